@@ -1,8 +1,10 @@
+from collections import Counter
 from enum import Enum
 from typing import Optional, Tuple, List, Dict
 
 import abccore.constants as constants
 from abccore.agent_crypto import hash_bytes
+from abccore.merkle import MerkleMap, MerkleProof
 from decimal import *
 from io import BytesIO
 import hashlib
@@ -475,6 +477,42 @@ class Genesis(Node):
             wallet.encode_output_wallet_identity(bytebuffer)
 
 
+def _utxo_leaf_key(wallet: Wallet) -> bytes:
+    """
+    Returns the key of the wallet in the utxo commitment of a checkpoint.
+    The commitment maps each wallet to the number of times it is contained in the utxos.
+    """
+    buffer = BytesIO()
+    wallet.encode_input_wallet_identity(buffer)
+    return buffer.getvalue()
+
+
+def _encode_count(count: int) -> bytes:
+    return count.to_bytes(4, byteorder="big")
+
+
+def _decode_count(value: Optional[bytes]) -> int:
+    return 0 if value is None else int.from_bytes(value, byteorder="big")
+
+
+def _stake_leaf(owner: bytes, stake: Decimal) -> Tuple[bytes, bytes]:
+    return owner, bytes(str(stake), "utf-8")
+
+
+def checkpoint_hash_version(height: int) -> int:
+    """Returns the hash version of new checkpoints at the given height."""
+    if constants.CKPT_HASH_V2_HEIGHT is not None and height >= constants.CKPT_HASH_V2_HEIGHT:
+        return constants.CKPT_HASH_V2
+    return constants.CKPT_HASH_VERSION
+
+
+def verify_utxo_proof(utxo_root: bytes, wallet: Wallet, proof: MerkleProof) -> bool:
+    """
+    Checks that the proof shows that the wallet is an unspent output of the checkpoint with the given utxo root.
+    """
+    return proof.key == _utxo_leaf_key(wallet) and _decode_count(proof.value) > 0 and proof.verify(utxo_root)
+
+
 class Checkpoint(Genesis):
     def __init__(
         self,
@@ -489,7 +527,15 @@ class Checkpoint(Genesis):
         tstake: Decimal,
         tcoins: Decimal,
         miner: bytes,
+        prev_checkpoint: Optional["Checkpoint"] = None,
+        hash_version: Optional[int] = None,
     ):
+        """
+        :param prev_checkpoint: Previous checkpoint. If given, the utxo commitment of this checkpoint is derived
+        from the commitment of the previous checkpoint by applying the difference of their utxos.
+        :param hash_version: Version of the checkpoint id. Defaults to the version of the height, see
+        checkpoint_hash_version().
+        """
         # checkpoint data
         Node.__init__(self)
         self.origin = origin  # Identifier of the last checkpoint
@@ -508,6 +554,14 @@ class Checkpoint(Genesis):
         self.total_stake = tstake  # Total stake at the Checkpoint
         self.total_coins = tcoins  # Total coins in the system at the Checkpoint
 
+        self.hash_version = checkpoint_hash_version(height) if hash_version is None else hash_version
+        if self.hash_version not in constants.CKPT_HASH_VERSIONS:
+            raise ValueError(f"Unsupported checkpoint hash version: {self.hash_version}")
+        self._utxo_commitment: Optional[MerkleMap] = None
+        self._stake_commitment: Optional[MerkleMap] = None
+        if prev_checkpoint is not None and self.hash_version >= constants.CKPT_HASH_V2:
+            self._derive_commitments(prev_checkpoint)
+
         for i, wallet in enumerate(outputs):
             wallet.set_origin_id(self.get_identifier(), i)
         self.id = self.get_identifier()
@@ -569,7 +623,93 @@ class Checkpoint(Genesis):
             txn.append(out.origin)
         return list(set(txn))
 
+    def utxo_commitment(self) -> MerkleMap:
+        """
+        Returns the Merkle map of the utxos of this checkpoint.
+        It is built from scratch, unless it was derived from the previous checkpoint.
+        """
+        if self._utxo_commitment is None:
+            counts = Counter(_utxo_leaf_key(w) for w in self.utxos)
+            self._utxo_commitment = MerkleMap.from_items((key, _encode_count(count)) for key, count in counts.items())
+        return self._utxo_commitment
+
+    def stake_commitment(self) -> MerkleMap:
+        """
+        Returns the Merkle map of the stake entries of this checkpoint.
+        """
+        if self._stake_commitment is None:
+            self._stake_commitment = MerkleMap.from_items(_stake_leaf(owner, stake)
+                                                          for owner, stake in self.stake_dict.items())
+        return self._stake_commitment
+
+    def _derive_commitments(self, prev: "Checkpoint"):
+        """
+        Applies the difference between the utxos and stake entries of the previous checkpoint and this checkpoint
+        to the commitments of the previous checkpoint.
+        Only changed entries are hashed, unchanged subtrees are shared with the previous checkpoint.
+        """
+        prev_utxos = Counter((w.origin, w.id, w.own_key, w.value) for w in prev.utxos)
+        utxos = Counter((w.origin, w.id, w.own_key, w.value) for w in self.utxos)
+        prev_commitment = prev.utxo_commitment()
+        counts: Dict[bytes, int] = dict()
+        for delta, sign in ((prev_utxos - utxos, -1), (utxos - prev_utxos, 1)):
+            for (origin, id, own_key, value), multiplicity in delta.items():
+                key = _utxo_leaf_key(Wallet(own_key, value, origin, id))
+                if key not in counts:
+                    counts[key] = _decode_count(prev_commitment.get(key))
+                counts[key] += sign * multiplicity
+        self._utxo_commitment = prev_commitment.update(
+            [key for key, count in counts.items() if count == 0],
+            [(key, _encode_count(count)) for key, count in counts.items() if count > 0])
+
+        prev_stake = prev.stake_dict
+        removed = [owner for owner in prev_stake if owner not in self.stake_dict]
+        added = [_stake_leaf(owner, stake) for owner, stake in self.stake_dict.items()
+                 if owner not in prev_stake or str(prev_stake[owner]) != str(stake)]
+        self._stake_commitment = prev.stake_commitment().update(removed, added)
+
+    def prove_utxo(self, wallet: Wallet) -> Optional[MerkleProof]:
+        """
+        Returns the proof that the given wallet is an unspent output of this checkpoint,
+        or None if it isn't or if the checkpoint id is not Merkle based.
+        The proof can be checked against the utxo root of the checkpoint with: ``verify_utxo_proof``.
+        """
+        if self.hash_version < constants.CKPT_HASH_V2:
+            return None
+        return self.utxo_commitment().prove(_utxo_leaf_key(wallet))
+
+    def utxo_root(self) -> bytes:
+        return self.utxo_commitment().root_hash()
+
+    def stake_root(self) -> bytes:
+        return self.stake_commitment().root_hash()
+
+    def match_identifier(self, expected_id: bytes) -> bool:
+        """
+        Looks for the hash version that produces the expected id.
+        Checkpoints created with older hash versions keep their id.
+        :returns: True if the id of this checkpoint with one of the supported hash versions matches.
+        """
+        if self.id == expected_id:
+            return True
+        current_version = self.hash_version
+        for version in constants.CKPT_HASH_VERSIONS:
+            if version != current_version and self._set_hash_version(version) == expected_id:
+                return True
+        self._set_hash_version(current_version)
+        return False
+
+    def _set_hash_version(self, version: int) -> bytes:
+        self.hash_version = version
+        self.identifier = None
+        for i, wallet in enumerate(self.outputs):
+            wallet.set_origin_id(self.get_identifier(), i)
+        self.id = self.get_identifier()
+        return self.id
+
     def generate_hash_id(self) -> bytes:
+        if self.hash_version >= constants.CKPT_HASH_V2:
+            return self._generate_merkle_hash_id()
         content = hashlib.sha256()
         content.update(self.origin)
         # content.update(pack("d", self.lock_time))
@@ -601,6 +741,19 @@ class Checkpoint(Genesis):
         content.update(self.miner)
         return content.digest()
 
+    def _generate_merkle_hash_id(self) -> bytes:
+        content = hashlib.sha256()
+        content.update(pack("B", self.hash_version))
+        content.update(self.origin)
+        content.update(self.utxo_root())
+        content.update(self.stake_root())
+        buffer = BytesIO()
+        for reward in self.outputs:
+            reward.encode_output_wallet_identity(buffer)
+        content.update(buffer.getvalue())
+        content.update(self.miner)
+        return content.digest()
+
     def get_parents(self):
         parents = dict()
         parents[self.origin] = self.origin
@@ -3,7 +3,7 @@ from datetime import datetime
 from random import random
 
 import time
-from typing import Set
+from typing import Iterator, Set
 
 from abccore.constants import RESEND_PENDING_ITEMS_TIME
 from abcnet.timer import StopTimer, SimpleTimer
@@ -13,14 +13,20 @@ from abccore.checkpoint_service import CheckpointServiceMock
 from abccore.agent_data import *
 from abccore.agent_msg_handler import AgentMessageHandler
 from abccore.agent_items_parser import AgentItemsParser
+from abccore.maintenance_stages import MaintenanceStage, MaintenancePipeline
+from abccore.orphan_pool import OrphanPool
+from abccore.confirmation_tracker import ConfirmationTracker
+from abccore.mempool import Mempool
+from abccore.tenants import TenantHost
+from abccore.iblt import IBLT
 from abccore.network_datastructures import (
     NetTransaction,
     NetAcknowledgement,
-    reduce_ttl,
     NetUSPWR,
+    RebroadcastSchedule,
 )
 
-from abcnet.structures import ItemType
+from abcnet.structures import ItemType, PeerContactInfo
 from abcnet.services import ChannelService
 
 from abccore.zmq_server import LocalMessageHandler
@@ -64,18 +70,24 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         #  of AbstractItemHandler of AgentMessageHandler
         self.checkpoint_service = None
         self.a_data = AgentData(private_keys)
+        # further identities hosted over the DAG of this agent
+        self.tenants = TenantHost(self.a_data.store, self.a_data)
 
-        self.check_out = set()
+        self.check_out = RebroadcastSchedule()
         self.fetch_item_set = set()
         self.item_set = set()
 
         self.pending_uspwr: NetUSPWR = None
         self.pending_uspwr_timeout: SimpleTimer = None
 
-        self.orphaned_nodes: Dict[bytes, Dict[bytes, Node]] = dict()
+        self.orphans = OrphanPool()
         self.gen_prev_orphan_parents = set()
+        # Missing parents of orphans that are requested from the peers that sent the orphans:
+        self.parent_fetches: Dict[str, Tuple[PeerContactInfo, Set[Tuple[int, str]]]] = dict()
 
         self.pending_transactions = dict()
+        # Decides which of the pending transactions are kept and acknowledged next:
+        self.mempool = Mempool(validate=self.a_data.validate_trans)
         self.resend_pending_txns_time_stamp = time.time()
         self.set_resend_pending_items_time()
 
@@ -97,6 +109,10 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         self.a_data.stake_threshold = checkpoint_service.stake_sum() * (
                 Decimal(2) / Decimal(3)
         )
+        self.confirmations = ConfirmationTracker(
+            lambda pk: self.checkpoint_service.delegated_stake(pk), self.a_data.stake_threshold,
+            acks_of=self.__counted_acks
+        )
         self.missing_txn_resend_timer = SimpleTimer(constants.MISSING_TXN_RESEND_TIMEOUT)
 
         self.bot_mode = bot_mode
@@ -104,6 +120,28 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             self.auto_send_timer = SimpleTimer(10)
             self.auto_send_count = 0
 
+        # The queues filled by the message handler are emptied into the stages at the start of each maintenance step.
+        # Acknowledgements confirm pending work and are processed before new transactions are admitted.
+        time_budget = constants.MAINTENANCE_STAGE_TIME_BUDGET
+        self.maintenance = MaintenancePipeline([
+            MaintenanceStage("ack", self.__handle_input_item, constants.MAINTENANCE_ACK_BUDGET,
+                             time_budget, constants.MAINTENANCE_ACK_QUEUE_SIZE),
+            MaintenanceStage("uspwr", self.__handle_input_item, constants.MAINTENANCE_USPWR_BUDGET,
+                             time_budget, constants.MAINTENANCE_QUEUE_SIZE),
+            MaintenanceStage("txn", self.__handle_input_item, constants.MAINTENANCE_TXN_BUDGET,
+                             time_budget, constants.MAINTENANCE_TXN_QUEUE_SIZE),
+            MaintenanceStage("request", self.__handle_request, constants.MAINTENANCE_REQUEST_BUDGET,
+                             time_budget, constants.MAINTENANCE_QUEUE_SIZE),
+            MaintenanceStage("checklist", self.__handle_checklist, constants.MAINTENANCE_CHECKLIST_BUDGET,
+                             time_budget, constants.MAINTENANCE_QUEUE_SIZE),
+        ])
+        self.input_stages = {
+            ItemType.ACK: self.maintenance.stage("ack"),
+            ItemType.UNSPENT_WALLET_COLLECTION: self.maintenance.stage("uspwr"),
+            ItemType.TXN: self.maintenance.stage("txn"),
+        }
+        self.maintenance_report_timer = SimpleTimer(constants.MAINTENANCE_REPORT_INTERVAL)
+
     def save_data(
             self,
             user_password=bytes("ThisNeedsToBeAdded!", "UTF-8"),
@@ -112,20 +150,17 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         """Calls the save handler to save the agent tree."""
         # TODO user password
 
-        # Flatten the orphaned dictionary to a dictionary of bytes to list of nodes:
-        flattened_orphans = dict()
-        for missing_parent, orphaned in self.orphaned_nodes.items():
-            flattened_orphans[missing_parent] = list()
-            for o in orphaned.values():
-                flattened_orphans[missing_parent].append(o)
+        # Flatten the orphan pool to a dictionary of bytes to list of nodes:
+        flattened_orphans = dict(self.orphans.items())
 
-        return self.a_data.save_data(
+        self.a_data.save_data(
             self.pending_transactions,
             flattened_orphans,
             user_password,
             filename,
             self.checkpoint_service
         )
+        self.tenants.save_data(user_password, filename)
 
     def __auto_send_money(self):
         logger.debug("Start automated Transaction generation from me to me, like as a present, but for the validators...")
@@ -170,31 +205,34 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         unspent_wallet_set = args[0]
         if not filename == "genesis.db":
             self.pending_transactions = args[1]
+            self.tenants.load_data(user_password, filename)
 
             # check for Wallets in balance that have been spent in pending TXNs
             pending_keys = args[1].keys()
-            balance = deepcopy(self.a_data.balance)
             for txn_key in pending_keys:
                 pending_trans = self.pending_transactions.get(txn_key)[0]
                 pending_trans: Transaction
+                # the restored txns were handled before
+                self.mempool.admit(pending_trans, local=True)
+                self.mempool.mark_acknowledged(txn_key)
 
-                for balance_wallet in balance:
-                    if balance_wallet in pending_trans.get_inputs():
-                        self.a_data.balance.remove(balance_wallet)
+                for data in [self.a_data] + self.tenants.identities():
+                    for balance_wallet in deepcopy(data.balance):
+                        if balance_wallet in pending_trans.get_inputs():
+                            data.balance.remove(balance_wallet)
+            self.__restore_confirmations()
 
-            # Set the orphaned nodes to an empty dict no matter if the loading succeeds:
-            self.orphaned_nodes: Dict[bytes, Dict[bytes, Node]] = dict()
+            # Empty the orphan pool no matter if the loading succeeds:
+            self.orphans.clear()
 
-            # De-flatten the orphans list to dictionary instead of node list:
+            # De-flatten the orphans list into the orphan pool:
             orphans_flatten: Dict[bytes, List[Node]] = args[2]
             if orphans_flatten is None:
                 logger.error("Agent save_handler loaded with orphan pool=None.", exc_info=True)
             else:
                 for missing_id, node_list in orphans_flatten.items():
-                    orphans: Dict[bytes, Node] = dict()
                     for n in node_list:
-                        orphans[n.get_identifier()] = n
-                    self.orphaned_nodes[missing_id] = orphans
+                        self.orphans.add(n, missing_id)
 
         for node in args[-1]:
             self.fetch_item_set.add(node)
@@ -227,8 +265,23 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         )
 
         transaction = self.a_data.send_money(recipient, value, validator)
+        self.__submit_own_transaction(transaction)
+
+    def send_money_as(self, tenant: str, recipient, value, validator):
+        """Send some money from one of the identities hosted by this agent to one specific recipient
+        :param tenant: name of the identity, see TenantHost
+        :param recipient: public key of the recipient
+        :param value: amount of money one wants to send
+        :param validator: public key of the validator
+        """
+        logger.info("INITIALIZED TRANSACTION of %s: value - %s; recipient - %s; validator - %s",
+                    tenant, value, recipient.hex(), validator.hex())
+        transaction = self.tenants[tenant].data.send_money(recipient, value, validator)
+        self.__submit_own_transaction(transaction)
+
+    def __submit_own_transaction(self, transaction: Optional[Transaction]):
         if transaction is not None:
-            self.__add_transaction(transaction)
+            self.__add_transaction(transaction, local=True)
             net_txn = NetTransaction(transaction)
             self.check_out.add(net_txn)
             # save_handler.update_unconfirmed(
@@ -253,7 +306,7 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         :param transaction: The transaction that will be acknowledged.
         :returns False if unsuccessfull.
         """
-        acks = self.a_data.acknowledge(transaction)
+        acks = self.a_data.acknowledge(transaction) + self.tenants.acknowledge(transaction)
         return_value = True
 
         for ack in acks:
@@ -386,7 +439,7 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         logger.debug("PRE  CHECKPOINT")
         for wallet in self.a_data.balance:
             logger.debug(wallet)
-        pendings = self.a_data.transform_dag(ckpt, self.pending_transactions)
+        pendings = self.a_data.transform_dag(ckpt, self.pending_transactions, self.tenants.identities())
         # pendings = [ pending_transactions: dict, pending_acks: set ]
         for wallet in self.a_data.balance:
             logger.debug(wallet)
@@ -399,7 +452,10 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         self.__remove_dead_orphans()
 
         self.pending_transactions.clear()
+        self.mempool.clear()
         self.checkpoint_service.set_checkpoint(self.a_data.tree)
+        # Acks are counted again with the stake and threshold of the new checkpoint:
+        self.confirmations.reset(ckpt.total_stake * (Decimal(2) / Decimal(3)))
 
         for txn in pendings[0]:
             self.__add_transaction(txn)
@@ -452,6 +508,8 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             item_content.unspent_wallet_set
         )
         # answer_from_tree = {ID: bytes, ItemType: hex), ... }
+        if item_content.sketch is not None:
+            answer_from_tree = self.__reconcile_dependend_nodes(answer_from_tree, item_content.sketch)
 
         for item_id, item_type in answer_from_tree:
             if item_type == ItemType.ACK:
@@ -464,14 +522,60 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
                 logger.warning("Found nodes in DAG that are requested in a NetUSPWR"
                                " but cannot it cannot be sent. Itemtype: %s, item id: %s", item_type, item_id)
 
+    def __sketch_dependend_nodes(self, wallet_set) -> Optional[IBLT]:
+        """
+        Sketches the sendable nodes which depend on the wallets, to be sent with a USPWR request.
+        The number of cells grows with the number of nodes, as the difference to a peer is expected to do so.
+        :return: the IBLT of the node ids or None, if no node depends on the wallets
+        """
+        held = [item_id for item_id, item_type in self.a_data.tree.search_dependend_nodes(wallet_set)
+                if item_type in (ItemType.ACK, ItemType.TXN)]
+        if not held:
+            return None
+        cells = int(len(held) * constants.USPWR_SKETCH_CELLS_PER_NODE)
+        cells = min(max(cells, constants.USPWR_SKETCH_MIN_CELLS), constants.USPWR_SKETCH_MAX_CELLS)
+        return IBLT.of(held, cells)
+
+    def __reconcile_dependend_nodes(self, answer: set, sketch: IBLT) -> set:
+        """
+        Reduces the answer to a USPWR request to the nodes that are missing in the sketch of the requester.
+        :param answer: pairs (node id, item type) of the nodes which depend on the requested wallets
+        :param sketch: IBLT of the ids of the nodes the requester holds
+        :return: the pairs of the missing nodes or all pairs, if the difference is too large to be decoded
+        """
+        sendable = {item_id for item_id, item_type in answer if item_type in (ItemType.ACK, ItemType.TXN)}
+        try:
+            difference = IBLT.of(sendable, len(sketch)).subtract(sketch).decode()
+        except ValueError:
+            difference = None
+        if difference is None:
+            logger.info("Could not decode the sketch of a USPWR request. Answering with all %d nodes.", len(answer))
+            return answer
+        missing, _ = difference
+        logger.debug("Answering a USPWR request with %d of %d nodes.", len(missing), len(answer))
+        return {(item_id, item_type) for item_id, item_type in answer if item_id in missing}
+
     def __retry_missing_txn_request(self):
-        """This method will be called every one in a while to ask again for missing Transactions. For this, all keys
-        of the dict orphaned_nodes will be added as TXN request to the fetch_item_set.
+        """This method will be called every one in a while to ask again for missing Transactions. For this, all
+        missing parents of the orphan pool are requested again from the peers that sent their orphans.
         """
-        if len(self.orphaned_nodes) != 0:
-            for txn_bytes in self.orphaned_nodes.keys():
-                self.fetch_item_set.add((ItemType.TXN, txn_bytes.hex()))
-            logger.info("Added missing TXNs to fetch_item_set, again.")
+        if len(self.orphans) != 0:
+            for contact, parents in self.orphans.parents_by_peer().values():
+                for txn_bytes in parents:
+                    self.__fetch_parent(txn_bytes, contact)
+            logger.info("Requested missing TXNs of the orphan pool, again.")
+
+    def __fetch_parent(self, parent: bytes, peer: Optional[PeerContactInfo]):
+        """
+        Requests the missing parent of an orphan from the peer that sent the orphan.
+        If the sender is unknown, the parent is requested from all peers.
+        """
+        item = (ItemType.TXN, parent.hex())
+        if peer is None:
+            self.fetch_item_set.add(item)
+        else:
+            _, items = self.parent_fetches.setdefault(peer.identifier, (peer, set()))
+            items.add(item)
 
     def set_resend_pending_items_time(self):
         """ Sets the randomized time for repeating pending items """
@@ -517,80 +621,23 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         if self.pending_uspwr_timeout is not None and self.pending_uspwr_timeout.check():
             self.pending_uspwr_timeout = None
             if self.pending_uspwr is not None:
+                if self.pending_uspwr.is_req and self.pending_uspwr.sketch is None:
+                    # Sketch the nodes held by now, which includes those received since the request was created
+                    self.pending_uspwr.sketch = self.__sketch_dependend_nodes(self.pending_uspwr.unspent_wallet_set)
                 cs.broadcast_channel().items([self.pending_uspwr])
                 self.pending_uspwr = None
 
-        for item_bytes in self.input_queue:
-            item = self.input_queue[item_bytes]
-            item_type = item[0]
-            item_content = item[1]
-
-            if item_type == ItemType.UNSPENT_WALLET_COLLECTION:
-                item_content: NetUSPWR
-                self.__handle_unspnt_wllt_objs(item_content)
-
-            elif item_type == ItemType.TXN:
-                item_content: NetTransaction
-                if self.__add_transaction(item_content.txn):
-                    logger.info(
-                        "Handled Transaction, ID:"
-                        + item_content.id.hex()
-                    )
-                else:
-                    logger.info(
-                        "New transaction has been declined, ID: "
-                        + item_content.id.hex()
-                    )
-            elif item_type == ItemType.ACK:  # item_type == ItemType.ACK
-                item_content: NetAcknowledgement
-                if self.__add_acknowledgement(item_content.ack):
-                    self.a_data.add_to_save(item_content.ack)
-                    logger.info(
-                        "New acknowledgement added to local DAG, ID:"
-                        + str(item_content.id.hex())
-                    )
-                else:
-                    logger.info(
-                        "New acknowledgement has been declined, ID: "
-                        + str(item_content.id.hex())
-                    )
-
-        for (item_type, item_bytes) in self.request_queue:
-            item_qualifier_bytes = bytes.fromhex(item_bytes)
-            if item_type == ItemType.TXN:
-                self.__handle_txn_request(item_qualifier_bytes)
-            elif item_type == ItemType.ACK:
-                self.__handle_ack_request(item_qualifier_bytes)
-            elif item_type == ItemType.UNSPENT_WALLET_COLLECTION:
-                self.__handle_uspwr_request(item_qualifier_bytes)
-            else:
-                logger.warning("Received request for unrecognized item type: " + str(item_type))
-
-        for (item_type, item_bytes_hex) in self.checklist_queue:
-            item_bytes = bytes.fromhex(item_bytes_hex)
-            if item_type == ItemType.UNSPENT_WALLET_COLLECTION:
-                # if item_bytes not in self.uspwr_dict:
-                #     self.fetch_item_set.add((item_type, item_bytes_hex))
-                logger.warning("Someone is sending checklist of unspent wallet collection requests.")
-            elif item_type == ItemType.ACK:
-                if self.search_item(item_type, item_bytes) is None:
-                    # TODO look into the orphan pool: if it is there we dont want it again.
-                    self.fetch_item_set.add((item_type, item_bytes_hex))
-            elif item_type == ItemType.TXN:
-                # If the item in the checklist is already confirmed, directly send ACKs from the DAG in a checklist as answer
-                content: TreeLeaf = self.a_data.tree.search(item_bytes)
-                if content is not None:
-                    for tl in content.dependend_nodes:
-                        if (
-                                isinstance(tl.node, Acknowledge)
-                                and tl.node.transaction == item_bytes
-                        ):
-                            self.check_out.add(NetAcknowledgement(tl.node))
-                else:
-                    self.fetch_item_set.add((item_type, item_bytes_hex))
-
-        if not self.check_out == set():
-            send_set = reduce_ttl(self.check_out)
+        self.__admit_queued_items()
+        self.maintenance.run()
+        self.__acknowledge_from_mempool()
+        # free the nodes pruned at the last checkpoint in slices
+        self.a_data.tree.release_detached(constants.DAG_RELEASE_BUDGET)
+        if self.maintenance_report_timer():
+            logger.info(self.maintenance.report())
+            logger.info(self.mempool)
+
+        if self.check_out:
+            send_set = self.check_out.due()
             if not send_set == set():
                 ch_out.checklist(send_set)
                 logger.info(
@@ -598,7 +645,7 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
                     + "\n\t- ".join(item.id.hex() for item in send_set)
                 )
 
-        if self.bot_mode:
+        if self.bot_mode and not cs.backpressure():
             if self.auto_send_count < 50 and self.auto_send_timer():
                 self.__auto_send_money()
                 self.auto_send_count += 1
@@ -610,7 +657,14 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             self.save_data()
 
             # regularly ask for missing TXNs
+            self.orphans.expire()
             self.__retry_missing_txn_request()
+            logger.info(self.orphans)
+
+        if self.parent_fetches:
+            for contact, items in self.parent_fetches.values():
+                cs.direct_channel(contact).fetch_items(list(items))
+            self.parent_fetches = dict()
 
         if not self.fetch_item_set == set():
             logger.debug("fetching items")
@@ -629,23 +683,117 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             )
             self.item_set = set()
 
+        self.output_queue.clear()
+
+        logger.debug("PERFORM MAINTENANCE - END")
+
+    def __admit_queued_items(self):
+        """
+        Moves the items received since the last maintenance step into the queues of the maintenance stages.
+        Items that are dropped because a stage queue is full are forgotten by the seen items cache,
+        so they are fetched again when they are offered the next time.
+        """
+        for item_bytes, item in self.input_queue.items():
+            stage = self.input_stages.get(item[0])
+            if stage is not None and not stage.admit(item_bytes, item):
+                if self.seen_items is not None:
+                    self.seen_items.discard((item[0], item[1].item_qualifier()))
+                logger.debug("Maintenance stage %s is full, dropped item: %s", stage.name, item_bytes)
+        requests = self.maintenance.stage("request")
+        for request in self.request_queue:
+            requests.admit(request)
+        checklists = self.maintenance.stage("checklist")
+        for checklist_item in self.checklist_queue:
+            checklists.admit(checklist_item)
         self.input_queue.clear()
         self.request_queue.clear()
         self.checklist_queue.clear()
-        self.output_queue.clear()
 
-        logger.debug("PERFORM MAINTENANCE - END")
+    def __handle_input_item(self, item_bytes, item):
+        item_type = item[0]
+        item_content = item[1]
+        sender: Optional[PeerContactInfo] = item[2] if len(item) > 2 else None
 
-    def __add_transaction(self, txn: Transaction) -> bool:
+        if item_type == ItemType.UNSPENT_WALLET_COLLECTION:
+            item_content: NetUSPWR
+            self.__handle_unspnt_wllt_objs(item_content)
+
+        elif item_type == ItemType.TXN:
+            item_content: NetTransaction
+            if self.__add_transaction(item_content.txn, sender):
+                logger.info(
+                    "Handled Transaction, ID:"
+                    + item_content.id.hex()
+                )
+            else:
+                logger.info(
+                    "New transaction has been declined, ID: "
+                    + item_content.id.hex()
+                )
+        elif item_type == ItemType.ACK:  # item_type == ItemType.ACK
+            item_content: NetAcknowledgement
+            if self.__add_acknowledgement(item_content.ack, sender):
+                self.a_data.add_to_save(item_content.ack)
+                logger.info(
+                    "New acknowledgement added to local DAG, ID:"
+                    + str(item_content.id.hex())
+                )
+            else:
+                logger.info(
+                    "New acknowledgement has been declined, ID: "
+                    + str(item_content.id.hex())
+                )
+
+    def __handle_request(self, request, _=None):
+        item_type, item_bytes = request
+        item_qualifier_bytes = bytes.fromhex(item_bytes)
+        if item_type == ItemType.TXN:
+            self.__handle_txn_request(item_qualifier_bytes)
+        elif item_type == ItemType.ACK:
+            self.__handle_ack_request(item_qualifier_bytes)
+        elif item_type == ItemType.UNSPENT_WALLET_COLLECTION:
+            self.__handle_uspwr_request(item_qualifier_bytes)
+        else:
+            logger.warning("Received request for unrecognized item type: " + str(item_type))
+
+    def __handle_checklist(self, checklist_item, _=None):
+        item_type, item_bytes_hex = checklist_item
+        item_bytes = bytes.fromhex(item_bytes_hex)
+        if item_type == ItemType.UNSPENT_WALLET_COLLECTION:
+            # if item_bytes not in self.uspwr_dict:
+            #     self.fetch_item_set.add((item_type, item_bytes_hex))
+            logger.warning("Someone is sending checklist of unspent wallet collection requests.")
+        elif item_type == ItemType.ACK:
+            if self.search_item(item_type, item_bytes) is None:
+                # TODO look into the orphan pool: if it is there we dont want it again.
+                self.fetch_item_set.add((item_type, item_bytes_hex))
+        elif item_type == ItemType.TXN:
+            # If the item in the checklist is already confirmed, directly send ACKs from the DAG in a checklist as answer
+            content: TreeLeaf = self.a_data.tree.search(item_bytes)
+            if content is not None:
+                for tl in content.dependend_nodes:
+                    if (
+                            isinstance(tl.node, Acknowledge)
+                            and tl.node.transaction == item_bytes
+                    ):
+                        self.check_out.add(NetAcknowledgement(tl.node))
+            else:
+                self.fetch_item_set.add((item_type, item_bytes_hex))
+
+    def __add_transaction(self, txn: Transaction, peer: Optional[PeerContactInfo] = None, local: bool = False) -> bool:
         """This function is called by the perform_maintanance() method to handle an incoming Transaction :param txn.
         At first it is checked if the txn is already in the dag or if the identifier is a key to a value in the dict
         pending_transactions. In both cases, the function :returns True, indicating that everything was as expected.
         If not, then the txn is completely new to the agent and it will be added to the dict pending_transactions as
-        value '[txn, Decimal(0)]' for the key 'txn.identifier'. If the validation of the txn succeeds, it will be
-        acknowledged (there, the stake will be updated).
-        Then, it will be checked if there are depending Acknowledges in the set orphaned_nodes, which then would be
+        value '[txn, Decimal(0)]' for the key 'txn.identifier', so it is confirmed by the acks of the validators.
+        Only the own acknowledgement goes through the mempool: if the txn is valid and admitted, the mempool hands it
+        out for the acknowledgement in a later maintenance step, ordered by its fee rate. Txns that are rejected or
+        evicted by the mempool stay pending, they are not acknowledged by this agent.
+        Then, it will be checked if there are depending Acknowledges in the orphan pool, which then would be
         processed.
         :param txn: Transaction received from the network.
+        :param peer: The peer that sent the transaction. Missing parents are requested from it.
+        :param local: True for the own txns, which are always admitted and acknowledged right away.
         :returns False if not successful.
         """
         if not self.validate_signature(txn):
@@ -682,12 +830,8 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         for in_wallet in txn.get_inputs():
             parent = in_wallet.get_origin()
             if self.a_data.tree.search(parent) is None:
-                orphans = self.orphaned_nodes.get(parent)
-                if orphans is None:
-                    orphans = dict()
-                    self.orphaned_nodes[parent] = orphans
-                orphans[txn.get_identifier()] = txn
-                self.fetch_item_set.add((ItemType.TXN, parent.hex()))
+                if self.orphans.add(txn, parent, peer):
+                    self.__fetch_parent(parent, peer)
                 is_orphan = True
 
         # check if this TXN was requested in the latest ckpt injection
@@ -700,13 +844,23 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             return_value = True
 
             if pending_trans is None:
+                admitted, evicted = self.mempool.admit(txn, local)
+                for entry in evicted:
+                    logger.info("Evicted the transaction %s from the mempool, it is not acknowledged.",
+                                entry.txn_id.hex())
+                if not admitted:
+                    logger.info("The mempool rejected the invalid or low fee transaction %s, it is not acknowledged.",
+                                txn.get_identifier().hex())
+
                 save_handler.update_unconfirmed(
                     {txn.get_identifier(): [txn, Decimal(0)]}
                 )
                 self.pending_transactions[txn.get_identifier()] = [txn, Decimal(0)]
 
-                if self.a_data.validate_trans(txn):
-                    self.__acknowledge(txn)
+                if local:
+                    self.mempool.mark_acknowledged(txn.get_identifier())
+                    if self.a_data.validate_trans(txn):
+                        self.__acknowledge(txn)
 
                 logger.info("Added new Transaction to pending_transactions, ID: %s", txn.get_identifier().hex())
 
@@ -720,11 +874,21 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
             logger.info("Added a TXN to the orphanage")
             return False
 
-    def __add_acknowledgement(self, ack: Acknowledge) -> bool:
+    def __acknowledge_from_mempool(self):
+        """Acknowledges the valid ones of the pending txns with the highest fee rates that were not handled yet.
+        The handed out txns leave the mempool, the invalid ones stay pending without an own ack."""
+        for txn in self.mempool.next_to_acknowledge(constants.MEMPOOL_ACK_BUDGET):
+            if self.a_data.validate_trans(txn):
+                self.__acknowledge(txn)
+
+
+    def __add_acknowledgement(self, ack: Acknowledge, peer: Optional[PeerContactInfo] = None) -> bool:
         """This function is called by the perform_maintenance() method to handle an incoming Acknowledge :param ack.
-        If the transaction related to this ack is not known, a txn request is send and the value [None, stake] will be
-        added to the dict pending_transactions for the key 'ack.get_transaction()' which is the txn.identifier.
-        If the txn is known, the stake in the dict will be updated and checked if the txn is now confirmed.
+        If the transaction related to this ack is not known, the ack is put into the orphan pool and the txn is
+        requested. The ack is processed again once the txn arrives.
+        If the txn is known, the stake of the validator is counted by the confirmation tracker, once per transaction
+        and validator, and it is checked if the txn is now confirmed. Acks of keys without stake are not counted.
+        :param peer: The peer that sent the ack. A missing transaction is requested from it.
         :returns False if not successful.
         """
         if not self.validate_signature(ack):
@@ -775,25 +939,22 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         pending_trans = self.pending_transactions.get(ack.get_trans_id())
 
         if pending_trans is None:
-            orphans = self.orphaned_nodes.get(ack.get_trans_id())
-            if orphans is None:
-                orphans = dict()
-                self.orphaned_nodes[ack.get_trans_id()] = orphans
-            orphans[ack.get_identifier()] = ack
-            self.fetch_item_set.add((ItemType.TXN, ack.get_trans_id().hex()))
+            if self.orphans.add(ack, ack.get_trans_id(), peer):
+                self.__fetch_parent(ack.get_trans_id(), peer)
             logger.warning("Ack %s was put into the orphan pool.", ack)
             return True
         else:
-            stake = pending_trans[1]
+            (pk, _) = ack.get_signature()
+            if not self.confirmations.add_ack(ack.get_trans_id(), pk):
+                logger.info("Declined ack %s, the validator already acknowledged the transaction.", ack)
+                return False
             self.a_data.tree.add(ack.get_identifier(), ack)
             self.a_data.add_to_save(ack)
 
-            (pk, _) = ack.get_signature()
-            ack_stake = self.checkpoint_service.delegated_stake(pk)
-            stake += ack_stake
+            stake = self.confirmations.stake(ack.get_trans_id())
             logger.info(
                 "Received an ack for transaction with %s stake. The transaction is now validated by %s stake.",
-                ack_stake,
+                self.confirmations.validator_stake(pk),
                 stake,
             )
 
@@ -801,22 +962,46 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
                 {ack.get_trans_id(): [pending_trans[0], stake]}
             )
 
-            if stake >= self.a_data.stake_threshold:
+            if self.confirmations.is_confirmed(ack.get_trans_id()):
                 # TXN is known and has enough stake to be confirmed
                 self.__add_confirmed_trans(pending_trans[0])
             return True
 
+    def __counted_acks(self, txn_id: bytes) -> Iterator[bytes]:
+        """The validators whose acks of the pending :param txn_id were counted, they wait in the pending_acks of the
+        tree."""
+        for ack_id in self.a_data.tree.pending_acks.get(txn_id, ()):
+            tree_node = self.a_data.tree.search(ack_id)
+            if tree_node is not None:
+                yield tree_node.get_node().get_signature()[0]
+
+    def __restore_confirmations(self):
+        """Counts the acks of the restored pending transactions again."""
+        confirmed = list()
+        for txn_id, pending in self.pending_transactions.items():
+            pending[1] = self.confirmations.restore(txn_id).stake
+            if self.confirmations.is_confirmed(txn_id):
+                confirmed.append(pending[0])
+        logger.info("Restored the acknowledged stake of %d pending transactions.", len(self.pending_transactions))
+        for txn in confirmed:
+            self.__add_confirmed_trans(txn)
+
     def __check_and_register_ownership(self, node: Node):
         self.a_data.check_and_register_ownership(node)
+        self.tenants.register_ownership(node)
 
     def __add_confirmed_trans(self, transaction: Transaction):
         """Function will be called if either an acknowledge or a transaction is received and confirmed. This function
         will delete the record of the transaction in the list pending_transactions and add the transaction to the local
         dag. After this, the function checks if the new transaction gives money or stake to the agent.
-        Then the dict orphaned_nodes will be checked if there are depending Nodes in it, which then will be processed.
+        Then the orphan pool will be checked if there are depending Nodes in it, which then will be processed.
         :param transaction: This is the newly confirmed transaction.
         """
         self.pending_transactions.pop(transaction.get_identifier())
+        self.confirmations.forget(transaction.get_identifier())
+        self.mempool.remove(transaction.get_identifier())
+        # the stake that confirmed the txn has seen it, there is no need to send it again
+        self.check_out.cancel(transaction.get_identifier())
         self.a_data.tree.add(transaction.get_identifier(), transaction)
 
         logger.info(
@@ -839,21 +1024,20 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
                 self.a_data.update_wallet(check_wallet)
             except AttributeError:
                 logger.debug("Something went terribly wrong!")
-        try:
-            orphans: Dict[bytes, Node] = self.orphaned_nodes.pop(transaction.get_identifier())
-            if orphans is not None:
-                for node in orphans.values():
-                    if isinstance(node, Acknowledge):
-                        self.__add_acknowledgement(node)
-                    elif isinstance(node, Transaction):
-                        self.__add_transaction(node)
-                logger.info(
-                    "By confirming txn %s,  freed %d many Nodes from the orphanage.",
-                    transaction,
-                    len(orphans),
-                )
+        orphans = self.orphans.release(transaction.get_identifier())
+        if orphans:
+            for orphan in orphans:
+                if isinstance(orphan.node, Acknowledge):
+                    self.__add_acknowledgement(orphan.node, orphan.peer)
+                elif isinstance(orphan.node, Transaction):
+                    self.__add_transaction(orphan.node, orphan.peer)
+            logger.info(
+                "By confirming txn %s,  freed %d many Nodes from the orphanage.",
+                transaction,
+                len(orphans),
+            )
             self.save_data()
-        except KeyError:
+        else:
             logger.info(
                 "By confirming txn %s, no nodes were freed from orphanage.", transaction
             )
@@ -944,23 +1128,26 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
 
             if self.pending_transactions.get(txn.get_identifier()) is not None:
                 self.pending_transactions.pop(txn.get_identifier())
+            self.confirmations.forget(txn.get_identifier())
+            self.mempool.remove(txn.get_identifier())
             logger.info("Found a wanted txn: %s", txn)
             return True
 
         return False
 
     def __try_freeing_orphans(self, txn: Transaction):
-        try:
-            orphans = self.orphaned_nodes.pop(txn.get_identifier())
-
-            if orphans is not None:
-                for node in orphans.values():
-                    if isinstance(node, Acknowledge):
-                        self.__add_acknowledgement(node)
+        orphans = self.orphans.release(txn.get_identifier())
+        if orphans:
+            for orphan in orphans:
+                if isinstance(orphan.node, Acknowledge):
+                    self.__add_acknowledgement(orphan.node, orphan.peer)
+                elif isinstance(orphan.node, Transaction):
+                    # Children wait until the transaction is confirmed:
+                    self.orphans.add(orphan.node, txn.get_identifier(), orphan.peer)
 
-                self.save_data()
-                logger.info("Freed some Acks from the orphanage")
-        except KeyError:
+            self.save_data()
+            logger.info("Freed some Acks from the orphanage")
+        else:
             logger.info("No orphans freed by registering transaction %s", txn)
 
     def __remove_dead_orphans(self):
@@ -971,13 +1158,11 @@ class Agent(AgentMessageHandler, LocalMessageHandler, AgentInterface):
         gen_dead_orphan_parents = copy(self.gen_prev_orphan_parents)
 
         # parents of orphans from the time between the new, current ckpt and the previous one will grow older
-        keys = set(self.orphaned_nodes.keys())
+        keys = set(self.orphans.missing_parents())
         self.gen_prev_orphan_parents = copy(keys)
 
-        # those parents of orphans, that died in gen_dead will be removed from the orphaned_nodes keys
-        for key in gen_dead_orphan_parents:
-            if self.orphaned_nodes.get(key) is not None:
-                self.orphaned_nodes.pop(key)
+        # the orphans of those parents, that died in gen_dead will be removed from the orphan pool
+        self.orphans.remove_parents(gen_dead_orphan_parents)
 
         logger.info("Missing parents of orphans grew older, dead ones were removed.")
 
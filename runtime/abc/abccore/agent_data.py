@@ -1,11 +1,13 @@
 from copy import copy
 from random import random
-from typing import Union, Any
+from typing import Union, Any, Iterable, Optional, Set
 
 from abccore.agent_crypto import *
 from abccore.checkpoint_service import CheckpointService
+from abccore.key_ring import KeyRing
 from abccore.prefix_tree import *
 from abccore.outputs_helper import outputs_helper
+from abccore.validation_cache import ValidationCache
 import abccore.save_handler as save_handler
 from abcnet.structures import ItemType
 
@@ -15,6 +17,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class DagStore:
+    """
+    The DAG and the validation results of an agent. The store is shared by the identities hosted by one agent, see
+    tenants.py, such that every node is kept and validated once no matter how many identities it concerns.
+    """
+
+    def __init__(self, tree: Optional[Tree] = None):
+        self.tree = tree if tree is not None else Tree()
+        self.validation_cache = ValidationCache()
+
+
 class AgentData:
     """
     AgentData holds most of the data necessary for the abc protocol. To directly have access to (primarely genesis) wallets by start-up routine one can enter a key in the constructor to get access to the to this key related wallets.
@@ -23,10 +36,12 @@ class AgentData:
     def __init__(
         self,
         private_key: Union[None, Ed25519PrivateKey, List[Ed25519PrivateKey]] = None,
+        store: Optional[DagStore] = None,
     ):
         """
         Construct a new 'AgentData' object.
         :param private_key: private key to get access the related wallets. Primarely used for the initial genesis wallets.
+        :param store: DAG store shared with other identities, a new one by default
         """
         if private_key is None:
             private_key = [gen_key()]
@@ -43,7 +58,7 @@ class AgentData:
             Ed25519PrivateKey
         ]  # At this point the argument is always a list of at least one key.
 
-        self.keyset: List[Ed25519PrivateKey] = list(private_key)
+        self.keyset = private_key
 
         self.balance = []  # a set of outputs owned by this entity
 
@@ -54,7 +69,6 @@ class AgentData:
         self.stake_threshold = Decimal("Infinity")
 
         self.known_validators = []  # list of public keys of known validators
-        self.key_to_use = 0
         self.validator_to_use = None
 
         # identifier of the last acknowledged transaction; b"0" for None
@@ -68,7 +82,36 @@ class AgentData:
         self.acked_wallets: Dict[Tuple[bytes, int], List[Acknowledge]] = dict()
         self.last_checkpoint = None
 
-        self.tree = Tree()
+        self.store = store if store is not None else DagStore()
+
+    @property
+    def tree(self) -> Tree:
+        return self.store.tree
+
+    @tree.setter
+    def tree(self, tree: Tree):
+        self.store.tree = tree
+
+    @property
+    def validation_cache(self) -> ValidationCache:
+        return self.store.validation_cache
+
+    @property
+    def keyset(self) -> KeyRing:
+        """The keys owned by this entity."""
+        return self.__keyset
+
+    @keyset.setter
+    def keyset(self, keys: Iterable[Ed25519PrivateKey]):
+        self.__keyset = keys if isinstance(keys, KeyRing) else KeyRing(keys)
+
+    @property
+    def key_to_use(self) -> int:
+        return self.__keyset.active_index
+
+    @key_to_use.setter
+    def key_to_use(self, index: int):
+        self.__keyset.active_index = index
 
     def save_data(
         self,
@@ -81,7 +124,7 @@ class AgentData:
         """Calls the save handler to save the agent tree."""
         # TODO: password for keyset
         args = [
-            self.keyset,
+            self.keyset.keys(),
             self.balance,
             self.last_acks,
             self.stake,
@@ -118,26 +161,16 @@ class AgentData:
             return self.load_data(user_password, "genesis.db", checkpointservice)
         else:
             self.tree = args[6]
+            self.validation_cache.clear()
 
             if not filename == "genesis.db":
                 # check if there has been a key load before the db was load
+                # if there is such a key and it's not in the keys load from the db, add it
+                loaded_keys = KeyRing(args[0])
                 for pre_load_key in self.keyset:
-                    # if there is such a key and it's not in the keys load from the db, add it
-                    add = True
-                    for load_key in args[0]:
-                        key1_bytes = parse_to_bytes(pre_load_key)
-                        key2_bytes = parse_to_bytes(load_key)
-
-                        if key1_bytes == key2_bytes:
-                            add = False
-
-                    if add:
-                        args[0].append(pre_load_key)
+                    loaded_keys.add(pre_load_key)
 
-                if args[0] is None:
-                    args[0] = list()
-
-                self.keyset = args[0]
+                self.keyset = loaded_keys
                 self.balance.extend(args[1])
 
                 # for the case where a user has no balance load from the db, we check twice -> fallback
@@ -155,10 +188,7 @@ class AgentData:
 
                 # last_acks
                 if args[2] is None or len(args[2]) == 0:
-                    for key in self.keyset:
-                        pk = key.public_key().public_bytes(
-                            encoding=Encoding.Raw, format=PublicFormat.Raw
-                        )
+                    for pk in self.keyset.pub_keys():
                         self.last_acks[
                             pk
                         ] = self.tree.get_latest_checkpoint().get_identifier()
@@ -169,10 +199,7 @@ class AgentData:
 
                 # ack_length
                 if args[5] is None or len(args[5]) == 0:
-                    for key in self.keyset:
-                        pk = key.public_key().public_bytes(
-                            encoding=Encoding.Raw, format=PublicFormat.Raw
-                        )
+                    for pk in self.keyset.pub_keys():
                         self.ack_length[
                             pk
                         ] = 0
@@ -190,10 +217,7 @@ class AgentData:
                     orphaned_nodes = args[10]
 
             else:
-                for key in self.keyset:
-                    pk = key.public_key().public_bytes(
-                        encoding=Encoding.Raw, format=PublicFormat.Raw
-                    )
+                for pk in self.keyset.pub_keys():
                     self.last_acks[
                         pk
                     ] = self.tree.get_latest_checkpoint().get_identifier()
@@ -245,12 +269,7 @@ class AgentData:
         """
         Adds a new randomly generated keypair to the keyset and flags it as new key_to_use
         """
-        key = gen_key()
-        self.keyset.append(key)
-        self.key_to_use = len(self.keyset) - 1
-        pk = key.public_key().public_bytes(
-            encoding=Encoding.Raw, format=PublicFormat.Raw
-        )
+        pk = self.keyset.rotate(gen_key())
         self.last_acks[pk] = self.tree.get_latest_checkpoint().get_identifier()
         self.ack_length[pk] = 0
         logger.info("New keypair created, public key: " + pk.hex())
@@ -263,10 +282,7 @@ class AgentData:
         :param key: Ed25519PrivateKey, which shall be included into the key list
         :param search_tree_for_now_owned: flags, if the DAG shall be searched for now owned wallets
         """
-        self.keyset.append(key)
-        pk = key.public_key().public_bytes(
-            encoding=Encoding.Raw, format=PublicFormat.Raw
-        )
+        pk = self.keyset.add(key)
         logger.info("Added pregenerated keypair, public key: " + pk.hex())
         self.last_acks[pk] = self.tree.get_latest_checkpoint().get_identifier()
         self.ack_length[pk] = 0
@@ -280,25 +296,18 @@ class AgentData:
         :param pb_key: bytes encoded public key
         :return: boolean
         """
-        for key in self.get_pub_key_bytes():
-            if key == pb_key:
-                return True
-        return False
+        return self.keyset.owns(pb_key)
 
     def get_key_to_use(self) -> bytes:
         """
         Gets the byte encoded public key of the private key we prioritize to use.
         :return: bytes
         """
-        return (
-            self.keyset[self.key_to_use]
-            .public_key()
-            .public_bytes(encoding=Encoding.Raw, format=PublicFormat.Raw)
-        )
+        return self.keyset.active_pub_key()
 
     def get_keys(self) -> List[Ed25519PrivateKey]:
         """Returns the list of keys owned by this agent"""
-        return list(self.keyset)
+        return self.keyset.keys()
 
     def get_pub_keys(self) -> list:
         """
@@ -317,10 +326,7 @@ class AgentData:
         Returns a list of public keys related to this agent encoded as bytes
         :return: list of bytes encoded public keys
         """
-        return [
-            key.public_bytes(Encoding.Raw, PublicFormat.Raw)
-            for key in self.get_pub_keys()
-        ]
+        return self.keyset.pub_keys()
 
     def get_transaction_set(self, value):
         """Returns a set of wallets to get the specified amount of money. The method uses the oldest wallets first
@@ -350,11 +356,7 @@ class AgentData:
         :return: public key of a validator in bytes format
         """
         if self.validator_to_use is None and len(self.known_validators) == 0:
-            return (
-                self.keyset[self.key_to_use]
-                .public_key()
-                .public_bytes(encoding=Encoding.Raw, format=PublicFormat.Raw)
-            )
+            return self.keyset.active_pub_key()
         elif self.validator_to_use is None:
             index = random.randint(
                 0, len(self.known_validators) - 1
@@ -401,10 +403,7 @@ class AgentData:
             return acks
 
         # create Ack for each key owned, instead of only once
-        for i in range(len(self.get_pub_key_bytes())):
-            sk: Ed25519PrivateKey = self.keyset[i]
-            pk = sk.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
-
+        for pk in self.keyset.pub_keys():
             prev_ack = self.last_acks.get(pk)
             if prev_ack is None:
                 prev_ack = self.tree.get_latest_checkpoint().get_identifier()
@@ -415,7 +414,7 @@ class AgentData:
                 prev_ack,
                 pk,
             )
-            self.__create_signature(ack, sk)
+            self.__create_signature(ack, pk)
 
             logger.info(
                 "CREATED ACKNOWLEDGEMENT for transaction: "
@@ -439,22 +438,21 @@ class AgentData:
 
         return acks
 
-    def __create_signature(self, node, key: Ed25519PrivateKey = None) -> bool:
+    def __create_signature(self, node, pb_key: bytes = None) -> bool:
         """Using the helper function __compute_data_for_auth(), this function creates a signature for :param node.
         The signature field is accessed with node.signature for Acknowledge or node.add_signature() for
-        Transactions.
+        Transactions. Acknowledges are signed with the key of :param pb_key or the key to use, transactions with
+        the keys of their inputs.
         """
         data = self.__compute_data_for_auth(node)
-        if key is None:
-            key = self.keyset[self.key_to_use]
 
         if isinstance(node, Acknowledge):
-            signature = auth_sign(data, key)
+            signature = self.keyset.sign(data, pb_key)
             node.signatures.append(signature)
 
         elif isinstance(node, Transaction):
-            for key in self.keyset:
-                signature = auth_sign(data, key)
+            input_keys = [wallet.get_pk() for wallet in node.get_inputs()]
+            for signature in self.keyset.sign_with_all(data, input_keys):
                 node.add_signature(signature)
 
         logger.info("Created a signature for " + str(node))
@@ -463,8 +461,21 @@ class AgentData:
     def validate_signature(self, node) -> bool:
         """Using the helper function __compute_data_for_auth(), this function validates a signature for :param node.
         The signature field is accessed with node.get_signature() for Acknowledge or node.get_signatures() for
-        Transactions.
+        Transactions. The result is cached for the node and its signatures.
         """
+        if isinstance(node, Acknowledge):
+            key = (node.get_identifier(), tuple(node.signature or ()))
+        elif isinstance(node, Transaction):
+            key = (node.get_identifier(), tuple(tuple(signature) for signature in node.get_signatures()))
+        else:
+            return self.__validate_signature(node)
+        result = self.validation_cache.get_signature(key)
+        if result is None:
+            result = self.__validate_signature(node)
+            self.validation_cache.put_signature(key, result)
+        return result
+
+    def __validate_signature(self, node) -> bool:
         data = self.__compute_data_for_auth(node)
         if isinstance(node, Acknowledge):
             result = auth_validate(data, node.signature)
@@ -496,9 +507,15 @@ class AgentData:
         If there are parent transactions missing, a TXN Request will be issued.
         If there is one wallet SPENT, the method will :return False to indicate that no acknowledge will be send.
         If txn is valid, it :returns True to indicate that an acknowledge should be send.
+        The result is cached until one of the spent output wallets changes its state.
         """
+        cached = self.validation_cache.get_transaction(txn.get_identifier())
+        if cached is not None:
+            return cached
 
         valid = True
+        outpoints = []
+        missing_parent = False
 
         for wallet in txn.get_inputs():  # Check in dag if this TXN is valid.
             try:
@@ -507,6 +524,7 @@ class AgentData:
                     .get_node()
                     .get_outputs()[wallet.get_id()]
                 )
+                outpoints.append((check_wallet, check_wallet.get_state()))
 
                 if not check_wallet == wallet:
                     valid = False
@@ -516,12 +534,16 @@ class AgentData:
 
             except AttributeError:
                 valid = False
+                missing_parent = True
                 logger.debug("There is no transaction with this wallet in the tree")
                 logger.error("Transaction not found")
 
         if valid:
             valid = is_valid_trans(txn.get_inputs(), txn.get_outputs())
 
+        if not missing_parent:
+            self.validation_cache.put_transaction(txn.get_identifier(), valid, outpoints)
+
         logger.info("Tried validation of a TXN with result " + str(valid))
         return valid
 
@@ -623,41 +645,52 @@ class AgentData:
 
         return transaction
 
-    def transform_dag(self, ckpt: Checkpoint, pending_transactions: dict):
+    def transform_dag(self, ckpt: Checkpoint, pending_transactions: dict, identities: Iterable["AgentData"] = ()):
         """This method will handle most of the transition from the current dag to a new checkpoint.
-        At first, it creates a new prefix tree and populates it with all TXNs which have unspent outputs in the
-        Checkpoint :param ckpt. Then, the ckpt will be added to the new tree.
-        For all TXNs in the new tree, the dependend TXNs will be added to the dict pending_trans, and all ACKs will be
-        added to a set pending_acks. Both are needed for reevaluation.
-        The last step is to add all TXNs from the old pending_transactions to the new pending_trans, with stake reset to
-        Decimal(0). Also, all ACKs for the TXNs in the old pending_transactions are added to pending_acks.
-        Then, the old tree will be completely replaced by the new tree and the method :returns both pending_trans and
-        pending_acks, such that the calling Agent is able to reconfirm TXNs.
+        The transition of the DAG store is done once by transform_tree(), the balance and acks of this entity and of
+        the :param identities sharing the store are updated by transform_identity().
+        :returns pending_trans, pending_acks and the missing txn requests of transform_tree().
+        """
+        pendings, retained_wallets = self.transform_tree(ckpt, pending_transactions)
+        self.transform_identity(ckpt, retained_wallets)
+        for identity in identities:
+            identity.transform_identity(ckpt, retained_wallets)
+        return pendings
+
+    def transform_tree(self, ckpt: Checkpoint, pending_transactions: dict):
+        """This method will handle the transition of the DAG store to a new checkpoint.
+        The transition is done in place: the previous checkpoints and all TXNs which have unspent outputs in the
+        Checkpoint :param ckpt are kept in the tree, all other nodes are pruned and the ckpt is added.
+        Before the tree is pruned, the dependend TXNs of the unspent outputs will be added to the set pending_trans,
+        and their ACKs will be added to a set pending_acks. Both are needed for reevaluation.
+        Also, all TXNs from the old pending_transactions are added to pending_trans, with stake reset to Decimal(0),
+        and all ACKs for these TXNs are added to pending_acks.
+        The memory of the pruned nodes is released in slices by release_detached() of the tree. The method :returns
+        both pending_trans and pending_acks, such that the calling Agent is able to reconfirm TXNs, and the wallets
+        whose acks are retained by the identities.
         """
         # delete old data in local storage
         save_handler.delete_old_data("abc_save.db")
+        self.validation_cache.clear()
 
-        # create a new tree and add all previous checkpoints
-        new_tree = Tree()
+        # keep all previous checkpoints
+        kept_nodes = set()
         for node_id in self.tree.list_of_checkpoints:
-            prev_ckpt = self.tree.search(node_id)
-            if prev_ckpt is not None:
-                new_tree.add(node_id, prev_ckpt.get_node())
+            if self.tree.search(node_id) is not None:
+                kept_nodes.add(node_id)
 
-        retained_spent_wallets: Dict[Tuple[bytes, int], List[Acknowledge]] = dict()
+        retained_wallets: Set[Tuple[bytes, int]] = set()
 
         def retain_acks_for_wallet(wallets: List[Wallet]):
             for w in wallets:
-                if (w.get_origin(), w.get_id()) in self.acked_wallets:
-                    retained_spent_wallets[(w.get_origin(), w.get_id())] \
-                        = self.acked_wallets[(w.get_origin(), w.get_id())]
+                retained_wallets.add((w.get_origin(), w.get_id()))
 
-        # add unspent TXNs to the tree
+        # keep unspent TXNs in the tree
         txn_set = set()
         utxo_set = set()
         missing_txn_requests = set()
         for wallet in ckpt.get_utxos():
-            # For all unspent transaction outputs in the checkpoint, we add the corresponding TXN to the new tree and
+            # For all unspent transaction outputs in the checkpoint, we keep the corresponding TXN in the tree and
             # set the corresponding output state to UNSPENT. Also, we add the pair (wallet.origin, wallet.id) to the
             # utxo_set.
 
@@ -669,13 +702,6 @@ class AgentData:
             if origin_leaf is None:
                 missing_txn_requests.add(wallet.get_origin())
             else:
-                # check if this TXN was added to the new tree before, if so, replace it
-                test_tree_node = new_tree.search(wallet.get_origin())
-                already_in_tree = False
-                if test_tree_node is not None:
-                    origin_leaf = test_tree_node
-                    already_in_tree = True
-
                 origin_node = origin_leaf.get_node()
                 origin_node: Transaction
 
@@ -686,28 +712,13 @@ class AgentData:
                 if not isinstance(origin_node, Genesis) and not isinstance(origin_node, Checkpoint):
                     origin_node.parents = {ckpt.get_identifier(): ckpt.get_identifier()}
 
-
-                # Add TXN.identifier to set of kept TXNs and add the TXN to the new tree
-                if not already_in_tree:
+                # Add TXN.identifier to set of kept TXNs
+                if origin_node.get_identifier() not in kept_nodes:
                     txn_set.add(origin_node.get_identifier())
-                    new_tree.add(origin_node.get_identifier(), origin_node)
+                    kept_nodes.add(origin_node.get_identifier())
                     # Retain the output acks that we have created before
                     retain_acks_for_wallet(origin_node.get_outputs())
 
-        # Add Checkpoint to new tree
-        new_tree.add(ckpt.get_identifier(), ckpt)
-
-        # Add all UTXO that are mine to my balance
-        self.balance.clear()
-        my_keys = set(self.get_pub_key_bytes())
-        for utxo in ckpt.utxos:
-            if utxo.own_key in my_keys:
-                self.balance.append(utxo)
-        # Add all new outputs (rewards) that belong to me to my balance
-        for out in ckpt.outputs:
-            if out.own_key in my_keys:
-                self.balance.append(out)
-
         # search for TXNs which were confirmed while the ckpt was created
         deconfirmed_nodes = self.tree.search_dependend_nodes(utxo_set)
         # deconfirmed_nodes: set of pairs (Node.ID, ItemType)
@@ -766,17 +777,35 @@ class AgentData:
             # Retain all acks we have for this txn's output and input
             retain_acks_for_wallet(txn.get_outputs())
             retain_acks_for_wallet(txn.get_inputs())
-        self.acked_wallets = retained_spent_wallets
 
-        # deletes the now deprecated data
-        self.tree = new_tree
+        # removes the now deprecated nodes and adds the ckpt, which depends on the kept TXNs
+        self.tree.prune(kept_nodes)
+        self.tree.add(ckpt.get_identifier(), ckpt)
+
+        return [pending_trans, pending_acks, missing_txn_requests], retained_wallets
+
+    def transform_identity(self, ckpt: Checkpoint, retained_wallets: Set[Tuple[bytes, int]]):
+        """Updates the balance and the acks of this entity to the checkpoint :param ckpt.
+        :param retained_wallets: wallets of the kept and pending TXNs, whose acks are kept
+        """
+        # Add all UTXO that are mine to my balance
+        self.balance.clear()
+        my_keys = set(self.get_pub_key_bytes())
+        for utxo in ckpt.utxos:
+            if utxo.own_key in my_keys:
+                self.balance.append(utxo)
+        # Add all new outputs (rewards) that belong to me to my balance
+        for out in ckpt.outputs:
+            if out.own_key in my_keys:
+                self.balance.append(out)
+
+        self.acked_wallets = {wallet: acks for wallet, acks in self.acked_wallets.items()
+                              if wallet in retained_wallets}
 
         # since by transition all ACKs are deleted, the last_ack is set to the new Checkpoint
-        ckpt = ckpt.get_identifier()
+        ckpt_id = ckpt.get_identifier()
         for key in self.last_acks:
-            self.last_acks[key] = ckpt
-
-        return [pending_trans, pending_acks, missing_txn_requests]
+            self.last_acks[key] = ckpt_id
 
     @staticmethod
     def transform_helper_reset_state(txn: Transaction):
@@ -5,6 +5,7 @@ from typing import Any, List
 from decimal import Decimal, Context, ROUND_HALF_DOWN
 
 from abccore.DAG import Wallet, Transaction, Acknowledge, Node
+from abccore.iblt import IBLT
 from abccore.network_datastructures import NetTransaction, NetAcknowledgement, NetUSPWR
 
 
@@ -107,7 +108,10 @@ class AgentItemsParser(ItemsParser):
                 origin_id = parser.consume_nested_bytes()
                 wallet_id = parser.consume_int()
                 uspnt_wllts.add((origin_id, wallet_id))
-            return NetUSPWR(uspnt_wllts, is_req, identifier)
+            # Empty for requests without a sketch and for those of agents that do not send one
+            sketch_bytes = parser.consume_nested_bytes()
+            sketch = IBLT.from_bytes(sketch_bytes) if sketch_bytes else None
+            return NetUSPWR(uspnt_wllts, is_req, identifier, sketch)
 
         else:
             return None
@@ -2,7 +2,7 @@ from abccore.network_datastructures import NetTransaction
 from abcnet.structures import ItemType
 from abcnet.transcriber import join_msg_parts
 from abcnet.services import ChannelService
-from abcnet.handlers import AbstractItemHandler, Message
+from abcnet.handlers import AbstractItemHandler, Message, SeenItemCache
 
 from abccore.agent_items_parser import AgentItemsParser
 
@@ -24,7 +24,8 @@ class AgentMessageHandler(AbstractItemHandler):
             ItemType.TXN,
             ItemType.UNSPENT_WALLET_COLLECTION,
         ]
-        super().__init__(interesting_items, item_parser)
+        # TXN checklists are answered with the acks of the txn, so only ACK checklists of seen items are dropped
+        super().__init__(interesting_items, item_parser, SeenItemCache(), silent_checklist_types=(ItemType.ACK,))
         self.input_queue = dict()
         self.request_queue = set()
         self.checklist_queue = set()
@@ -34,13 +35,15 @@ class AgentMessageHandler(AbstractItemHandler):
         self, cs: "ChannelService", msg: Message, item_type: int, item_content: Any
     ):
         """
-        Handles messages which include an actual content e.g. as in a full transaction and puts it into the inputs_queue.
+        Handles messages which include an actual content e.g. as in a full transaction and puts it into the inputs_queue
+        together with the sender of the message.
         :param cs: The given ChannelService (not used in this method but required by the superclass)
         :param msg: The message itself
         :param item_type: The item_type as defined in abcnet.structures
         :param item_content: The content itself, e.g. a NetTransaction
         """
-        self.input_queue[item_content.item_qualifier()] = (item_type, item_content)
+        sender = msg.sender if msg is not None else None
+        self.input_queue[item_content.item_qualifier()] = (item_type, item_content, sender)
 
     def handle_item_request(
         self, cs: "ChannelService", msg: Message, item_type: int, item_qualifier: str
@@ -0,0 +1,152 @@
+import logging
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import abccore.constants as constants
+
+logger = logging.getLogger(__name__)
+
+
+class StakeTally:
+    """
+    The stake of the validators that acknowledged a transaction. Each validator is a bit of the voters bitset.
+    """
+    __slots__ = ("stake", "voters", "confirmed")
+
+    def __init__(self):
+        self.stake = Decimal(0)
+        self.voters = 0
+        self.confirmed = False
+
+
+class ConfirmationTracker:
+    """
+    Keeps the acknowledged stake of every pending transaction. Every validator is counted once per transaction,
+    an ack of a validator that already acknowledged the transaction is rejected by a single bit test.
+    Only keys with stake are validators and get a bit, acks of keys without stake are ignored.
+    The stake of each validator and the confirmation threshold are cached until the next checkpoint.
+    Listeners are called with transaction id and stake once a transaction reaches the threshold.
+    """
+
+    def __init__(self, stake_of: Callable[[bytes], Decimal], threshold: Decimal = Decimal("Infinity"),
+                 max_entries: int = None, acks_of: Callable[[bytes], Iterable[bytes]] = None):
+        """
+        :param stake_of: returns the stake of a validator in the current checkpoint
+        :param threshold: stake a transaction needs to be confirmed
+        :param max_entries: maximum number of tallies. The oldest tallies are dropped beyond it, pending transactions
+        among them are rebuilt by restore() on their next ack.
+        :param acks_of: returns the validators whose acks of a transaction were counted before. A dropped tally is
+        rebuilt from them once the transaction is acknowledged again.
+        """
+        self.stake_of = stake_of
+        self.threshold = threshold
+        self.max_entries = max_entries if max_entries is not None else constants.CONFIRMATION_TRACKER_MAX_ENTRIES
+        self.acks_of = acks_of
+        self.tallies: "OrderedDict[bytes, StakeTally]" = OrderedDict()
+        # Validator -> its bit and its stake
+        self.validators: Dict[bytes, Tuple[int, Decimal]] = dict()
+        self.listeners: List[Callable[[bytes, Decimal], None]] = list()
+        self.duplicates = 0
+        self.unstaked = 0
+
+    def add_listener(self, listener: Callable[[bytes, Decimal], None]):
+        self.listeners.append(listener)
+
+    def reset(self, threshold: Decimal):
+        """
+        Drops all tallies and cached stakes. Called once a new checkpoint is adopted.
+        :param threshold: confirmation threshold of the new checkpoint
+        """
+        self.threshold = threshold
+        self.tallies.clear()
+        self.validators.clear()
+
+    def validator(self, pk: bytes) -> Optional[Tuple[int, Decimal]]:
+        """
+        Returns the bit and the stake of the validator, or None if the key has no stake.
+        """
+        validator = self.validators.get(pk)
+        if validator is None:
+            stake = self.stake_of(pk)
+            if not stake > 0:
+                return None
+            validator = (1 << len(self.validators), stake)
+            self.validators[pk] = validator
+        return validator
+
+    def validator_stake(self, pk: bytes) -> Decimal:
+        validator = self.validators.get(pk)
+        return validator[1] if validator is not None else Decimal(0)
+
+    def add_ack(self, txn_id: bytes, validator: bytes) -> bool:
+        """
+        Counts the stake of the validator for the transaction. Acks of keys without stake are not counted.
+        :return: False, if the validator already acknowledged the transaction
+        """
+        bit_stake = self.validators.get(validator) or self.validator(validator)
+        if bit_stake is None:
+            self.unstaked += 1
+            return True
+        tally = self.tallies.get(txn_id)
+        if tally is None:
+            tally = self.restore(txn_id)
+        bit, stake = bit_stake
+        if tally.voters & bit:
+            self.duplicates += 1
+            return False
+        tally.voters |= bit
+        tally.stake += stake
+        if tally.stake >= self.threshold and not tally.confirmed:
+            self.__confirm(txn_id, tally)
+        return True
+
+    def restore(self, txn_id: bytes) -> StakeTally:
+        """
+        Creates the tally of the transaction from the acks that were counted before, e.g. before the tally was dropped
+        or before a restart. The oldest tally is dropped beyond the maximum number of tallies.
+        """
+        tally = StakeTally()
+        self.tallies[txn_id] = tally
+        if len(self.tallies) > self.max_entries:
+            self.tallies.popitem(last=False)
+        if self.acks_of is not None:
+            for pk in self.acks_of(txn_id):
+                validator = self.validator(pk)
+                if validator is not None and not tally.voters & validator[0]:
+                    tally.voters |= validator[0]
+                    tally.stake += validator[1]
+            if tally.stake >= self.threshold and tally.voters:
+                self.__confirm(txn_id, tally)
+        return tally
+
+    def __confirm(self, txn_id: bytes, tally: StakeTally):
+        tally.confirmed = True
+        for listener in self.listeners:
+            listener(txn_id, tally.stake)
+
+    def stake(self, txn_id: bytes) -> Decimal:
+        tally = self.tallies.get(txn_id)
+        return tally.stake if tally is not None else Decimal(0)
+
+    def is_confirmed(self, txn_id: bytes) -> bool:
+        tally = self.tallies.get(txn_id)
+        return tally is not None and tally.confirmed
+
+    def has_acked(self, txn_id: bytes, validator: bytes) -> bool:
+        tally = self.tallies.get(txn_id)
+        bit_stake = self.validators.get(validator)
+        return tally is not None and bit_stake is not None and bool(tally.voters & bit_stake[0])
+
+    def ack_count(self, txn_id: bytes) -> int:
+        tally = self.tallies.get(txn_id)
+        return bin(tally.voters).count("1") if tally is not None else 0
+
+    def forget(self, txn_id: bytes) -> Optional[StakeTally]:
+        """
+        Drops the tally of a transaction that was added to the DAG.
+        """
+        return self.tallies.pop(txn_id, None)
+
+    def __len__(self):
+        return len(self.tallies)
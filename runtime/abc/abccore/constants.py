@@ -4,7 +4,49 @@ MONEY_GENERATION_MODIFIER = 1.1
 TRANSACTION_FEE = Decimal(0.001)
 TTL = 5  # Number of times the an item in the checklist is posted again to the network
 INTERVAL_TIME = 4  # Number of seconds between sending (same) messages
+REBROADCAST_TICK = 0.5  # Resolution in seconds of the timer wheel that schedules the sending of checklist items
+REBROADCAST_WHEEL_SLOTS = 64  # Slots of that wheel, its span must exceed INTERVAL_TIME
 RESEND_PENDING_ITEMS_TIME = 10
 USPWR_LATE_SEND_TIMEOUT = 10
+USPWR_SKETCH_CELLS_PER_NODE = 0.03  # IBLT cells per held node in a USPWR request, decodes a difference of about 2%
+USPWR_SKETCH_MIN_CELLS = 96
+USPWR_SKETCH_MAX_CELLS = 30000  # 1.3 MB, larger differences are answered with all nodes
 
 MISSING_TXN_RESEND_TIMEOUT = 30
+
+CKPT_HASH_V1 = 1  # Checkpoint id over the sorted concatenation of all utxos and stake entries
+CKPT_HASH_V2 = 2  # Checkpoint id over the Merkle roots of the utxos and stake entries
+CKPT_HASH_VERSIONS = (CKPT_HASH_V2, CKPT_HASH_V1)
+CKPT_HASH_VERSION = CKPT_HASH_V1  # Version used for new checkpoints below the activation height of V2
+CKPT_HASH_V2_HEIGHT = None  # Height from which new checkpoints use CKPT_HASH_V2, None until all nodes support it
+
+# Budgets of the stages of the agent maintenance, see maintenance_stages.py.
+# Stages run in the order ACK, USPWR, TXN, request, checklist: confirming work goes before admitting new transactions.
+MAINTENANCE_STAGE_TIME_BUDGET = 0.02  # Seconds after which a stage defers its remaining items to the next step
+MAINTENANCE_ACK_BUDGET = 2000  # Items processed per maintenance step
+MAINTENANCE_USPWR_BUDGET = 50
+MAINTENANCE_TXN_BUDGET = 200
+MAINTENANCE_REQUEST_BUDGET = 1000
+MAINTENANCE_CHECKLIST_BUDGET = 2000
+MAINTENANCE_ACK_QUEUE_SIZE = 100000  # Items that are queued beyond the size are dropped
+MAINTENANCE_TXN_QUEUE_SIZE = 10000
+MAINTENANCE_QUEUE_SIZE = 10000  # Queue size of the other stages
+MAINTENANCE_REPORT_INTERVAL = 30  # Seconds between the logs of the stage stats
+
+# Bounds of the pool of nodes whose parents are missing, see orphan_pool.py.
+ORPHAN_POOL_MAX_ENTRIES = 20000
+ORPHAN_POOL_MAX_BYTES = 16 * 1024 * 1024  # Estimated size of the network encoding of all orphans
+ORPHAN_POOL_MAX_PER_PEER = 5000  # Orphans sent by a single peer
+ORPHAN_POOL_MAX_AGE = 300  # Seconds an orphan waits for its parents
+
+CONFIRMATION_TRACKER_MAX_ENTRIES = 200000  # Stake tallies of unconfirmed transactions, the oldest are dropped and rebuilt on their next ack
+
+# Bounds of the unconfirmed transactions held by the agent, see mempool.py.
+MEMPOOL_MAX_ENTRIES = 20000
+MEMPOOL_MAX_BYTES = 16 * 1024 * 1024  # Estimated size of the network encoding of all transactions
+MEMPOOL_MAX_PER_SENDER = 2000  # Transactions paid by the same key
+MEMPOOL_ACK_BUDGET = 500  # Transactions acknowledged per maintenance step, highest fee rate first
+
+DAG_RELEASE_BUDGET = 5000  # Tree nodes pruned at a checkpoint that are freed per maintenance step
+
+VALIDATION_CACHE_MAX_ENTRIES = 100000  # Cached transaction and signature validations each, the oldest are dropped beyond it
@@ -0,0 +1,121 @@
+import hashlib
+import struct
+from typing import Iterable, List, Optional, Set, Tuple
+
+KEY_SIZE = 32  # Identifiers of DAG nodes
+HASH_FUNCTIONS = 3
+CELL_FORMAT = ">i32s8s"  # count, xor of the keys, xor of the check hashes of the keys
+CELL_SIZE = struct.calcsize(CELL_FORMAT)
+
+
+def _digest(key: bytes) -> Tuple[List[int], int]:
+    """
+    :return: the position of the key in each partition of the table relative to the partition and its check hash
+    """
+    digest = hashlib.blake2b(key, digest_size=4 * HASH_FUNCTIONS + 8).digest()
+    positions = [int.from_bytes(digest[4 * i:4 * i + 4], "big") for i in range(HASH_FUNCTIONS)]
+    return positions, int.from_bytes(digest[-8:], "big")
+
+
+class IBLT:
+    """
+    An invertible Bloom lookup table over node identifiers, used as a sketch of the nodes an agent holds.
+    The table of one set subtracted from the table of another set holds the symmetric difference of both sets, which
+    can be listed as long as it is not much larger than the number of cells divided by HASH_FUNCTIONS.
+    The size of a table is independent of the size of the set; a table with 1.5 cells per expected differing key
+    can be decoded with high probability.
+    """
+
+    def __init__(self, cells: int):
+        # Each key is put into one cell of each of the HASH_FUNCTIONS partitions
+        self.partition = max(1, -(-cells // HASH_FUNCTIONS))
+        size = self.partition * HASH_FUNCTIONS
+        self.counts = [0] * size
+        self.keys = [0] * size
+        self.checks = [0] * size
+
+    @classmethod
+    def of(cls, keys: Iterable[bytes], cells: int) -> "IBLT":
+        table = cls(cells)
+        for key in keys:
+            table.add(key)
+        return table
+
+    def __len__(self):
+        """Returns the number of cells."""
+        return len(self.counts)
+
+    def add(self, key: bytes, count: int = 1):
+        if len(key) != KEY_SIZE:
+            raise ValueError(f"IBLT keys must have {KEY_SIZE} bytes, got {len(key)}.")
+        positions, check = _digest(key)
+        value = int.from_bytes(key, "big")
+        for i, position in enumerate(positions):
+            index = i * self.partition + position % self.partition
+            self.counts[index] += count
+            self.keys[index] ^= value
+            self.checks[index] ^= check
+
+    def remove(self, key: bytes):
+        self.add(key, -1)
+
+    def subtract(self, other: "IBLT") -> "IBLT":
+        """
+        :return: the table of the keys that are only in this table (count 1) or only in the other one (count -1)
+        """
+        if len(self) != len(other):
+            raise ValueError(f"Cannot subtract an IBLT with {len(other)} cells from one with {len(self)} cells.")
+        result = IBLT(len(self))
+        result.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        result.keys = [a ^ b for a, b in zip(self.keys, other.keys)]
+        result.checks = [a ^ b for a, b in zip(self.checks, other.checks)]
+        return result
+
+    def decode(self) -> Optional[Tuple[Set[bytes], Set[bytes]]]:
+        """
+        Lists the keys of the table by repeatedly removing the keys of cells that hold a single key.
+        The table is emptied in the process.
+        :return: the keys with positive and with negative count, or None, if the table cannot be listed completely
+        """
+        positive: Set[bytes] = set()
+        negative: Set[bytes] = set()
+        pure = [i for i in range(len(self)) if self.__is_pure(i)]
+        while pure:
+            index = pure.pop()
+            if not self.__is_pure(index):
+                continue
+            count = self.counts[index]
+            key = self.keys[index].to_bytes(KEY_SIZE, "big")
+            (positive if count > 0 else negative).add(key)
+            positions, _ = _digest(key)
+            self.add(key, -count)
+            for i, position in enumerate(positions):
+                neighbour = i * self.partition + position % self.partition
+                if self.__is_pure(neighbour):
+                    pure.append(neighbour)
+
+        if any(self.counts) or any(self.keys) or any(self.checks):
+            return None
+        return positive, negative
+
+    def to_bytes(self) -> bytes:
+        return b"".join(
+            struct.pack(CELL_FORMAT, count, key.to_bytes(KEY_SIZE, "big"), check.to_bytes(8, "big"))
+            for count, key, check in zip(self.counts, self.keys, self.checks)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IBLT":
+        if len(data) % CELL_SIZE != 0 or len(data) // CELL_SIZE % HASH_FUNCTIONS != 0:
+            raise ValueError(f"Malformed IBLT of {len(data)} bytes.")
+        table = cls(len(data) // CELL_SIZE)
+        for index, (count, key, check) in enumerate(struct.iter_unpack(CELL_FORMAT, data)):
+            table.counts[index] = count
+            table.keys[index] = int.from_bytes(key, "big")
+            table.checks[index] = int.from_bytes(check, "big")
+        return table
+
+    def __is_pure(self, index: int) -> bool:
+        if self.counts[index] not in (1, -1):
+            return False
+        return _digest(self.keys[index].to_bytes(KEY_SIZE, "big"))[1] == self.checks[index]
@@ -0,0 +1,129 @@
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from abccore.agent_crypto import pub_key_to_bytes
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[bytes, bytes]
+
+
+class KeyRing:
+    """
+    The private keys owned by an entity, indexed by their byte encoded public key.
+    The public key of every private key is serialized once when the key is added, so ownership checks and the
+    lookup of the signing key are dictionary lookups instead of a serialization per key and check.
+    The keys keep the order in which they were added. One of them is the active key, which is used to sign
+    by default. Rotating the key ring adds a new key and makes it the active one; older keys are kept, so
+    wallets sent to them remain spendable.
+    """
+
+    def __init__(self, keys: Optional[Iterable[Ed25519PrivateKey]] = None):
+        self.__keys: List[Ed25519PrivateKey] = list()
+        self.__pub_keys: List[bytes] = list()
+        self.__signers: Dict[bytes, Ed25519PrivateKey] = dict()
+        self.active_index = 0
+        if keys is not None:
+            for key in keys:
+                self.add(key)
+
+    def add(self, key: Ed25519PrivateKey) -> bytes:
+        """
+        Adds the key to the key ring. Adding a key that is already owned has no effect.
+        :param key: private key
+        :return: byte encoded public key of the added key
+        """
+        pk = pub_key_to_bytes(key.public_key())
+        if pk not in self.__signers:
+            self.__keys.append(key)
+            self.__pub_keys.append(pk)
+            self.__signers[pk] = key
+        return pk
+
+    def rotate(self, key: Ed25519PrivateKey) -> bytes:
+        """
+        Adds the key and makes it the active key.
+        :return: byte encoded public key of the new active key
+        """
+        pk = self.add(key)
+        self.active_index = self.__pub_keys.index(pk)
+        logger.info("Rotated the active key to: %s", pk.hex())
+        return pk
+
+    def owns(self, pb_key: bytes) -> bool:
+        """
+        :param pb_key: byte encoded public key
+        :return: True, if the private key of the public key is in the key ring
+        """
+        return pb_key in self.__signers
+
+    def signer_for(self, pb_key: bytes) -> Optional[Ed25519PrivateKey]:
+        """
+        :param pb_key: byte encoded public key
+        :return: the private key of the public key or None, if it is not owned
+        """
+        return self.__signers.get(pb_key)
+
+    def active_key(self) -> Ed25519PrivateKey:
+        return self.__keys[self.active_index]
+
+    def active_pub_key(self) -> bytes:
+        return self.__pub_keys[self.active_index]
+
+    def keys(self) -> List[Ed25519PrivateKey]:
+        """Returns the private keys in the order they were added."""
+        return list(self.__keys)
+
+    def pub_keys(self) -> List[bytes]:
+        """Returns the byte encoded public keys in the order the keys were added."""
+        return list(self.__pub_keys)
+
+    def items(self) -> Iterator[Tuple[bytes, Ed25519PrivateKey]]:
+        """Iterates over the pairs of byte encoded public key and private key."""
+        return zip(list(self.__pub_keys), list(self.__keys))
+
+    def sign(self, data: bytes, pb_key: Optional[bytes] = None) -> Signature:
+        """
+        Signs the data with the key of the given public key or with the active key.
+        :return: the signature in the format of `auth_sign`
+        :raises KeyError: if the public key is not owned
+        """
+        if pb_key is None:
+            pb_key = self.active_pub_key()
+        return pb_key, self.__signers[pb_key].sign(data)
+
+    def sign_batch(self, messages: Iterable[bytes], pb_key: Optional[bytes] = None) -> List[Signature]:
+        """
+        Signs each of the messages with the key of the given public key or with the active key.
+        """
+        if pb_key is None:
+            pb_key = self.active_pub_key()
+        key = self.__signers[pb_key]
+        return [(pb_key, key.sign(data)) for data in messages]
+
+    def sign_with_all(self, data: bytes, pb_keys: Optional[Iterable[bytes]] = None) -> List[Signature]:
+        """
+        Signs the data once with each of the given public keys that are owned, or with every key if none are given.
+        Public keys that are not owned or given more than once are skipped.
+        """
+        if pb_keys is None:
+            pb_keys = self.__pub_keys
+        signatures = list()
+        signed = set()
+        for pk in pb_keys:
+            key = self.__signers.get(pk)
+            if key is not None and pk not in signed:
+                signatures.append((pk, key.sign(data)))
+                signed.add(pk)
+        return signatures
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __iter__(self) -> Iterator[Ed25519PrivateKey]:
+        return iter(list(self.__keys))
+
+    def __getitem__(self, index: int) -> Ed25519PrivateKey:
+        return self.__keys[index]
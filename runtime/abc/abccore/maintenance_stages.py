@@ -0,0 +1,140 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """
+    Counters of a maintenance stage. The depth is the number of queued items after the last run of the stage
+    and the service time the time spent in the last run.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.admitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.service_time = 0.0
+        self.total_service_time = 0.0
+
+    def __str__(self):
+        return (f"{self.name}: depth={self.depth} (max {self.max_depth}), processed={self.processed}, "
+                f"dropped={self.dropped}, service time={self.service_time * 1000:.1f} ms "
+                f"(total {self.total_service_time:.3f} s)")
+
+
+class MaintenanceStage:
+    """
+    A bounded queue of work items and the handler that processes them during the maintenance of an agent.
+    Each run processes the queued items in the order they were admitted until either the item budget or the time
+    budget of the stage is used up. The remaining items are kept for the next run.
+    An item that is admitted while the queue is full is dropped; an item whose key is already queued replaces the
+    queued one without changing its position.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Hashable, Any], Any], item_budget: int,
+                 time_budget: float, max_queue: int):
+        """
+        :param name: name of the stage used in the stats
+        :param handler: called with key and item of each processed item
+        :param item_budget: maximum number of items processed in one run
+        :param time_budget: time in seconds after which a run stops processing items. At least one item is
+            processed in each run.
+        :param max_queue: maximum number of queued items
+        """
+        self.name = name
+        self.handler = handler
+        self.item_budget = item_budget
+        self.time_budget = time_budget
+        self.max_queue = max_queue
+        self.queue: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.stats = StageStats(name)
+
+    def admit(self, key: Hashable, item: Any = None) -> bool:
+        """
+        Queues the item.
+        :return: False, if the queue is full and the item was dropped
+        """
+        if key in self.queue:
+            self.queue[key] = item
+            return True
+        if len(self.queue) >= self.max_queue:
+            self.stats.dropped += 1
+            return False
+        self.queue[key] = item
+        self.stats.admitted += 1
+        if len(self.queue) > self.stats.max_depth:
+            self.stats.max_depth = len(self.queue)
+        return True
+
+    def run(self) -> int:
+        """
+        Processes queued items within the budgets of the stage.
+        :return: number of processed items
+        """
+        stats = self.stats
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        processed = 0
+        while self.queue and processed < self.item_budget:
+            if processed > 0 and time.perf_counter() > deadline:
+                break
+            key, item = self.queue.popitem(last=False)
+            processed += 1
+            self.handler(key, item)
+        stats.service_time = time.perf_counter() - start
+        stats.total_service_time += stats.service_time
+        stats.processed += processed
+        stats.depth = len(self.queue)
+        stats.runs += 1
+        if self.queue:
+            logger.debug("Maintenance stage %s deferred %d items after processing %d items in %.1f ms.",
+                         self.name, len(self.queue), processed, stats.service_time * 1000)
+        return processed
+
+    def clear(self):
+        self.queue.clear()
+        self.stats.depth = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class MaintenancePipeline:
+    """
+    The stages of the maintenance of an agent in the order of their priority.
+    """
+
+    def __init__(self, stages: Optional[List[MaintenanceStage]] = None):
+        self.stages: "OrderedDict[str, MaintenanceStage]" = OrderedDict()
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: MaintenanceStage):
+        self.stages[stage.name] = stage
+
+    def stage(self, name: str) -> MaintenanceStage:
+        return self.stages[name]
+
+    def run(self) -> int:
+        """
+        Runs each stage once in the order of their priority.
+        :return: number of processed items
+        """
+        return sum(stage.run() for stage in self.stages.values())
+
+    def backlog(self) -> int:
+        """Returns the number of queued items over all stages."""
+        return sum(len(stage) for stage in self.stages.values())
+
+    def stats(self) -> List[StageStats]:
+        return [stage.stats for stage in self.stages.values()]
+
+    def report(self) -> str:
+        return "\n\t- ".join(["Maintenance stages:"] + [str(stats) for stats in self.stats()])
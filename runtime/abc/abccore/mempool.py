@@ -0,0 +1,219 @@
+import heapq
+import logging
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import abccore.constants as constants
+from abccore.DAG import Transaction
+from abccore.orphan_pool import node_size
+
+logger = logging.getLogger(__name__)
+
+REJECTED_SENDER_QUOTA = "sender quota"
+REJECTED_FULL = "full"
+REJECTED_INVALID = "invalid"
+
+
+def transaction_fee(txn: Transaction) -> Decimal:
+    """
+    The fee paid by the transaction, which is the value of its inputs not spent in its outputs.
+    For valid transactions this is the fee computed by calculate_fee(). The input values are the ones claimed by the
+    transaction, they match the outputs they spend only once the transaction is validated.
+    """
+    return sum((w.get_value() for w in txn.get_inputs()), Decimal(0)) \
+        - sum((w.get_value() for w in txn.get_outputs()), Decimal(0))
+
+
+def transaction_sender(txn: Transaction) -> Optional[bytes]:
+    """The public key of the owner of the first input, which is the key that pays for the transaction."""
+    inputs = txn.get_inputs()
+    return inputs[0].get_pk() if inputs else None
+
+
+class MempoolEntry:
+    __slots__ = ("txn", "txn_id", "fee_rate", "size", "sender", "local", "seq")
+
+    def __init__(self, txn: Transaction, size: int, local: bool, seq: int):
+        self.txn = txn
+        self.txn_id = txn.get_identifier()
+        self.size = size
+        self.fee_rate = transaction_fee(txn) / size
+        self.sender = transaction_sender(txn)
+        self.local = local
+        self.seq = seq
+
+
+class Mempool:
+    """
+    Holds the unconfirmed transactions the agent has not acknowledged yet and decides which of them are acknowledged
+    next. Transactions are prioritized by their fee rate, the fee per byte of their estimated network encoding, and
+    leave the mempool once they are handed out for the acknowledgement, valid or not.
+    The mempool is bounded by the number of transactions, their size and the number of transactions paid by a single
+    sender. If a bound is reached, a new transaction evicts transactions with a lower fee rate, or is rejected if there
+    are none. Rejected and evicted transactions are only not acknowledged by the agent, they are still confirmed by the
+    acks of others. Local transactions, the own and the restored ones, are always admitted and never evicted.
+    Other transactions are validated before they are admitted, so fee rates and senders are the ones of the spent
+    outputs and not just claimed.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, max_per_sender: int = None,
+                 validate: Callable[[Transaction], bool] = None):
+        """
+        :param validate: checks that the inputs of a transaction are unspent outputs of the DAG
+        """
+        self.validate = validate
+        self.max_entries = max_entries if max_entries is not None else constants.MEMPOOL_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else constants.MEMPOOL_MAX_BYTES
+        self.max_per_sender = max_per_sender if max_per_sender is not None else constants.MEMPOOL_MAX_PER_SENDER
+
+        self.entries: Dict[bytes, MempoolEntry] = dict()
+        self.by_sender: Dict[bytes, Set[bytes]] = dict()
+        self.size = 0
+        # Heaps of the entries. Keys of entries that were handed out or removed are skipped when popped.
+        self.best: List[Tuple[Decimal, int, bytes]] = list()  # highest fee rate first
+        self.worst: List[Tuple[Decimal, int, bytes]] = list()  # lowest fee rate first, without local entries
+        self.seq = 0
+
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {REJECTED_INVALID: 0, REJECTED_SENDER_QUOTA: 0, REJECTED_FULL: 0}
+        self.evicted = 0
+        self.acknowledged = 0
+        self.removed = 0
+
+    def admit(self, txn: Transaction, local: bool = False) -> Tuple[bool, List[MempoolEntry]]:
+        """
+        Adds the transaction to the mempool, if it fits into the bounds or has a higher fee rate than the
+        unacknowledged transactions that have to be evicted to make room for it.
+        :param txn: unconfirmed transaction
+        :param local: True for own and restored transactions, which are admitted in any case
+        :return: whether the transaction was admitted and the evicted entries
+        """
+        if txn.get_identifier() in self.entries:
+            return True, list()
+        if not local and self.validate is not None and not self.validate(txn):
+            self.rejected[REJECTED_INVALID] += 1
+            return False, list()
+        self.seq += 1
+        entry = MempoolEntry(txn, node_size(txn), local, self.seq)
+
+        if not local and entry.sender is not None \
+                and len(self.by_sender.get(entry.sender, ())) >= self.max_per_sender:
+            self.rejected[REJECTED_SENDER_QUOTA] += 1
+            return False, list()
+
+        victims = self.__find_victims(entry)
+        if victims is None:
+            self.rejected[REJECTED_FULL] += 1
+            return False, list()
+        for victim in victims:
+            self.__remove(victim.txn_id)
+        self.evicted += len(victims)
+
+        self.entries[entry.txn_id] = entry
+        self.size += entry.size
+        if entry.sender is not None:
+            self.by_sender.setdefault(entry.sender, set()).add(entry.txn_id)
+        heapq.heappush(self.best, (-entry.fee_rate, entry.seq, entry.txn_id))
+        if not local:
+            heapq.heappush(self.worst, (entry.fee_rate, -entry.seq, entry.txn_id))
+        self.admitted += 1
+        self.__compact()
+        return True, victims
+
+    def next_to_acknowledge(self, limit: int) -> List[Transaction]:
+        """
+        Removes up to :param limit transactions with the highest fee rates from the mempool to be acknowledged.
+        :return: the transactions in the order of their fee rates
+        """
+        txns = list()
+        while self.best and len(txns) < limit:
+            _, seq, txn_id = heapq.heappop(self.best)
+            entry = self.entries.get(txn_id)
+            if entry is None or entry.seq != seq:
+                continue
+            self.__remove(txn_id)
+            txns.append(entry.txn)
+        self.acknowledged += len(txns)
+        self.__compact()
+        return txns
+
+    def mark_acknowledged(self, txn_id: bytes):
+        """Removes the transaction, which was acknowledged right away."""
+        if self.__remove(txn_id) is not None:
+            self.acknowledged += 1
+
+    def remove(self, txn_id: bytes) -> Optional[MempoolEntry]:
+        """
+        Removes the transaction, once it was confirmed or dropped.
+        """
+        entry = self.__remove(txn_id)
+        if entry is not None:
+            self.removed += 1
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.by_sender.clear()
+        self.best.clear()
+        self.worst.clear()
+        self.size = 0
+
+    def __contains__(self, txn_id: bytes) -> bool:
+        return txn_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return (f"Mempool(transactions={len(self)}, size={self.size}, admitted={self.admitted}, "
+                f"rejected={sum(self.rejected.values())} {self.rejected}, evicted={self.evicted}, "
+                f"acknowledged={self.acknowledged}, removed={self.removed})")
+
+    def __find_victims(self, entry: MempoolEntry) -> Optional[List[MempoolEntry]]:
+        """
+        Finds the entries with the lowest fee rates whose eviction makes room for the entry.
+        :return: the entries to evict or None, if the entry does not fit
+        """
+        count = len(self.entries) + 1
+        size = self.size + entry.size
+        victims = list()
+        popped = list()
+        while count > self.max_entries or size > self.max_bytes:
+            victim = None
+            while self.worst and victim is None:
+                key = heapq.heappop(self.worst)
+                popped.append(key)
+                candidate = self.entries.get(key[2])
+                if candidate is not None and candidate.seq == -key[1]:
+                    victim = candidate
+            if victim is None and entry.local:
+                # local transactions exceed the bounds if nothing can be evicted
+                break
+            if victim is None or (not entry.local and victim.fee_rate >= entry.fee_rate):
+                for key in popped:
+                    heapq.heappush(self.worst, key)
+                return None
+            victims.append(victim)
+            count -= 1
+            size -= victim.size
+        return victims
+
+    def __remove(self, txn_id: bytes) -> Optional[MempoolEntry]:
+        entry = self.entries.pop(txn_id, None)
+        if entry is None:
+            return None
+        self.size -= entry.size
+        sender_txns = self.by_sender.get(entry.sender)
+        if sender_txns is not None:
+            sender_txns.discard(txn_id)
+            if not sender_txns:
+                del self.by_sender[entry.sender]
+        return entry
+
+    def __compact(self):
+        """Rebuilds the heaps from the entries, once most of their keys are skipped ones."""
+        if len(self.best) + len(self.worst) > 4 * len(self.entries) + 64:
+            self.best = [(-e.fee_rate, e.seq, e.txn_id) for e in self.entries.values()]
+            self.worst = [(e.fee_rate, -e.seq, e.txn_id) for e in self.entries.values() if not e.local]
+            heapq.heapify(self.best)
+            heapq.heapify(self.worst)
@@ -0,0 +1,262 @@
+"""
+Merkle commitment over a sorted map of byte keys to byte values.
+
+The map is stored as a treap whose node priorities are derived from the hash of the key.
+The shape of the treap, and therefore the root hash, only depends on the content of the map
+and not on the order in which entries were added or removed.
+Maps are persistent: updates copy the O(log n) nodes on the path to the changed entry
+and share all other nodes with the previous version.
+"""
+import hashlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+EMPTY_HASH = bytes(32)
+"""
+Root hash of an empty map and hash of a missing child.
+"""
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(key: bytes, value: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + len(key).to_bytes(2, "big") + key + value).digest()
+
+
+def node_hash(left: bytes, leaf: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + leaf + right).digest()
+
+
+def _priority(key: bytes) -> bytes:
+    return hashlib.sha256(key).digest()
+
+
+class _Node:
+    __slots__ = ('key', 'value', 'priority', 'leaf', 'left', 'right', 'hash')
+
+    def __init__(self, key: bytes, value: bytes, priority: bytes, leaf: bytes,
+                 left: Optional["_Node"] = None, right: Optional["_Node"] = None):
+        self.key = key
+        self.value = value
+        self.priority = priority
+        self.leaf = leaf
+        self.left = left
+        self.right = right
+        self.hash = None
+        self.rehash()
+
+    def rehash(self):
+        self.hash = node_hash(_hash_of(self.left), self.leaf, _hash_of(self.right))
+
+    def with_children(self, left: Optional["_Node"], right: Optional["_Node"]) -> "_Node":
+        return _Node(self.key, self.value, self.priority, self.leaf, left, right)
+
+
+def _hash_of(node: Optional[_Node]) -> bytes:
+    return EMPTY_HASH if node is None else node.hash
+
+
+def _split(node: Optional[_Node], key: bytes) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """
+    Splits the treap into the entries with smaller keys and the entries with larger keys.
+    The key itself must not be in the treap.
+    """
+    if node is None:
+        return None, None
+    if key < node.key:
+        left, right = _split(node.left, key)
+        return left, node.with_children(right, node.right)
+    else:
+        left, right = _split(node.right, key)
+        return node.with_children(node.left, left), right
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """
+    Merges two treaps. All keys of the left treap must be smaller than the keys of the right treap.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return left.with_children(left.left, _merge(left.right, right))
+    else:
+        return right.with_children(_merge(left, right.left), right.right)
+
+
+def _put(node: Optional[_Node], new: _Node) -> _Node:
+    if node is None:
+        return new
+    if new.key == node.key:
+        return new.with_children(node.left, node.right)
+    if new.priority > node.priority:
+        left, right = _split(node, new.key)
+        return new.with_children(left, right)
+    if new.key < node.key:
+        return node.with_children(_put(node.left, new), node.right)
+    else:
+        return node.with_children(node.left, _put(node.right, new))
+
+
+def _remove(node: Optional[_Node], key: bytes) -> Optional[_Node]:
+    if node is None:
+        raise KeyError(key)
+    if key == node.key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        return node.with_children(_remove(node.left, key), node.right)
+    else:
+        return node.with_children(node.left, _remove(node.right, key))
+
+
+class MerkleProof:
+    """
+    Proof that a key is mapped to a value in a map with a given root hash.
+    The path lists, from the entry up to the root, for each ancestor whether the entry lies in its left subtree,
+    the leaf hash of the ancestor and the hash of its other subtree.
+    """
+
+    def __init__(self, key: bytes, value: bytes, left: bytes, right: bytes,
+                 path: List[Tuple[bool, bytes, bytes]]):
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        self.path = path
+
+    def root(self) -> bytes:
+        """
+        Returns the root hash that is implied by this proof.
+        """
+        h = node_hash(self.left, leaf_hash(self.key, self.value), self.right)
+        for in_left, ancestor_leaf, sibling in self.path:
+            if in_left:
+                h = node_hash(h, ancestor_leaf, sibling)
+            else:
+                h = node_hash(sibling, ancestor_leaf, h)
+        return h
+
+    def verify(self, root_hash: bytes) -> bool:
+        return self.root() == root_hash
+
+
+class MerkleMap:
+    """
+    Persistent sorted map with a Merkle root hash.
+    All update methods return a new map and leave this map unchanged.
+    """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, root: Optional[_Node] = None, size: int = 0):
+        self._root = root
+        self._size = size
+
+    @staticmethod
+    def from_items(items: Iterable[Tuple[bytes, bytes]]) -> "MerkleMap":
+        """
+        Builds the map from the given entries in O(n log n).
+        Keys must be unique.
+        """
+        entries = sorted(items)
+        # Builds the cartesian tree of the sorted entries with the right spine on a stack.
+        spine: List[_Node] = []
+        for key, value in entries:
+            if spine and spine[-1].key == key:
+                raise ValueError("Duplicate key: " + key.hex())
+            node = _Node.__new__(_Node)
+            node.key, node.value, node.priority = key, value, _priority(key)
+            node.leaf, node.left, node.right, node.hash = leaf_hash(key, value), None, None, None
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        root = spine[0] if spine else None
+        # Hashes the nodes bottom up.
+        stack = [(root, False)] if root is not None else []
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node.rehash()
+                continue
+            stack.append((node, True))
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append((child, False))
+        return MerkleMap(root, len(entries))
+
+    def root_hash(self) -> bytes:
+        return _hash_of(self._root)
+
+    def put(self, key: bytes, value: bytes) -> "MerkleMap":
+        """
+        Returns a map that maps the key to the value.
+        """
+        size = self._size if key in self else self._size + 1
+        new = _Node(key, value, _priority(key), leaf_hash(key, value))
+        return MerkleMap(_put(self._root, new), size)
+
+    def remove(self, key: bytes) -> "MerkleMap":
+        """
+        Returns a map without the key. Raises a KeyError if the key is missing.
+        """
+        return MerkleMap(_remove(self._root, key), self._size - 1)
+
+    def update(self, removed: Iterable[bytes] = tuple(), added: Iterable[Tuple[bytes, bytes]] = tuple()) \
+            -> "MerkleMap":
+        """
+        Removes and then adds the given entries.
+        """
+        updated = self
+        for key in removed:
+            updated = updated.remove(key)
+        for key, value in added:
+            updated = updated.put(key, value)
+        return updated
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        node = self._root
+        while node is not None:
+            if key == node.key:
+                return node.value
+            node = node.left if key < node.key else node.right
+        return None
+
+    def prove(self, key: bytes) -> Optional[MerkleProof]:
+        """
+        Returns the membership proof of the key or None if the key is missing.
+        """
+        ancestors: List[Tuple[bool, _Node]] = []
+        node = self._root
+        while node is not None and node.key != key:
+            in_left = key < node.key
+            ancestors.append((in_left, node))
+            node = node.left if in_left else node.right
+        if node is None:
+            return None
+        path = [(in_left, a.leaf, _hash_of(a.right if in_left else a.left)) for in_left, a in reversed(ancestors)]
+        return MerkleProof(key, node.value, _hash_of(node.left), _hash_of(node.right), path)
+
+    def items(self) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Iterates over the entries in the order of their keys.
+        """
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.value
+            node = node.right
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self._size
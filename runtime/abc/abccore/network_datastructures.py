@@ -1,12 +1,15 @@
 import time
 import hashlib
+from typing import Callable, Dict, Iterator, Optional, Union
 
 from abcnet.structures import ItemQualifier, ItemEncodeable, ItemType
 from abcnet.transcriber import Transcriber
 
 from abccore.DAG import Acknowledge
-from abccore.constants import TTL, INTERVAL_TIME
+from abccore.constants import TTL, INTERVAL_TIME, REBROADCAST_TICK, REBROADCAST_WHEEL_SLOTS
 from abccore.agent_crypto import hash_bytes
+from abccore.iblt import IBLT
+from abccore.timer_wheel import TimerWheel
 
 
 def encode_signature(transcriber: Transcriber, signature):
@@ -42,37 +45,66 @@ def encode_wallet(transcriber: Transcriber, wallets):
         transcriber.integer(wallets[i].id, "Wallet ID")
 
 
-def reduce_ttl(item_set: set, debug=False) -> set:
+class RebroadcastSchedule:
     """
-    Reduces the TTL of all items included in the item_set.
-    :param item_set: Set of items which TTL shall be reduced
-    :param debug: debug=True allows testing of the TTL reduction block even if a certain amount of time has not passed.
-    :return: Set of items with the reduced TTL
+    The items of the checklist, each of which is sent TTL times with INTERVAL_TIME seconds in between.
+    Instead of scanning the whole checklist on each call, the next send of every item is scheduled in a timer wheel,
+    so that due() only touches the items that are due. Added items are due right away.
+    Items are identified by their id; adding an item whose id is scheduled already has no effect.
     """
-    return_set = set()
-    to_remove = list()
-    for item in item_set:
+
+    def __init__(self, interval: float = INTERVAL_TIME, clock: Callable[[], float] = time.time):
+        self.interval = float(interval)
+        self.clock = clock
+        self.wheel = TimerWheel(REBROADCAST_TICK, REBROADCAST_WHEEL_SLOTS, clock)
+        self.fresh: Dict[bytes, "HasTimeToLive"] = dict()  # items that were not sent yet
+
+    def add(self, item: "HasTimeToLive"):
         if not isinstance(item, HasTimeToLive):
             raise TypeError('Item has no "ttl"-variable')
+        if item.id not in self:
+            self.fresh[item.id] = item
 
-        if item.time_stamp != None:
-            if debug or time.time() - item.time_stamp > float(INTERVAL_TIME):
-                item.ttl -= 1
-                item.time_stamp = time.time()
-                return_set.add(item)
+    def cancel(self, item_id: bytes) -> bool:
+        """
+        Cancels the resends of the item with the given id. An item that was not sent yet is still sent once.
+        :return: True, if a resend was cancelled
+        """
+        return self.wheel.cancel(item_id) is not None
 
-        else:
+    def due(self) -> set:
+        """
+        Reduces the TTL of the items that are due and schedules their next send, if their TTL is not used up.
+        :return: Set of items to be sent
+        """
+        now = self.clock()
+        items = list(self.fresh.values())
+        self.fresh.clear()
+        items.extend(self.wheel.advance(now))
+
+        return_set = set()
+        for item in items:
             item.ttl -= 1
-            item.time_stamp = time.time()
+            item.time_stamp = now
             return_set.add(item)
+            if item.ttl > 0:
+                self.wheel.schedule(item.id, item, self.interval)
+        return return_set
+
+    def clear(self):
+        self.fresh.clear()
+        self.wheel.clear()
 
-        if item.ttl <= 0:
-            to_remove.append(item)
+    def __contains__(self, item: Union["HasTimeToLive", bytes]) -> bool:
+        item_id = item.id if isinstance(item, HasTimeToLive) else item
+        return item_id in self.fresh or item_id in self.wheel
 
-    for item in to_remove:
-        item_set.remove(item)
+    def __iter__(self) -> Iterator["HasTimeToLive"]:
+        yield from list(self.fresh.values())
+        yield from self.wheel.items()
 
-    return return_set
+    def __len__(self):
+        return len(self.fresh) + len(self.wheel)
 
 
 class HasTimeToLive:
@@ -226,18 +258,8 @@ def gen_uspwr_id(wallet_set, is_req) -> bytes:
     :param wallet_set: Set of wallets we want to generate an ID for
     :return: hash in bytes
     """
-    wallet_list = []
-    for wallet in wallet_set:
-        wallet_list.append(wallet)
-
-    wallet_list.sort()
-    id_string = b""
-    for wallet in wallet_list:
-        id_string = id_string + wallet[0] + bytes(wallet[1])
-
-    id_string = id_string + bytes(is_req)
-
-    return hash_bytes(id_string)
+    id_string = b"".join(origin + bytes(wallet_id) for origin, wallet_id in sorted(wallet_set))
+    return hash_bytes(id_string + bytes(is_req))
 
 
 # Unspent Wallet Request = USPWR
@@ -248,9 +270,12 @@ class NetUSPWR(HasTimeToLive, ItemQualifier, ItemEncodeable):
     If an agent was offline he might has missed new transactions or acknowledgement. Therefore, the agent can send an NetUSPWR to the network with
     the last state of utxos (unspent-transaction-outputs = unspent wallets). All other agents will check if there are new transactions which depend on these utxos.
     If there are new transactions, the newest ones will be send with help of a NetUSPWR as well. The 'is_req' flag defines if a NetUSPWR is a request or an answer.
+    A request may carry a sketch of the nodes the requesting agent already holds. Then only the nodes missing in the
+    sketch are sent back. The sketch is not part of the ID and is encoded after the wallets, so agents that do not know
+    it still parse the request and answer it with all nodes.
     """
 
-    def __init__(self, wallet_set, is_req=0, id=None):
+    def __init__(self, wallet_set, is_req=0, id=None, sketch: Optional[IBLT] = None):
         """
         Initializes all parameters including the TTL necessary for the repeatedly sending.
         :param wallet_set: The acknowledgement we want to prepare for the network
@@ -258,6 +283,7 @@ class NetUSPWR(HasTimeToLive, ItemQualifier, ItemEncodeable):
         0: it is not a request
         1: it is a request
         :param id: If an ID is given (e.g. received over the network) it will be checked if it fits to the acknowledgement
+        :param sketch: IBLT of the IDs of the nodes which depend on the wallets and are already known to the requester
         """
         super(NetUSPWR, self).__init__()
 
@@ -270,6 +296,7 @@ class NetUSPWR(HasTimeToLive, ItemQualifier, ItemEncodeable):
         self.id = id
         self.unspent_wallet_set = wallet_set  # = {(origin1, wallet_id1),...}
         self.is_req = is_req
+        self.sketch = sketch
 
         if id is None:
             self.id = gen_uspwr_id(self.unspent_wallet_set, is_req)
@@ -311,4 +338,6 @@ class NetUSPWR(HasTimeToLive, ItemQualifier, ItemEncodeable):
 
         for wallet in self.unspent_wallet_set:
             transcriber.nested_bytes(wallet[0], "Wallet origin")
-            transcriber.integer(wallet[1], "Wallet ID")
\ No newline at end of file
+            transcriber.integer(wallet[1], "Wallet ID")
+
+        transcriber.nested_bytes(self.sketch.to_bytes() if self.sketch is not None else bytes(), "Sketch")
\ No newline at end of file
@@ -0,0 +1,204 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import abccore.constants as constants
+from abccore.DAG import Node
+from abcnet.structures import PeerContactInfo
+
+logger = logging.getLogger(__name__)
+
+NODE_BASE_SIZE = 64  # Identifier, references and the validator key of a node
+WALLET_SIZE = 80  # Public key, origin, id and value of a wallet
+SIGNATURE_SIZE = 96  # Public key and signature
+
+
+def node_size(node: Node) -> int:
+    """
+    Estimates the number of bytes the network encoding of the node takes.
+    """
+    inputs = getattr(node, "inputs", None) or ()
+    outputs = node.outputs or ()
+    return NODE_BASE_SIZE + WALLET_SIZE * (len(inputs) + len(outputs)) + SIGNATURE_SIZE * len(node.signatures)
+
+
+class Orphan:
+    """
+    A node whose parents are missing in the DAG together with the peer that sent it.
+    """
+
+    def __init__(self, node: Node, peer: Optional[PeerContactInfo], size: int, time_stamp: float):
+        self.node = node
+        self.missing_parents: Set[bytes] = set()
+        self.peer = peer
+        self.size = size
+        self.time_stamp = time_stamp
+
+    @property
+    def peer_id(self) -> Optional[str]:
+        return self.peer.identifier if self.peer is not None else None
+
+
+class OrphanPool:
+    """
+    Holds the nodes whose parents are not known yet, indexed by their missing parents.
+    The pool is bounded by the number of orphans, their estimated size and the number of orphans sent by a single
+    peer. Once a bound is reached, the orphans that were added first are evicted; a peer that exceeds its share
+    only evicts its own orphans. Orphans that wait longer than the maximum age for their parents expire.
+    When a parent arrives, its orphans are released by a single lookup.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None, max_per_peer: int = None,
+                 max_age: float = None, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries if max_entries is not None else constants.ORPHAN_POOL_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else constants.ORPHAN_POOL_MAX_BYTES
+        self.max_per_peer = max_per_peer if max_per_peer is not None else constants.ORPHAN_POOL_MAX_PER_PEER
+        self.max_age = max_age if max_age is not None else constants.ORPHAN_POOL_MAX_AGE
+        self.clock = clock
+
+        self.orphans: "OrderedDict[bytes, Orphan]" = OrderedDict()  # oldest first
+        self.by_parent: Dict[bytes, Set[bytes]] = dict()
+        self.by_peer: Dict[str, "OrderedDict[bytes, None]"] = dict()
+        self.size = 0
+
+        self.added = 0
+        self.released = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def add(self, node: Node, parent: bytes, peer: Optional[PeerContactInfo] = None) -> bool:
+        """
+        Adds the node as orphan of the missing parent.
+        :param node: the orphaned node
+        :param parent: identifier of the missing parent
+        :param peer: the peer that sent the node
+        :return: True, if the node is in the pool afterwards
+        """
+        node_id = node.get_identifier()
+        orphan = self.orphans.get(node_id)
+        if orphan is None:
+            orphan = Orphan(node, peer, node_size(node), self.clock())
+            self.orphans[node_id] = orphan
+            self.size += orphan.size
+            if orphan.peer_id is not None:
+                self.by_peer.setdefault(orphan.peer_id, OrderedDict())[node_id] = None
+            self.added += 1
+        orphan.missing_parents.add(parent)
+        self.by_parent.setdefault(parent, set()).add(node_id)
+        self.__enforce_bounds(orphan.peer_id)
+        return node_id in self.orphans
+
+    def release(self, parent: bytes) -> List[Orphan]:
+        """
+        Removes and returns the orphans of the parent, which just became known.
+        Orphans that miss other parents, too, are removed as well and are expected to be added again if they are
+        still orphaned when they are processed.
+        """
+        node_ids = self.by_parent.pop(parent, None)
+        if not node_ids:
+            return list()
+        released = [self.__remove(node_id) for node_id in node_ids]
+        self.released += len(released)
+        return released
+
+    def remove_parents(self, parents: Iterable[bytes]) -> int:
+        """
+        Drops the orphans of the given parents.
+        :return: number of dropped orphans
+        """
+        dropped = 0
+        for parent in parents:
+            node_ids = self.by_parent.get(parent)
+            if node_ids:
+                for node_id in list(node_ids):
+                    self.__remove(node_id)
+                    dropped += 1
+        return dropped
+
+    def expire(self) -> int:
+        """
+        Drops the orphans that are older than the maximum age.
+        :return: number of dropped orphans
+        """
+        deadline = self.clock() - self.max_age
+        expired = 0
+        while self.orphans:
+            node_id, orphan = next(iter(self.orphans.items()))
+            if orphan.time_stamp > deadline:
+                break
+            self.__remove(node_id)
+            expired += 1
+        if expired:
+            self.expired += expired
+            logger.info("Dropped %d orphans whose parents did not arrive in %s seconds.", expired, self.max_age)
+        return expired
+
+    def missing_parents(self) -> List[bytes]:
+        return list(self.by_parent.keys())
+
+    def parents_by_peer(self) -> Dict[Optional[str], Tuple[Optional[PeerContactInfo], Set[bytes]]]:
+        """
+        Groups the missing parents by the peers that sent their orphans.
+        Parents of orphans with unknown sender are grouped under None.
+        """
+        grouped: Dict[Optional[str], Tuple[Optional[PeerContactInfo], Set[bytes]]] = dict()
+        for orphan in self.orphans.values():
+            _, parents = grouped.setdefault(orphan.peer_id, (orphan.peer, set()))
+            parents.update(orphan.missing_parents)
+        return grouped
+
+    def items(self) -> Iterable[Tuple[bytes, List[Node]]]:
+        """Iterates over the missing parents and their orphans."""
+        return [(parent, [self.orphans[node_id].node for node_id in node_ids])
+                for parent, node_ids in self.by_parent.items()]
+
+    def clear(self):
+        self.orphans.clear()
+        self.by_parent.clear()
+        self.by_peer.clear()
+        self.size = 0
+
+    def peer_count(self, peer_id: str) -> int:
+        return len(self.by_peer.get(peer_id, ()))
+
+    def __contains__(self, node_id: bytes) -> bool:
+        return node_id in self.orphans
+
+    def __len__(self):
+        return len(self.orphans)
+
+    def __str__(self):
+        return (f"OrphanPool(orphans={len(self)}, parents={len(self.by_parent)}, size={self.size}, "
+                f"added={self.added}, released={self.released}, evicted={self.evicted}, expired={self.expired})")
+
+    def __enforce_bounds(self, peer_id: Optional[str]):
+        if peer_id is not None:
+            peer_orphans = self.by_peer.get(peer_id)
+            while peer_orphans and len(peer_orphans) > self.max_per_peer:
+                self.__evict(next(iter(peer_orphans)))
+        while self.orphans and (len(self.orphans) > self.max_entries or self.size > self.max_bytes):
+            self.__evict(next(iter(self.orphans)))
+
+    def __evict(self, node_id: bytes):
+        self.__remove(node_id)
+        self.evicted += 1
+
+    def __remove(self, node_id: bytes) -> Optional[Orphan]:
+        orphan = self.orphans.pop(node_id, None)
+        if orphan is None:
+            return None
+        self.size -= orphan.size
+        for parent in orphan.missing_parents:
+            node_ids = self.by_parent.get(parent)
+            if node_ids is not None:
+                node_ids.discard(node_id)
+                if not node_ids:
+                    del self.by_parent[parent]
+        peer_id = orphan.peer_id
+        if peer_id is not None:
+            peer_orphans = self.by_peer[peer_id]
+            del peer_orphans[node_id]
+            if not peer_orphans:
+                del self.by_peer[peer_id]
+        return orphan
@@ -20,6 +20,9 @@ class Tree:
         self.pending_acks = dict()
         self.pending_txns = dict()
 
+        # Subtrees unlinked by prune(), which are released in slices by release_detached().
+        self.detached = list()
+
     def __contains__(self, item: Node) -> bool:
         """Uses the function search() to check if the identifier of the given Node :param item is in the Tree, and if
         so, it raises an Exception if the item differs from the Node in the Tree.
@@ -214,6 +217,75 @@ class Tree:
 
         return return_value
 
+    def prune(self, keep: set) -> int:
+        """Removes every Node from the Tree whose identifier is not in :param keep. The kept TreeLeafs stay in place.
+        First, the TreeNodes on the paths from the root to the kept TreeLeafs are marked. Every subtree that hangs off
+        these paths holds no kept Node and is unlinked as a whole, so the work depends on the number of kept Nodes and
+        not on the size of the Tree. The unlinked subtrees are queued in detached until release_detached() frees them.
+        The dependend_nodes of the kept TreeLeafs are reduced to kept TreeLeafs.
+        :returns the number of unlinked subtrees.
+        """
+        kept_leaves = []
+        marked = set()  # id() of all TreeNodes on a path to a kept TreeLeaf
+        for code in keep:
+            leaf = self.search(code)
+            if leaf is None:
+                continue
+            kept_leaves.append(leaf)
+            parent = leaf.get_parent()
+            while isinstance(parent, TreeNode) and id(parent) not in marked:
+                marked.add(id(parent))
+                parent = parent.get_parent()
+
+        unlinked = 0
+        stack = [self]
+        while len(stack) > 0:
+            tree_node = stack.pop()
+            for index, child in enumerate(tree_node.childs):
+                if child is None:
+                    continue
+                if isinstance(child, TreeLeaf):
+                    if child.get_node().get_identifier() in keep:
+                        continue
+                elif id(child) in marked:
+                    stack.append(child)
+                    continue
+                tree_node.childs[index] = None
+                self.detached.append(child)
+                unlinked += 1
+
+        for leaf in kept_leaves:
+            leaf.dependend_nodes = {
+                dep_node for dep_node in leaf.get_dependend_nodes() if dep_node.get_node().get_identifier() in keep
+            }
+
+        # The pending Nodes were not kept, their dependencies will be set again once they are added.
+        self.pending_acks.clear()
+        self.pending_txns.clear()
+        self.list_of_checkpoints = [code for code in self.list_of_checkpoints if code in keep]
+
+        logger.debug("Pruned the tree to %d nodes, %d subtrees are detached.", len(kept_leaves), len(self.detached))
+        return unlinked
+
+    def release_detached(self, budget: int) -> int:
+        """Frees up to :param budget TreeNodes and TreeLeafs of the subtrees unlinked by prune(). The references
+        between the freed objects are cut one by one, such that the memory of the old DAG is returned in slices
+        instead of all at once.
+        :returns the number of freed objects.
+        """
+        released = 0
+        while len(self.detached) > 0 and released < budget:
+            tree_node = self.detached.pop()
+            for child in tree_node.childs:
+                if child is not None:
+                    self.detached.append(child)
+            tree_node.childs.clear()
+            tree_node.parent = None
+            if isinstance(tree_node, TreeLeaf):
+                tree_node.dependend_nodes.clear()
+            released += 1
+        return released
+
     def search_predecessors(self, code: bytes):  # not used anymore
         """This function returns a list of DAG.Node.
         :param code: Identifier of a DAG.Node. Its representation in the Tree will be searched and from there all direct
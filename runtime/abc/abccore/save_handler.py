@@ -517,61 +517,43 @@ def write_data(args, password, tree: prefix_tree.Tree, filename):
         orphaned_nodes
     :param password: password in bytes to encrypt the key pairs of the key_set included in args.
     """
-    keyset_bytes = b""
-    for key in args[0]:
-        keyset_bytes = keyset_bytes + parse_to_bytes(key, password)
+    args[0] = __encode_keyset(args[0], password)
+    args[1] = __encode_balance(args[1])
+    args[2] = __encode_last_acks(args[2])
+    args[3] = __encode_ids(args[3])  # stake
+    args[4] = __encode_ids(args[4])  # transaction_history
+    args[5] = __encode_ack_length(args[5])
 
-    args[0] = keyset_bytes
+    __init(filename)
+    if not filename == "genesis.db":
+        __commit_agent_fields(args, filename)
 
-    balance = b""  # balance
-    if len(args[1]) > 0:
-        for wallet in args[1]:
-            balance = balance + bytes(wallet)
+    __encode_tree(tree, filename)
+    __encode_unconfirmed(args[6], args[7], filename)
 
-    args[1] = balance
 
-    last_acks = b""
-    if args[2]:
-        args[2]: dict
-        acks = args[2].items()
+def __encode_keyset(keys, password) -> bytes:
+    return b"".join(parse_to_bytes(key, password) for key in keys)
 
-        for pair in acks:
-            last_acks += pair[0] + pair[1]
-    args[2] = last_acks
 
-    if len(args[3]) > 0:  # stake
-        stake = b""
-        for trans_id in args[3]:
-            stake = stake + trans_id
+def __encode_balance(balance) -> bytes:
+    return b"".join(bytes(wallet) for wallet in balance)
 
-        args[3] = stake
-    else:
-        args[3] = b""
 
-    if len(args[4]) > 0:  # transaction_history
-        transaction_history = args[4]
-        transactions = b""
-        for trans in transaction_history:
-            transactions += trans
+def __encode_last_acks(last_acks: dict) -> bytes:
+    if not last_acks:
+        return b""
+    return b"".join(pk + ack_id for pk, ack_id in last_acks.items())
 
-        args[4] = transactions
-    else:
-        args[4] = b""
-
-    if not args[5]:
-        args[5] = dict()
 
-    ack_length = b""
-    for pair in args[5].items():
-        ack_length += pair[0] + int.to_bytes(pair[1], 32, "big")
-    args[5] = ack_length
+def __encode_ids(ids) -> bytes:
+    return b"".join(ids)
 
-    __init(filename)
-    if not filename == "genesis.db":
-        __commit_agent_fields(args, filename)
 
-    __encode_tree(tree, filename)
-    __encode_unconfirmed(args[6], args[7], filename)
+def __encode_ack_length(ack_length: dict) -> bytes:
+    if not ack_length:
+        return b""
+    return b"".join(pk + int.to_bytes(length, 32, "big") for pk, length in ack_length.items())
 
 
 def update(args, filename):
@@ -727,78 +709,15 @@ def load_data(password, filename):
         if not args:
             raise LookupError
 
-        if len(args[0]) > 0:
-            keyset = set()
-            keyset_bytes = args[0]
-            while len(keyset_bytes) > 0:
-                # check if this key is already in the keyset
-                if keyset_bytes[0:32] not in keyset:
-                    # reconstruct key_set out of the bytestring
-                    output[0].append(parse_from_bytes(keyset_bytes[0:32], password))
-
-                    # add key to sanity set and delete it from keyset_bytes
-                    keyset.add(keyset_bytes[0:32])
-
-                keyset_bytes = keyset_bytes[32:]
-
-        output.append([])  # balance
-        if len(args[1]) > 0:
-
-            balance = args[1]
-            while len(balance) > 0:
-                # balance contains concatenated representations of wallets which the user owns
-                # as long as balance is not empty, search in the previously restored tree for the current wallet
-                try:
-                    trans = tree.search(balance[32:64]).get_node()
-                    restored_wallet = trans.get_outputs()[int.from_bytes(balance[64:66], "big")]
-                    if restored_wallet.get_pk() == balance[0:32]:
-                        output[1].append(restored_wallet)
-                except AttributeError:
-                    print("Failed to match a wallet with the DAG.")
-
-                balance = balance[66:]
-
-        last_acks = dict()
-        # the default of last_ack is the genesis or latest checkpoint
-        if args[2] is not None:
-            # if the user has made an Ack before, his latest_ack is set to that Ack
-
-            saved_last_acks = bytes.fromhex(args[2])
-            while len(saved_last_acks) > 0:
-                last_acks[saved_last_acks[0:32]] = saved_last_acks[32:64]
-                saved_last_acks = saved_last_acks[64:]
-        else:
-            last_acks = None
-        output.append(last_acks)
-
-        output.append([])  # stake
-        if len(args[3]) > 0:
-            # stake is a list of transactions, represented by their identifiers, in which the user gained stake
-            stake = args[3]
-            while len(stake) > 0:
-                output[3].append(stake[0:32])
-                stake = stake[32:]
-
-        output.append([])  # transaction_history
-        if len(args[4]) > 0:
-            # this is a concatenation of Transaction identifiers of those, which the user made himself
-            transaction_history = args[4]
-            while len(transaction_history) > 0:
-                output[4].append(transaction_history[0:32])
-                transaction_history = transaction_history[32:]
-
-        ack_length = dict()
+        output[0].extend(__decode_keyset(args[0], password))
+        output.append(__decode_balance(args[1], tree))
         # the default of last_ack is the genesis or latest checkpoint
-        if args[5] is not None:
-            # if the user has made an Ack before, his latest_ack is set to that Ack
-
-            saved_ack_length = bytes.fromhex(args[5])
-            while len(saved_ack_length) > 0:
-                ack_length[saved_ack_length[0:32]] = int.from_bytes(saved_ack_length[32:64], "big")
-                saved_ack_length = saved_ack_length[64:]
-        else:
-            ack_length = None
-        output.append(ack_length)
+        output.append(__decode_last_acks(args[2]))
+        # stake is a list of transactions, represented by their identifiers, in which the user gained stake
+        output.append(__decode_ids(args[3]))
+        # this is a concatenation of Transaction identifiers of those, which the user made himself
+        output.append(__decode_ids(args[4]))
+        output.append(__decode_ack_length(args[5]))
 
     # sanity check for the case where filename == genesis.db
     while len(output) < 5:
@@ -815,6 +734,139 @@ def load_data(password, filename):
     return output
 
 
+def __decode_keyset(keyset_bytes: bytes, password) -> list:
+    keys = list()
+    keyset = set()
+    while len(keyset_bytes) > 0:
+        # check if this key is already in the keyset
+        if keyset_bytes[0:32] not in keyset:
+            # reconstruct key_set out of the bytestring
+            keys.append(parse_from_bytes(keyset_bytes[0:32], password))
+
+            # add key to sanity set and delete it from keyset_bytes
+            keyset.add(keyset_bytes[0:32])
+
+        keyset_bytes = keyset_bytes[32:]
+    return keys
+
+
+def __decode_balance(balance: bytes, tree: prefix_tree.Tree) -> list:
+    wallets = list()
+    while len(balance) > 0:
+        # balance contains concatenated representations of wallets which the user owns
+        # as long as balance is not empty, search in the previously restored tree for the current wallet
+        try:
+            trans = tree.search(balance[32:64]).get_node()
+            restored_wallet = trans.get_outputs()[int.from_bytes(balance[64:66], "big")]
+            if restored_wallet.get_pk() == balance[0:32]:
+                wallets.append(restored_wallet)
+        except AttributeError:
+            print("Failed to match a wallet with the DAG.")
+
+        balance = balance[66:]
+    return wallets
+
+
+def __decode_last_acks(saved_last_acks: Optional[str]) -> Optional[dict]:
+    if saved_last_acks is None:
+        return None
+    # if the user has made an Ack before, his latest_ack is set to that Ack
+    last_acks = dict()
+    saved_last_acks = bytes.fromhex(saved_last_acks)
+    while len(saved_last_acks) > 0:
+        last_acks[saved_last_acks[0:32]] = saved_last_acks[32:64]
+        saved_last_acks = saved_last_acks[64:]
+    return last_acks
+
+
+def __decode_ids(ids: bytes) -> list:
+    return [ids[i:i + 32] for i in range(0, len(ids), 32)]
+
+
+def __decode_ack_length(saved_ack_length: Optional[str]) -> Optional[dict]:
+    if saved_ack_length is None:
+        return None
+    ack_length = dict()
+    saved_ack_length = bytes.fromhex(saved_ack_length)
+    while len(saved_ack_length) > 0:
+        ack_length[saved_ack_length[0:32]] = int.from_bytes(saved_ack_length[32:64], "big")
+        saved_ack_length = saved_ack_length[64:]
+    return ack_length
+
+
+def write_tenants(tenants: dict, password, filename):
+    """Saves the fields of the identities hosted by an agent to the table tenant_data of the database :param filename,
+    next to the data of the agent and its DAG, which is shared by the identities and saved by write_data(). The rows
+    saved before are replaced, so identities that are no longer hosted are deleted.
+    :param tenants: name of the identity -> [keyset, balance, last_acks, transaction_history, ack_length, ack_policy]
+    :param password: password in bytes to encrypt the key pairs of the identities.
+    """
+    conn = sqlite3.connect(filename)
+    cursor = conn.cursor()
+    cursor.execute("""CREATE TABLE IF NOT EXISTS tenant_data (
+        name text PRIMARY KEY,
+        keyset varbinary,
+        balance varbinary,
+        last_ack text,
+        transaction_history varbinary,
+        ack_length text,
+        ack_policy text
+        )
+    """)
+    cursor.execute("DELETE FROM tenant_data")
+
+    sql = """INSERT INTO tenant_data VALUES (
+        :name,
+        :keyset,
+        :balance,
+        :last_ack,
+        :transaction_history,
+        :ack_length,
+        :ack_policy
+        )"""
+    cursor.executemany(sql, [
+        {
+            'name': name,
+            'keyset': __encode_keyset(args[0], password),
+            'balance': __encode_balance(args[1]),
+            'last_ack': __encode_last_acks(args[2]).hex(),
+            'transaction_history': __encode_ids(args[3]),
+            'ack_length': __encode_ack_length(args[4]).hex(),
+            'ack_policy': args[5]
+        } for name, args in tenants.items()
+    ])
+
+    conn.commit()
+    conn.close()
+
+
+def load_tenants(password, tree: prefix_tree.Tree, filename) -> dict:
+    """Loads the fields of the identities saved by write_tenants(). The wallets of their balance are looked up in the
+    :param tree loaded before.
+    :return: name of the identity -> [keyset, balance, last_acks, transaction_history, ack_length, ack_policy]
+    """
+    conn = sqlite3.connect(filename)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT * FROM tenant_data")
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError:
+        # no identities were saved to this database
+        rows = list()
+    conn.close()
+
+    return {
+        name: [
+            __decode_keyset(keyset, password),
+            __decode_balance(balance, tree),
+            __decode_last_acks(last_ack),
+            __decode_ids(transaction_history),
+            __decode_ack_length(ack_length),
+            ack_policy,
+        ] for name, keyset, balance, last_ack, transaction_history, ack_length, ack_policy in rows
+    }
+
+
 def __load_data(table, only_last_item, filename):
     """Load data of a specific :param table from the database :param filename. The :param only_last_item denotes if the
     output should be only the last row (only_last_item == False), or all rows in the table (only_last_item == True).
@@ -0,0 +1,211 @@
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+import abccore.save_handler as save_handler
+from abccore.agent_data import AgentData, DagStore
+from abccore.DAG import Acknowledge, Checkpoint, Genesis, Node, Transaction
+
+logger = logging.getLogger(__name__)
+
+AckPolicy = Callable[[Transaction], bool]
+
+
+def acknowledge_all(txn: Transaction) -> bool:
+    """The policy of the agent itself: every valid transaction is acknowledged."""
+    return True
+
+
+def acknowledge_none(txn: Transaction) -> bool:
+    """The policy of identities that only hold money, e.g. the users of a custodian."""
+    return False
+
+
+# Name -> policy, to restore the policies of saved identities. Custom policies are registered here by their __name__.
+ACK_POLICIES: Dict[str, AckPolicy] = {policy.__name__: policy for policy in (acknowledge_all, acknowledge_none)}
+
+
+class Tenant:
+    """An identity hosted by an agent: its name, its keys and balance view, and its acknowledgement policy."""
+
+    __slots__ = ("name", "data", "ack_policy")
+
+    def __init__(self, name: str, data: AgentData, ack_policy: AckPolicy):
+        self.name = name
+        self.data = data
+        self.ack_policy = ack_policy
+
+    def __repr__(self):
+        return f"Tenant({self.name}, keys={len(self.data.keyset)}, balance={len(self.data.balance)})"
+
+
+class TenantHost:
+    """
+    Hosts several identities in one agent over the DAG store of the agent. Every identity has its own AgentData with
+    its keys, balance, acks and transaction history, while the tree, the validation results and the save file are
+    shared. Nodes are validated and stored once by the agent; afterwards the host passes them only to the identities
+    that own a key of one of their wallets, which are found in an index from public key to identity. Transactions are
+    acknowledged by every identity whose policy accepts them.
+    """
+
+    def __init__(self, store: DagStore, host: Optional[AgentData] = None):
+        """
+        :param store: DAG store of the agent
+        :param host: data of the agent itself, whose keys cannot be hosted
+        """
+        self.store = store
+        self.host = host
+        self.tenants: Dict[str, Tenant] = dict()
+        self.owners: Dict[bytes, Tenant] = dict()  # public key -> identity owning it
+
+    def add(
+        self,
+        name: str,
+        private_key: Union[None, Ed25519PrivateKey, List[Ed25519PrivateKey]] = None,
+        ack_policy: AckPolicy = acknowledge_all,
+        search_tree_for_now_owned: bool = True,
+    ) -> Tenant:
+        """
+        Adds an identity with the given keys, or a new key if there are none.
+        :param search_tree_for_now_owned: flags, if the DAG shall be searched for the wallets of the identity. Many
+        identities are searched at once with search_tree().
+        :raises ValueError: if the name is taken or a key belongs to another identity
+        """
+        if name in self.tenants:
+            raise ValueError(f"There is already an identity named {name}.")
+        tenant = Tenant(name, AgentData(private_key, self.store), ack_policy)
+        for pk in tenant.data.keyset.pub_keys():
+            if pk in self.owners:
+                raise ValueError(f"The key {pk.hex()} belongs to the identity {self.owners[pk].name}.")
+            if self.host is not None and self.host.is_my_key(pk):
+                raise ValueError(f"The key {pk.hex()} belongs to the agent.")
+        for pk in tenant.data.keyset.pub_keys():
+            self.owners[pk] = tenant
+        self.tenants[name] = tenant
+        if search_tree_for_now_owned:
+            self.search_tree([tenant])
+        logger.info("Added identity %s.", name)
+        return tenant
+
+    def remove(self, name: str) -> Tenant:
+        """Stops hosting the identity. It is deleted from the save file by the next save_data()."""
+        tenant = self.tenants.pop(name)
+        for pk in tenant.data.keyset.pub_keys():
+            del self.owners[pk]
+        return tenant
+
+    def add_keypair(self, name: str) -> bytes:
+        """
+        Adds a new randomly generated keypair to the identity and flags it as its key to use.
+        :return: byte encoded public key of the new key
+        """
+        tenant = self.tenants[name]
+        tenant.data.add_keypair()
+        pk = tenant.data.get_key_to_use()
+        self.owners[pk] = tenant
+        return pk
+
+    def owner_of(self, pb_key: bytes) -> Optional[Tenant]:
+        return self.owners.get(pb_key)
+
+    def search_tree(self, tenants: Optional[Iterable[Tenant]] = None):
+        """Registers the wallets in the DAG that belong to the given identities, or to all identities."""
+        tenants = set(map(id, tenants)) if tenants is not None else None
+        for node in self.store.tree:
+            for tenant in self.__concerned(node):
+                if tenants is None or id(tenant) in tenants:
+                    tenant.data.check_and_register_ownership(node)
+
+    def register_ownership(self, node: Node) -> List[Tenant]:
+        """
+        Updates the balance of the identities whose wallets are spent or created by the validated :param node.
+        :return: the concerned identities
+        """
+        concerned = self.__concerned(node)
+        for tenant in concerned:
+            tenant.data.check_and_register_ownership(node)
+        return concerned
+
+    def acknowledge(self, txn: Transaction) -> List[Acknowledge]:
+        """Acknowledges the validated :param txn with the keys of every identity whose policy accepts it."""
+        acks = list()
+        for tenant in self.tenants.values():
+            if tenant.ack_policy(txn):
+                acks.extend(tenant.data.acknowledge(txn))
+        return acks
+
+    def identities(self) -> List[AgentData]:
+        """The data of the identities, to be transformed together with the agent data at a checkpoint."""
+        return [tenant.data for tenant in self.tenants.values()]
+
+    def save_data(self, user_password, filename="abc_save.db"):
+        """
+        Saves the identities and the names of their policies to the save file of the agent, whose DAG is saved by
+        AgentData.save_data(). The saved identities are replaced, so removed identities are deleted from the file.
+        """
+        save_handler.write_tenants({
+            name: [
+                tenant.data.keyset.keys(),
+                tenant.data.balance,
+                tenant.data.last_acks,
+                tenant.data.transaction_history,
+                tenant.data.ack_length,
+                getattr(tenant.ack_policy, "__name__", ""),
+            ] for name, tenant in self.tenants.items()
+        }, user_password, filename)
+
+    def load_data(self, user_password=None, filename="abc_save.db", ack_policy: AckPolicy = acknowledge_none):
+        """
+        Restores the identities saved to the save file of the agent, after the DAG was loaded. Restored identities get
+        their saved policy if it is registered in ACK_POLICIES, else the :param ack_policy. Identities that are already
+        hosted keep theirs.
+        """
+        for name, args in save_handler.load_tenants(user_password, self.store.tree, filename).items():
+            tenant = self.tenants.get(name)
+            if tenant is None:
+                policy = ACK_POLICIES.get(args[5])
+                if policy is None:
+                    logger.warning("The policy %s of identity %s is unknown, it gets %s.", args[5], name,
+                                   ack_policy.__name__)
+                    policy = ack_policy
+                tenant = self.add(name, args[0], policy, search_tree_for_now_owned=False)
+            data = tenant.data
+            data.balance = args[1]
+            if args[2]:
+                data.last_acks = args[2]
+            data.transaction_history = args[3]
+            if args[4]:
+                data.ack_length = args[4]
+        logger.info("Loaded %d identities.", len(self.tenants))
+
+    def __concerned(self, node: Node) -> List[Tenant]:
+        """The identities that own a key of a wallet of the node, each once."""
+        wallets = list()
+        if isinstance(node, Checkpoint):
+            wallets += node.get_utxos()
+            wallets += node.get_outputs()
+        elif isinstance(node, Genesis):
+            wallets += node.get_outputs()
+        if isinstance(node, Transaction):
+            wallets += node.get_outputs()
+            wallets += node.get_inputs()
+
+        concerned = dict()
+        for wallet in wallets:
+            tenant = self.owners.get(wallet.get_pk())
+            if tenant is not None:
+                concerned[id(tenant)] = tenant
+        return list(concerned.values())
+
+    def __getitem__(self, name: str) -> Tenant:
+        return self.tenants[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tenants
+
+    def __iter__(self) -> Iterator[Tenant]:
+        return iter(list(self.tenants.values()))
+
+    def __len__(self):
+        return len(self.tenants)
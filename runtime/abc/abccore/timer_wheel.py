@@ -0,0 +1,90 @@
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+
+class TimerWheel:
+    """
+    A hashed timing wheel. Time is divided into ticks; an entry due in tick t is kept in slot t modulo the number of
+    slots together with the number of revolutions of the wheel that are left until it is due.
+    Advancing the wheel only visits the slots of the elapsed ticks, so as long as the delays are shorter than the span
+    of the wheel, only due entries are touched. Entries are cancelled by their key in constant time.
+    An entry is never returned before its due time and at most one tick after it.
+    """
+
+    def __init__(self, tick: float, slots: int, clock: Callable[[], float] = time.time):
+        """
+        :param tick: length of a tick in seconds
+        :param slots: number of slots. Delays up to tick * slots need a single revolution.
+        :param clock: returns the current time in seconds
+        """
+        self.tick = tick
+        self.clock = clock
+        self.slots: List[Dict[Hashable, list]] = [dict() for _ in range(slots)]  # key -> [revolutions, item]
+        self.positions: Dict[Hashable, int] = dict()  # key -> slot index
+        self.current_tick = int(clock() // tick)  # last tick whose entries were returned
+
+    def schedule(self, key: Hashable, item: Any, delay: float):
+        """
+        Schedules the item to be due after the delay. An entry with the same key is replaced.
+        """
+        self.cancel(key)
+        due_tick = max(-int(-(self.clock() + delay) // self.tick), self.current_tick + 1)
+        index = due_tick % len(self.slots)
+        revolutions = (due_tick - self.current_tick - 1) // len(self.slots)
+        self.slots[index][key] = [revolutions, item]
+        self.positions[key] = index
+
+    def cancel(self, key: Hashable) -> Optional[Any]:
+        """
+        Removes the entry of the key.
+        :return: the item of the entry or None, if there is no entry for the key
+        """
+        index = self.positions.pop(key, None)
+        if index is None:
+            return None
+        return self.slots[index].pop(key)[1]
+
+    def advance(self, now: Optional[float] = None) -> List[Any]:
+        """
+        Moves the wheel to the current time and removes the entries that became due.
+        :return: the items of the due entries
+        """
+        if now is None:
+            now = self.clock()
+        now_tick = int(now // self.tick)
+        elapsed = now_tick - self.current_tick
+        due = list()
+        if elapsed <= 0:
+            return due
+
+        slot_count = len(self.slots)
+        for tick in range(self.current_tick + 1, self.current_tick + 1 + min(elapsed, slot_count)):
+            slot = self.slots[tick % slot_count]
+            if not slot:
+                continue
+            # number of times the slot passed by since the last advance
+            visits = (now_tick - tick) // slot_count + 1
+            for key, entry in list(slot.items()):
+                if entry[0] < visits:
+                    del slot[key]
+                    del self.positions[key]
+                    due.append(entry[1])
+                else:
+                    entry[0] -= visits
+        self.current_tick = now_tick
+        return due
+
+    def items(self) -> Iterator[Any]:
+        """Iterates over the items of all scheduled entries."""
+        return (entry[1] for slot in self.slots for entry in list(slot.values()))
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self.positions.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.positions
+
+    def __len__(self):
+        return len(self.positions)
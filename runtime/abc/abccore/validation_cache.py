@@ -0,0 +1,74 @@
+import logging
+from collections import OrderedDict
+from typing import Hashable, Optional, Sequence, Tuple
+
+import abccore.constants as constants
+from abccore.DAG import State, Wallet
+
+logger = logging.getLogger(__name__)
+
+Outpoint = Tuple[Wallet, State]  # output wallet in the DAG and its state at the time of the validation
+
+
+class ValidationCache:
+    """
+    Memoizes the results of the transaction and signature validations of the agent.
+    A transaction result is stored together with the output wallets the inputs of the transaction spend and the states
+    these wallets had. The result is dropped as soon as one of these wallets changed its state, so a double spend is
+    still detected. Results that depend on missing parents are not cached.
+    A signature result only depends on the node and its signatures, which are both part of the key.
+    The oldest results are dropped beyond the maximum number of entries.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries if max_entries is not None else constants.VALIDATION_CACHE_MAX_ENTRIES
+        self.transactions: "OrderedDict[bytes, Tuple[bool, Tuple[Outpoint, ...]]]" = OrderedDict()
+        self.signatures: "OrderedDict[Hashable, bool]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get_transaction(self, txn_id: bytes) -> Optional[bool]:
+        """
+        :return: the cached result or None, if there is none or one of its outpoints changed its state
+        """
+        entry = self.transactions.get(txn_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        result, outpoints = entry
+        for wallet, state in outpoints:
+            if wallet.get_state() != state:
+                del self.transactions[txn_id]
+                self.invalidated += 1
+                self.misses += 1
+                return None
+        self.hits += 1
+        return result
+
+    def put_transaction(self, txn_id: bytes, result: bool, outpoints: Sequence[Outpoint]):
+        self.transactions[txn_id] = (result, tuple(outpoints))
+        if len(self.transactions) > self.max_entries:
+            self.transactions.popitem(last=False)
+
+    def get_signature(self, key: Hashable) -> Optional[bool]:
+        result = self.signatures.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put_signature(self, key: Hashable, result: bool):
+        self.signatures[key] = result
+        if len(self.signatures) > self.max_entries:
+            self.signatures.popitem(last=False)
+
+    def clear(self):
+        """Drops all results. Called once the DAG is replaced or pruned."""
+        self.transactions.clear()
+        self.signatures.clear()
+
+    def __str__(self):
+        return (f"ValidationCache(transactions={len(self.transactions)}, signatures={len(self.signatures)}, "
+                f"hits={self.hits}, misses={self.misses}, invalidated={self.invalidated})")
@@ -321,11 +321,7 @@ class LocalMessageHandler(AgentInterface):
         mode = data["mode"]
 
         if mode == "Transaction":
-            val_key = (
-                self.a_data.keyset[self.a_data.key_to_use]
-                .public_key()
-                .public_bytes(encoding=Encoding.Raw, format=PublicFormat.Raw)
-            )
+            val_key = self.a_data.keyset.active_pub_key()
         else:  # mode == "Delegation"
             val_key = bytes.fromhex(data["validator"])
 
@@ -7,14 +7,14 @@ from abccore.network_datastructures import (
     NetAcknowledgement,
     Transcriber,
     NetUSPWR,
-    reduce_ttl,
+    RebroadcastSchedule,
 )
 from abccore.agent_crypto import pub_key_to_bytes
 from tests.tree_test import Generator
 from abcnet.structures import ItemType
 from abcnet.transcriber import Parser
 from abccore.genesis_key_generator import load_genesis_keys
-from abccore.constants import TTL
+from abccore.constants import TTL, INTERVAL_TIME
 
 from cryptography.hazmat.primitives.asymmetric.ed25519 import (
     Ed25519PrivateKey,
@@ -129,14 +129,19 @@ class TestAgentNetwork(unittest.TestCase):
 
     def test_ttl(self):
         item_list = list()
+        now = [1000.0]
+        schedule = RebroadcastSchedule(clock=lambda: now[0])
         generator = Generator()
         generator.gen_genesis()
         for i in range(0, TTL):
             item_list.append(NetTransaction(generator.gen_transaction()))
-            reduce_ttl(item_list, debug=True)
+            schedule.add(item_list[-1])
+            schedule.due()
+            now[0] += INTERVAL_TIME
 
-        for i in range(0, TTL - 1):
-            assert item_list[i].ttl == i + 1
+        for i in range(0, TTL):
+            assert item_list[i].ttl == i
+        assert item_list[0] not in schedule
 
     def test_create_transaction(self):
         pass
@@ -0,0 +1,97 @@
+import os
+import time
+import unittest
+from decimal import Decimal
+
+from abccore.confirmation_tracker import ConfirmationTracker
+
+VALIDATORS = 100
+TRANSACTIONS = 50000
+
+
+class BenchmarkConfirmation(unittest.TestCase):
+    """
+    100 validators with equal stake acknowledge 50k transactions.
+    Compares the stake counting of the pending transactions list with the confirmation tracker. Both drop a
+    transaction once it is confirmed, like the agent does, so later acks only miss the pending transactions.
+    """
+
+    def setUp(self):
+        self.validators = [os.urandom(32) for _ in range(VALIDATORS)]
+        self.stakes = {pk: Decimal(1) for pk in self.validators}
+        self.txn_ids = [os.urandom(32) for _ in range(TRANSACTIONS)]
+
+    def stake_sum(self):
+        return sum(self.stakes.values(), Decimal(0))
+
+    def delegated_stake(self, pk):
+        return self.stakes.get(pk, Decimal(0))
+
+    def test_benchmark(self):
+        # Counting as done by the pending transactions dict:
+        threshold = self.stake_sum() * (Decimal(2) / Decimal(3))
+        start = time.perf_counter()
+        pending = {txn_id: [None, Decimal(0)] for txn_id in self.txn_ids}
+        confirmed = 0
+        for txn_id in self.txn_ids:
+            for pk in self.validators:
+                pending_trans = pending.get(txn_id)
+                if pending_trans is None:
+                    continue
+                stake = pending_trans[1] + self.delegated_stake(pk)
+                pending[txn_id] = [pending_trans[0], stake]
+                if stake >= threshold:
+                    del pending[txn_id]
+                    confirmed += 1
+        list_time = time.perf_counter() - start
+        self.assertEqual(confirmed, TRANSACTIONS)
+
+        start = time.perf_counter()
+        pending = {txn_id: [None, Decimal(0)] for txn_id in self.txn_ids}
+        tracker = ConfirmationTracker(self.delegated_stake, threshold)
+
+        def confirm(txn_id, stake):
+            del pending[txn_id]
+            tracker.forget(txn_id)
+
+        tracker.add_listener(confirm)
+        for txn_id in self.txn_ids:
+            for pk in self.validators:
+                if txn_id in pending:
+                    tracker.add_ack(txn_id, pk)
+        tracker_time = time.perf_counter() - start
+        self.assertFalse(pending)
+        self.assertEqual(len(tracker), 0)
+
+        # Keys without stake don't get a bit and don't create tallies.
+        spammers = [os.urandom(32) for _ in range(VALIDATORS)]
+        indexed = len(tracker.validators)
+        start = time.perf_counter()
+        for txn_id in self.txn_ids:
+            for pk in spammers:
+                tracker.add_ack(txn_id, pk)
+        spam_time = time.perf_counter() - start
+        self.assertEqual(len(tracker.validators), indexed)
+        self.assertEqual(tracker.unstaked, VALIDATORS * TRANSACTIONS)
+        self.assertEqual(len(tracker), 0)
+
+        # Every validator sends its ack a second time, the list would count it twice.
+        tracker = ConfirmationTracker(self.delegated_stake)
+        for txn_id in self.txn_ids:
+            for pk in self.validators:
+                tracker.add_ack(txn_id, pk)
+        start = time.perf_counter()
+        for txn_id in self.txn_ids:
+            for pk in self.validators:
+                tracker.add_ack(txn_id, pk)
+        duplicate_time = time.perf_counter() - start
+        self.assertEqual(tracker.duplicates, VALIDATORS * TRANSACTIONS)
+
+        print(f"{VALIDATORS} validators acking {TRANSACTIONS} transactions: "
+              f"pending list {list_time:.2f} s, tracker {tracker_time:.2f} s, "
+              f"ignoring {VALIDATORS * TRANSACTIONS} acks without stake {spam_time:.2f} s, "
+              f"rejecting {VALIDATORS * TRANSACTIONS} duplicates {duplicate_time:.2f} s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import unittest
+from decimal import Decimal
+
+from abccore.confirmation_tracker import ConfirmationTracker
+
+
+class TestConfirmationTracker(unittest.TestCase):
+    def setUp(self):
+        self.validators = [os.urandom(32) for _ in range(6)]
+        self.stakes = {pk: Decimal(i + 1) for i, pk in enumerate(self.validators)}
+        self.lookups = 0
+        self.confirmed = []
+        self.tracker = ConfirmationTracker(self.stake_of, Decimal(10))
+        self.tracker.add_listener(lambda txn_id, stake: self.confirmed.append((txn_id, stake)))
+
+    def stake_of(self, pk):
+        self.lookups += 1
+        return self.stakes.get(pk, Decimal(0))
+
+    def test_confirmation(self):
+        txn_id = os.urandom(32)
+        for pk in self.validators[:3]:
+            self.assertTrue(self.tracker.add_ack(txn_id, pk))
+        self.assertEqual(self.tracker.stake(txn_id), Decimal(6))
+        self.assertFalse(self.tracker.is_confirmed(txn_id))
+        self.assertTrue(self.tracker.add_ack(txn_id, self.validators[3]))
+        self.assertTrue(self.tracker.is_confirmed(txn_id))
+        self.assertEqual(self.confirmed, [(txn_id, Decimal(10))])
+
+        # Later acks don't confirm the transaction again.
+        self.tracker.add_ack(txn_id, self.validators[4])
+        self.assertEqual(len(self.confirmed), 1)
+        self.assertEqual(self.tracker.ack_count(txn_id), 5)
+
+        self.tracker.forget(txn_id)
+        self.assertEqual(self.tracker.stake(txn_id), Decimal(0))
+        self.assertEqual(len(self.tracker), 0)
+
+    def test_duplicates(self):
+        txn_id = os.urandom(32)
+        self.assertTrue(self.tracker.add_ack(txn_id, self.validators[5]))
+        self.assertFalse(self.tracker.add_ack(txn_id, self.validators[5]))
+        self.assertEqual(self.tracker.stake(txn_id), Decimal(6))
+        self.assertEqual(self.tracker.duplicates, 1)
+        self.assertTrue(self.tracker.has_acked(txn_id, self.validators[5]))
+        self.assertFalse(self.tracker.has_acked(txn_id, self.validators[0]))
+
+    def test_stake_is_cached_per_checkpoint(self):
+        for _ in range(20):
+            self.tracker.add_ack(os.urandom(32), self.validators[0])
+        self.assertEqual(self.lookups, 1)
+
+        self.stakes[self.validators[0]] = Decimal(20)
+        self.tracker.reset(Decimal(15))
+        txn_id = os.urandom(32)
+        self.tracker.add_ack(txn_id, self.validators[0])
+        self.assertEqual(self.lookups, 2)
+        self.assertTrue(self.tracker.is_confirmed(txn_id))
+
+    def test_bounded(self):
+        tracker = ConfirmationTracker(self.stake_of, Decimal(10), max_entries=5)
+        txn_ids = [os.urandom(32) for _ in range(8)]
+        for txn_id in txn_ids:
+            tracker.add_ack(txn_id, self.validators[0])
+        self.assertEqual(list(tracker.tallies), txn_ids[3:])
+
+    def test_dropped_tally_is_rebuilt(self):
+        # The acks that were counted, as kept in the pending_acks of the tree.
+        counted = {}
+        tracker = ConfirmationTracker(self.stake_of, Decimal(10), max_entries=2,
+                                      acks_of=lambda txn_id: counted.get(txn_id, ()))
+        tracker.add_listener(lambda txn_id, stake: self.confirmed.append((txn_id, stake)))
+        txn_id = os.urandom(32)
+        for pk in self.validators[:3]:
+            self.assertTrue(tracker.add_ack(txn_id, pk))
+            counted.setdefault(txn_id, []).append(pk)
+        for _ in range(2):
+            tracker.add_ack(os.urandom(32), self.validators[0])
+        self.assertNotIn(txn_id, tracker.tallies)
+
+        self.assertFalse(tracker.add_ack(txn_id, self.validators[1]))
+        self.assertEqual(tracker.stake(txn_id), Decimal(6))
+        self.assertTrue(tracker.add_ack(txn_id, self.validators[3]))
+        self.assertEqual(self.confirmed, [(txn_id, Decimal(10))])
+
+    def test_keys_without_stake_are_ignored(self):
+        txn_id = os.urandom(32)
+        for _ in range(10):
+            self.assertTrue(self.tracker.add_ack(txn_id, os.urandom(32)))
+        self.assertEqual(self.tracker.unstaked, 10)
+        self.assertFalse(self.tracker.validators)
+        self.assertEqual(len(self.tracker), 0)
+        self.assertTrue(self.tracker.add_ack(txn_id, self.validators[0]))
+        self.assertEqual(list(self.tracker.validators), [self.validators[0]])
+        self.assertEqual(self.tracker.ack_count(txn_id), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from abcnet.structures import ItemType
+from abcnet.transcriber import Parser, Transcriber
+
+from abccore.agent_items_parser import AgentItemsParser
+from abccore.iblt import IBLT
+from abccore.network_datastructures import NetUSPWR
+
+
+class TestIBLT(unittest.TestCase):
+    def test_difference(self):
+        shared = [os.urandom(32) for _ in range(5000)]
+        only_a = {os.urandom(32) for _ in range(40)}
+        only_b = {os.urandom(32) for _ in range(10)}
+        a = IBLT.of(shared + list(only_a), 150)
+        b = IBLT.of(shared + list(only_b), 150)
+        self.assertEqual(a.subtract(b).decode(), (only_a, only_b))
+        self.assertEqual(b.subtract(a).decode(), (only_b, only_a))
+
+    def test_equal_sets(self):
+        keys = [os.urandom(32) for _ in range(100)]
+        self.assertEqual(IBLT.of(keys, 30).subtract(IBLT.of(reversed(keys), 30)).decode(), (set(), set()))
+
+    def test_too_large_difference(self):
+        a = IBLT.of([os.urandom(32) for _ in range(200)], 30)
+        self.assertIsNone(a.subtract(IBLT(30)).decode())
+
+    def test_encoding(self):
+        table = IBLT.of([os.urandom(32) for _ in range(20)], 30)
+        table.remove(os.urandom(32))
+        decoded = IBLT.from_bytes(table.to_bytes())
+        self.assertEqual((decoded.counts, decoded.keys, decoded.checks), (table.counts, table.keys, table.checks))
+        with self.assertRaises(ValueError):
+            IBLT.from_bytes(bytes(10))
+        with self.assertRaises(ValueError):
+            IBLT(3).add(bytes(16))
+
+    def test_uspwr_sketch(self):
+        wallets = {(os.urandom(32), i) for i in range(3)}
+        sketch = IBLT.of([os.urandom(32) for _ in range(10)], 96)
+        for uspwr in (NetUSPWR(wallets, is_req=1), NetUSPWR(wallets, is_req=1, sketch=sketch)):
+            transcriber = Transcriber()
+            uspwr.encode(transcriber)
+            decoded: NetUSPWR = AgentItemsParser().decode_item(
+                ItemType.UNSPENT_WALLET_COLLECTION, Parser(transcriber.msg.parts[0])
+            )
+            self.assertEqual(decoded.id, uspwr.id)
+            self.assertEqual(decoded.unspent_wallet_set, wallets)
+            self.assertEqual(decoded.sketch is None, uspwr.sketch is None)
+        self.assertEqual(decoded.sketch.keys, sketch.keys)
+
+        # Requests of agents without sketches end after the wallets
+        transcriber = Transcriber()
+        transcriber.nested_bytes(NetUSPWR(set(), is_req=1).id)
+        transcriber.integer(1)
+        transcriber.integer(0)
+        decoded = AgentItemsParser().decode_item(ItemType.UNSPENT_WALLET_COLLECTION, Parser(transcriber.msg.parts[0]))
+        self.assertIsNone(decoded.sketch)
+
+
+if __name__ == "__main__":
+    unittest.main()
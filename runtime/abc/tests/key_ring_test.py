@@ -0,0 +1,84 @@
+import time
+import unittest
+
+from abccore.agent_crypto import gen_key, pub_key_to_bytes, auth_validate
+from abccore.agent_data import AgentData
+from abccore.key_ring import KeyRing
+
+
+class TestKeyRing(unittest.TestCase):
+    def setUp(self):
+        self.keys = [gen_key() for _ in range(5)]
+        self.pub_keys = [pub_key_to_bytes(key.public_key()) for key in self.keys]
+        self.ring = KeyRing(self.keys)
+
+    def test_owns(self):
+        for pk, key in zip(self.pub_keys, self.keys):
+            self.assertTrue(self.ring.owns(pk))
+            self.assertIs(self.ring.signer_for(pk), key)
+        other = pub_key_to_bytes(gen_key().public_key())
+        self.assertFalse(self.ring.owns(other))
+        self.assertIsNone(self.ring.signer_for(other))
+        self.assertEqual(self.ring.pub_keys(), self.pub_keys)
+
+        # Adding a key twice has no effect.
+        self.ring.add(self.keys[2])
+        self.assertEqual(len(self.ring), 5)
+
+    def test_rotate(self):
+        self.assertEqual(self.ring.active_pub_key(), self.pub_keys[0])
+        new_pk = self.ring.rotate(gen_key())
+        self.assertEqual(self.ring.active_pub_key(), new_pk)
+        self.assertEqual(self.ring.active_index, 5)
+        # The old keys are still owned.
+        self.assertTrue(all(self.ring.owns(pk) for pk in self.pub_keys))
+
+        self.ring.rotate(self.keys[1])
+        self.assertEqual(self.ring.active_pub_key(), self.pub_keys[1])
+        self.assertEqual(len(self.ring), 6)
+
+    def test_signing(self):
+        messages = [bytes([i]) * 32 for i in range(4)]
+        signatures = self.ring.sign_batch(messages, self.pub_keys[3])
+        for data, signature in zip(messages, signatures):
+            self.assertEqual(signature[0], self.pub_keys[3])
+            self.assertTrue(auth_validate(data, signature))
+        self.assertEqual(self.ring.sign(b"data")[0], self.pub_keys[0])
+
+        other = pub_key_to_bytes(gen_key().public_key())
+        signatures = self.ring.sign_with_all(b"data", [self.pub_keys[4], other, self.pub_keys[4], self.pub_keys[0]])
+        self.assertEqual([s[0] for s in signatures], [self.pub_keys[4], self.pub_keys[0]])
+        self.assertTrue(all(auth_validate(b"data", s) for s in signatures))
+        self.assertEqual(len(self.ring.sign_with_all(b"data")), 5)
+
+    def test_agent_data(self):
+        a_data = AgentData(self.keys[0])
+        a_data.keyset = self.keys
+        self.assertIsInstance(a_data.keyset, KeyRing)
+        self.assertTrue(a_data.is_my_key(self.pub_keys[4]))
+        self.assertEqual(a_data.get_pub_key_bytes(), self.pub_keys)
+        a_data.key_to_use = 2
+        self.assertEqual(a_data.get_key_to_use(), self.pub_keys[2])
+
+    def test_benchmark_is_my_key(self):
+        keys = [gen_key() for _ in range(200)]
+        pub_keys = [pub_key_to_bytes(key.public_key()) for key in keys]
+        checks = pub_keys[::10] * 10
+
+        start = time.perf_counter()
+        for pk in checks:
+            any(pub_key_to_bytes(key.public_key()) == pk for key in keys)
+        loop_time = time.perf_counter() - start
+
+        ring = KeyRing(keys)
+        start = time.perf_counter()
+        for pk in checks:
+            ring.owns(pk)
+        ring_time = time.perf_counter() - start
+        print(f"{len(checks)} ownership checks with {len(keys)} keys: loop {loop_time * 1000:.1f} ms, "
+              f"key ring {ring_time * 1000:.3f} ms")
+        self.assertLess(ring_time, loop_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
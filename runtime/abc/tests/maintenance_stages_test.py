@@ -0,0 +1,74 @@
+import time
+import unittest
+
+from abccore.maintenance_stages import MaintenanceStage, MaintenancePipeline
+
+
+class TestMaintenanceStages(unittest.TestCase):
+    def setUp(self):
+        self.handled = []
+
+    def stage(self, name, item_budget=10, time_budget=1.0, max_queue=100, cost=0.0):
+        def handler(key, item):
+            if cost:
+                time.sleep(cost)
+            self.handled.append((name, key))
+
+        return MaintenanceStage(name, handler, item_budget, time_budget, max_queue)
+
+    def test_item_budget(self):
+        stage = self.stage("txn", item_budget=3)
+        for i in range(7):
+            stage.admit(i, i)
+        self.assertEqual(stage.run(), 3)
+        self.assertEqual(stage.stats.depth, 4)
+        self.assertEqual(stage.run(), 3)
+        self.assertEqual(stage.run(), 1)
+        self.assertEqual([key for _, key in self.handled], list(range(7)))
+        self.assertEqual((stage.stats.runs, stage.stats.processed, stage.stats.depth), (3, 7, 0))
+
+    def test_time_budget(self):
+        stage = self.stage("txn", item_budget=100, time_budget=0.005, cost=0.002)
+        for i in range(20):
+            stage.admit(i)
+        processed = stage.run()
+        self.assertGreaterEqual(processed, 1)
+        self.assertLess(processed, 20)
+        self.assertEqual(stage.stats.depth, 20 - processed)
+        self.assertGreater(stage.stats.service_time, 0.004)
+
+    def test_bounded_queue(self):
+        stage = self.stage("txn", max_queue=5)
+        admitted = [stage.admit(i) for i in range(8)]
+        self.assertEqual(admitted, [True] * 5 + [False] * 3)
+        # Items already queued are replaced.
+        self.assertTrue(stage.admit(2, "new"))
+        self.assertEqual(stage.queue[2], "new")
+        self.assertEqual((stage.stats.admitted, stage.stats.dropped, stage.stats.max_depth), (5, 3, 5))
+
+    def test_txn_flood_does_not_starve_acks(self):
+        acks = self.stage("ack", item_budget=50)
+        txns = self.stage("txn", item_budget=10, time_budget=0.01, max_queue=1000, cost=0.001)
+        pipeline = MaintenancePipeline([acks, txns])
+        for step in range(5):
+            for i in range(200):
+                txns.admit(("txn", step, i))
+            for i in range(5):
+                acks.admit(("ack", step, i))
+            self.handled.clear()
+            start = time.perf_counter()
+            pipeline.run()
+            step_time = time.perf_counter() - start
+            # All acks of the step are processed before any transaction.
+            self.assertEqual([name for name, _ in self.handled[:5]], ["ack"] * 5)
+            self.assertEqual(len(acks), 0)
+            self.assertLess(step_time, 0.1)
+        self.assertEqual(pipeline.backlog(), len(txns))
+        self.assertGreater(len(txns), 0)
+        report = pipeline.report()
+        self.assertIn("ack: depth=0", report)
+        self.assertIn("txn: depth=", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
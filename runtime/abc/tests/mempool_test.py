@@ -0,0 +1,124 @@
+import os
+import unittest
+from decimal import Decimal
+
+from abccore.agent_crypto import gen_key, pub_key_to_bytes
+from abccore.agent_data import AgentData
+from abccore.DAG import Genesis, Transaction, Wallet, calculate_fee
+from abccore.mempool import Mempool, REJECTED_FULL, REJECTED_INVALID, REJECTED_SENDER_QUOTA, transaction_fee
+from abccore.outputs_helper import outputs_helper
+
+
+def make_txn(value, sender: bytes = None) -> Transaction:
+    """Creates a transaction that pays the fee of the given value from a single input of the sender."""
+    if sender is None:
+        sender = os.urandom(32)
+    inputs = [Wallet(sender, Decimal(10000), os.urandom(32), 0)]
+    outputs = outputs_helper(inputs, [Wallet(os.urandom(32), Decimal(value))])
+    return Transaction(inputs, outputs, None)
+
+
+class TestMempool(unittest.TestCase):
+    def test_fee(self):
+        txn = make_txn(100)
+        self.assertEqual(transaction_fee(txn), calculate_fee(Decimal(100)))
+
+    def test_acknowledge_by_fee_rate(self):
+        pool = Mempool(max_entries=10)
+        txns = [make_txn(value) for value in (10, 500, 50, 200)]
+        for txn in txns:
+            self.assertEqual(pool.admit(txn), (True, []))
+        ordered = pool.next_to_acknowledge(3)
+        self.assertEqual([transaction_fee(txn) for txn in ordered],
+                         [calculate_fee(Decimal(value)) for value in (500, 200, 50)])
+        self.assertEqual(pool.next_to_acknowledge(3), [txns[0]])
+        self.assertEqual(pool.next_to_acknowledge(3), [])
+        # handed out txns leave the mempool
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.size, 0)
+        self.assertEqual(pool.acknowledged, 4)
+
+    def test_eviction(self):
+        pool = Mempool(max_entries=3)
+        low, mid, high = make_txn(10), make_txn(100), make_txn(1000)
+        pool.admit(mid)
+        pool.admit(low)
+        pool.admit(high)
+
+        # A transaction with a lower fee rate than all others is rejected
+        admitted, evicted = pool.admit(make_txn(1))
+        self.assertFalse(admitted)
+        self.assertEqual(pool.rejected[REJECTED_FULL], 1)
+
+        # A better one evicts the worst unacknowledged transaction
+        better = make_txn(50)
+        admitted, evicted = pool.admit(better)
+        self.assertTrue(admitted)
+        self.assertEqual([entry.txn for entry in evicted], [low])
+        self.assertNotIn(low.get_identifier(), pool)
+
+        # Acknowledged transactions free their slots
+        self.assertEqual(pool.next_to_acknowledge(2), [high, mid])
+        self.assertTrue(pool.admit(make_txn(900))[0])
+        self.assertTrue(pool.admit(make_txn(800))[0])
+        self.assertEqual(pool.evicted, 1)
+
+        # Local transactions are always admitted and never evicted
+        local = make_txn(1)
+        admitted, evicted = pool.admit(local, local=True)
+        self.assertTrue(admitted)
+        self.assertEqual([entry.txn for entry in evicted], [better])
+        admitted, evicted = pool.admit(make_txn(1000))
+        self.assertEqual(len(evicted), 1)
+        self.assertNotEqual(evicted[0].txn, local)
+        self.assertIn(local.get_identifier(), pool)
+        self.assertEqual(len(pool), 3)
+
+    def test_byte_limit(self):
+        pool = Mempool(max_bytes=1000)
+        while pool.admit(make_txn(100))[0]:
+            pass
+        self.assertGreater(len(pool), 0)
+        self.assertLessEqual(pool.size, 1000)
+        self.assertEqual(pool.rejected[REJECTED_FULL], 1)
+
+    def test_sender_quota(self):
+        pool = Mempool(max_per_sender=2)
+        sender = os.urandom(32)
+        self.assertTrue(pool.admit(make_txn(10, sender))[0])
+        self.assertTrue(pool.admit(make_txn(20, sender))[0])
+        self.assertFalse(pool.admit(make_txn(30, sender))[0])
+        self.assertEqual(pool.rejected[REJECTED_SENDER_QUOTA], 1)
+        self.assertTrue(pool.admit(make_txn(30))[0])
+
+        # Removed transactions free the quota of their sender
+        txn = make_txn(40, sender)
+        pool.remove(next(iter(pool.by_sender[sender])))
+        self.assertTrue(pool.admit(txn)[0])
+        self.assertEqual(pool.removed, 1)
+
+    def test_inflated_inputs_cannot_evict(self):
+        keys = [gen_key(), gen_key()]
+        pks = [pub_key_to_bytes(key.public_key()) for key in keys]
+        genesis = Genesis([Wallet(pk, Decimal(100)) for pk in pks])
+        agent = AgentData()
+        agent.tree.add(genesis.get_identifier(), genesis)
+        honest, forger = AgentData(keys[0]), AgentData(keys[1])
+        honest.check_and_register_ownership(genesis)
+        # The forger claims its genesis output holds far more than it does and pays a fee it cannot afford
+        forger.balance = [Wallet(pks[1], Decimal(1000000), genesis.get_identifier(), 1)]
+        valid = honest.send_money(pks[1], Decimal(10), pks[0])
+        forged = forger.send_money(pks[0], Decimal(500000), pks[1])
+        self.assertTrue(agent.validate_signature(forged))
+        self.assertGreater(transaction_fee(forged), transaction_fee(valid))
+
+        pool = Mempool(max_entries=1, validate=agent.validate_trans)
+        self.assertTrue(pool.admit(valid)[0])
+        self.assertEqual(pool.admit(forged), (False, []))
+        self.assertEqual(pool.rejected[REJECTED_INVALID], 1)
+        self.assertIn(valid.get_identifier(), pool)
+        self.assertEqual(pool.evicted, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
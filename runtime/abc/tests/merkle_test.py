@@ -0,0 +1,139 @@
+import random
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from abccore import constants
+from abccore.DAG import Wallet, Checkpoint, checkpoint_hash_version, verify_utxo_proof
+from abccore.merkle import MerkleMap, EMPTY_HASH
+
+
+def random_key(rnd: random.Random) -> bytes:
+    return rnd.getrandbits(64).to_bytes(8, "big")
+
+
+def wallet(nr: int, value=None) -> Wallet:
+    return Wallet(b"owner-%d" % (nr % 7), Decimal(nr + 1) if value is None else value, b"txn-%08d" % (nr // 3), nr % 3)
+
+
+def checkpoint(utxos, stake, prev=None, hash_version=None) -> Checkpoint:
+    return Checkpoint(b"origin", 1, 0.0, 0, list(utxos), [Wallet(b"miner", Decimal(1))], dict(stake), len(utxos),
+                      sum(stake.values()), Decimal(0), b"miner", prev_checkpoint=prev, hash_version=hash_version)
+
+
+class TestMerkleMap(unittest.TestCase):
+
+    def test_incremental_matches_rebuild(self):
+        """
+        Property: after any sequence of puts and removes the root equals the root of a full rebuild.
+        """
+        for seed in range(20):
+            rnd = random.Random(seed)
+            reference = dict()
+            merkle_map = MerkleMap()
+            for _ in range(300):
+                if reference and rnd.random() < 0.4:
+                    key = rnd.choice(list(reference))
+                    del reference[key]
+                    merkle_map = merkle_map.remove(key)
+                else:
+                    key = rnd.choice(list(reference)) if reference and rnd.random() < 0.2 else random_key(rnd)
+                    value = random_key(rnd)
+                    reference[key] = value
+                    merkle_map = merkle_map.put(key, value)
+                rebuilt = MerkleMap.from_items(reference.items())
+                self.assertEqual(merkle_map.root_hash(), rebuilt.root_hash())
+                self.assertEqual(len(merkle_map), len(reference))
+            self.assertEqual(list(merkle_map.items()), sorted(reference.items()))
+
+    def test_history_independent(self):
+        rnd = random.Random(1)
+        items = [(random_key(rnd), random_key(rnd)) for _ in range(500)]
+        shuffled = list(items)
+        rnd.shuffle(shuffled)
+        merkle_map = MerkleMap()
+        for key, value in shuffled:
+            merkle_map = merkle_map.put(key, value)
+        self.assertEqual(merkle_map.root_hash(), MerkleMap.from_items(items).root_hash())
+        self.assertEqual(MerkleMap().root_hash(), EMPTY_HASH)
+
+    def test_persistence(self):
+        old = MerkleMap.from_items([(b"a", b"1"), (b"b", b"2")])
+        old_root = old.root_hash()
+        new = old.put(b"c", b"3").remove(b"a")
+        self.assertEqual(old.root_hash(), old_root)
+        self.assertEqual(list(old.items()), [(b"a", b"1"), (b"b", b"2")])
+        self.assertEqual(list(new.items()), [(b"b", b"2"), (b"c", b"3")])
+        self.assertRaises(KeyError, new.remove, b"a")
+        self.assertRaises(ValueError, MerkleMap.from_items, [(b"a", b"1"), (b"a", b"2")])
+
+    def test_membership_proofs(self):
+        rnd = random.Random(2)
+        items = dict((random_key(rnd), random_key(rnd)) for _ in range(1000))
+        merkle_map = MerkleMap.from_items(items.items())
+        root = merkle_map.root_hash()
+        for key, value in list(items.items())[:100]:
+            proof = merkle_map.prove(key)
+            self.assertEqual(proof.value, value)
+            self.assertTrue(proof.verify(root))
+            proof.value = b"forged"
+            self.assertFalse(proof.verify(root))
+        self.assertIsNone(merkle_map.prove(b"missing"))
+
+
+@patch("abccore.constants.CKPT_HASH_V2_HEIGHT", 1)
+class TestCheckpointCommitment(unittest.TestCase):
+
+    def test_derived_id_matches_full_rebuild(self):
+        rnd = random.Random(3)
+        utxos = [wallet(i) for i in range(200)]
+        stake = {b"owner-%d" % i: Decimal(i + 1) for i in range(7)}
+        prev = checkpoint(utxos, stake)
+        for step in range(10):
+            spent = set(rnd.sample(range(len(utxos)), 20))
+            utxos = [w for i, w in enumerate(utxos) if i not in spent] + \
+                    [wallet(1000 * (step + 1) + i) for i in range(25)]
+            stake = dict(stake)
+            stake[b"owner-%d" % rnd.randrange(9)] = Decimal(rnd.randrange(1, 100))
+            del stake[rnd.choice(list(stake))]
+            derived = checkpoint(utxos, stake, prev=prev)
+            rebuilt = checkpoint(list(reversed(utxos)), stake)
+            self.assertEqual(derived.id, rebuilt.id)
+            self.assertEqual(derived.utxo_root(), rebuilt.utxo_root())
+            prev = derived
+
+    def test_changed_value_changes_id(self):
+        utxos = [wallet(i) for i in range(10)]
+        prev = checkpoint(utxos, {b"a": Decimal(1)})
+        changed = [wallet(0, Decimal(1000))] + utxos[1:]
+        derived = checkpoint(changed, {b"a": Decimal(1)}, prev=prev)
+        self.assertNotEqual(derived.id, prev.id)
+        self.assertEqual(derived.id, checkpoint(changed, {b"a": Decimal(1)}).id)
+        duplicates = utxos + [wallet(0), wallet(0, Decimal(5))]
+        self.assertEqual(checkpoint(duplicates, {}, prev=prev).id, checkpoint(duplicates, {}).id)
+        self.assertEqual(checkpoint(utxos, {}, prev=checkpoint(duplicates, {})).id, checkpoint(utxos, {}).id)
+
+    def test_old_hash_version_still_verifies(self):
+        utxos = [wallet(i) for i in range(10)]
+        old = checkpoint(utxos, {b"a": Decimal(1)}, hash_version=constants.CKPT_HASH_V1)
+        received = checkpoint(utxos, {b"a": Decimal(1)})
+        self.assertNotEqual(old.id, received.id)
+        self.assertTrue(received.match_identifier(old.id))
+        self.assertEqual(received.hash_version, constants.CKPT_HASH_V1)
+        self.assertEqual(received.outputs[0].origin, old.id)
+        self.assertFalse(received.match_identifier(b"unknown"))
+        self.assertEqual(received.id, old.id)
+
+    def test_activation_height(self):
+        self.assertEqual(checkpoint_hash_version(0), constants.CKPT_HASH_V1)
+        self.assertEqual(checkpoint_hash_version(1), constants.CKPT_HASH_V2)
+        with patch("abccore.constants.CKPT_HASH_V2_HEIGHT", None):
+            self.assertEqual(checkpoint([wallet(0)], {}).hash_version, constants.CKPT_HASH_V1)
+
+    def test_utxo_proof(self):
+        utxos = [wallet(i) for i in range(50)]
+        ckpt = checkpoint(utxos, {b"a": Decimal(1)})
+        proof = ckpt.prove_utxo(utxos[7])
+        self.assertTrue(verify_utxo_proof(ckpt.utxo_root(), utxos[7], proof))
+        self.assertFalse(verify_utxo_proof(ckpt.utxo_root(), utxos[8], proof))
+        self.assertIsNone(ckpt.prove_utxo(wallet(7, Decimal(99))))
@@ -0,0 +1,90 @@
+import os
+import unittest
+
+from abccore.DAG import Acknowledge
+from abccore.orphan_pool import OrphanPool, node_size
+from abcnet.structures import PeerContactInfo
+
+
+def orphan_ack(parent: bytes = None) -> Acknowledge:
+    ack = Acknowledge(parent if parent is not None else os.urandom(32), os.urandom(32), os.urandom(32))
+    ack.signatures.append((ack.pb_key, os.urandom(64)))
+    return ack
+
+
+class TestOrphanPool(unittest.TestCase):
+    def setUp(self):
+        self.peers = [PeerContactInfo(f"Peer-{i}", None, None, None) for i in range(4)]
+
+    def test_flood_stays_bounded(self):
+        pool = OrphanPool(max_entries=1000, max_bytes=1000 * 1024, max_per_peer=400)
+        size = node_size(orphan_ack())
+        for i in range(20000):
+            ack = orphan_ack()
+            pool.add(ack, ack.get_trans_id(), self.peers[i % 4] if i % 5 else None)
+            self.assertLessEqual(len(pool), 1000)
+        self.assertEqual(pool.size, len(pool) * size)
+        self.assertLessEqual(len(pool.by_parent), 1000)
+        for peer in self.peers:
+            self.assertLessEqual(pool.peer_count(peer.identifier), 400)
+        self.assertEqual(pool.added, 20000)
+        self.assertEqual(pool.evicted, 20000 - len(pool))
+
+        # A tight byte bound is enforced, too.
+        pool = OrphanPool(max_entries=1000, max_bytes=size * 10, max_per_peer=1000)
+        for i in range(100):
+            ack = orphan_ack()
+            pool.add(ack, ack.get_trans_id())
+        self.assertEqual(len(pool), 10)
+        self.assertLessEqual(pool.size, size * 10)
+
+    def test_single_peer_only_evicts_own_orphans(self):
+        pool = OrphanPool(max_entries=100, max_per_peer=10)
+        honest = orphan_ack()
+        pool.add(honest, honest.get_trans_id(), self.peers[0])
+        for _ in range(50):
+            ack = orphan_ack()
+            pool.add(ack, ack.get_trans_id(), self.peers[1])
+        self.assertIn(honest.get_identifier(), pool)
+        self.assertEqual(pool.peer_count(self.peers[1].identifier), 10)
+
+    def test_release(self):
+        pool = OrphanPool()
+        parent = os.urandom(32)
+        children = [orphan_ack(parent) for _ in range(3)]
+        for child in children:
+            pool.add(child, parent, self.peers[0])
+        other = orphan_ack()
+        pool.add(other, other.get_trans_id(), self.peers[1])
+
+        released = pool.release(parent)
+        self.assertEqual({o.node for o in released}, set(children))
+        self.assertTrue(all(o.peer is self.peers[0] for o in released))
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.release(parent), [])
+        self.assertEqual(pool.size, node_size(other))
+
+    def test_expiry_and_targeted_parents(self):
+        now = [100.0]
+        pool = OrphanPool(max_age=10, clock=lambda: now[0])
+        old = orphan_ack()
+        pool.add(old, old.get_trans_id(), self.peers[0])
+        now[0] += 6
+        young = orphan_ack()
+        pool.add(young, young.get_trans_id(), self.peers[1])
+        anonymous = orphan_ack()
+        pool.add(anonymous, anonymous.get_trans_id())
+
+        grouped = pool.parents_by_peer()
+        self.assertEqual(grouped[self.peers[0].identifier], (self.peers[0], {old.get_trans_id()}))
+        self.assertEqual(grouped[None], (None, {anonymous.get_trans_id()}))
+
+        now[0] += 6
+        self.assertEqual(pool.expire(), 1)
+        self.assertNotIn(old.get_identifier(), pool)
+        self.assertEqual(set(pool.missing_parents()), {young.get_trans_id(), anonymous.get_trans_id()})
+        self.assertEqual(pool.peer_count(self.peers[0].identifier), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import gc
+import random
+import time
+import tracemalloc
+import unittest
+from copy import deepcopy
+from decimal import Decimal
+
+from abcnet.transcriber import Parser, Transcriber
+
+from abccore.agent_crypto import gen_key, pub_key_to_bytes
+from abccore.agent_data import AgentData
+from abccore.agent_items_parser import AgentItemsParser
+from abccore.DAG import Genesis, Wallet
+from abccore.network_datastructures import NetTransaction
+from abccore.tenants import TenantHost
+
+IDENTITIES = 50
+TRANSACTIONS = 1000
+
+
+def receive(item_bytes: bytes):
+    """Decodes a txn as an agent receives it from the network."""
+    parser = Parser(item_bytes)
+    item_type = parser.consume_int()
+    return AgentItemsParser().decode_item(item_type, parser.parse_nested()).txn
+
+
+class BenchmarkTenants(unittest.TestCase):
+    """
+    50 identities receive a DAG of 1000 signed transactions between them.
+    Compares 50 agents, each with its own DAG, with one agent that hosts the 50 identities over a single DAG.
+    """
+
+    def setUp(self):
+        random.seed(1)
+        self.keys = [gen_key() for _ in range(IDENTITIES)]
+        pks = [pub_key_to_bytes(key.public_key()) for key in self.keys]
+        self.genesis = Genesis([Wallet(pk, Decimal(1000)) for pk in pks])
+
+        # the identities pay each other, the txns are created with a host of their own
+        source = AgentData()
+        source.tree.add(self.genesis.get_identifier(), self.genesis)
+        host = TenantHost(source.store)
+        for i, key in enumerate(self.keys):
+            host.add(str(i), key)
+        self.txns = list()
+        for i in range(TRANSACTIONS):
+            sender = host[str(i % IDENTITIES)].data
+            txn = sender.send_money(random.choice(pks), Decimal(1), sender.get_key_to_use())
+            source.tree.add(txn.get_identifier(), txn)
+            host.register_ownership(txn)
+            transcriber = Transcriber()
+            transcriber.item_content(NetTransaction(txn))
+            self.txns.append(transcriber.msg.parts[0])
+        self.balances = sorted(len(tenant.data.balance) for tenant in host)
+
+    def run_separate(self):
+        agents = list()
+        for key in self.keys:
+            agent = AgentData(key)
+            genesis = deepcopy(self.genesis)
+            agent.tree.add(genesis.get_identifier(), genesis)
+            agent.check_and_register_ownership(genesis)
+            agents.append(agent)
+        for item_bytes in self.txns:
+            for agent in agents:
+                txn = receive(item_bytes)
+                self.assertTrue(agent.validate_trans(txn) and agent.validate_signature(txn))
+                agent.tree.add(txn.get_identifier(), txn)
+                agent.check_and_register_ownership(txn)
+        return agents, sorted(len(agent.balance) for agent in agents)
+
+    def run_hosted(self):
+        agent = AgentData()
+        genesis = deepcopy(self.genesis)
+        agent.tree.add(genesis.get_identifier(), genesis)
+        host = TenantHost(agent.store, agent)
+        for i, key in enumerate(self.keys):
+            host.add(str(i), key)
+        for item_bytes in self.txns:
+            txn = receive(item_bytes)
+            self.assertTrue(agent.validate_trans(txn) and agent.validate_signature(txn))
+            agent.tree.add(txn.get_identifier(), txn)
+            host.register_ownership(txn)
+        return host, sorted(len(tenant.data.balance) for tenant in host)
+
+    def measure(self, run):
+        """:return: the CPU time of the run and the memory it retains, measured in a second run with tracemalloc"""
+        gc.collect()
+        start = time.process_time()
+        kept, balances = run()
+        cpu = time.process_time() - start
+        self.assertEqual(balances, self.balances)
+        del kept
+        gc.collect()
+
+        tracemalloc.start()
+        kept, _ = run()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        gc.collect()
+        return cpu, memory
+
+    def test_benchmark(self):
+        separate_cpu, separate_memory = self.measure(self.run_separate)
+        hosted_cpu, hosted_memory = self.measure(self.run_hosted)
+        print()
+        print(f"{IDENTITIES} agents:           {separate_cpu:.2f} s CPU, {separate_memory / 2 ** 20:.1f} MiB")
+        print(f"1 agent, {IDENTITIES} identities: {hosted_cpu:.2f} s CPU, {hosted_memory / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    unittest.main()
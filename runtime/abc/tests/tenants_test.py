@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+from abccore.agent_crypto import gen_key, pub_key_to_bytes
+from abccore.agent_data import AgentData
+from abccore.DAG import Checkpoint, Genesis, Wallet
+import abccore.save_handler as save_handler
+from abccore.tenants import TenantHost, acknowledge_all, acknowledge_none
+
+
+class TestTenants(unittest.TestCase):
+    def setUp(self):
+        self.agent = AgentData()
+        self.host = TenantHost(self.agent.store, self.agent)
+        self.keys = {name: gen_key() for name in ("alice", "bob", "carol")}
+        self.pks = {name: pub_key_to_bytes(key.public_key()) for name, key in self.keys.items()}
+        self.genesis = Genesis([Wallet(self.pks[name], Decimal(100)) for name in self.keys])
+        self.agent.tree.add(self.genesis.get_identifier(), self.genesis)
+        self.host.add("alice", self.keys["alice"])
+        self.host.add("bob", self.keys["bob"], acknowledge_none)
+        self.host.add("carol", self.keys["carol"], search_tree_for_now_owned=False)
+
+    def send(self, sender: str, recipient: str, value):
+        txn = self.host[sender].data.send_money(self.pks[recipient], Decimal(value), self.pks[recipient])
+        # the agent validates and stores the txn once for all identities
+        self.assertTrue(self.agent.validate_trans(txn))
+        self.assertTrue(self.agent.validate_signature(txn))
+        self.agent.tree.add(txn.get_identifier(), txn)
+        return txn
+
+    def test_register_ownership(self):
+        self.assertEqual(len(self.host["alice"].data.balance), 1)
+        self.assertEqual(len(self.host["carol"].data.balance), 0)
+        self.host.search_tree()
+        self.assertEqual(len(self.host["carol"].data.balance), 1)
+
+        txn = self.send("alice", "bob", 40)
+        concerned = self.host.register_ownership(txn)
+        self.assertEqual({tenant.name for tenant in concerned}, {"alice", "bob"})
+        # the change of alice replaces her genesis wallet
+        change = [w for w in txn.get_outputs() if w.get_pk() == self.pks["alice"]]
+        self.assertEqual(self.host["alice"].data.balance, change)
+        self.assertEqual(sorted(w.get_value() for w in self.host["bob"].data.balance), [Decimal(40), Decimal(100)])
+        self.assertEqual(len(self.agent.balance), 0)
+
+    def test_shared_store(self):
+        txn = self.send("alice", "bob", 40)
+        bob = self.host["bob"].data
+        self.assertIs(bob.tree, self.agent.tree)
+        hits = bob.validation_cache.hits
+        self.assertTrue(bob.validate_trans(txn))
+        self.assertTrue(bob.validate_signature(txn))
+        self.assertEqual(bob.validation_cache.hits, hits + 2)
+
+    def test_acknowledge_policy(self):
+        self.agent.tree.list_of_checkpoints.append(self.genesis.get_identifier())
+        txn = self.send("alice", "bob", 40)
+        acks = self.host.acknowledge(txn)
+        self.assertEqual({ack.get_pb_key() for ack in acks}, {self.pks["alice"], self.pks["carol"]})
+
+    def test_keys(self):
+        with self.assertRaises(ValueError):
+            self.host.add("alice")
+        with self.assertRaises(ValueError):
+            self.host.add("eve", self.keys["bob"])
+        with self.assertRaises(ValueError):
+            self.host.add("eve", self.agent.keyset.active_key())
+        pk = self.host.add_keypair("carol")
+        self.assertIs(self.host.owner_of(pk), self.host["carol"])
+        self.host.remove("carol")
+        self.assertIsNone(self.host.owner_of(pk))
+
+    def test_transform_dag(self):
+        self.agent.tree.list_of_checkpoints.append(self.genesis.get_identifier())
+        utxos = [Wallet(self.pks["bob"], Decimal(10), self.genesis.get_identifier(), 1)]
+        rewards = [Wallet(self.pks["carol"], Decimal(1))]
+        ckpt = Checkpoint(self.genesis.get_identifier(), 1, 0.0, 1, utxos, rewards, {}, 1, Decimal(1), Decimal(1),
+                          os.urandom(32))
+        self.agent.transform_dag(ckpt, dict(), self.host.identities())
+        self.assertEqual(self.host["alice"].data.balance, [])
+        self.assertEqual([w.get_value() for w in self.host["bob"].data.balance], [Decimal(10)])
+        self.assertEqual([w.get_value() for w in self.host["carol"].data.balance], [Decimal(1)])
+
+    def test_save_load(self):
+        txn = self.send("alice", "bob", 40)
+        self.host.register_ownership(txn)
+        self.host["alice"].data.last_acks[self.pks["alice"]] = os.urandom(32)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "abc_save.db")
+            self.host.save_data(None, filename)
+            self.host.save_data(None, filename)
+
+            restored = TenantHost(self.agent.store)
+            restored.add("bob", self.keys["bob"], acknowledge_none, search_tree_for_now_owned=False)
+            restored.load_data(None, filename)
+            self.assertEqual(len(save_handler.load_tenants(None, self.agent.tree, filename)), 3)
+
+        self.assertEqual(set(restored.tenants), {"alice", "bob", "carol"})
+        self.assertIs(restored["bob"].ack_policy, acknowledge_none)
+        for name in self.keys:
+            self.assertEqual(restored[name].data.get_pub_key_bytes(), [self.pks[name]])
+            self.assertEqual(restored[name].data.balance, self.host[name].data.balance)
+        self.assertEqual(restored["alice"].data.last_acks, self.host["alice"].data.last_acks)
+        self.assertEqual(restored["alice"].data.transaction_history, [txn.get_identifier()])
+
+    def test_save_remove_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "abc_save.db")
+            self.host.save_data(None, filename)
+            self.host.remove("alice")
+            self.host.save_data(None, filename)
+            restored = TenantHost(self.agent.store)
+            restored.load_data(None, filename)
+            self.assertEqual(set(restored.tenants), {"bob", "carol"})
+            self.assertIs(restored["bob"].ack_policy, acknowledge_none)
+            self.assertIs(restored["carol"].ack_policy, acknowledge_all)
+
+            # the last identity is deleted from the file as well
+            self.host.remove("bob")
+            self.host.remove("carol")
+            self.host.save_data(None, filename)
+            self.assertEqual(save_handler.load_tenants(None, self.agent.tree, filename), {})
+
+            # an unknown policy falls back to acknowledge nothing
+            self.host.add("dave", ack_policy=lambda txn: True)
+            self.host.save_data(None, filename)
+            restored = TenantHost(self.agent.store)
+            restored.load_data(None, filename)
+            self.assertIs(restored["dave"].ack_policy, acknowledge_none)
+
+
+if __name__ == "__main__":
+    unittest.main()
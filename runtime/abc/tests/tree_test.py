@@ -252,6 +252,49 @@ class TestTreePrefix(unittest.TestCase):
             trans = tree.search(trans.get_identifier())
             assert trans is None
 
+    def test_positive_prune(self):
+        tree = Tree()
+        self.generator = Generator()
+
+        genesis = self.generator.gen_genesis()
+        tree.add(genesis.get_identifier(), genesis)
+
+        transactions = []
+        acks = []
+        for i in range(1000):
+            trans = self.generator.gen_transaction()
+            tree.add(trans.get_identifier(), trans)
+            transactions.append(trans)
+            ack = Acknowledge(trans.get_identifier(), None, None)
+            tree.add(ack.get_identifier(), ack)
+            acks.append(ack)
+
+        keep = {genesis.get_identifier()}
+        keep.update(trans.get_identifier() for trans in transactions[::10])
+        assert tree.prune(keep) > 0
+
+        assert {node.get_identifier() for node in tree.get_all()} == keep
+        for trans in transactions[::10]:
+            leaf = tree.search(trans.get_identifier())
+            assert leaf.get_node() is trans
+            assert all(dep.get_node().get_identifier() in keep for dep in leaf.get_dependend_nodes())
+        for ack in acks:
+            assert tree.search(ack.get_identifier()) is None
+        assert tree.list_of_checkpoints == [genesis.get_identifier()]
+
+        # The pruned nodes are freed in slices
+        released = tree.release_detached(100)
+        assert released == 100
+        while tree.release_detached(100) > 0:
+            released += 100
+        assert len(tree.detached) == 0
+        assert released >= 2 * 1000 - len(keep)
+
+        # The pruned tree is still usable
+        trans = self.generator.gen_transaction()
+        assert tree.add(trans.get_identifier(), trans)
+        assert tree.search(trans.get_identifier()).get_node() is trans
+
     # def test_multiple(self):
     # """This test will take much time and ram!"""
     # for i in range(10):
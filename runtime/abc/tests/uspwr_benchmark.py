@@ -0,0 +1,79 @@
+import os
+import random
+import time
+import unittest
+from decimal import Decimal
+
+from abcnet.structures import ItemType
+from abcnet.transcriber import Parser, Transcriber
+
+from abccore.agent_items_parser import AgentItemsParser
+from abccore.DAG import Acknowledge, Transaction, Wallet
+from abccore.iblt import IBLT
+import abccore.constants as constants
+from abccore.network_datastructures import NetAcknowledgement, NetTransaction, NetUSPWR
+from abccore.outputs_helper import outputs_helper
+
+NODES = 100000  # half transactions, half acknowledgements
+DIFFERENCE = 0.01  # share of the nodes the requester is missing
+
+
+def encoded_size(item) -> int:
+    transcriber = Transcriber()
+    transcriber.item_content(item)
+    return len(transcriber.msg.parts[0])
+
+
+class BenchmarkUSPWR(unittest.TestCase):
+    """
+    A requester that misses 1% of the 100k nodes which depend on the requested wallets.
+    Compares the bytes of the answer with all nodes against the sketch and the answer with the missing nodes.
+    """
+
+    def setUp(self):
+        pk = os.urandom(32)
+        self.sizes = dict()
+        for _ in range(NODES // 2):
+            inputs = [Wallet(pk, Decimal(10000), os.urandom(32), 0)]
+            txn = Transaction(inputs, outputs_helper(inputs, [Wallet(os.urandom(32), Decimal(100))]), None)
+            txn.add_signature((pk, os.urandom(64)))
+            ack = Acknowledge(txn.get_identifier(), os.urandom(32), pk)
+            ack.signatures.append((pk, os.urandom(64)))
+            self.sizes[txn.get_identifier()] = encoded_size(NetTransaction(txn))
+            self.sizes[ack.get_identifier()] = encoded_size(NetAcknowledgement(ack))
+        self.wallets = {(os.urandom(32), 0)}
+
+    def test_benchmark(self):
+        ids = list(self.sizes)
+        missing = set(random.sample(ids, int(NODES * DIFFERENCE)))
+        held = [node_id for node_id in ids if node_id not in missing]
+        full_bytes = sum(self.sizes.values())
+
+        start = time.perf_counter()
+        cells = min(max(int(len(held) * constants.USPWR_SKETCH_CELLS_PER_NODE), constants.USPWR_SKETCH_MIN_CELLS),
+                    constants.USPWR_SKETCH_MAX_CELLS)
+        request = NetUSPWR(self.wallets, is_req=1, sketch=IBLT.of(held, cells))
+        transcriber = Transcriber()
+        transcriber.item_content(request)
+        request_bytes = len(transcriber.msg.parts[0])
+        sketch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser = Parser(transcriber.msg.parts[0])
+        self.assertEqual(parser.consume_int(), ItemType.UNSPENT_WALLET_COLLECTION)
+        received = AgentItemsParser().decode_item(ItemType.UNSPENT_WALLET_COLLECTION, parser.parse_nested())
+        difference = IBLT.of(ids, len(received.sketch)).subtract(received.sketch).decode()
+        reconcile_time = time.perf_counter() - start
+        self.assertIsNotNone(difference)
+        self.assertEqual(difference, (missing, set()))
+        answer_bytes = sum(self.sizes[node_id] for node_id in difference[0])
+
+        print()
+        print(f"Full answer: {NODES} nodes, {full_bytes} bytes")
+        print(f"Reconciled: request with {cells} cells {request_bytes} bytes ({sketch_time:.2f} s), "
+              f"answer {len(difference[0])} nodes {answer_bytes} bytes ({reconcile_time:.2f} s), "
+              f"total {request_bytes + answer_bytes} bytes")
+
+
+if __name__ == "__main__":
+    unittest.main()
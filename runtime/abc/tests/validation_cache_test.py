@@ -0,0 +1,68 @@
+import os
+import unittest
+from decimal import Decimal
+
+from abccore.agent_crypto import gen_key, pub_key_to_bytes
+from abccore.agent_data import AgentData
+from abccore.DAG import State, Transaction, Wallet
+from abccore.outputs_helper import outputs_helper
+from abccore.validation_cache import ValidationCache
+
+
+class TestValidationCache(unittest.TestCase):
+    def setUp(self):
+        self.key = gen_key()
+        self.pk = pub_key_to_bytes(self.key.public_key())
+        self.a_data = AgentData(self.key)
+
+        inputs = [Wallet(self.pk, Decimal(1000), os.urandom(32), 0)]
+        self.parent = Transaction(inputs, outputs_helper(inputs, [Wallet(self.pk, Decimal(500))]), None)
+        self.a_data.tree.add(self.parent.get_identifier(), self.parent)
+
+        inputs = [self.parent.get_outputs()[0]]
+        self.txn = Transaction(inputs, outputs_helper(inputs, [Wallet(os.urandom(32), Decimal(100))]), None)
+        self.txn.add_signature((self.pk, self.key.sign(self.txn.get_identifier())))
+
+    def test_transaction(self):
+        cache = self.a_data.validation_cache
+        self.assertTrue(self.a_data.validate_trans(self.txn))
+        self.assertEqual(cache.misses, 1)
+        self.assertTrue(self.a_data.validate_trans(self.txn))
+        self.assertEqual(cache.hits, 1)
+
+        # Spending the input elsewhere invalidates the result
+        self.parent.get_outputs()[0].set_state(State.SPENT)
+        self.assertFalse(self.a_data.validate_trans(self.txn))
+        self.assertEqual(cache.invalidated, 1)
+        self.assertFalse(self.a_data.validate_trans(self.txn))
+        self.assertEqual(cache.hits, 2)
+
+    def test_missing_parent(self):
+        inputs = [Wallet(self.pk, Decimal(1000), os.urandom(32), 0)]
+        orphan = Transaction(inputs, outputs_helper(inputs, [Wallet(os.urandom(32), Decimal(100))]), None)
+        self.assertFalse(self.a_data.validate_trans(orphan))
+        self.assertNotIn(orphan.get_identifier(), self.a_data.validation_cache.transactions)
+
+    def test_signature(self):
+        cache = self.a_data.validation_cache
+        self.assertTrue(self.a_data.validate_signature(self.txn))
+        self.assertTrue(self.a_data.validate_signature(self.txn))
+        self.assertEqual(cache.hits, 1)
+
+        # A transaction with the same id but other signatures is checked again
+        forged = Transaction(self.txn.get_inputs(), self.txn.get_outputs(), None)
+        forged.add_signature((self.pk, gen_key().sign(self.txn.get_identifier())))
+        self.assertEqual(forged.get_identifier(), self.txn.get_identifier())
+        self.assertFalse(self.a_data.validate_signature(forged))
+        self.assertEqual(cache.hits, 1)
+
+    def test_bound(self):
+        cache = ValidationCache(max_entries=2)
+        for i in range(3):
+            cache.put_transaction(bytes([i]), True, [])
+        self.assertIsNone(cache.get_transaction(bytes([0])))
+        self.assertTrue(cache.get_transaction(bytes([2])))
+
+
+if __name__ == "__main__":
+    unittest.main()
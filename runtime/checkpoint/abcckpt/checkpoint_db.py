@@ -131,6 +131,9 @@ def ckpt_extract(checkpoint_height: Union[None, int, bytes] = None) -> Checkpoin
     # object creation
     checkpoint = Checkpoint(origin, int(args[0][10]), float(args[0][2]), int(args[0][3]), wallet_list,
                             fee_rewards, stake_list, int(args[0][7]), Decimal(args[0][4]), Decimal(args[0][9]), miner)
+    # Checkpoints that were saved with an older hash version keep their id
+    if not checkpoint.match_identifier(bytes.fromhex(str(args[0][0]))):
+        logging.warning("Id of the stored checkpoint %s does not match its content.", args[0][0])
 
     return checkpoint
 
@@ -1,9 +1,10 @@
 import base64
 import logging
+from collections import Counter
 from decimal import Decimal
 from enum import IntEnum
 from io import BytesIO
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 from abccore.DAG import Transaction
 from abccore.DAG import Wallet, Checkpoint
 from abccore.agent_crypto import auth_sign, auth_validate
@@ -31,6 +32,10 @@ class CkptItemType(IntEnum):
     MOCK_CKPT_DATA = 0xabcce08
     CKPT = 0xabcce09
     CKPT_REQ = 0xabcce10
+    CKPT_DELTA = 0xabcce11
+    CKPT_TIP = 0xabcce12
+    CKPT_RANGE = 0xabcce13
+    CKPT_CHUNK = 0xabcce14
 
 
 def encode_priority(t: Transcriber, pub_k: bytes, stake: Decimal, proof: bytes,
@@ -63,6 +68,13 @@ def encode_state(transcriber: Transcriber, state: CkptCreationState):
         transcriber.nested_bytes(state.content_hash)
 
 
+def encode_stake_list(stake_dict: Dict) -> str:
+    stake_list = ''
+    for key in stake_dict:
+        stake_list += key.hex() + ':' + str(stake_dict[key]) + ';'
+    return stake_list
+
+
 def decode_state(parser: Parser) -> CkptCreationState:
     try:
         last_common_string = parser.consume_nested_bytes()
@@ -445,14 +457,27 @@ class CkptData(CkptMsg, ItemQualifier, ItemEncodeable):
         bytebuffer.write(t.content)
         bytebuffer.write(self.ckpt_hash)
 
+    @staticmethod
+    def compute_id(ckpt_state: CkptCreationState, ckpt_hash: bytes) -> bytes:
+        """
+        Returns the id of the content message of the checkpoint with the given hash without the checkpoint itself.
+        """
+        digest = hashes.Hash(hashes.SHA512_256())
+        bytebuffer = BytesIO()
+        bytebuffer.write(transcriber.encode_int(CkptItemType.CKPT_DATA))
+        t = Transcriber()
+        encode_state(t, ckpt_state)
+        bytebuffer.write(t.content)
+        bytebuffer.write(ckpt_hash)
+        digest.update(bytebuffer.getvalue())
+        return digest.finalize()
+
     def encode(self, transcriber, encode_identity_only=False):
         """
         Encodes the checkpoint object into bytes.
         """
         CkptMsg.encode(self, transcriber, encode_identity_only)
-        ckpt_stake_list = ''
-        for key in self.checkpoint_data.stake_dict:
-            ckpt_stake_list += key.hex() + ':' + str(self.checkpoint_data.stake_dict[key]) + ';'
+        ckpt_stake_list = encode_stake_list(self.checkpoint_data.stake_dict)
 
         transcriber.nested_bytes(self.checkpoint_data.id, "CID")
         transcriber.nested_bytes(self.checkpoint_data.origin, "PARENT")
@@ -478,3 +503,134 @@ class CkptData(CkptMsg, ItemQualifier, ItemEncodeable):
         return self.state.chosen_validator == self.signature[0]
 
 
+class CkptDelta(CkptMsg, ItemQualifier, ItemEncodeable):
+    def __init__(self, ckpt_state: CkptCreationState, ckpt_hash: bytes, parent_id: bytes, height: int,
+                 lock_time: float, ack_length: int, spent: List[Tuple[bytes, int]], new_utxos: List[Wallet],
+                 outputs: List[Wallet], nutxo: int, stake_changes: Dict[bytes, Decimal], removed_owners: List[bytes],
+                 total_stake: Decimal, total_coins: Decimal, miner: bytes, item_id: bytes = None):
+        """Checkpoint proposal encoded as the difference to its parent checkpoint.
+
+        The receiver rebuilds the checkpoint from its own copy of the parent and checks the rebuilt checkpoint hash.
+        The id and the signature are the ones of the full content message, `CkptData`, of the same checkpoint.
+
+        Parameters:
+            ckpt_state: Consensus data object (Common string, round, status, step..)
+            ckpt_hash (bytes): Identifier of the proposed checkpoint.
+            parent_id (bytes): Identifier of the parent checkpoint which is the origin of the proposed checkpoint.
+            spent (list): Transaction id and output index of the utxos of the parent that are no longer unspent.
+            new_utxos (list): Utxos that are not utxos of the parent.
+            outputs (list): Fee and reward outputs of the proposed checkpoint.
+            stake_changes (dict): Stake entries that are new or different from the parent.
+            removed_owners (list): Stake owners of the parent without a stake entry in the proposed checkpoint.
+            item_id (bytes): Unique content identity of the checkpoint.
+        """
+        super().__init__(ckpt_state)
+        self.ckpt_hash = ckpt_hash
+        self.parent_id = parent_id
+        self.height = height
+        self.lock_time = lock_time
+        self.ack_length = ack_length
+        self.spent = spent
+        self.new_utxos = new_utxos
+        self.outputs = outputs
+        self.nutxo = nutxo
+        self.stake_changes = stake_changes
+        self.removed_owners = removed_owners
+        self.total_stake = total_stake
+        self.total_coins = total_coins
+        self.miner = miner
+        self.check_id(item_id)
+
+    @classmethod
+    def of(cls, ckpt_data: CkptData, parent: Checkpoint) -> "CkptDelta":
+        """
+        Creates the delta of the given content to its parent checkpoint. The signature of the content is kept.
+        """
+        ckpt = ckpt_data.checkpoint_data
+        if parent.id != ckpt.origin:
+            raise ValueError(f"Checkpoint {parent.id.hex()} is not the parent of the checkpoint "
+                             f"{ckpt.id.hex()}.")
+        parent_utxos = Counter((w.origin, w.id, w.own_key, w.value) for w in parent.utxos)
+        utxos = Counter((w.origin, w.id, w.own_key, w.value) for w in ckpt.utxos)
+        spent = [(origin, id) for (origin, id, _, _), count in (parent_utxos - utxos).items()
+                 for _ in range(count)]
+        new_utxos = [Wallet(own_key, value, origin, id) for (origin, id, own_key, value), count
+                     in (utxos - parent_utxos).items() for _ in range(count)]
+        parent_stake = parent.stake_dict
+        stake_changes = {owner: stake for owner, stake in ckpt.stake_dict.items()
+                         if owner not in parent_stake or str(parent_stake[owner]) != str(stake)}
+        removed_owners = [owner for owner in parent_stake if owner not in ckpt.stake_dict]
+        delta = cls(ckpt_data.state, ckpt.id, ckpt.origin, ckpt.height, ckpt.lock_time, ckpt.ack_length, spent,
+                    new_utxos, ckpt.outputs, ckpt.nutxo, stake_changes, removed_owners, ckpt.total_stake,
+                    ckpt.total_coins, ckpt.miner)
+        delta.signature = ckpt_data.signature
+        return delta
+
+    def reconstruct(self, parent: Checkpoint) -> CkptData:
+        """
+        Applies this delta to the given parent checkpoint.
+        Raises a ValueError if the parent is not the expected one or if the hash of the rebuilt checkpoint
+        doesn't match the checkpoint hash of this delta.
+        :returns: The content message of the rebuilt checkpoint with the signature of this delta.
+        """
+        if parent.id != self.parent_id:
+            raise ValueError(f"Expected parent checkpoint {self.parent_id.hex()} but got {parent.id.hex()}.")
+        spent = Counter(self.spent)
+        utxos = []
+        for wallet in parent.utxos:
+            outpoint = (wallet.origin, wallet.id)
+            if spent[outpoint] > 0:
+                spent[outpoint] -= 1
+            else:
+                utxos.append(wallet)
+        if any(count > 0 for count in spent.values()):
+            raise ValueError("Spent outputs are missing in the parent checkpoint.")
+        utxos.extend(self.new_utxos)
+        stake_dict = {owner: stake for owner, stake in parent.stake_dict.items()
+                      if owner not in self.removed_owners}
+        stake_dict.update(self.stake_changes)
+        outputs = [Wallet(w.own_key, w.value, w.origin, w.id) for w in self.outputs]
+        ckpt = Checkpoint(self.parent_id, self.height, self.lock_time, self.ack_length, utxos, outputs, stake_dict,
+                          self.nutxo, self.total_stake, self.total_coins, self.miner, prev_checkpoint=parent)
+        if not ckpt.match_identifier(self.ckpt_hash):
+            raise ValueError(f"Rebuilt checkpoint hash {ckpt.id.hex()} doesn't match the expected hash "
+                             f"{self.ckpt_hash.hex()}.")
+        ckpt_data = CkptData(self.state, ckpt)
+        ckpt_data.set_sign(self.signature)
+        return ckpt_data
+
+    def get_id(self) -> bytes:
+        if self._id is None:
+            self._id = CkptData.compute_id(self.state, self.ckpt_hash)
+        return self._id
+
+    def get_ckpt_hash(self) -> bytes:
+        return self.ckpt_hash
+
+    def item_type(self) -> IntEnum:
+        return CkptItemType.CKPT_DELTA
+
+    def encode(self, transcriber, encode_identity_only=False):
+        CkptMsg.encode(self, transcriber, encode_identity_only)
+        transcriber.nested_bytes(self.ckpt_hash, "CID")
+        transcriber.nested_bytes(self.parent_id, "PARENT")
+        transcriber.integer(self.height)
+        transcriber.write_double(self.lock_time, "TIME")
+        transcriber.integer(self.ack_length, "LENGTH")
+        transcriber.integer(len(self.spent), "SPENT")
+        for origin, id in self.spent:
+            transcriber.nested_bytes(origin)
+            transcriber.integer(id)
+        encode_wallet(transcriber, self.new_utxos)
+        encode_wallet(transcriber, self.outputs)
+        transcriber.integer(self.nutxo, "NUTXO")
+        transcriber.write_text(encode_stake_list(self.stake_changes), "STAKEL")
+        transcriber.write_text(''.join(owner.hex() + ';' for owner in self.removed_owners), "REMOVED")
+        transcriber.write_text(str(self.total_stake), "TSTAKE")
+        transcriber.write_text(str(self.total_coins), "TCOIN")
+        transcriber.nested_bytes(self.miner, "MINER")
+
+    def verify_signature(self) -> bool:
+        if not CkptMsg.verify_signature(self):
+            return False
+        return self.state.chosen_validator == self.signature[0]
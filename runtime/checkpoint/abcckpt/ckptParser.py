@@ -1,6 +1,6 @@
 import logging
 from decimal import Decimal
-from typing import Any, Tuple, Optional
+from typing import Any, Tuple, Optional, Dict
 
 from abccore.agent_items_parser import AgentItemsParser, decode_wallet
 from abccore.network_datastructures import NetTransaction, encode_wallet
@@ -9,7 +9,7 @@ from abcnet.transcriber import ItemsParser, Parser
 
 from abcckpt import ckptItems
 from abcckpt.checkpoint_db import Checkpoint
-from abcckpt.ckptItems import CkptItemType, Priority, CkptData, CkptHash
+from abcckpt.ckptItems import CkptItemType, Priority, CkptData, CkptHash, CkptDelta
 from abcckpt.ckpt_creation_state import CkptCreationState
 
 logger = logging.getLogger("CkptItemsParser")
@@ -39,7 +39,8 @@ class CkptItemsParser(ItemsParser):
     @staticmethod
     def decode_item(item_type: int, parser: Parser) -> Any:
         if item_type not in [CkptItemType.VALVOTE, CkptItemType.MAJVOTES, CkptItemType.PRIORITY,
-                             CkptItemType.CKPT_DATA, CkptItemType.MOCK_CKPT_DATA, CkptItemType.CKPT_HASH]:
+                             CkptItemType.CKPT_DATA, CkptItemType.MOCK_CKPT_DATA, CkptItemType.CKPT_HASH,
+                             CkptItemType.CKPT_DELTA]:
             raise ValueError("Unrecognized type: " + str(item_type))
         id_, state, signature = CkptItemsParser.decode_ckpt_msg(parser)
         if item_type == CkptItemType.VALVOTE:
@@ -87,6 +88,11 @@ class CkptItemsParser(ItemsParser):
             assert ckpt_data.set_sign(signature)
             return ckpt_data
 
+        elif item_type == CkptItemType.CKPT_DELTA:
+            delta = decode_ckpt_delta(parser, state, id_)
+            assert delta.set_sign(signature)
+            return delta
+
 
 
 def decode_ckpt_data(parser: Parser) -> Checkpoint:
@@ -110,9 +116,20 @@ def decode_ckpt_data(parser: Parser) -> Checkpoint:
     ckpt_nutxo = parser.consume_int()
 
     ckpt_stakelist = parser.consume_nested_text()
-    ckpt_stake_dict = {}
+    ckpt_stake_dict = decode_stake_list(ckpt_stakelist)
+
+    ckpt_total_stake = parser.consume_nested_text()
+    ckpt_total_coins = parser.consume_nested_text()
+    ckpt_miner = parser.consume_nested_bytes()
+    checkpointdb = Checkpoint(ckpt_origin, ckpt_height, ckpt_time, ckpt_length, ckpt_utxo_list,
+                              ckpt_fees, ckpt_stake_dict, ckpt_nutxo, Decimal(ckpt_total_stake),
+                              Decimal(ckpt_total_coins), ckpt_miner)
+    assert checkpointdb.match_identifier(ckpt_id)
+    return checkpointdb
+
 
-    # decode stake list
+def decode_stake_list(ckpt_stakelist: str) -> Dict[bytes, Decimal]:
+    ckpt_stake_dict = {}
     stake_list_string = str(ckpt_stakelist).strip().split(';')
     for stake in stake_list_string:
         if stake == '':
@@ -121,15 +138,34 @@ def decode_ckpt_data(parser: Parser) -> Checkpoint:
         validator = bytes.fromhex(stake.split(':')[0])
         validator_stake = Decimal(str(stake.split(':')[1]))
         ckpt_stake_dict[validator] = validator_stake
+    return ckpt_stake_dict
 
-    ckpt_total_stake = parser.consume_nested_text()
-    ckpt_total_coins = parser.consume_nested_text()
-    ckpt_miner = parser.consume_nested_bytes()
-    checkpointdb = Checkpoint(ckpt_origin, ckpt_height, ckpt_time, ckpt_length, ckpt_utxo_list,
-                              ckpt_fees, ckpt_stake_dict, ckpt_nutxo, Decimal(ckpt_total_stake),
-                              Decimal(ckpt_total_coins), ckpt_miner)
-    assert checkpointdb.id == ckpt_id
-    return checkpointdb
+
+def decode_ckpt_delta(parser: Parser, state: CkptCreationState, id_: Optional[bytes]) -> CkptDelta:
+    """
+    Decodes the delta of a checkpoint to its parent received over the network.
+    The checkpoint itself is rebuilt by the receiver that holds the parent checkpoint.
+    """
+    ckpt_hash = parser.consume_nested_bytes()
+    parent_id = parser.consume_nested_bytes()
+    height = parser.consume_int()
+    lock_time = parser.consume_double()
+    ack_length = parser.consume_int()
+    spent_count = parser.consume_int()
+    spent = []
+    for _ in range(spent_count):
+        origin = parser.consume_nested_bytes()
+        spent.append((origin, parser.consume_int()))
+    new_utxos = decode_wallet(parser)
+    outputs = decode_wallet(parser)
+    nutxo = parser.consume_int()
+    stake_changes = decode_stake_list(parser.consume_nested_text())
+    removed_owners = [bytes.fromhex(owner) for owner in parser.consume_nested_text().split(';') if owner != '']
+    total_stake = Decimal(parser.consume_nested_text())
+    total_coins = Decimal(parser.consume_nested_text())
+    miner = parser.consume_nested_bytes()
+    return CkptDelta(state, ckpt_hash, parent_id, height, lock_time, ack_length, spent, new_utxos, outputs, nutxo,
+                     stake_changes, removed_owners, total_stake, total_coins, miner, id_)
 
 
 def decode_val_votes(parser: Parser):
@@ -29,3 +29,25 @@ CKPT_SYNC_DAG_CHECK = 3.0
 CKPT_SYNC_CHECKLIST = 16.0
 CKPT_SYNC_FETCH = 4.0
 CKPT_SYNC_RESPONSE = 5.0
+# Size of the chunks that synchronized checkpoints are transferred in
+CKPT_SYNC_CHUNK_SIZE = 32 * 1024
+# Number of checkpoints whose metadata is requested at once
+CKPT_SYNC_RANGE = 32
+# Number of chunks requested from a single peer in each fetch period
+CKPT_SYNC_CHUNKS_PER_PEER = 8
+# Seconds without a received chunk after which a download is stalled and its manifests are fetched again
+CKPT_SYNC_DOWNLOAD_TIMEOUT = 20.0
+# Seconds after which the advertised height of a peer is forgotten, if the peer stopped advertising its tip
+CKPT_SYNC_PEER_TIMEOUT = 50.0
+
+# Request checkpoint proposals as delta to the parent checkpoint, if the parent is known
+CKPT_DELTA_CONTENT = True
+
+# Number of threads that verify batches of consensus messages. Batches are verified serially if zero.
+CKPT_VERIFY_WORKERS = 0
+# Smallest batch that is handed to the verification threads
+CKPT_VERIFY_POOL_MIN_BATCH = 16
+# Number of verified consensus messages whose verification result is remembered by each handler
+CKPT_VERIFY_CACHE_SIZE = 4096
+# Number of received priorities that are kept unverified, because they could not beat the max priority
+CKPT_DEFERRED_PRIORITIES = 256
@@ -0,0 +1,336 @@
+"""
+Recording and offline replay of checkpoint consensus rounds.
+
+A `ConsensusRecorder` registered in the app stack of a node writes every received consensus item message
+and every maintenance step, with its timestamp, to a compact binary log.
+A `ConsensusReplayer` feeds such a log into a fresh handler stack.
+The clock of `abcnet.timer` and `abcckpt.ckpttimer` is replaced by a virtual clock that jumps to the time of
+each recorded event, so timeouts fire exactly as they did on the recording node and a replay of many rounds
+takes only the CPU time of the handlers. Messages sent by the replayed handlers are counted and dropped.
+
+Usage::
+
+    events = read_consensus_log("consensus.log")
+    report = ConsensusReplayer(events).run(build_stack)
+    print(report)
+
+Checkpoint proposals created by the replayed node carry the wall clock lock time,
+so they differ between replays.
+"""
+import logging
+import pathlib
+import struct
+import time
+from collections import defaultdict
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from abcnet import timer
+from abcnet.handlers import MessageHandler
+from abcnet.outch import MsgSender, OutputChannel
+from abcnet.services import BaseApp, ChannelService
+from abcnet.structures import Message, MsgType, PeerContactInfo
+
+from abcckpt import ckpttimer
+from abcckpt.ckptItems import CkptItemType
+from abcckpt.pre_checkpoint import PreCheckpoint
+
+logger = logging.getLogger(__name__)
+
+CONSENSUS_LOG_MAGIC = b'ABCCKPT1'
+"""
+Header of consensus log files.
+"""
+
+CONSENSUS_ITEM_TYPES = frozenset(item_type.value for item_type in CkptItemType)
+
+EVENT_TICK = 0
+EVENT_MSG = 1
+
+_EVENT_STRUCT = struct.Struct('<dB')
+"""
+Layout of an event: timestamp and event kind. Tick events have no further fields.
+"""
+
+_MSG_STRUCT = struct.Struct('<IBBH')
+"""
+Layout of a message event: message type, direct flag, length of the sender id, item count.
+The utf-8 encoded sender id and the items follow.
+"""
+
+_ITEM_STRUCT = struct.Struct('<II')
+"""
+Layout of an item: item type and length of the payload.
+The payload is the encoded item content or the utf-8 encoded item qualifier, depending on the message type.
+"""
+
+
+class ConsensusEvent:
+    """
+    A received consensus message or a maintenance step of the recording node.
+    """
+
+    __slots__ = ('timestamp', 'kind', 'msg_type', 'is_direct', 'sender', 'items')
+
+    def __init__(self, timestamp: float, kind: int, msg_type: int = 0, is_direct: bool = False, sender: str = "",
+                 items: List[Tuple[int, Union[bytes, str]]] = None):
+        self.timestamp: float = timestamp
+        self.kind: int = kind
+        self.msg_type: int = msg_type
+        self.is_direct: bool = is_direct
+        self.sender: str = sender
+        self.items: List[Tuple[int, Union[bytes, str]]] = items if items is not None else list()
+
+    @staticmethod
+    def tick(timestamp: float) -> "ConsensusEvent":
+        return ConsensusEvent(timestamp, EVENT_TICK)
+
+    @staticmethod
+    def of_msg(timestamp: float, msg: Message) -> Optional["ConsensusEvent"]:
+        """
+        Creates the event of the consensus items in the given message.
+        Returns None if the message has no consensus items.
+        """
+        if not MsgType.is_items(msg.msg_type) or not msg.items:
+            return None
+        items = [(item_type, item) for item_type, item in msg.items if item_type in CONSENSUS_ITEM_TYPES]
+        if not items:
+            return None
+        sender = msg.sender.identifier if msg.sender is not None else ""
+        return ConsensusEvent(timestamp, EVENT_MSG, msg.msg_type, msg.is_direct, sender, items)
+
+    def to_message(self) -> Message:
+        """
+        Creates the message with already extracted items, as it is passed to the item handlers.
+        """
+        msg = Message(list(), self.msg_type)
+        msg.is_direct = self.is_direct
+        if self.sender:
+            msg.sender = PeerContactInfo(self.sender, None, None, None)
+        msg.items = list(self.items)
+        return msg
+
+    def to_bytes(self) -> bytes:
+        encoded = _EVENT_STRUCT.pack(self.timestamp, self.kind)
+        if self.kind == EVENT_TICK:
+            return encoded
+        sender = self.sender.encode('utf-8')[:255]
+        parts = [encoded, _MSG_STRUCT.pack(self.msg_type, self.is_direct, len(sender), len(self.items)), sender]
+        for item_type, item in self.items:
+            payload = bytes(item) if not isinstance(item, str) else item.encode('utf-8')
+            parts.append(_ITEM_STRUCT.pack(item_type, len(payload)))
+            parts.append(payload)
+        return b''.join(parts)
+
+    def __eq__(self, other):
+        if not isinstance(other, ConsensusEvent):
+            return False
+        return all(getattr(self, attr) == getattr(other, attr) for attr in ConsensusEvent.__slots__)
+
+    def __str__(self):
+        if self.kind == EVENT_TICK:
+            return f'ConsensusEvent(tick, t={self.timestamp:.3f})'
+        return f'ConsensusEvent(msg, t={self.timestamp:.3f}, type={self.msg_type}, items={len(self.items)}, ' \
+               f'sender={self.sender})'
+
+
+def read_consensus_log(path: Union[str, pathlib.PurePath]) -> Iterator[ConsensusEvent]:
+    with open(path, 'rb') as fp:
+        content = fp.read()
+    if not content.startswith(CONSENSUS_LOG_MAGIC):
+        raise ValueError(f"{path} is not a consensus log.")
+    pos = len(CONSENSUS_LOG_MAGIC)
+    while pos < len(content):
+        timestamp, kind = _EVENT_STRUCT.unpack_from(content, pos)
+        pos += _EVENT_STRUCT.size
+        if kind == EVENT_TICK:
+            yield ConsensusEvent.tick(timestamp)
+            continue
+        msg_type, is_direct, sender_len, item_count = _MSG_STRUCT.unpack_from(content, pos)
+        pos += _MSG_STRUCT.size
+        sender = content[pos:pos + sender_len].decode('utf-8')
+        pos += sender_len
+        items = list()
+        for _ in range(item_count):
+            item_type, payload_len = _ITEM_STRUCT.unpack_from(content, pos)
+            pos += _ITEM_STRUCT.size
+            payload = content[pos:pos + payload_len]
+            pos += payload_len
+            items.append((item_type, payload if msg_type == MsgType.items_content else payload.decode('utf-8')))
+        yield ConsensusEvent(timestamp, kind, msg_type, bool(is_direct), sender, items)
+
+
+class ConsensusRecorder(MessageHandler):
+    """
+    Appends the received consensus messages and the maintenance steps of the node to a consensus log.
+    Register it after the item extraction, to record the extracted items and the authenticated sender.
+    """
+
+    def __init__(self, file_path: Union[str, pathlib.PurePath]):
+        self.file_path = file_path
+        self.recorded = 0
+        self._fp: Optional[BinaryIO] = open(file_path, 'wb')
+        self._fp.write(CONSENSUS_LOG_MAGIC)
+
+    def _write(self, event: ConsensusEvent):
+        if self._fp is None:
+            return
+        self._fp.write(event.to_bytes())
+        self.recorded += 1
+
+    def accept(self, cs: ChannelService, msg: Message):
+        event = ConsensusEvent.of_msg(timer.TIME_SUPPLIER(), msg)
+        if event is not None:
+            self._write(event)
+
+    def perform_maintenance(self, cs: ChannelService, force_maintenance=False):
+        self._write(ConsensusEvent.tick(timer.TIME_SUPPLIER()))
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+            logger.info("Recorded %d consensus events to %s.", self.recorded, self.file_path)
+
+
+def enable_consensus_recorder(ba: BaseApp, file_path: Union[str, pathlib.PurePath]) -> ConsensusRecorder:
+    recorder = ConsensusRecorder(file_path)
+    ba.register_app_layer("consensus_recorder", recorder)
+    return recorder
+
+
+class VirtualClock:
+    """
+    Time supplier whose time is set by the replayer.
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _CountingSender(MsgSender):
+
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    def _send(self, msg: Message, do_log=True):
+        self.sent += 1
+
+
+class ReplayChannelService:
+    """
+    Channel service stand-in for replayed handlers. All sent messages are counted and dropped.
+    """
+
+    def __init__(self, contact: PeerContactInfo):
+        self.contact = contact
+        self.sender = _CountingSender()
+
+    def broadcast_channel(self) -> OutputChannel:
+        return OutputChannel(sender=self.sender)
+
+    def direct_channel(self, peer) -> OutputChannel:
+        return OutputChannel(sender=self.sender)
+
+
+class ReplayReport:
+    """
+    CPU time spent by each handler per consensus round during a replay.
+    """
+
+    def __init__(self):
+        # round -> handler -> [cpu time of handled messages, cpu time of maintenance]
+        self.rounds: Dict[int, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0]))
+        self.messages = 0
+        self.ticks = 0
+        self.sent = 0
+        self.virtual_time = 0.0
+        self.cpu_time = 0.0
+
+    def add(self, round: int, handler: str, cpu_time: float, maintenance: bool):
+        self.rounds[round][handler][1 if maintenance else 0] += cpu_time
+
+    def round_cpu_time(self, round: int) -> float:
+        return sum(msg_time + maintenance_time for msg_time, maintenance_time in self.rounds[round].values())
+
+    def __str__(self):
+        lines = [f"Replayed {self.messages} messages and {self.ticks} maintenance steps covering "
+                 f"{self.virtual_time:.1f} sec in {self.cpu_time:.3f} sec CPU time. {self.sent} messages sent."]
+        for round in sorted(self.rounds):
+            lines.append(f"Round {round}: {self.round_cpu_time(round) * 1000:.2f} ms")
+            for handler, (msg_time, maintenance_time) in sorted(self.rounds[round].items()):
+                lines.append(f"  {handler:<24} messages {msg_time * 1000:>9.2f} ms  "
+                             f"maintenance {maintenance_time * 1000:>9.2f} ms")
+        return "\n".join(lines)
+
+
+class ConsensusReplayer:
+    """
+    Feeds recorded consensus events into a fresh handler stack under a virtual clock.
+    """
+
+    def __init__(self, events: Iterable[ConsensusEvent], contact: PeerContactInfo = None):
+        self.events: List[ConsensusEvent] = list(events)
+        if contact is None:
+            contact = PeerContactInfo("Replay", None, None, None)
+        self.contact = contact
+
+    def run(self, build_stack: Callable[[BaseApp], Optional[PreCheckpoint]]) -> ReplayReport:
+        """
+        Replays the events.
+        The given function registers the handler stack in the given app and returns the pre checkpoint,
+        whose round the CPU time is attributed to. It is called at the time of the first event.
+        """
+        report = ReplayReport()
+        if not self.events:
+            return report
+        clock = VirtualClock(self.events[0].timestamp)
+        old_suppliers = timer.TIME_SUPPLIER, ckpttimer.TIME_SUPPLIER
+        timer.TIME_SUPPLIER = ckpttimer.TIME_SUPPLIER = clock
+        try:
+            cs = ReplayChannelService(self.contact)
+            ba = BaseApp(cs)
+            pc = build_stack(ba)
+            handlers = list(ba.msg_del.msg_handlers)
+            start = time.process_time()
+            for event in self.events:
+                clock.now = max(clock.now, event.timestamp)
+                if event.kind == EVENT_TICK:
+                    report.ticks += 1
+                    self._maintain(cs, handlers, pc, report)
+                else:
+                    report.messages += 1
+                    self._deliver(cs, event.to_message(), handlers, pc, report)
+            report.cpu_time = time.process_time() - start
+            report.virtual_time = clock.now - self.events[0].timestamp
+            report.sent = cs.sender.sent
+        finally:
+            timer.TIME_SUPPLIER, ckpttimer.TIME_SUPPLIER = old_suppliers
+        return report
+
+    @staticmethod
+    def _round(pc: Optional[PreCheckpoint]) -> int:
+        return pc.state.round if pc is not None else 0
+
+    def _deliver(self, cs, msg: Message, handlers: List[MessageHandler], pc, report: ReplayReport):
+        for handler in handlers:
+            round = self._round(pc)
+            start = time.process_time()
+            try:
+                handler.accept(cs, msg)
+            except Exception:
+                logger.error("Error replaying message to %s.", handler, exc_info=True)
+            report.add(round, type(handler).__name__, time.process_time() - start, maintenance=False)
+
+    def _maintain(self, cs, handlers: List[MessageHandler], pc, report: ReplayReport):
+        for handler in handlers:
+            round = self._round(pc)
+            start = time.process_time()
+            try:
+                handler.perform_maintenance(cs)
+            except Exception:
+                logger.error("Error performing maintenance of %s during replay.", handler, exc_info=True)
+            report.add(round, type(handler).__name__, time.process_time() - start, maintenance=True)
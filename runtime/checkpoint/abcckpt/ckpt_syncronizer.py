@@ -1,13 +1,17 @@
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Union, Optional, List, Dict, AnyStr, Any, Set, Tuple
 
 from abccore.DAG import Genesis, Checkpoint
 from abccore.agent_service import AgentService
 from abcnet.handlers import AbstractItemHandler
 from abcnet.services import ChannelService
-from abcnet.structures import ItemQualifier, ItemEncodeable, Message
+from abcnet.outch import OutputChannel
+from abcnet.structures import ItemQualifier, ItemEncodeable, Message, PeerContactInfo
+from abcnet import timer
 from abcnet.timer import SimpleTimer
-from abcnet.transcriber import ItemsParser, Parser
+from abcnet.transcriber import ItemsParser, Parser, Transcriber
 
 from abcckpt import ckpt_constants
 from abcckpt.ckptItems import CkptItemType, CkptData
@@ -51,24 +55,213 @@ class CkptSyncChecklistItem(ItemQualifier):
         return self.ckpt_id.hex()
 
 
-class CkptSyncParser(ItemsParser):
-    """Handles the decoding of the checkpoint item received."""
+class CkptTipItem(ItemQualifier):
+    """
+    Advertises the latest checkpoint of a peer and the height of its checkpoint chain.
+    The genesis has height 0.
+    """
+
+    def __init__(self, height: int, tip_id: bytes):
+        self.height = height
+        self.tip_id = tip_id
+
+    def item_type(self) -> int:
+        return CkptItemType.CKPT_TIP
+
+    def item_qualifier(self) -> AnyStr:
+        return f"{self.height}:{self.tip_id.hex()}"
+
+    @staticmethod
+    def parse_qualifier(item_qualifier: str) -> Tuple[int, bytes]:
+        height, tip_hex = item_qualifier.split(":")
+        return int(height), bytes.fromhex(tip_hex)
+
+
+class CkptManifest:
+    """
+    Metadata of a checkpoint of the chain: its id, the size of its encoded content and the hashes of its chunks.
+    """
 
-    def decode_item(self, item_type: int, parser: Parser, delegate=CkptItemsParser()) -> Checkpoint:
+    def __init__(self, ckpt_id: bytes, size: int, chunk_hashes: List[bytes]):
+        self.ckpt_id = ckpt_id
+        self.size = size
+        self.chunk_hashes = chunk_hashes
+
+    @staticmethod
+    def of_content(ckpt_id: bytes, content: bytes) -> "CkptManifest":
+        chunk_size = ckpt_constants.CKPT_SYNC_CHUNK_SIZE
+        chunk_hashes = [hashlib.sha256(content[i:i + chunk_size]).digest()
+                        for i in range(0, max(len(content), 1), chunk_size)]
+        return CkptManifest(ckpt_id, len(content), chunk_hashes)
+
+    def chunk_count(self) -> int:
+        return len(self.chunk_hashes)
+
+
+class CkptRangeItem(ItemQualifier, ItemEncodeable):
+    """
+    Manifests of the checkpoints of the chain from height `start` to height `end`.
+    The qualifier is used to request ranges.
+    """
+
+    def __init__(self, start: int, manifests: List[CkptManifest]):
+        self.start = start
+        self.manifests = manifests
+
+    def item_type(self) -> int:
+        return CkptItemType.CKPT_RANGE
+
+    def item_qualifier(self) -> AnyStr:
+        return self.range_qualifier(self.start, self.start + len(self.manifests) - 1)
+
+    @staticmethod
+    def range_qualifier(start: int, end: int) -> str:
+        return f"{start}:{end}"
+
+    @staticmethod
+    def parse_qualifier(item_qualifier: str) -> Tuple[int, int]:
+        start, end = item_qualifier.split(":")
+        return int(start), int(end)
+
+    def encode(self, transcriber: "Transcriber"):
+        transcriber.integer(self.start)
+        transcriber.integer(len(self.manifests))
+        for manifest in self.manifests:
+            transcriber.nested_bytes(manifest.ckpt_id)
+            transcriber.integer(manifest.size)
+            transcriber.integer(len(manifest.chunk_hashes))
+            for chunk_hash in manifest.chunk_hashes:
+                transcriber.nested_bytes(chunk_hash)
+
+
+class CkptChunkItem(ItemQualifier, ItemEncodeable):
+    """
+    A single chunk of the encoded content of a checkpoint.
+    """
+
+    def __init__(self, ckpt_id: bytes, index: int, data: bytes):
+        self.ckpt_id = ckpt_id
+        self.index = index
+        self.data = data
+
+    def item_type(self) -> int:
+        return CkptItemType.CKPT_CHUNK
+
+    def item_qualifier(self) -> AnyStr:
+        return self.chunk_qualifier(self.ckpt_id, self.index)
+
+    @staticmethod
+    def chunk_qualifier(ckpt_id: bytes, index: int) -> str:
+        return f"{ckpt_id.hex()}:{index}"
+
+    @staticmethod
+    def parse_qualifier(item_qualifier: str) -> Tuple[bytes, int]:
+        ckpt_hex, index = item_qualifier.split(":")
+        return bytes.fromhex(ckpt_hex), int(index)
+
+    def encode(self, transcriber: "Transcriber"):
+        transcriber.nested_bytes(self.ckpt_id)
+        transcriber.integer(self.index)
+        transcriber.nested_bytes(self.data)
+
+
+class CkptSyncParser(ItemsParser):
+    """Handles the decoding of the checkpoint sync items received."""
+
+    def decode_item(self, item_type: int, parser: Parser, delegate=CkptItemsParser()) -> Any:
+        if item_type == CkptItemType.CKPT_RANGE:
+            start = parser.consume_int()
+            manifests = []
+            for _ in range(parser.consume_int()):
+                ckpt_id = parser.consume_nested_bytes()
+                size = parser.consume_int()
+                chunk_hashes = [parser.consume_nested_bytes() for _ in range(parser.consume_int())]
+                manifests.append(CkptManifest(ckpt_id, size, chunk_hashes))
+            return CkptRangeItem(start, manifests)
+        elif item_type == CkptItemType.CKPT_CHUNK:
+            ckpt_id = parser.consume_nested_bytes()
+            index = parser.consume_int()
+            return CkptChunkItem(ckpt_id, index, parser.consume_nested_bytes())
         ckpt_data: CkptData = delegate.decode_item(CkptItemType.CKPT_DATA, parser)
         assert ckpt_data is not None
         return ckpt_data.checkpoint_data
 
 
+class CkptDownload:
+    """
+    Chunks of a checkpoint that were received so far.
+    Interrupted downloads are resumed by requesting only the missing chunks.
+    """
+
+    def __init__(self, height: int, manifest: CkptManifest, peer_id: str = ""):
+        self.height = height
+        self.manifest = manifest
+        # The peer that sent the manifest
+        self.peer_id = peer_id
+        self.chunks: Dict[int, bytes] = dict()
+        # Peers that were asked for chunks since the last received chunk
+        self.requested_from: Set[str] = set()
+        self.last_progress: float = timer.TIME_SUPPLIER()
+
+    def add_chunk(self, index: int, data: bytes) -> bool:
+        """
+        Stores the chunk if its hash matches the manifest.
+        """
+        if not 0 <= index < self.manifest.chunk_count() or index in self.chunks:
+            return False
+        if hashlib.sha256(data).digest() != self.manifest.chunk_hashes[index]:
+            logger.warning("Chunk %d of checkpoint %s doesn't match its hash.", index, self.manifest.ckpt_id.hex())
+            return False
+        self.chunks[index] = data
+        self.requested_from.clear()
+        self.last_progress = timer.TIME_SUPPLIER()
+        return True
+
+    def resume(self, stalled: "CkptDownload") -> int:
+        """
+        Takes over the chunks of a stalled download that match the hashes of this manifest.
+        Returns the number of chunks taken over.
+        """
+        return sum(self.add_chunk(index, data) for index, data in stalled.chunks.items())
+
+    def silent_peers(self) -> Set[str]:
+        """
+        Returns the peers that were asked for the manifest or the chunks and didn't deliver since the last progress.
+        """
+        return {peer_id for peer_id in self.requested_from | {self.peer_id} if peer_id}
+
+    def is_stale(self, now: float) -> bool:
+        return now - self.last_progress > ckpt_constants.CKPT_SYNC_DOWNLOAD_TIMEOUT
+
+    def missing_chunks(self) -> List[int]:
+        return [i for i in range(self.manifest.chunk_count()) if i not in self.chunks]
+
+    def is_complete(self) -> bool:
+        return len(self.chunks) == self.manifest.chunk_count()
+
+    def content(self) -> bytes:
+        return b''.join(self.chunks[i] for i in range(self.manifest.chunk_count()))
+
+
 class CkptSync(AbstractItemHandler):
     """
     Checkpoint synchronize handler for the checkpoint.
+
+    Peers advertise the tip and the height of their checkpoint chain.
+    A peer that is behind requests the manifests of the missing heights in ranges
+    and downloads the chunks of the missing checkpoints from all peers that advertised them.
+    Received chunks are kept until the checkpoint is complete, so an interrupted download is resumed.
+    Downloads that receive no chunk for a while are stalled and their manifests are requested again.
+    The verified chunks of a stalled download are kept and taken over if they match the refetched manifest.
+    The peers that were silent during the stall are avoided for a while.
+    Peers that stop advertising their tip are forgotten.
     """
 
     pc: "PreCheckpoint"
 
     def __init__(self, pc: PreCheckpoint, agent_service: AgentService):
-        super(CkptSync, self).__init__([CkptItemType.CKPT], CkptSyncParser())
+        super(CkptSync, self).__init__([CkptItemType.CKPT, CkptItemType.CKPT_TIP, CkptItemType.CKPT_RANGE,
+                                        CkptItemType.CKPT_CHUNK], CkptSyncParser())
         self.agent_service = agent_service
         self.pc = pc
         self.maintenance_methods = [
@@ -78,12 +271,29 @@ class CkptSync(AbstractItemHandler):
             (self.pm_response, SimpleTimer(ckpt_constants.CKPT_SYNC_RESPONSE))
         ]
         self.latest_ckpt_id: Optional[bytes] = None
+        # Checkpoint ids indexed by height - 1
         self.ckpt_list: List[bytes] = list()
+        self.ckpt_heights: Dict[bytes, int] = dict()
         self.ckpt_orphan: Dict[bytes, Checkpoint] = dict()
 
         self.requested_ckpts: Set[bytes] = set()
         self.missing_ckpts: Set[bytes] = set()
 
+        # Peer id -> contact and requested items of the peer
+        self.peer_requests: Dict[str, Tuple[Optional[PeerContactInfo], Set[Tuple[int, str]]]] = dict()
+        # Peer id -> contact, advertised height and time of the advertisement
+        self.peer_heights: Dict[str, Tuple[PeerContactInfo, int, float]] = dict()
+        # Number of range requests, used to ask the peers in turn
+        self.range_requests: int = 0
+        self.target_height: int = 0
+        self.downloads: Dict[bytes, CkptDownload] = dict()
+        self.download_heights: Dict[int, bytes] = dict()
+        # Height -> stalled download whose chunks are resumed once the manifest is received again
+        self.stalled_downloads: Dict[int, CkptDownload] = dict()
+        # Peer id -> time the peer was found silent during a stalled download
+        self.silent_peers: Dict[str, float] = dict()
+        self.encoded_ckpts: "OrderedDict[bytes, Tuple[bytes, CkptManifest]]" = OrderedDict()
+
     def perform_maintenance(self, cs: "ChannelService", force_maintenance=False):
         for method, timer in self.maintenance_methods:
             if timer():
@@ -106,6 +316,14 @@ class CkptSync(AbstractItemHandler):
         self.latest_ckpt_id = ckpt.get_identifier()
         if isinstance(ckpt, Checkpoint):
             self.ckpt_list.append(ckpt.get_identifier())
+            self.ckpt_heights[ckpt.get_identifier()] = len(self.ckpt_list)
+            self.missing_ckpts.discard(ckpt.get_identifier())
+
+    def height(self) -> int:
+        """
+        Returns the height of the known checkpoint chain. The genesis has height 0.
+        """
+        return len(self.ckpt_list)
 
     def process_new_ckpt(self, ckpt: Checkpoint):
         logger.info("New external checkpoint is injected into the agent.")
@@ -119,14 +337,14 @@ class CkptSync(AbstractItemHandler):
 
         if ckpt.get_identifier() in self.ckpt_orphan:
             logger.info("Injecting the checkpoint freed another checkpoint: %s", ckpt.get_identifier().hex())
-            next_ckpt = self.ckpt_orphan[ckpt.get_origin()]
-            del self.ckpt_orphan[ckpt.get_origin()]
-            self.update_ckpt(next_ckpt)
+            next_ckpt = self.ckpt_orphan[ckpt.get_identifier()]
+            del self.ckpt_orphan[ckpt.get_identifier()]
+            self.update_ckpt(next_ckpt, external=True)
 
     def update_ckpt(self, ckpt: Union[Genesis, Checkpoint], external=False):
         if self.latest_ckpt_id == ckpt.get_identifier():
             return False
-        if ckpt.get_identifier() in self.ckpt_list:
+        if ckpt.get_identifier() in self.ckpt_heights:
             return False
         if isinstance(ckpt, Genesis) and not isinstance(ckpt, Checkpoint):
             if self.latest_ckpt_id is not None:
@@ -137,7 +355,7 @@ class CkptSync(AbstractItemHandler):
             return True
         ckpt: Checkpoint
         prev_ckpt = ckpt.get_origin()
-        if prev_ckpt != self.latest_ckpt_id and prev_ckpt not in self.ckpt_list:
+        if prev_ckpt != self.latest_ckpt_id and prev_ckpt not in self.ckpt_heights:
             logger.warning("Received an orphaned checkpoint.")
             self.add_orphan(ckpt)
             return False
@@ -171,6 +389,37 @@ class CkptSync(AbstractItemHandler):
             cursor = prev_ckpt.get_node()
         raise ValueError("Genesis not found in the DAG..")
 
+    def find_ckpt(self, ckpt_id: bytes) -> Optional[Checkpoint]:
+        """
+        Looks up a checkpoint of the known chain in the DAG.
+        """
+        if ckpt_id not in self.ckpt_heights:
+            return None
+        leaf = self.agent_service.get_DAG().search(ckpt_id)
+        if leaf is None or not isinstance(leaf.get_node(), Checkpoint):
+            return None
+        return leaf.get_node()
+
+    def encoded_ckpt(self, ckpt_id: bytes) -> Optional[Tuple[bytes, CkptManifest]]:
+        """
+        Returns the encoded content of the checkpoint and its manifest.
+        The most recently used encodings are cached.
+        """
+        if ckpt_id in self.encoded_ckpts:
+            self.encoded_ckpts.move_to_end(ckpt_id)
+            return self.encoded_ckpts[ckpt_id]
+        ckpt = self.find_ckpt(ckpt_id)
+        if ckpt is None:
+            return None
+        transcriber = Transcriber()
+        CkptSyncItem(ckpt).encode(transcriber)
+        content = transcriber.msg.parts[0]
+        encoded = content, CkptManifest.of_content(ckpt_id, content)
+        self.encoded_ckpts[ckpt_id] = encoded
+        if len(self.encoded_ckpts) > ckpt_constants.CKPT_SYNC_RANGE:
+            self.encoded_ckpts.popitem(last=False)
+        return encoded
+
     def pm_dag_check(self, cs: ChannelService):
         ckpt = self.agent_service.get_DAG().get_latest_checkpoint()
         if ckpt is None:
@@ -194,31 +443,137 @@ class CkptSync(AbstractItemHandler):
 
     def pm_checklist(self, cs: ChannelService):
         if self.ckpt_list:
-            cs.broadcast_channel().checklist(
-                list(map(self.to_item_id_wrap, self.ckpt_list))
-            )
+            cs.broadcast_channel().checklist([CkptTipItem(self.height(), self.latest_ckpt_id)])
 
     def pm_fetch(self, cs: ChannelService):
         if self.missing_ckpts:
             cs.broadcast_channel().fetch_items(
                 list(map(self.to_item_tuple, self.missing_ckpts))
             )
+        self.expire(timer.TIME_SUPPLIER())
+        self.fetch_ranges(cs)
+        self.fetch_chunks(cs)
 
-    def pm_response(self, cs: ChannelService):
-        response_items = list(filter(self.has_ckpt_id, self.requested_ckpts))
-        if not response_items:
+    def expire(self, now: float):
+        """
+        Forgets peers that stopped advertising their tip and stalls stale downloads.
+        The manifests of a stalled download are requested again, preferably from peers that weren't silent.
+        Its verified chunks are kept until the manifest is received again.
+        """
+        expiry = now - ckpt_constants.CKPT_SYNC_PEER_TIMEOUT
+        for peer_id in [peer_id for peer_id, (_, _, advertised) in self.peer_heights.items() if advertised <= expiry]:
+            del self.peer_heights[peer_id]
+        for peer_id in [peer_id for peer_id, silent in self.silent_peers.items() if silent <= expiry]:
+            del self.silent_peers[peer_id]
+        for height in [height for height in self.stalled_downloads if height <= self.height()]:
+            del self.stalled_downloads[height]
+        for ckpt_id in [ckpt_id for ckpt_id, download in self.downloads.items() if download.is_stale(now)]:
+            download = self.downloads.pop(ckpt_id)
+            del self.download_heights[download.height]
+            self.stalled_downloads[download.height] = download
+            silent_peers = download.silent_peers()
+            for peer_id in silent_peers:
+                self.silent_peers[peer_id] = now
+            logger.warning("Stalled the download of checkpoint %s at height %d with %d of %d chunks, silent peers: %s.",
+                           ckpt_id.hex(), download.height, len(download.chunks), download.manifest.chunk_count(),
+                           sorted(silent_peers))
+
+    def serving_peers(self, height: int) -> List[str]:
+        """
+        Returns the peers that advertised the height, without the silent ones unless all of them are silent.
+        """
+        peers = [peer_id for peer_id, (_, peer_height, _) in self.peer_heights.items() if peer_height >= height]
+        return [peer_id for peer_id in peers if peer_id not in self.silent_peers] or peers
+
+    def fetch_ranges(self, cs: ChannelService):
+        """
+        Requests the manifests of the next heights that are neither known nor being downloaded.
+        The peers that advertised these heights are asked in turn, so an unanswered request goes to another peer.
+        Silent peers are only asked if no other peer advertised these heights.
+        """
+        start = self.height() + 1
+        while start in self.download_heights:
+            start += 1
+        end = min(self.target_height, self.height() + ckpt_constants.CKPT_SYNC_RANGE)
+        if start > end:
             return
-        logger.info("Responding to checkpoints requested by the network: \n%s",
-                    list(map(self.to_item_tuple, self.requested_ckpts)))
-        gen, chain = self.ckpt_chain()
-        chain = list(filter(lambda ckpt: ckpt.get_identifier() in self.requested_ckpts, chain))
-        cs.broadcast_channel().items(
-            list(map(self.to_item_wrap, chain))
-        )
-        self.requested_ckpts.clear()
+        peers = [self.peer_heights[peer_id][0] for peer_id in self.serving_peers(end)]
+        channel = cs.direct_channel(peers[self.range_requests % len(peers)]) if peers else cs.broadcast_channel()
+        self.range_requests += 1
+        channel.fetch_items([(CkptItemType.CKPT_RANGE, CkptRangeItem.range_qualifier(start, end))])
+
+    def fetch_chunks(self, cs: ChannelService):
+        """
+        Requests the missing chunks of the downloads, lowest height first.
+        Chunks are spread over the peers that advertised the checkpoint.
+        Requests that are not answered until the next fetch are sent again, possibly to another peer.
+        """
+        requests: Dict[str, List[Tuple[int, str]]] = dict()
+        peer_index = 0
+        for height in sorted(self.download_heights):
+            download = self.downloads[self.download_heights[height]]
+            peers = self.serving_peers(height)
+            for index in download.missing_chunks():
+                qualifier = CkptChunkItem.chunk_qualifier(download.manifest.ckpt_id, index)
+                if not peers:
+                    requests.setdefault("", list()).append((CkptItemType.CKPT_CHUNK, qualifier))
+                    continue
+                for _ in range(len(peers)):
+                    peer_id = peers[peer_index % len(peers)]
+                    peer_index += 1
+                    if len(requests.get(peer_id, ())) < ckpt_constants.CKPT_SYNC_CHUNKS_PER_PEER:
+                        requests.setdefault(peer_id, list()).append((CkptItemType.CKPT_CHUNK, qualifier))
+                        download.requested_from.add(peer_id)
+                        break
+        for peer_id, items in requests.items():
+            if peer_id:
+                cs.direct_channel(self.peer_heights[peer_id][0]).fetch_items(items)
+            else:
+                cs.broadcast_channel().fetch_items(items[:ckpt_constants.CKPT_SYNC_CHUNKS_PER_PEER])
+
+    def pm_response(self, cs: ChannelService):
+        for peer_id, (contact, requests) in self.peer_requests.items():
+            response_items = list()
+            for item_type, item_qualifier in requests:
+                try:
+                    item = self.response_item(item_type, item_qualifier)
+                except ValueError:
+                    logger.warning("Malformed checkpoint sync request: %s", item_qualifier)
+                    continue
+                if item is not None:
+                    response_items.append(item)
+            if response_items:
+                channel = cs.direct_channel(contact) if contact is not None else cs.broadcast_channel()
+                channel.items(response_items)
+        self.peer_requests.clear()
+
+    def response_item(self, item_type: int, item_qualifier: str) -> Optional[ItemEncodeable]:
+        if item_type == CkptItemType.CKPT:
+            ckpt = self.find_ckpt(bytes.fromhex(item_qualifier))
+            return self.to_item_wrap(ckpt) if ckpt is not None else None
+        elif item_type == CkptItemType.CKPT_RANGE:
+            start, end = CkptRangeItem.parse_qualifier(item_qualifier)
+            end = min(end, self.height(), start + ckpt_constants.CKPT_SYNC_RANGE - 1)
+            if start < 1 or start > end:
+                return None
+            manifests = list()
+            for ckpt_id in self.ckpt_list[start - 1:end]:
+                encoded = self.encoded_ckpt(ckpt_id)
+                if encoded is None:
+                    break
+                manifests.append(encoded[1])
+            return CkptRangeItem(start, manifests) if manifests else None
+        elif item_type == CkptItemType.CKPT_CHUNK:
+            ckpt_id, index = CkptChunkItem.parse_qualifier(item_qualifier)
+            encoded = self.encoded_ckpt(ckpt_id)
+            if encoded is None or not 0 <= index < encoded[1].chunk_count():
+                return None
+            chunk_size = ckpt_constants.CKPT_SYNC_CHUNK_SIZE
+            return CkptChunkItem(ckpt_id, index, encoded[0][index * chunk_size:(index + 1) * chunk_size])
+        return None
 
     def has_ckpt_id(self, ckpt_id: bytes) -> bool:
-        return ckpt_id in self.ckpt_list
+        return ckpt_id in self.ckpt_heights
 
     @staticmethod
     def to_item_tuple(ckpt_id: bytes):
@@ -232,14 +587,61 @@ class CkptSync(AbstractItemHandler):
     def to_item_wrap(ckpt: Checkpoint):
         return CkptSyncItem(ckpt)
 
-    def handle_item_content(self, cs: "ChannelService", msg: Message, item_type: int, ckpt: Checkpoint):
+    def add_manifests(self, range_item: CkptRangeItem, peer_id: str = ""):
+        for height, manifest in enumerate(range_item.manifests, start=range_item.start):
+            if height <= self.height() or height in self.download_heights or manifest.ckpt_id in self.downloads:
+                continue
+            download = CkptDownload(height, manifest, peer_id)
+            stalled = self.stalled_downloads.pop(height, None)
+            if stalled is not None:
+                logger.info("Resumed the download of checkpoint %s at height %d with %d of %d chunks.",
+                            manifest.ckpt_id.hex(), height, download.resume(stalled), manifest.chunk_count())
+            self.downloads[manifest.ckpt_id] = download
+            self.download_heights[height] = manifest.ckpt_id
+
+    def add_chunk(self, chunk: CkptChunkItem):
+        download = self.downloads.get(chunk.ckpt_id)
+        if download is None or not download.add_chunk(chunk.index, chunk.data):
+            return
+        if not download.is_complete():
+            return
+        del self.downloads[chunk.ckpt_id]
+        del self.download_heights[download.height]
+        try:
+            ckpt = self.item_parser.decode_item_bytes(CkptItemType.CKPT, download.content())
+        except Exception:
+            logger.warning("Downloaded checkpoint %s couldn't be decoded.", chunk.ckpt_id.hex(), exc_info=True)
+            return
+        if ckpt.get_identifier() != chunk.ckpt_id:
+            logger.warning("Downloaded checkpoint %s has the id %s.", chunk.ckpt_id.hex(), ckpt.get_identifier().hex())
+            return
+        logger.info("Downloaded checkpoint %s at height %d in %d chunks.", chunk.ckpt_id.hex(), download.height,
+                    download.manifest.chunk_count())
         self.update_ckpt(ckpt, external=True)
 
+    def handle_item_content(self, cs: "ChannelService", msg: Message, item_type: int, item_content: Any):
+        if item_type == CkptItemType.CKPT_RANGE:
+            self.add_manifests(item_content, msg.sender.identifier if msg.sender is not None else "")
+        elif item_type == CkptItemType.CKPT_CHUNK:
+            self.add_chunk(item_content)
+        else:
+            self.update_ckpt(item_content, external=True)
+
     def handle_item_request(self, cs: "ChannelService", msg: Message, item_type: int, item_qualifier: str):
-        ckpt_id = bytes.fromhex(item_qualifier)
-        self.requested_ckpts.add(ckpt_id)
+        sender = msg.sender
+        peer_id = sender.identifier if sender is not None else ""
+        if peer_id not in self.peer_requests:
+            self.peer_requests[peer_id] = (sender, set())
+        self.peer_requests[peer_id][1].add((item_type, item_qualifier))
 
     def handle_item_checklist(self, cs: "ChannelService", msg: Message, item_type: int, item_qualifier: str):
+        if item_type == CkptItemType.CKPT_TIP:
+            height, tip_id = CkptTipItem.parse_qualifier(item_qualifier)
+            if msg.sender is not None:
+                self.peer_heights[msg.sender.identifier] = (msg.sender, height, timer.TIME_SUPPLIER())
+            if tip_id not in self.ckpt_heights:
+                self.target_height = max(self.target_height, height)
+            return
         ckpt_id = bytes.fromhex(item_qualifier)
-        if ckpt_id not in self.ckpt_list:
+        if ckpt_id not in self.ckpt_heights:
             self.missing_ckpts.add(ckpt_id)
@@ -0,0 +1,112 @@
+"""
+Batch verification of consensus messages.
+
+Consensus messages arrive in bursts at the start of each step, spread over many network messages. Handlers queue
+the messages received until their next maintenance and pass them to a `BatchVerifier` before processing them one by one. The verifier drops duplicates, skips messages whose
+signature was already checked and checks the rest in one go, optionally in a pool of worker threads.
+The outcome is remembered, so the single message checks of the handlers that follow are cache hits.
+"""
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from abcckpt import ckpt_constants
+from abcckpt.ckptItems import CkptMsg
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def worker_pool() -> Optional[ThreadPoolExecutor]:
+    """
+    Returns the shared pool of verification workers or None if verification is done serially.
+    """
+    global _executor
+    if ckpt_constants.CKPT_VERIFY_WORKERS <= 0:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=ckpt_constants.CKPT_VERIFY_WORKERS,
+                                       thread_name_prefix="ckpt-verify")
+    return _executor
+
+
+def check_signature(msg: CkptMsg) -> bool:
+    return msg.verify_signature()
+
+
+class BatchVerifier:
+    """
+    Verifies consensus messages with the given check and remembers the results of the recently checked messages.
+    Messages are identified by their id, which covers the signer and the round, and their signature.
+    """
+
+    def __init__(self, check: Callable[[CkptMsg], bool] = check_signature,
+                 cache_size: int = None):
+        self.check = check
+        self.cache_size = cache_size if cache_size is not None else ckpt_constants.CKPT_VERIFY_CACHE_SIZE
+        self.results: "OrderedDict[Tuple[bytes, Optional[Tuple[bytes, bytes]]], bool]" = OrderedDict()
+        self.checked = 0
+        self.cache_hits = 0
+
+    @staticmethod
+    def key(msg: CkptMsg) -> Tuple[bytes, Optional[Tuple[bytes, bytes]]]:
+        signature = msg.signature
+        if signature is not None:
+            signature = (bytes(signature[0]), bytes(signature[1]))
+        return msg.get_id(), signature
+
+    def _remember(self, key, result: bool):
+        self.results[key] = result
+        if len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+
+    def _cached(self, key) -> Optional[bool]:
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            self.cache_hits += 1
+        return result
+
+    def verify(self, msg: CkptMsg) -> bool:
+        """
+        Checks a single message.
+        """
+        key = self.key(msg)
+        result = self._cached(key)
+        if result is None:
+            result = bool(self.check(msg))
+            self.checked += 1
+            self._remember(key, result)
+        return result
+
+    def verify_batch(self, msgs: Iterable[CkptMsg]) -> List[CkptMsg]:
+        """
+        Checks all given messages and returns the valid ones in the given order.
+        Duplicates are checked once.
+        """
+        msgs = list(msgs)
+        keys = [self.key(msg) for msg in msgs]
+        valid: Dict[Tuple, bool] = dict()
+        pending: Dict[Tuple, CkptMsg] = dict()
+        for key, msg in zip(keys, msgs):
+            if key in valid or key in pending:
+                continue
+            result = self._cached(key)
+            if result is None:
+                pending[key] = msg
+            else:
+                valid[key] = result
+        if pending:
+            pool = worker_pool()
+            if pool is not None and len(pending) >= ckpt_constants.CKPT_VERIFY_POOL_MIN_BATCH:
+                results = pool.map(self.check, pending.values())
+            else:
+                results = map(self.check, pending.values())
+            for key, result in zip(list(pending.keys()), results):
+                valid[key] = bool(result)
+                self._remember(key, valid[key])
+            self.checked += len(pending)
+            logger.debug("Verified a batch of %d messages, %d of them were checked.", len(msgs), len(pending))
+        return [msg for key, msg in zip(keys, msgs) if valid[key]]
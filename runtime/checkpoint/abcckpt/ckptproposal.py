@@ -1,7 +1,7 @@
 import decimal
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_EVEN
-from typing import Union, Dict, Tuple, List
+from typing import Union, Dict, Tuple, List, Optional, Set
 from abccore.DAG import Acknowledge, Transaction, Wallet, Genesis, get_wallet_value, State, Checkpoint, Node
 from abccore.checkpoint_service import CheckpointService
 from abcckpt.ckpt_constants import ALPHA, FEE_THRESHOLD, REWARD
@@ -40,9 +40,14 @@ class Ckpt_Proposal:
         finally:
             decimal.setcontext(old_context)
         self.nutxo = len(self.outputs)
+        # The commitments of the new checkpoint are derived from the last checkpoint
+        prev_ckpt = self.dagtree.get_latest_checkpoint()
+        if not isinstance(prev_ckpt, Checkpoint) or prev_ckpt.get_identifier() != self.lastckptid:
+            prev_ckpt = None
         self.Ckpt = Checkpoint(self.lastckptid, height, self.locktime, ack_len,
                                self.outputs, self.fee_rewards, self.stake_list,
-                               self.nutxo, self.total_stake(), self.total_coins(), miner)
+                               self.nutxo, self.total_stake(), self.total_coins(), miner,
+                               prev_checkpoint=prev_ckpt)
 
     def extract_utxo(self, dag: Tree, ckpt_service):
         """
@@ -359,90 +364,164 @@ class Ckpt_Proposal:
         return coin_sum.quantize(Decimal(".00000000000001"), rounding=ROUND_HALF_EVEN)
 
 
+OutPoint = Tuple[bytes, int]
+
+
+class CheckpointDiff:
+    """
+    Result of the verification of a checkpoint proposal against the local DAG and the last checkpoint.
+    The diff is truthy if the checkpoint is valid.
+    """
+
+    PENDING = "PENDING"
+    EMPTY = "EMPTY"
+
+    def __init__(self):
+        self.status: str = ""  # "", EMPTY or PENDING
+        self.reason: str = ""  # Reason of the rejection of a checkpoint
+        self.missing_txns: Set[bytes] = set()  # Origins of new outputs that are not found in the DAG
+        self.unexpected_outputs: List[Wallet] = list()  # New outputs that do not match the DAG
+        # Stake owner -> (stake of the checkpoint, expected stake). The total stake is reported under the key None.
+        self.stake_mismatches: Dict[Optional[bytes], Tuple[Optional[Decimal], Optional[Decimal]]] = dict()
+
+    @staticmethod
+    def rejected(reason: str, status: str = "") -> "CheckpointDiff":
+        diff = CheckpointDiff()
+        diff.reason = reason
+        diff.status = status
+        return diff
+
+    @property
+    def valid(self) -> bool:
+        return not self.reason and not self.status and not self.unexpected_outputs and not self.stake_mismatches \
+               and not self.missing_txns
+
+    @property
+    def pending(self) -> bool:
+        return self.status == CheckpointDiff.PENDING
+
+    def __bool__(self):
+        return self.valid
+
+    def __str__(self):
+        return f"CheckpointDiff(valid={self.valid}, status={self.status}, reason={self.reason}, " \
+               f"missing_txns={len(self.missing_txns)}, unexpected_outputs={len(self.unexpected_outputs)}, " \
+               f"stake_mismatches={len(self.stake_mismatches)})"
+
+
 class PostCheckpoint:
 
     @staticmethod
     def checkpoint_verify(dagtree: Tree, checkpoint: Checkpoint, ckpt_service: CheckpointService,
-                          agentservice: AgentService) -> Tuple[bool, str]:
+                          agentservice: AgentService,
+                          expected_stake: Optional[Dict[bytes, Decimal]] = None) -> CheckpointDiff:
         """
-        Checks the validity of the checkpoint, if transaction is not found it adds the transaction id to pending lists
-        which verify/request the network for missing transaction id.
+        Checks the validity of the checkpoint in a single pass over its outputs and stake entries.
+        Outputs that are carried over from the last checkpoint are matched by their outpoint.
+        Only the new outputs are looked up in the DAG. If the txn of a new output is not found,
+        it is added to the fetch list of the agent and the verification is pending.
         :param dagtree: refrence to the dagtree object.
         :param ckpt_service: checkpoint service
         :param checkpoint: checkpoint received from the network.
         :param agentservice: agenet service object
-        :returns: True if checkpoint is valid, False if checkpoint data is invalid; status is returned as "PENDING" if
-        there are txns that requires to be fetched.
-
+        :param expected_stake: Locally computed stake list. If given, the stake entries of the checkpoint are compared
+        against it.
+        :returns: Diff of the checkpoint. It is valid if the checkpoint is valid. Its status is "EMPTY" if the
+        checkpoint doesn't change any output and "PENDING" if there are txns that need to be fetched.
         """
-        pending: Dict[Tuple[bytes, int], Wallet] = dict()
-        missing_txn: List[bytes] = list()
-
-        def verify_output(output: Wallet) -> bool:
-            """
-            Verifies the existence of the given wallet. If not found in the DAG then adds to the pending list.
-            """
-            txn = dagtree.search(output.origin)
-            if txn is None:
-                pending[(output.origin, output.id)] = output
-            else:
-                found = False
-                for out in txn.node.outputs:
-                    if out.equals(output):
-                        found = True
-                        if (output.origin, output.id) in pending:
-                            del pending[(output.origin, output.id)]
-                        break
-                if not found:
-                    return False  # txn was found but output do not match
-            return True
-
         # check height
         if checkpoint.height != ckpt_service.get_height() + 1:
             logger.info("Proposal rejected. Height series is not correct.")
-            return False, ""
+            return CheckpointDiff.rejected("height")
         # check origin
         if checkpoint.origin != ckpt_service.get_ckpt_id():
             logger.info("Proposal rejected. Checkpoint origin does not match the last checkpoint.")
-            return False, ""
+            return CheckpointDiff.rejected("origin")
         # check if utxos are not present
-        if checkpoint.get_utxos() is None:
+        new_outputs = checkpoint.get_utxos()
+        if new_outputs is None:
             logger.info("Unspent transaction output list is empty.")
-            return False, ""
+            return CheckpointDiff.rejected("utxos")
 
         # check if last reward wallet amount matches the constant amount
         reward = checkpoint.get_fee_rewards()
-        if reward[len(reward) - 1].value != REWARD:
+        if not reward or reward[-1].value != REWARD:
             logger.info("Checkpoint fee reward does not match")
-            return False, ""
-
-        # Check if checkpoint is empty
-        new_list = checkpoint.get_utxos()
-        new_list.sort()
-        old_list = ckpt_service.get_ckpt_outputs() + ckpt_service.get_ckpt_utxos()
-        old_list.sort()
+            return CheckpointDiff.rejected("reward")
+
+        old_outputs: Dict[OutPoint, Wallet] = dict()
+        for w in ckpt_service.get_ckpt_outputs():
+            old_outputs[(w.origin, w.id)] = w
+        for w in ckpt_service.get_ckpt_utxos():
+            old_outputs[(w.origin, w.id)] = w
+
+        diff = CheckpointDiff()
+        seen: Set[OutPoint] = set()
+        carried_over = 0
+        for output in new_outputs:
+            outpoint = (output.origin, output.id)
+            if outpoint in seen:
+                diff.unexpected_outputs.append(output)
+                continue
+            seen.add(outpoint)
+            old_output = old_outputs.get(outpoint)
+            if old_output is not None and old_output == output:
+                carried_over += 1
+                continue
+            txn_tl = dagtree.search(output.origin)
+            if txn_tl is None or txn_tl.node is None:
+                diff.missing_txns.add(output.origin)
+                continue
+            dag_outputs = txn_tl.node.outputs
+            if not isinstance(output.id, int) or not 0 <= output.id < len(dag_outputs) \
+                    or dag_outputs[output.id] != output:
+                diff.unexpected_outputs.append(output)
 
-        if new_list == old_list:
+        if carried_over == len(old_outputs) == len(new_outputs):
             logger.info("Checkpoint rejected. Proposal is empty.")
-            return False, "EMPTY"
-
-        # check for existence of wallet in the DAG
-        for output in checkpoint.get_utxos():
-            status = verify_output(output)
-            if not status:
-                return False, ""
-        # Add missing transaction id to transaction checklist
-        if pending:
-            for txn in pending.keys():
-                missing_txn.append(txn[0])
+            return CheckpointDiff.rejected("empty", CheckpointDiff.EMPTY)
+
+        PostCheckpoint._compare_stake(checkpoint, expected_stake, diff)
+
+        if diff.unexpected_outputs or diff.stake_mismatches:
+            logger.info("Checkpoint rejected. %d outputs do not match the DAG, %d stake entries do not match.",
+                        len(diff.unexpected_outputs), len(diff.stake_mismatches))
+            diff.reason = "mismatch"
+            return diff
+
+        if diff.missing_txns:
             # add the txn to fetch list
-            for txn in set(missing_txn):
+            for txn in diff.missing_txns:
                 assert isinstance(txn, bytes), "txn must be bytes!"
                 agentservice.add_txn_to_fetch_list(txn)
             logger.info("Few transactions were not found. Request for missing transaction sent to network.")
-            return False, "PENDING"
+            diff.status = CheckpointDiff.PENDING
+            return diff
+
+        logger.info("Checkpoint proposal accepted.")
+        return diff
 
-        # check if pending list is empty
-        if not pending:
-            logging.info("Checkpoint proposal accepted.")
-            return True, ""
+    @staticmethod
+    def _compare_stake(checkpoint: Checkpoint, expected_stake: Optional[Dict[bytes, Decimal]], diff: CheckpointDiff):
+        """
+        Streams over the stake entries of the checkpoint.
+        Each entry has to be positive and has to match the expected stake if given.
+        The sum of the entries has to match the total stake of the checkpoint.
+        """
+        stake_sum = Decimal(0)
+        stake_list = checkpoint.get_stake_list()
+        for owner, stake in stake_list.items():
+            stake_sum += stake
+            if expected_stake is not None:
+                expected = expected_stake.get(owner)
+                if expected != stake:
+                    diff.stake_mismatches[owner] = (stake, expected)
+            elif stake <= 0:
+                diff.stake_mismatches[owner] = (stake, None)
+        if expected_stake is not None and len(expected_stake) != len(stake_list):
+            for owner, expected in expected_stake.items():
+                if owner not in stake_list:
+                    diff.stake_mismatches[owner] = (None, expected)
+        stake_sum = stake_sum.quantize(Decimal(".00000000000001"), rounding=ROUND_HALF_EVEN)
+        if checkpoint.total_stake is not None and stake_sum != checkpoint.get_stake_sum():
+            diff.stake_mismatches[None] = (checkpoint.get_stake_sum(), stake_sum)
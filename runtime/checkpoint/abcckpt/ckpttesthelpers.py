@@ -14,6 +14,7 @@ from abcnet.structures import MsgType, Message
 from abcckpt.ckptItems import CkptItemType, Priority, CkptHash, CkptData, ValidatorVote, MajorityVotes
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import CkptCreationState
+from abcckpt.ckpt_syncronizer import CkptSync
 from abcckpt.content_handler import ContentHandler
 from abcckpt.hash_handler import HashHandler
 from abcckpt.pre_checkpoint import PreCheckpoint, AgentService, PreCkptItemProcessor
@@ -145,6 +146,8 @@ def ckpt_protocol_app(ba: BaseApp, ckpt_service: CheckpointService, agent: Agent
     hh = add_hash_app(ba, pc)
     ch = ContentHandler(pc, agent, ckpt_service)
     ba.register_app_layer("content_handler", ch)
+    csync = CkptSync(pc, agent)
+    ba.register_app_layer("checkpoint_sync_handler", csync)
 
     svh = add_stab_vote_handler_app(ba, ckpt_service, pc)
 
@@ -157,8 +160,8 @@ def ckpt_protocol_app(ba: BaseApp, ckpt_service: CheckpointService, agent: Agent
 
     ph.set_handlers(vote_creator)
     hh.set_handlers(vote_creator)
-    ch.set_handlers(vote_creator)
-    svh.set_handlers(ph, hh, ch)
+    ch.set_handlers(vote_creator, csync)
+    svh.set_handlers(ph, hh, ch, vote_creator)
 
     priority_creator.set_handlers(ph)
     vote_creator.set_handlers(svh)
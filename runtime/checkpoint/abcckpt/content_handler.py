@@ -7,12 +7,14 @@ from abcnet.handlers import AbstractItemHandler
 from abcnet.services import ChannelService
 from abcnet.structures import Message
 from abcnet.timer import SimpleTimer
-from abcckpt.ckptItems import CkptItemType, ValidatorVote, CkptHash, CkptData
+from abccore.DAG import Checkpoint
+from abcckpt.ckptItems import CkptItemType, ValidatorVote, CkptHash, CkptData, CkptDelta
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import CkptCreationState, StateTransitionObserver
+from abcckpt.ckpt_verifier import BatchVerifier
 from abcckpt.ckpt_creation_state import PreCkptStatus as ps, PreCkptStatus
 from abcckpt.ckpt_syncronizer import CkptSync
-from abcckpt.ckptproposal import PostCheckpoint
+from abcckpt.ckptproposal import PostCheckpoint, CheckpointDiff
 from abcckpt.pre_checkpoint import PreCheckpoint, PreCkptItemProcessor, AgentService
 from abcckpt.vote_cr_handler import VoteCrHandler
 
@@ -29,7 +31,7 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
     ckpt_sync: CkptSync
 
     def __init__(self, pre_ckpt: PreCheckpoint, agent_service: AgentService, ckpt_service: CheckpointService):
-        super(ContentHandler, self).__init__([CkptItemType.CKPT_DATA], CkptItemsParser())
+        super(ContentHandler, self).__init__([CkptItemType.CKPT_DATA, CkptItemType.CKPT_DELTA], CkptItemsParser())
         self.pc: PreCheckpoint = pre_ckpt
         self.agent_service = agent_service
         self.ckpt_service = ckpt_service
@@ -46,6 +48,8 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
         self.verified_content: Dict[str, CkptData] = {}
         self.rejected_content: List[bytes] = []
         self.fetch_list = set()
+        self.full_content_required = set()
+        self.verifier = BatchVerifier()
         self.timeout_timers = [
             (self.try_vote, SimpleTimer(4.0)),
             (self.send_request_for_missing, SimpleTimer(1.0)),
@@ -89,6 +93,7 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
         self.verified_content: Dict[str, CkptData] = {}
         self.finalzd_content: Dict[str, CkptData] = {}
         self.fetch_list.clear()
+        self.full_content_required.clear()
         self.vote_sent = False
 
 
@@ -100,7 +105,7 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
     def process_content(self, content: CkptData):
         if content.item_qualifier() in self.verified_content:
             return
-        auth_result = content.verify_signature()
+        auth_result = self.verifier.verify(content)
         item_id = content.item_qualifier()
         if not auth_result:
             logger.warning(f"Invalid signature for hash msg:{item_id}")
@@ -127,6 +132,26 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
         logger.info("Received checkpoint content with the expected hash: %s", content.ckpt_hash.hex()[:6])
         return
 
+    def process_delta(self, delta: CkptDelta):
+        """
+        Rebuilds the proposed checkpoint from the delta to the local checkpoint.
+        The full content is requested instead, if the local checkpoint is not the parent of the proposal
+        or the rebuilt checkpoint doesn't match the proposed hash.
+        """
+        parent = self.ckpt_service.checkpoint
+        item_id = delta.item_qualifier()
+        if not isinstance(parent, Checkpoint) or parent.id != delta.parent_id:
+            logger.info("Parent checkpoint %s of content delta is missing, requesting full content: %s",
+                        delta.parent_id.hex()[:6], item_id)
+        else:
+            try:
+                self.process_content(delta.reconstruct(parent))
+                return
+            except ValueError as e:
+                logger.warning("Couldn't rebuild checkpoint content from delta %s, requesting full content: %s",
+                               item_id, e)
+        self.full_content_required.add(item_id)
+        self.fetch_list.add((CkptItemType.CKPT_DATA, item_id))
 
     def has_timer_run_out(self):
         if self.content_timer is None:
@@ -145,15 +170,16 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
         if len(self.verified_content) == 1 and not self.vote_sent:
             content: CkptData = next(iter(self.verified_content.values()))
             if not self.pending_content_timer.check():
-                content_check, status = self.__verify_content(content)
-                if status == 'PENDING':
+                content_check = self.__verify_content(content)
+                if content_check.pending:
                     logger.info("Checkpoint content verification is pending, hash: %s", content.ckpt_hash.hex()[:6])
                     return
                 if content_check:
                     self.finalzd_content[content.item_qualifier()] = content
                     logger.info("Finalized checkpoint content with the expected hash: %s, content ID:%s", content.ckpt_hash.hex()[:6], content.item_qualifier()[:6])
                 elif not content_check:
-                    logger.warning("Invalid content, rejecting content ID : %s", content.item_qualifier())
+                    logger.warning("Invalid content, rejecting content ID : %s, %s", content.item_qualifier(),
+                                   content_check)
                     # PASS vote if content from chosen validator is invalid
                     self.create_pass_vote()
             else:
@@ -161,12 +187,10 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
                 #PASS vote if content from chosen validator could not be validated within timer for checking pending txns
                 self.create_pass_vote()
 
-    def __verify_content(self, content):
+    def __verify_content(self, content) -> CheckpointDiff:
         local_dag = self.agent_service.get_DAG()
         ckpt_data = content.checkpoint_data
-        content_check, status = PostCheckpoint.checkpoint_verify(local_dag, ckpt_data, self.ckpt_service,
-                                                                 self.agent_service)
-        return content_check, status
+        return PostCheckpoint.checkpoint_verify(local_dag, ckpt_data, self.ckpt_service, self.agent_service)
 
     def check_content_timeout(self):
         if not self.vote_sent and len(self.finalzd_content) == 1:
@@ -201,10 +225,17 @@ class ContentHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemPr
         if item_type == CkptItemType.CKPT_DATA and item_content is not None and isinstance(item_content, CkptData) \
                 and not self.has_content(item_content.item_qualifier()):
             self.process_content(item_content)
+        elif item_type == CkptItemType.CKPT_DELTA and isinstance(item_content, CkptDelta) \
+                and not self.has_content(item_content.item_qualifier()):
+            self.process_delta(item_content)
 
     def handle_item_checklist(self, cs: "ChannelService", msg: Message, item_type: int,
                               item_qualifier: str):  # checklist()
         if not self.has_content(item_qualifier):
+            if item_type == CkptItemType.CKPT_DATA and ckpt_constants.CKPT_DELTA_CONTENT \
+                    and item_qualifier not in self.full_content_required \
+                    and isinstance(self.ckpt_service.checkpoint, Checkpoint):
+                item_type = CkptItemType.CKPT_DELTA
             self.fetch_list.add((item_type, item_qualifier))
 
     def send_request_for_missing(self, cs: ChannelService):
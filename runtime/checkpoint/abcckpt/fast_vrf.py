@@ -17,6 +17,23 @@ import json
 
 hash_bytes_size = 32
 float_bytes_size = 4
+signature_bytes_size = 64
+
+PROOF_FORMAT_JSON = 'json'
+PROOF_FORMAT_BINARY = 'binary'
+PROOF_FORMAT = PROOF_FORMAT_JSON
+"""
+Format of created proofs. Both formats are accepted when proofs are verified.
+Priorities are broadcast to all nodes, so nodes keep creating json proofs until all nodes accept binary proofs.
+Set to PROOF_FORMAT_BINARY once the network is upgraded.
+"""
+
+BINARY_PROOF_VERSION = 0x01
+BINARY_PROOF_SIZE = 1 + hash_bytes_size + signature_bytes_size
+"""
+Binary proof layout: version byte, alpha hash, ed25519 signature of the alpha hash.
+Json proofs start with '{', so the first byte tells the formats apart.
+"""
 
 VRF_SAMPLE_CONTEXT = decimal.Context(prec=6, rounding=decimal.ROUND_DOWN)
 
@@ -26,7 +43,7 @@ def create_hash(text: bytes) -> bytes:
     return digest.finalize()
 
 
-def hash_to_sample(hash_bytes: bytes) -> Decimal:
+def hash_to_sample(hash_bytes: Union[bytes, memoryview]) -> Decimal:
     if hash_bytes is None or len(hash_bytes) != hash_bytes_size:
         raise ValueError(f"Hash is malformed. Requiring a {hash_bytes_size} length bytes object.")
     ctx_copy = decimal.getcontext()
@@ -108,12 +125,45 @@ def append_pub_key_to_alpha(alpha_string: str, key: Union[bytes, Ed25519PublicKe
     key_hex = key.hex()
     return json.dumps([alpha_string, key_hex]).encode('utf-8')
 
-def hash_vrf_prove(sk: Union[bytes, Ed25519PrivateKey], alpha_string: bytes, raise_exception=False)-> Tuple[str, bytes]:
+def encode_proof(alpha_hash: bytes, signature: bytes, proof_format: str = None) -> bytes:
+    if proof_format is None:
+        proof_format = PROOF_FORMAT
+    if proof_format == PROOF_FORMAT_BINARY:
+        if len(alpha_hash) != hash_bytes_size or len(signature) != signature_bytes_size:
+            raise ValueError("Proof fields are malformed.")
+        return bytes([BINARY_PROOF_VERSION]) + alpha_hash + signature
+    elif proof_format == PROOF_FORMAT_JSON:
+        proof: Dict[str, str] = {
+            "hash": alpha_hash.hex(),
+            "sign": signature.hex()
+        }
+        return json.dumps(proof).encode('utf-8')
+    raise ValueError("Unrecognized proof format: " + str(proof_format))
+
+
+def decode_proof(pi_string: bytes) -> Tuple[bytes, bytes]:
+    """
+    Returns the alpha hash and the signature of a binary or json proof.
+    Fields of binary proofs are returned as views into the proof without copying.
+    The signature view has to be copied before it is passed to the ed25519 backend.
+    """
+    if len(pi_string) > 0 and pi_string[0] == BINARY_PROOF_VERSION:
+        if len(pi_string) != BINARY_PROOF_SIZE:
+            raise ValueError(f"Binary proof has {len(pi_string)} bytes instead of {BINARY_PROOF_SIZE}.")
+        view = memoryview(pi_string)
+        return view[1:1 + hash_bytes_size], view[1 + hash_bytes_size:]
+    proof: Dict[str, str] = json.loads(pi_string.decode('utf-8'))
+    return bytes.fromhex(proof['hash']), bytes.fromhex(proof['sign'])
+
+
+def hash_vrf_prove(sk: Union[bytes, Ed25519PrivateKey], alpha_string: bytes, raise_exception=False,
+                   proof_format: str = None) -> Tuple[str, bytes]:
     """
     Input:
         sk - private key
         alpha_string - input alpha, the common string.
         raise_exception - if True, raises exception instead of returning INVALID
+        proof_format - PROOF_FORMAT_BINARY or PROOF_FORMAT_JSON, defaults to PROOF_FORMAT
     Output:
         pi_string - VRF proof
     """
@@ -128,12 +178,7 @@ def hash_vrf_prove(sk: Union[bytes, Ed25519PrivateKey], alpha_string: bytes, rai
         alpha_string_pub_key = append_pub_key_to_alpha(alpha_string_bytes, pub_k_bytes)
         alpha_hash = create_hash(alpha_string_pub_key)
         signature = sign_hash(alpha_hash, sk)
-        signature_hex = signature.hex()
-        proof: Dict[str, str] = {
-            "hash": alpha_hash.hex(),
-            "sign": signature_hex
-        }
-        return 'VALID', json.dumps(proof).encode('utf-8')
+        return 'VALID', encode_proof(alpha_hash, signature, proof_format)
     except Exception as e:
         if raise_exception:
             raise e
@@ -150,8 +195,7 @@ def hash_vrf_proof_to_hash(pi_string: bytes, raise_exception=False) -> Tuple[str
         sample - The randomly drawn sample from 0.0 (inclusive) to 1.0 (exclusive).
     """
     try:
-        proof = json.loads(pi_string.decode('utf-8'))
-        alpha_hash: bytes = bytes.fromhex(proof['hash'])
+        alpha_hash, _ = decode_proof(pi_string)
         sample = hash_to_sample(alpha_hash)
         return 'VALID', sample
     except Exception as e:
@@ -174,10 +218,7 @@ def hash_vrf_verify(pub_k_bytes: bytes, pi_string: bytes, alpha_string: bytes, r
     """
     try:
         # Decode the pi string:
-        proof: Dict[str, str] = json.loads(pi_string.decode('utf-8'))
-        proof_sign = proof['sign']
-        given_hash: bytes = bytes.fromhex(proof['hash'])
-        signature_bytes = bytes.fromhex(proof_sign)
+        given_hash, signature_bytes = decode_proof(pi_string)
 
         # Recalculate the hash:
         alpha_string_bytes = alpha_string.hex()
@@ -189,7 +230,8 @@ def hash_vrf_verify(pub_k_bytes: bytes, pi_string: bytes, alpha_string: bytes, r
             raise ValueError("The proof doesn't match the given alpha_string")
 
         # Validate signature:
-        decode_and_validate_signature(alpha_hash, signature_bytes, pub_k_bytes)
+        if not decode_and_validate_signature(alpha_hash, bytes(signature_bytes), pub_k_bytes):
+            raise ValueError("The proof signature is invalid.")
 
         # Encode sample
         sample: Decimal = hash_to_sample(alpha_hash)
@@ -10,6 +10,7 @@ from abcckpt import ckpt_constants
 from abcckpt.ckptItems import CkptItemType, ValidatorVote, CkptHash
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import CkptCreationState, StateTransitionObserver
+from abcckpt.ckpt_verifier import BatchVerifier
 from abcckpt.ckpt_creation_state import PreCkptStatus as ps, PreCkptStatus
 from abcckpt.pre_checkpoint import PreCheckpoint, PreCkptItemProcessor
 from abcckpt.vote_cr_handler import VoteCrHandler
@@ -39,6 +40,7 @@ class HashHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemProce
         self.verified_hash: Dict[str, CkptHash] = {}
         self.rejected_hash: List[bytes] = []
         self.fetch_list = set()
+        self.verifier = BatchVerifier()
         self.timeout_timers = [
             (self.try_vote, SimpleTimer(4.0)),
             (self.send_request_for_missing, SimpleTimer(4.0)),
@@ -92,7 +94,7 @@ class HashHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemProce
     def process_hash(self, hash: CkptHash):
         if hash.item_qualifier() in self.verified_hash:
             return
-        auth_result = hash.verify_signature()
+        auth_result = self.verifier.verify(hash)
         item_id = hash.item_qualifier()
 
         if not auth_result:
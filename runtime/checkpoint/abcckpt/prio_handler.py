@@ -1,6 +1,6 @@
 import logging
 from decimal import Decimal
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 
 from abccore.checkpoint_service import CheckpointService
 from abcnet.handlers import AbstractItemHandler
@@ -12,6 +12,7 @@ from abcckpt import ckpt_constants
 from abcckpt.ckptItems import CkptItemType, Priority, ValidatorVote
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import CkptCreationState, StateTransitionObserver
+from abcckpt.ckpt_verifier import BatchVerifier
 from abcckpt.pre_checkpoint import PreCheckpoint, PreCkptItemProcessor
 from abcckpt.ckpt_creation_state import PreCkptStatus as ps, PreCkptStatus
 from abcckpt.sortition import ValidatorProperties, verify_sortition
@@ -20,6 +21,39 @@ from abcckpt.vote_cr_handler import VoteCrHandler
 logger = logging.getLogger(__name__)
 
 
+def priority_rank(priority: Priority) -> Tuple[int, Decimal, bytes]:
+    """
+    Sort key of priorities that orders them like `Priority.is_greater_than`.
+    Only the claimed votes and the sample of the proof are used, neither is verified.
+    """
+    return priority.votes, -priority.get_sample(), priority.pub_k
+
+
+class PriorityVerificationStats:
+    """
+    Counts the priorities that were fully verified and the ones whose verification was deferred
+    because they could not beat the best known priority.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.verified = 0
+        self.deferred = 0
+        self.promoted = 0
+        self.evicted = 0
+
+    @property
+    def saved(self) -> int:
+        """
+        Number of verifications that were never run.
+        """
+        return self.deferred - self.promoted
+
+    def __str__(self):
+        return f"PriorityVerificationStats(received={self.received}, verified={self.verified}, " \
+               f"deferred={self.deferred}, promoted={self.promoted}, evicted={self.evicted}, saved={self.saved})"
+
+
 class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemProcessor):
     """
     This handler is for collecting priority objects and voting for the maximum priority seen.
@@ -41,8 +75,16 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
         self.queued_prios = []
         self.verified_prios: Dict[str, Priority] = {}
         self.rejected_prios: List[str] = []
+        # Unverified priorities of the current round that could not beat the max priority when they were received:
+        self.deferred_prios: Dict[str, Priority] = {}
+        # Priorities received since the last maintenance step and the peers that sent them:
+        self.received_prios: Dict[str, Tuple[Priority, Optional[str]]] = {}
+        self.stats = PriorityVerificationStats()
 
         self.fetch_list = set()
+        # Signatures and VRF proofs of received priorities are verified in batches:
+        self.signatures = BatchVerifier()
+        self.proofs = BatchVerifier(lambda priority: self.verify_validator_vote(priority.get_validator_prop()))
         self.timeout_timers = [
             (self.try_vote, SimpleTimer(ckpt_constants.VOTE_TRY_TIME_OUT)),
             (self.send_request_for_missing, SimpleTimer(1.0)),
@@ -84,13 +126,14 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
 
 
     def reset_queues(self):
-        logger.info(f"Clearing priority handler queues")
+        logger.info(f"Clearing priority handler queues. %s", self.stats)
         self.max_priority: Optional[Priority] = None
         self.vote_sent = False
         self.prio_timer.reset()
         self.queued_prios = []
         self.verified_prios: Dict[str, Priority] = {}
         self.rejected_prios: List[str] = []
+        self.deferred_prios.clear()
         self.fetch_list.clear()
 
     def verify_validator_vote(self, validator: ValidatorProperties) -> bool:
@@ -135,7 +178,7 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
 
             if stake > ckpt_constants.CKPT_PARTICIPATION_STAKE_TH:
                 logger.debug(f"Checking priority msg: {item_id}")
-                if self.verify_validator_vote(priority.get_validator_prop()):
+                if self.proofs.verify(priority):
                     self.verified_prios[item_id] = priority
                     return True
                 else:
@@ -149,10 +192,53 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
             logger.debug(f"Calculated stake: {stake_list_value}")
             return False
 
-    def process_prio(self, priority: Priority, peer_id=None):
+    def could_be_max_priority(self, priority: Priority) -> bool:
+        """
+        Cheap check whether the claimed values of the priority beat the max priority.
+        """
+        if self.max_priority is None or self.max_priority == priority:
+            return True
+        try:
+            return priority.is_greater_than(self.max_priority)
+        except ValueError:
+            # Malformed proof or a conflicting priority of the same validator, leave it to the verification.
+            return True
+
+    def defer_priority(self, priority: Priority):
+        self.deferred_prios[priority.item_qualifier()] = priority
+        self.stats.deferred += 1
+        if len(self.deferred_prios) > ckpt_constants.CKPT_DEFERRED_PRIORITIES:
+            lowest = min(self.deferred_prios.values(), key=priority_rank)
+            del self.deferred_prios[lowest.item_qualifier()]
+            self.stats.evicted += 1
+
+    def promote_deferred(self, item_qualifier: str) -> bool:
+        """
+        Verifies a deferred priority, because it turns out to be needed.
+        Returns False if there is no such deferred priority.
+        """
+        priority = self.deferred_prios.pop(item_qualifier, None)
+        if priority is None:
+            return False
+        logger.debug("Verifying deferred priority message id:%s", item_qualifier)
+        self.stats.promoted += 1
+        self.process_prio(priority, lazy=False)
+        return True
+
+    def process_prio(self, priority: Priority, peer_id=None, lazy=True):
         if priority.item_qualifier() in self.verified_prios:
             return True
-        auth_result = priority.verify_signature()
+        if self.pc.state == priority.state:
+            if lazy:
+                if priority.item_qualifier() in self.deferred_prios:
+                    return
+                self.stats.received += 1
+                if not self.could_be_max_priority(priority):
+                    # The priority can't become the max priority, so its verification is deferred until it is needed.
+                    self.defer_priority(priority)
+                    return
+            self.stats.verified += 1
+        auth_result = self.signatures.verify(priority)
         item_id = priority.item_qualifier()
 
         if not auth_result:
@@ -189,6 +275,7 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
                 self.vote_sent = True
 
     def perform_maintenance(self, cs: ChannelService, force_maintenance=False):
+        self.process_received_prios()
         self.check_state_transition()
         if self.pc.state.step_status == PreCkptStatus.AGREE_VALIDATOR:
             # self.send_request_for_missing(cs)
@@ -203,10 +290,26 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
             return
         self.check_prio_timeout(cs)
 
+    def process_received_prios(self):
+        """
+        Processes the priorities received since the last maintenance step, the highest claimed priorities first.
+        Once one of them is verified, the lower ones are deferred without being verified.
+        """
+        if not self.received_prios:
+            return
+        received = list(self.received_prios.values())
+        self.received_prios.clear()
+        try:
+            received.sort(key=lambda entry: priority_rank(entry[0]), reverse=True)
+        except ValueError:
+            pass
+        for priority, peer_id in received:
+            self.process_prio(priority, peer_id)
+
     def handle_item_content(self, cs: "ChannelService", msg: Message, item_type: int, item_content: Any):  # items()
         if item_type == CkptItemType.PRIORITY and item_content is not None and isinstance(item_content, Priority) \
                 and not self.has_priority(item_content.item_qualifier()):
-            self.process_prio(item_content,cs.contact.identifier)
+            self.received_prios[item_content.item_qualifier()] = (item_content, cs.contact.identifier)
 
     def handle_item_checklist(self, cs: "ChannelService", msg: Message, item_type: int,
                               item_qualifier: str):  # checklist()
@@ -219,11 +322,14 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
             self.fetch_list.clear()
 
     def has_priority(self, item_qualifier) -> bool:
-        if item_qualifier in self.verified_prios or item_qualifier in self.rejected_prios:
+        if item_qualifier in self.verified_prios or item_qualifier in self.rejected_prios \
+                or item_qualifier in self.deferred_prios or item_qualifier in self.received_prios:
             return True
         return False
 
     def check_item_exists(self, item_qualifier) -> bool:
+        self.process_received_prios()
+        self.promote_deferred(item_qualifier)
         if item_qualifier in self.verified_prios:
             return True
         elif item_qualifier in self.rejected_prios:
@@ -234,6 +340,8 @@ class PriorityHandler(AbstractItemHandler, StateTransitionObserver, PreCkptItemP
 
     def has_verified_priority(self, item_qualifier) -> bool:
         # Check before transition call from consens
+        self.process_received_prios()
+        self.promote_deferred(item_qualifier)
         if item_qualifier in self.verified_prios:
             return True
         return False
@@ -1,6 +1,7 @@
 import logging
 from typing import Tuple, Optional
 
+from abccore.DAG import Checkpoint
 from abccore.checkpoint_service import CheckpointService
 from abccore.prefix_tree import Tree
 from abcnet.handlers import AbstractItemHandler
@@ -10,7 +11,7 @@ from abcnet.timer import SimpleTimer
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 
 from abcckpt import fast_vrf
-from abcckpt.ckptItems import CkptItemType, CkptData, CkptHash
+from abcckpt.ckptItems import CkptItemType, CkptData, CkptHash, CkptDelta
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import CkptCreationState, StateTransitionObserver, PreCkptStatus
 from abcckpt.ckpt_creation_state import PreCkptStatus as ps
@@ -50,8 +51,8 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
     Item creator class for hash and proposal in step AGREE_HASH, proposal content is broadcasted only after AGREE_CONTENT state is reached.
     """
     def __init__(self, pre_ckpt: PreCheckpoint, agent_service: AgentService, ckpt_service: CheckpointService):
-        super(ProposalCrHandler, self).__init__([CkptItemType.CKPT_HASH, CkptItemType.CKPT_DATA],
-                                                CkptItemsParser())
+        super(ProposalCrHandler, self).__init__([CkptItemType.CKPT_HASH, CkptItemType.CKPT_DATA,
+                                                 CkptItemType.CKPT_DELTA], CkptItemsParser())
         # Global Set of Data
         self.pc: PreCheckpoint = pre_ckpt
         self.agent_service: AgentService = agent_service
@@ -62,6 +63,7 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
         self.creator = CheckpointContentCreator()
 
         self.proposal: Optional[CkptData] = None
+        self.proposal_delta: Optional[CkptDelta] = None
         self.ckpt_hash: Optional[CkptHash] = None
 
         self.is_chosen_validator_ = False
@@ -86,6 +88,7 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
         if self.proposal is None:
             logger.info("Couldn't create proposal object..")
             return False
+        self.proposal_delta = None
         self.ckpt_hash = CkptHash(self.pc.state, self.proposal.get_ckpt_hash())
         if self.proposal is not None and self.ckpt_hash is not None:
             logger.info("%s created checkpoint proposal with hash %s.", peer_id, self.proposal.ckpt_hash.hex()[:5])
@@ -99,6 +102,7 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
         self.is_chosen_validator_ = False
         self.ckpt_hash = None
         self.proposal = None
+        self.proposal_delta = None
         self.checklist.clear()
         self.chosen_key = None
         self.chosen_pb_key = None
@@ -123,6 +127,7 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
             self.checklist[self.proposal.item_qualifier()] = self.proposal
         if not self.is_chosen_validator_:
             self.proposal = None
+            self.proposal_delta = None
             self.ckpt_hash = None
             self.checklist.clear()
 
@@ -164,10 +169,24 @@ class ProposalCrHandler(AbstractItemHandler, StateTransitionObserver):
                     checklist[self.ckpt_hash.item_qualifier()] = self.ckpt_hash
             if self.proposal is not None:
                 if item_qualifier == self.proposal.item_qualifier():
-                    checklist.update({self.proposal.item_qualifier(): self.proposal})
+                    checklist.update({self.proposal.item_qualifier(): self.proposal_content(type)})
             cs.broadcast_channel().items(list(checklist.values()))
         self.requested_items.clear()
 
+    def proposal_content(self, item_type: int):
+        """
+        Returns the delta of the proposal to the last checkpoint if it was requested and can be created,
+        the full proposal otherwise.
+        """
+        if item_type != CkptItemType.CKPT_DELTA:
+            return self.proposal
+        if self.proposal_delta is None:
+            parent = self.ckpt_service.checkpoint
+            if not isinstance(parent, Checkpoint) or parent.id != self.proposal.checkpoint_data.origin:
+                return self.proposal
+            self.proposal_delta = CkptDelta.of(self.proposal, parent)
+        return self.proposal_delta
+
     def handle_item_request(self, cs: "ChannelService", msg: Message, item_type: int,
                             item_qualifier: str):  # fetch_items()
         self.requested_items.add((item_type, item_qualifier))
@@ -1,5 +1,6 @@
 import math
-from typing import Union, Tuple
+from collections import OrderedDict
+from typing import Union, Tuple, Dict
 
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 
@@ -7,9 +8,6 @@ from abcckpt import fast_vrf
 import logging
 from decimal import *
 
-from scipy.stats import binom
-import scipy.stats
-
 logger = logging.getLogger("sortition")
 
 
@@ -49,21 +47,126 @@ def __parse_vote_calc_inputs(sample: Union[Decimal, float], stake: Union[Decimal
     return sample, stake
 
 
-def sortition_distribution(stake: int) -> scipy.stats.norm:
+_SQRT_HALF = math.sqrt(0.5)
+
+# Coefficients of the rational approximation of the inverse normal cdf by P. J. Acklam.
+# The relative error of the approximation is below 1.15e-9.
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+
+def normal_cdf(z: float) -> float:
     """
-    Returns the distribution that we use for vote calculation.
-    Through experimentation we have found that norm(stake, stake) is a fast distribution that still allows small stake
-    players to win over high stake validators.
-    It still proportionally given validators votes proportionally to the amount of stake.
+    Cdf of the standard normal distribution.
+    Evaluated like scipy.special.ndtr: with erf close to the mean and with erfc in the tails.
+    """
+    x = z * _SQRT_HALF
+    if abs(x) < _SQRT_HALF:
+        return 0.5 + 0.5 * math.erf(x)
+    y = 0.5 * math.erfc(abs(x))
+    return 1.0 - y if x > 0 else y
+
+
+def normal_ppf(p: float) -> float:
+    """
+    Inverse cdf of the standard normal distribution for p in (0, 1).
+    The rational approximation is refined with one step of Halley's method, which brings the error close to
+    the precision of the cdf.
+    """
+    if p <= 0 or p >= 1:
+        raise ValueError("Probability is expected to be in (0, 1): " + str(p))
+    a, b, c, d = _PPF_A, _PPF_B, _PPF_C, _PPF_D
+    if p < _PPF_LOW or p > 1 - _PPF_LOW:
+        q = math.sqrt(-2 * math.log(p if p < _PPF_LOW else 1 - p))
+        x = (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+            ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+        if p > 1 - _PPF_LOW:
+            x = -x
+    else:
+        q = p - 0.5
+        r = q * q
+        x = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+            (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+    e = normal_cdf(x) - p
+    u = e * math.sqrt(2 * math.pi) * math.exp(x * x / 2)
+    return x - u / (1 + x * u / 2)
+
+
+class VoteThresholds:
+    """
+    Vote thresholds of a stake: the cdf of normal(stake, stake) at each vote count.
+    A sample results in the largest vote count whose threshold is less equal than the sample.
+    Thresholds are computed when they are first needed and kept, so repeated vote calculations
+    and verifications for the same stake are table lookups.
+    """
+
+    def __init__(self, stake: int):
+        self.stake = stake
+        self.thresholds: Dict[int, float] = dict()
+
+    def threshold(self, votes: int) -> float:
+        t = self.thresholds.get(votes)
+        if t is None:
+            t = normal_cdf((votes - self.stake) / self.stake)
+            self.thresholds[votes] = t
+        return t
+
+    def votes(self, sample: float) -> int:
+        """
+        Returns the vote count of the sample.
+        The inverse cdf only gives the starting point, the result is determined by comparing thresholds.
+        """
+        if self.threshold(0) >= sample:
+            return 0
+        votes = max(0, int(math.floor(self.stake + self.stake * normal_ppf(sample))))
+        while votes > 0 and self.threshold(votes) > sample:
+            votes -= 1
+        while self.threshold(votes + 1) <= sample:
+            votes += 1
+        return votes
+
+    def verify(self, sample: float, votes: int) -> bool:
+        if votes == 0:
+            return sample < self.threshold(1)
+        return self.threshold(votes) <= sample < self.threshold(votes + 1)
+
+
+_THRESHOLD_CACHE_SIZE = 1024
+_threshold_tables: "OrderedDict[int, VoteThresholds]" = OrderedDict()
+
+
+def vote_thresholds(stake: int) -> VoteThresholds:
     """
-    return scipy.stats.norm(stake, stake)
+    Returns the cached threshold table of the stake.
+    Stakes only change with a new checkpoint, so a table serves every vote calculation and verification
+    of a validator until then. The least recently used tables are dropped.
+    """
+    table = _threshold_tables.get(stake)
+    if table is None:
+        table = VoteThresholds(stake)
+        _threshold_tables[stake] = table
+        if len(_threshold_tables) > _THRESHOLD_CACHE_SIZE:
+            _threshold_tables.popitem(last=False)
+    else:
+        _threshold_tables.move_to_end(stake)
+    return table
 
 
 def vote_calc_normal(sample: Union[Decimal, float], stake: Union[Decimal, int]) -> int:
     """
     Returns priority value.
-    Performs inverse transform sampling onto normal(stake, stake) using binary search.
-    Runs in O(log(stake))
+    Performs inverse transform sampling onto normal(stake, stake).
+    Normal distribution with a mean of stake (50% probability to get exactly stake amount of votes)
+    and variance of stake too. (High probability that small stakeholders get high vote count)
+    Through experimentation we have found that norm(stake, stake) is a fast distribution that still allows small stake
+    players to win over high stake validators.
 
     :param sample: The VRF drawn random sample. It is a uniformly random number between 0 and 1 (exclusive).
     :param stake: stake of validator.
@@ -72,61 +175,9 @@ def vote_calc_normal(sample: Union[Decimal, float], stake: Union[Decimal, int])
     if stake == 0:
         return 0
     sample, stake = __parse_vote_calc_inputs(sample, stake)
-
-    # Normal distribution with a mean of stake (50% probability to get exactly stake amount of votes)
-    # and variance of stake too. (High probability that small stakeholders get high vote count)
-    distribution = sortition_distribution(stake)
-
-    # Edge case: sample is smaller that cdf(0), negative tosses are converted to zero:
-    if distribution.cdf(0) >= sample:
+    if stake == 0:
         return 0
-
-    # Perform binary search on x to find the right probability value x with: cdf(x) <= sample < cdf(x+1)
-    cursor = stake
-
-    # Search boundaries
-    min_cursor = None
-    max_cursor = None
-
-    while True:
-        # step_size = int(math.ceil(step_size / 2)) # half the step size in each round
-        cursor_cdf = distribution.cdf(cursor)
-        if cursor_cdf > sample:
-            max_cursor = cursor
-        elif cursor_cdf < sample:
-            min_cursor = cursor
-        else:
-            return cursor
-
-        if min_cursor is not None and max_cursor is not None:
-            if max_cursor - min_cursor < 4:
-                break
-            cursor = int(math.ceil((min_cursor + max_cursor) / 2))
-        else:
-            # min or max was not found yet.
-            # At this point either min or max must be defined.
-            assert min_cursor is not None or max_cursor is not None
-
-            # Now just move the cursor towards the undefined area by variance amount
-            if min_cursor is not None:
-                cursor += stake
-            elif max_cursor is not None:
-                cursor -= stake
-    # Min and max are now very close together.
-    # Iterate over the remaining number of candidates starting from min.
-    for cursor in range(min_cursor, max_cursor+1):
-        # Increase cdf one by one until we cross sample.
-        cursor_cdf = distribution.cdf(cursor)
-        if sample < cursor_cdf:
-            if cursor == min_cursor:
-                raise ValueError("Not correct cursor found")
-            # We have crossed the sample value with the current cursor.
-            # The previous cursor value is the last value that is behind the sample threshold.
-            votes = cursor - 1
-            # Recheck:
-            assert verify_votes_match_sample(sample, stake, votes)
-            return votes
-    raise ValueError(f"Cursor should have been found for stake={stake} sample={sample}")
+    return vote_thresholds(stake).votes(sample)
 
 
 def verify_votes_match_sample(sample: Union[Decimal, float], stake: Union[Decimal, int], votes: int) -> bool:
@@ -136,10 +187,9 @@ def verify_votes_match_sample(sample: Union[Decimal, float], stake: Union[Decima
     Runs in O(1).
     """
     sample, stake = __parse_vote_calc_inputs(sample=sample, stake=stake)
-    distribution = sortition_distribution(stake)
-    if votes == 0:
-        return sample < distribution.cdf(1)
-    return distribution.cdf(votes) <= sample < distribution.cdf(votes+1)
+    if stake == 0:
+        return votes == 0
+    return vote_thresholds(stake).verify(sample, votes)
 
 
 def verify_sortition(validator: "ValidatorProperties") -> bool:
@@ -1,7 +1,8 @@
+import heapq
 import itertools
 import logging
 from decimal import Decimal
-from typing import Iterable, Dict, Set, Optional, List, Any
+from typing import Iterable, Dict, Set, Optional, List, Any, Tuple
 
 from abccore.checkpoint_service import CheckpointService
 from abcnet.handlers import AbstractItemHandler
@@ -12,6 +13,7 @@ from abcckpt import ckpt_constants, fast_vrf
 from abcckpt.ckptItems import CkptItemType, ValidatorVote, MajorityVotes
 from abcckpt.ckptParser import CkptItemsParser
 from abcckpt.ckpt_creation_state import StateTransitionObserver
+from abcckpt.ckpt_verifier import BatchVerifier
 from abcnet.services import ChannelService
 from abcckpt.pre_checkpoint import PreCheckpoint, PreCkptItemProcessor, AgentService
 from abcckpt.ckpt_creation_state import PreCkptStatus
@@ -46,6 +48,10 @@ class VoterInfo:
 
     stake: Decimal = None
 
+    counted_item: Optional[str] = None  # the voted item whose support includes the stake of this validator.
+
+    is_counted = False
+
     def __init__(self, validator_key: bytes):
         self.validator = validator_key
         self.votes = set()
@@ -111,6 +117,13 @@ class VoteRegistry:
 
         self.majority_votes: Optional[List[ValidatorVote]] = None
 
+        # Running stake totals of the voted items and of all votes:
+        self.item_support: Dict[Optional[str], Decimal] = dict()
+        self.total_support: Decimal = Decimal(0)
+        # Max heap of (-support, insertion counter, voted item). Entries whose support is outdated are skipped.
+        self._leading_items: List[Tuple[Decimal, int, Optional[str]]] = list()
+        self._heap_counter = itertools.count()
+
     def has_vote(self, vote_qualifier: str) -> bool:
         return vote_qualifier in self.votes
 
@@ -153,6 +166,43 @@ class VoteRegistry:
                 continue
             if other_vote in self.item_votes:
                 self.item_votes[other_vote].discard(voter_info)
+        self._move_support(voter_info, voted_item)
+
+    def _move_support(self, voter_info: VoterInfo, voted_item: Optional[str]):
+        """
+        Moves the stake of the voter from the item it was counted for to the given item.
+        """
+        if voter_info.is_counted and voter_info.counted_item == voted_item:
+            return
+        stake = voter_info.stake if voter_info.stake is not None else Decimal(0)
+        if voter_info.is_counted:
+            self._add_support(voter_info.counted_item, -stake)
+        else:
+            self.total_support += stake
+        voter_info.is_counted = True
+        voter_info.counted_item = voted_item
+        self._add_support(voted_item, stake)
+
+    def _add_support(self, voted_item: Optional[str], stake: Decimal):
+        support = self.item_support.get(voted_item, Decimal(0)) + stake
+        self.item_support[voted_item] = support
+        heapq.heappush(self._leading_items, (-support, next(self._heap_counter), voted_item))
+
+    def support(self, voted_item: Optional[str]) -> Decimal:
+        return self.item_support.get(voted_item, Decimal(0))
+
+    def leading_item(self) -> Tuple[Optional[str], Decimal]:
+        """
+        Returns the voted item with the most stake and its stake.
+        Outdated heap entries are dropped, so the amortized cost is constant.
+        """
+        heap = self._leading_items
+        while heap:
+            neg_support, _, voted_item = heap[0]
+            if self.item_support.get(voted_item) == -neg_support:
+                return voted_item, -neg_support
+            heapq.heappop(heap)
+        return None, Decimal(0)
 
     def is_emtpy(self):
         return len(self.votes) == 0 and len(self.item_votes) == 0 and len(self.voters) == 0
@@ -198,6 +248,9 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
         self.stalemate_timer = SimpleTimer(ckpt_constants.MISSING_VOTES_REQUEST_TIME)
 
         self.majority: Optional[Majority] = None
+        self.verifier = BatchVerifier()
+        # Votes received since the last maintenance step:
+        self.received_votes: List[ValidatorVote] = list()
         # Timers for maintenance:
         self.timeout_timers = [
             (self.request_missing_votes, SimpleTimer(ckpt_constants.MISSING_VOTES_REQUEST_TIME)),
@@ -254,7 +307,7 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
             logger.debug("Already processed vote %s. Skipping", vote)
             return
 
-        if not vote.verify_signature():
+        if not self.verifier.verify(vote):
             logger.debug("A vote received with invalid signature: %s", vote)
             vw.is_processed = True
             return
@@ -289,12 +342,26 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
                                    maj_votes.voted_item_qualifier)
                     vote_wrap.voter_info.mark_vote_requested()
 
+    def process_received_votes(self):
+        """
+        Processes the votes received since the last maintenance step. The signatures of the votes of the current
+        round are verified at once, processing them one by one reuses the results.
+        """
+        if not self.received_votes:
+            return
+        votes, self.received_votes = self.received_votes, list()
+        current_votes = [vote for vote in votes if vote.signature is not None and vote.state == self.current_state]
+        if len(current_votes) > 1:
+            self.verifier.verify_batch(current_votes)
+        for vote in votes:
+            self.process_vote(vote, outside_source=True)
+
     def handle_item_content(self, cs: "ChannelService", msg: Message, item_type: int, item_content: Any):
         if item_type == CkptItemType.MAJVOTES and item_content is not None and isinstance(item_content, MajorityVotes):
             self.process_majority_votes(item_content, self.registry)
             self.process_majority_votes(item_content, self.prev_registry)
         if item_type == CkptItemType.VALVOTE and item_content is not None and isinstance(item_content, ValidatorVote):
-            self.process_vote(item_content, outside_source=True)
+            self.received_votes.append(item_content)
         logger.debug("Received unexpected item with type: %d, %s", item_type, item_content)
 
     def handle_item_request(self, cs: "ChannelService", msg: Message, item_type: int, item_qualifier: str):
@@ -327,6 +394,7 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
             self.new_vote_found = True
 
     def perform_maintenance(self, cs: ChannelService, force_maintenance=False):
+        self.process_received_votes()
         self.check_state_transition()
         for maintenance_method, timer in self.timeout_timers:
             if force_maintenance or timer():
@@ -386,9 +454,7 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
                 logger.warning("Stalemate detected but already switched vote.")
 
     def get_support_of_vote(self, vote_item_qualifier: Optional[str]) -> Decimal:
-        if vote_item_qualifier in self.registry.item_votes:
-            return sum(map(lambda voter_info: voter_info.stake, self.registry.item_votes[vote_item_qualifier]))
-        return Decimal(0.0)
+        return self.registry.support(vote_item_qualifier)
 
     def get_self_vote_support(self) -> Decimal:
         if self.agent_service is None:
@@ -411,20 +477,9 @@ class StabVotingHandler(AbstractItemHandler, StateTransitionObserver):
             return
         self.new_vote_distrib = False
 
-        majority_voted_item_id: Optional[str] = None
-        majority_found = False
-        all_votes_stake_sum = Decimal(0.0)
-        for voted_item_id in self.registry.item_votes.keys():
-            summed_voting_stake = self.get_support_of_vote(voted_item_id)
-            all_votes_stake_sum += summed_voting_stake
-            if self.is_majority_threshold_surpassed(summed_voting_stake):
-                if majority_found:
-                    raise Exception("While counting votes two simultaneous majorities. Current state: %s"
-                                    "\nVoted item 1:%s"
-                                    "\nVoted item 2: %s",
-                                    self.current_state, majority_voted_item_id, voted_item_id)
-                majority_found = True
-                majority_voted_item_id = voted_item_id
+        majority_voted_item_id, summed_voting_stake = self.registry.leading_item()
+        all_votes_stake_sum = self.registry.total_support
+        majority_found = self.is_majority_threshold_surpassed(summed_voting_stake)
         if majority_found:
             self.set_majority(majority_voted_item_id)
             self.stalemate_found = False
@@ -17,9 +17,11 @@ setuptools.setup(
     ],
     install_requires=[
         'cryptography',
-        'scipy',
         'abc_network'
     ],
+    extras_require={
+        'test': ['scipy']
+    },
     packages=['abcckpt'],
     python_requires=">=3.8"
 )
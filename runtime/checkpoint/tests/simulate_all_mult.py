@@ -1,15 +1,19 @@
 import logging
 import os
+from collections import defaultdict
 from copy import deepcopy, copy
 from decimal import Decimal
 from random import randint
+from typing import List
 
 from abccore.DAG import Wallet, Genesis
 from abcnet import settings, nettesthelpers, transcriber
+from abcnet.handlers import MessageHandler
 from abcnet.netstats import LogEvent, MsgEvent
-from abcnet.services import BaseApp
+from abcnet.services import BaseApp, ChannelService
 from abcnet.simenv import configure_mocked_network_env, Simulation
 from abcnet.structures import MsgType, PeerContactInfo, Message
+from abcnet.timer import StopTimer
 
 from abccore.DAG import Transaction
 
@@ -19,6 +23,9 @@ from abccore.prefix_tree import Tree, TreeLeaf
 from abcckpt.pre_checkpoint import AgentService, PreCheckpoint
 from abcckpt import ckpttesthelpers
 from abcckpt import ckpt_constants
+from abcckpt.ckptItems import CkptItemType
+from abcckpt.ckptParser import CkptItemsParser
+from abcckpt.prio_handler import PriorityHandler
 from tests.testUtil import TestUtility
 
 configure_mocked_network_env()
@@ -46,6 +53,53 @@ def event_ser_filter(event: LogEvent):
 
 settings.NetStatSettings.msg_serialization_filter = event_ser_filter
 
+class ContentTransferStats(MessageHandler):
+    """
+    Records the bytes and the decode time of the received checkpoint content items per round.
+    """
+
+    CONTENT_TYPES = [CkptItemType.CKPT_DATA, CkptItemType.CKPT_DELTA]
+
+    def __init__(self, pc: PreCheckpoint):
+        self.pc = pc
+        self.parser = CkptItemsParser()
+        # round -> item type -> [item count, bytes, decode time]
+        self.rounds = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0]))
+
+    def accept(self, cs: ChannelService, msg: Message):
+        if msg.msg_type != MsgType.items_content or not msg.items:
+            return
+        for item_type, item_content in msg.items:
+            if item_type in self.CONTENT_TYPES:
+                timer = StopTimer()
+                self.parser.decode_item_bytes(item_type, item_content)
+                stats = self.rounds[self.pc.state.round][CkptItemType(item_type).name]
+                stats[0] += 1
+                stats[1] += len(item_content)
+                stats[2] += timer.time()
+
+
+def log_content_transfer(stats: List[ContentTransferStats]):
+    merged = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0]))
+    for s in stats:
+        for round, by_type in s.rounds.items():
+            for type_name, (count, size, decode_time) in by_type.items():
+                total = merged[round][type_name]
+                total[0] += count
+                total[1] += size
+                total[2] += decode_time
+    for round in sorted(merged):
+        for type_name, (count, size, decode_time) in sorted(merged[round].items()):
+            logger.info("Round %d: received %d %s items, %d bytes, decoded in %.4f sec.",
+                        round, count, type_name, size, decode_time)
+
+
+def log_priority_verification(handlers: List[PriorityHandler]):
+    for index, handler in enumerate(handlers):
+        logger.info("Peer-%d: %s", index, handler.stats)
+    logger.info("Priority verifications saved by all peers: %d", sum(h.stats.saved for h in handlers))
+
+
 class Validator:
 
     def __init__(self, ba: BaseApp, agent: AgentService, pc: PreCheckpoint, index: int):
@@ -140,6 +194,7 @@ def create_valid_app(index: int, gateway_contact: PeerContactInfo, dag: Tree):
                                              dag)
     pc = ckpttesthelpers.pseudo_pc()
     ckpttesthelpers.ckpt_protocol_app(ba, ckpttesthelpers.CheckpointCase1, agent, pc)
+    ba.register_app_layer("content_transfer_stats", ContentTransferStats(pc))
     return ba, agent, pc
 
 def main():
@@ -159,6 +214,8 @@ def main():
         sim.next_round(1000)
     finally:
         sim.close()
+        log_content_transfer([va.ba.app("content_transfer_stats") for va in validators])
+        log_priority_verification([va.ba.app("prio_handler") for va in validators])
 
 def test_ckpt_proposal():
     gw = create_gw()
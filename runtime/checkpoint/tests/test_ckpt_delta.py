@@ -0,0 +1,80 @@
+import os
+import unittest
+from decimal import Decimal
+from typing import List
+
+from abccore.DAG import Checkpoint, Wallet
+from abcnet.transcriber import Parser, Transcriber
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from abcckpt import fast_vrf
+from abcckpt.ckptItems import CkptData, CkptDelta, CkptItemType
+from abcckpt.ckptParser import CkptItemsParser
+from abcckpt.ckpt_creation_state import CkptCreationState, PreCkptStatus
+
+
+def random_wallets(count: int) -> List[Wallet]:
+    return [Wallet(os.urandom(32), Decimal(i + 1), os.urandom(32), i % 3) for i in range(count)]
+
+
+def checkpoint(origin: bytes, utxos: List[Wallet], stake_dict, prev: Checkpoint = None) -> Checkpoint:
+    outputs = [Wallet(os.urandom(32), Decimal("0.5"))]
+    total = sum(stake_dict.values(), Decimal(0))
+    return Checkpoint(origin, 1, 10.0, 0, utxos, outputs, stake_dict, len(utxos), total, total, b'miner',
+                      prev_checkpoint=prev)
+
+
+def encode(item) -> bytes:
+    t = Transcriber()
+    item.encode(t)
+    return t.msg.parts[0]
+
+
+class TestCkptDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.key = Ed25519PrivateKey.generate()
+        owners = [os.urandom(32) for _ in range(10)]
+        self.parent = checkpoint(b'Genesis', random_wallets(500), {o: Decimal(10) for o in owners})
+        utxos = self.parent.utxos[20:] + random_wallets(20)
+        stake = {o: Decimal(10) for o in owners[1:]}
+        stake[owners[2]] = Decimal("12.5")
+        stake[os.urandom(32)] = Decimal(3)
+        ckpt = checkpoint(self.parent.id, utxos, stake)
+        state = CkptCreationState(b'common', 3, PreCkptStatus.AGREE_CONTENT,
+                                  fast_vrf.encode_pub_key(self.key.public_key()), ckpt.id)
+        self.content = CkptData(state, ckpt)
+        self.content.add_signature(self.key)
+
+    def test_delta_round_trip(self):
+        delta = CkptDelta.of(self.content, self.parent)
+        self.assertEqual(delta.item_qualifier(), self.content.item_qualifier())
+        self.assertEqual(len(delta.spent), 20)
+        self.assertEqual(len(delta.new_utxos), 20)
+        self.assertEqual(len(delta.removed_owners), 1)
+        self.assertEqual(len(delta.stake_changes), 2)
+
+        encoded = encode(delta)
+        self.assertLess(len(encoded), len(encode(self.content)) / 5)
+        decoded = CkptItemsParser().decode_item(CkptItemType.CKPT_DELTA, Parser(encoded))
+        self.assertTrue(decoded.verify_signature())
+
+        rebuilt = decoded.reconstruct(self.parent)
+        self.assertEqual(rebuilt, self.content)
+        self.assertEqual(rebuilt.checkpoint_data.id, self.content.checkpoint_data.id)
+        self.assertTrue(rebuilt.verify_signature())
+
+    def test_wrong_parent(self):
+        delta = CkptDelta.of(self.content, self.parent)
+        other = checkpoint(b'Genesis', random_wallets(10), {})
+        with self.assertRaises(ValueError):
+            delta.reconstruct(other)
+        with self.assertRaises(ValueError):
+            CkptDelta.of(self.content, other)
+
+    def test_tampered_delta(self):
+        delta = CkptDelta.of(self.content, self.parent)
+        delta.new_utxos[0] = Wallet(delta.new_utxos[0].own_key, Decimal(1000), delta.new_utxos[0].origin,
+                                    delta.new_utxos[0].id)
+        with self.assertRaises(ValueError):
+            delta.reconstruct(self.parent)
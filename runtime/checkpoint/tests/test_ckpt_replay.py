@@ -0,0 +1,118 @@
+import tempfile
+import unittest
+from typing import List
+
+from abcnet import timer
+from abcnet.services import BaseApp
+from abcnet.structures import Message, MsgType, PeerContactInfo
+from abcnet.transcriber import Transcriber
+
+from abcckpt import ckpt_constants, ckpttesthelpers
+from abcckpt.ckptItems import CkptItemType, Priority
+from abcckpt.ckpt_replay import ConsensusRecorder, ConsensusReplayer, ConsensusEvent, read_consensus_log, \
+    VirtualClock
+from abcckpt.ckpttesthelpers import CheckpointCase1
+from abcckpt.prio_cr_handler import PriorityCrHandler
+from tests.test_ckpt_sync import ChainDag, build_chain
+
+START_TIME = 1000.0
+
+
+def encode(item) -> bytes:
+    t = Transcriber()
+    item.encode(t)
+    return t.msg.parts[0]
+
+
+def received_msg(msg_type: MsgType, items, sender: str) -> Message:
+    msg = Message(list(), msg_type)
+    msg.sender = PeerContactInfo(sender, None, None, None)
+    msg.items = items
+    return msg
+
+
+def build_stack(ba: BaseApp):
+    pc = ckpttesthelpers.pseudo_pc()
+    genesis, _ = build_chain(0, 0)
+    agent = ckpttesthelpers.AgentSerivceMock([CheckpointCase1.private_keys[0]], ChainDag(genesis))
+    ckpttesthelpers.ckpt_protocol_app(ba, CheckpointCase1, agent, pc)
+    return pc
+
+
+class TestCkptReplay(unittest.TestCase):
+
+    def setUp(self):
+        state = ckpttesthelpers.pseudo_pc().state
+        self.priorities: List[Priority] = list()
+        for skey in CheckpointCase1.private_keys[1:]:
+            prio = PriorityCrHandler.create_prio(state, skey, CheckpointCase1)
+            prio.add_signature(skey)
+            self.priorities.append(prio)
+
+    def record(self, file_path) -> List[ConsensusEvent]:
+        """
+        Records the priorities of the other validators arriving in the first seconds and
+        the maintenance steps of a node until the time to create a checkpoint has passed.
+        """
+        clock = VirtualClock(START_TIME)
+        old_supplier = timer.TIME_SUPPLIER
+        timer.TIME_SUPPLIER = clock
+        try:
+            recorder = ConsensusRecorder(file_path)
+            end = START_TIME + ckpt_constants.CKPT_CREATION_TIME_TH + ckpt_constants.VOTE_TRY_TIME_OUT * 2
+            while clock.now < end:
+                second = int(clock.now - START_TIME)
+                if second < len(self.priorities):
+                    prio = self.priorities[second]
+                    recorder.accept(None, received_msg(MsgType.items_checklist,
+                                                       [(CkptItemType.PRIORITY, prio.item_qualifier())],
+                                                       f"Peer-{second}"))
+                    recorder.accept(None, received_msg(MsgType.items_content,
+                                                       [(CkptItemType.PRIORITY, encode(prio)), (0xeeee013, b'x')],
+                                                       f"Peer-{second}"))
+                recorder.perform_maintenance(None)
+                clock.now += 1.0
+            recorder.close()
+        finally:
+            timer.TIME_SUPPLIER = old_supplier
+        return list(read_consensus_log(file_path))
+
+    def test_log_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            events = self.record(tmp_dir + "/consensus.log")
+        msgs = [e for e in events if e.kind != 0]
+        self.assertEqual(len(msgs), 2 * len(self.priorities))
+        checklist, content = msgs[:2]
+        self.assertEqual(checklist.items, [(CkptItemType.PRIORITY, self.priorities[0].item_qualifier())])
+        # Items that are not consensus items are not recorded.
+        self.assertEqual(content.items, [(CkptItemType.PRIORITY, encode(self.priorities[0]))])
+        self.assertEqual(content.sender, "Peer-0")
+        self.assertEqual(content.timestamp, START_TIME)
+
+    def test_deterministic_replay(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            events = self.record(tmp_dir + "/consensus.log")
+
+        results = list()
+        for _ in range(2):
+            stacks = list()
+
+            def build(ba):
+                stacks.append(ba)
+                return build_stack(ba)
+
+            report = ConsensusReplayer(events).run(build)
+            prio_handler = stacks[0].app("prio_handler")
+            results.append((report.messages, report.ticks, report.sent, prio_handler.max_priority.item_qualifier(),
+                            sorted(prio_handler.verified_prios)))
+            self.assertTrue(prio_handler.vote_sent)
+            self.assertGreater(report.virtual_time, ckpt_constants.CKPT_CREATION_TIME_TH)
+            self.assertLess(report.cpu_time, report.virtual_time)
+            self.assertGreater(report.round_cpu_time(0), 0)
+            print(report)
+        self.assertEqual(results[0], results[1])
+        self.assertNotIsInstance(timer.TIME_SUPPLIER, VirtualClock)
+
+
+if __name__ == '__main__':
+    unittest.main()
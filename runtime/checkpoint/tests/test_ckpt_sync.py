@@ -0,0 +1,272 @@
+import os
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+from unittest.mock import MagicMock, patch
+
+from abccore.DAG import Wallet, Checkpoint, Genesis
+from abcnet.nettesthelpers import pseudo_peer
+from abcnet.transcriber import Transcriber
+
+from abcckpt import ckpt_constants
+from abcckpt.ckptItems import CkptItemType
+from abcckpt.ckpt_syncronizer import CkptSync, CkptTipItem
+
+
+class ChainDag:
+    """
+    DAG stand-in that only holds checkpoints.
+    """
+
+    def __init__(self, genesis: Genesis):
+        self.nodes: Dict[bytes, Genesis] = {genesis.get_identifier(): genesis}
+        self.latest = genesis
+
+    def add(self, ckpt: Genesis):
+        self.nodes[ckpt.get_identifier()] = ckpt
+        self.latest = ckpt
+
+    def search(self, node_id: bytes):
+        node = self.nodes.get(node_id)
+        return SimpleNamespace(get_node=lambda: node) if node is not None else None
+
+    def get_latest_checkpoint(self):
+        return self.latest
+
+
+class ChainAgentService:
+
+    def __init__(self, dag: ChainDag):
+        self.dag = dag
+
+    def get_DAG(self):
+        return self.dag
+
+    def inject_checkpoint(self, ckpt: Checkpoint):
+        self.dag.add(ckpt)
+
+
+class RecordingChannel:
+
+    def __init__(self, peer: str, sent: List[Tuple[str, str, list]]):
+        self.peer = peer
+        self.sent = sent
+
+    def checklist(self, items):
+        self.sent.append((self.peer, "checklist", items))
+
+    def fetch_items(self, items):
+        self.sent.append((self.peer, "fetch", items))
+
+    def items(self, items):
+        self.sent.append((self.peer, "items", items))
+
+
+class RecordingCS:
+
+    def __init__(self):
+        self.sent: List[Tuple[str, str, list]] = list()
+
+    def broadcast_channel(self):
+        return RecordingChannel("", self.sent)
+
+    def direct_channel(self, peer):
+        return RecordingChannel(peer.identifier, self.sent)
+
+    def pop(self):
+        sent, self.sent = self.sent, list()
+        return sent
+
+
+def build_chain(length: int, utxo_count: int) -> Tuple[Genesis, List[Checkpoint]]:
+    genesis = Genesis([Wallet(os.urandom(32), Decimal(100)) for _ in range(5)])
+    chain = list()
+    prev = genesis
+    for height in range(1, length + 1):
+        utxos = [Wallet(os.urandom(32), Decimal(height), os.urandom(32), i) for i in range(utxo_count)]
+        ckpt = Checkpoint(prev.get_identifier(), height, float(height), 0, utxos, [Wallet(b'miner', Decimal(1))],
+                          {b'miner': Decimal(1)}, utxo_count, Decimal(1), Decimal(100), b'miner')
+        chain.append(ckpt)
+        prev = ckpt
+    return genesis, chain
+
+
+def sync_node(genesis: Genesis, chain: List[Checkpoint]) -> CkptSync:
+    dag = ChainDag(genesis)
+    for ckpt in chain:
+        dag.add(ckpt)
+    sync = CkptSync(MagicMock(), ChainAgentService(dag))
+    sync.update_ckpt(genesis)
+    for ckpt in chain:
+        sync.update_ckpt(ckpt)
+    return sync
+
+
+def deliver(items, sender, receiver: CkptSync, cs: RecordingCS):
+    msg = SimpleNamespace(sender=sender)
+    for item in items:
+        t = Transcriber()
+        item.encode(t)
+        decoded = receiver.item_parser.decode_item_bytes(item.item_type(), t.msg.parts[0])
+        receiver.handle_item_content(cs, msg, item.item_type(), decoded)
+
+
+@patch('abcckpt.ckpt_constants.CKPT_SYNC_CHUNK_SIZE', 2048)
+@patch('abcckpt.ckpt_constants.CKPT_SYNC_CHUNKS_PER_PEER', 4)
+class TestCkptSync(unittest.TestCase):
+
+    def setUp(self):
+        self.genesis, self.chain = build_chain(5, 100)
+        self.peers = [pseudo_peer("Server-1"), pseudo_peer("Server-2")]
+        self.servers = [sync_node(self.genesis, self.chain) for _ in self.peers]
+        self.client_peer = pseudo_peer("Client")
+        self.client = sync_node(self.genesis, [])
+        self.cs = RecordingCS()
+
+    def advertise(self):
+        for peer, server in zip(self.peers, self.servers):
+            server.pm_checklist(self.cs)
+            for _, _, items in self.cs.pop():
+                for item in items:
+                    self.client.handle_item_checklist(self.cs, SimpleNamespace(sender=peer), item.item_type(),
+                                                      item.item_qualifier())
+
+    def exchange(self, online: List[bool]) -> List[Tuple[str, str, list]]:
+        """
+        Sends the requests of the client to the servers and the responses of online servers back.
+        """
+        self.client.pm_fetch(self.cs)
+        requests = self.cs.pop()
+        for peer_id, kind, items in requests:
+            for peer, server in zip(self.peers, self.servers):
+                if peer_id in ("", peer.identifier):
+                    for item_type, item_qualifier in items:
+                        server.handle_item_request(self.cs, SimpleNamespace(sender=self.client_peer), item_type,
+                                                   item_qualifier)
+        for peer, server, is_online in zip(self.peers, self.servers, online):
+            server.pm_response(self.cs)
+            for _, _, items in self.cs.pop():
+                if is_online:
+                    deliver(items, peer, self.client, self.cs)
+        return requests
+
+    def test_tip_advert(self):
+        server = self.servers[0]
+        server.pm_checklist(self.cs)
+        (peer, kind, items), = self.cs.pop()
+        self.assertEqual(kind, "checklist")
+        self.assertEqual(len(items), 1)
+        self.assertEqual(CkptTipItem.parse_qualifier(items[0].item_qualifier()), (5, self.chain[-1].id))
+
+    def test_chunked_parallel_sync(self):
+        self.advertise()
+        self.assertEqual(self.client.target_height, 5)
+        requests = self.exchange([True, True])
+        self.assertEqual(requests, [(self.peers[0].identifier, "fetch", [(CkptItemType.CKPT_RANGE, "1:5")])])
+        self.assertEqual(len(self.client.downloads), 5)
+        self.assertGreater(self.client.downloads[self.chain[0].id].manifest.chunk_count(), 1)
+
+        chunk_peers = set()
+        for _ in range(50):
+            if self.client.height() == 5:
+                break
+            for peer_id, kind, items in self.exchange([True, True]):
+                if items[0][0] == CkptItemType.CKPT_CHUNK:
+                    chunk_peers.add(peer_id)
+                    self.assertLessEqual(len(items), 4)
+        self.assertEqual(self.client.ckpt_list, [c.id for c in self.chain])
+        self.assertEqual(self.client.agent_service.get_DAG().get_latest_checkpoint().id, self.chain[-1].id)
+        self.assertEqual(chunk_peers, {p.identifier for p in self.peers})
+        self.assertFalse(self.client.downloads)
+
+    def test_resume_after_interruption(self):
+        self.advertise()
+        self.exchange([True, True])
+        download = self.client.downloads[self.chain[0].id]
+        # The second server goes offline before answering.
+        self.exchange([True, False])
+        received = set(download.chunks)
+        self.assertTrue(received)
+        self.assertTrue(download.missing_chunks())
+
+        requests = self.exchange([True, False])
+        requested = {q for _, _, items in requests for t, q in items if t == CkptItemType.CKPT_CHUNK}
+        for index in received:
+            self.assertNotIn(f"{self.chain[0].id.hex()}:{index}", requested)
+        for _ in range(50):
+            if self.client.height() == 5:
+                break
+            self.exchange([True, False])
+        self.assertEqual(self.client.ckpt_list, [c.id for c in self.chain])
+
+    def test_corrupt_chunk_is_rejected(self):
+        self.advertise()
+        self.exchange([True, True])
+        download = self.client.downloads[self.chain[0].id]
+        self.assertFalse(download.add_chunk(0, b'corrupt'))
+        self.assertNotIn(0, download.chunks)
+
+    def test_stalled_download_is_fetched_from_another_peer(self):
+        now = [1000.0]
+        with patch('abcnet.timer.TIME_SUPPLIER', lambda: now[0]):
+            self.advertise()
+            self.exchange([True, True])
+            self.assertEqual(len(self.client.downloads), 5)
+            self.assertEqual(self.client.downloads[self.chain[0].id].peer_id, self.peers[0].identifier)
+
+            # The first server goes offline, the downloads don't progress.
+            now[0] += ckpt_constants.CKPT_SYNC_DOWNLOAD_TIMEOUT + 1
+            requests = self.exchange([False, True])
+            self.assertIn(self.peers[0].identifier, self.client.silent_peers)
+            self.assertIn((self.peers[1].identifier, "fetch", [(CkptItemType.CKPT_RANGE, "1:5")]), requests)
+            self.assertEqual(self.client.downloads[self.chain[0].id].peer_id, self.peers[1].identifier)
+            for _ in range(50):
+                if self.client.height() == 5:
+                    break
+                self.exchange([False, True])
+            self.assertEqual(self.client.ckpt_list, [c.id for c in self.chain])
+
+    def test_stalled_download_resumes_verified_chunks(self):
+        now = [1000.0]
+        with patch('abcnet.timer.TIME_SUPPLIER', lambda: now[0]):
+            self.advertise()
+            self.exchange([True, True])
+            # The second server goes offline, then the first one.
+            self.exchange([True, False])
+            received = set(self.client.downloads[self.chain[0].id].chunks)
+            self.assertTrue(received)
+            self.exchange([False, False])
+
+            # A third server advertises the chain while the downloads are stalled.
+            self.peers.append(pseudo_peer("Server-3"))
+            self.servers.append(sync_node(self.genesis, self.chain))
+            self.advertise()
+            now[0] += ckpt_constants.CKPT_SYNC_DOWNLOAD_TIMEOUT + 1
+            requests = self.exchange([False, False, True])
+            self.assertEqual(set(self.client.silent_peers), {self.peers[0].identifier, self.peers[1].identifier})
+            self.assertEqual(requests, [(self.peers[2].identifier, "fetch", [(CkptItemType.CKPT_RANGE, "1:5")])])
+            download = self.client.downloads[self.chain[0].id]
+            self.assertEqual(download.peer_id, self.peers[2].identifier)
+            self.assertEqual(set(download.chunks), received)
+
+            requests = self.exchange([False, False, True])
+            self.assertEqual({peer_id for peer_id, _, _ in requests}, {self.peers[2].identifier})
+            requested = {q for _, _, items in requests for t, q in items if t == CkptItemType.CKPT_CHUNK}
+            for index in received:
+                self.assertNotIn(f"{self.chain[0].id.hex()}:{index}", requested)
+            for _ in range(50):
+                if self.client.height() == 5:
+                    break
+                self.exchange([False, False, True])
+            self.assertEqual(self.client.ckpt_list, [c.id for c in self.chain])
+            self.assertFalse(self.client.stalled_downloads)
+
+    def test_peer_heights_expire(self):
+        now = [1000.0]
+        with patch('abcnet.timer.TIME_SUPPLIER', lambda: now[0]):
+            self.advertise()
+            self.assertEqual(len(self.client.peer_heights), 2)
+            now[0] += ckpt_constants.CKPT_SYNC_PEER_TIMEOUT + 1
+            self.client.expire(now[0])
+            self.assertFalse(self.client.peer_heights)
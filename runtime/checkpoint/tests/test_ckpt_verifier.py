@@ -0,0 +1,93 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from abcckpt import fast_vrf
+from abcckpt.ckptItems import CkptItemType, ValidatorVote
+from abcckpt.ckpt_creation_state import CkptCreationState
+from abcckpt.ckpt_verifier import BatchVerifier
+from abcckpt.ckpttesthelpers import CheckpointCase1, pseudo_pc
+from abcckpt.stab_abc_consens import StabVotingHandler
+
+
+def signed_votes(count: int, round_nr: int = 1):
+    state = CkptCreationState(b'common', round_nr)
+    return [ValidatorVote.create_and_sign(state, f"item-{i % 3}", CkptItemType.PRIORITY, Ed25519PrivateKey.generate())
+            for i in range(count)]
+
+
+class TestBatchVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.votes = signed_votes(20)
+        forged = ValidatorVote(self.votes[0].state, "item-0", CkptItemType.PRIORITY,
+                               fast_vrf.encode_pub_key(Ed25519PrivateKey.generate().public_key()))
+        forged.signature = (forged.pub_key, self.votes[1].signature[1])
+        self.forged = forged
+
+    def test_batch_drops_invalid_and_duplicates(self):
+        verifier = BatchVerifier()
+        batch = self.votes + [self.forged] + self.votes[:5]
+        verified = verifier.verify_batch(batch)
+        self.assertEqual(verified, self.votes + self.votes[:5])
+        self.assertEqual(verifier.checked, 21)
+
+        # Single checks after the batch are answered from the cache.
+        for vote in self.votes:
+            self.assertTrue(verifier.verify(vote))
+        self.assertFalse(verifier.verify(self.forged))
+        self.assertEqual(verifier.checked, 21)
+        self.assertEqual(verifier.cache_hits, 21)
+
+    def test_cache_is_bounded(self):
+        verifier = BatchVerifier(cache_size=10)
+        verifier.verify_batch(self.votes)
+        self.assertEqual(len(verifier.results), 10)
+        self.assertTrue(verifier.verify(self.votes[0]))
+        self.assertEqual(verifier.checked, 21)
+
+    @patch('abcckpt.ckpt_constants.CKPT_VERIFY_WORKERS', 4)
+    @patch('abcckpt.ckpt_constants.CKPT_VERIFY_POOL_MIN_BATCH', 2)
+    def test_worker_pool(self):
+        verifier = BatchVerifier()
+        self.assertEqual(verifier.verify_batch(self.votes + [self.forged]), self.votes)
+
+    def test_votes_of_a_step_are_verified_together(self):
+        pc = pseudo_pc()
+        handler = StabVotingHandler(pc, CheckpointCase1)
+        handler.set_handlers(MagicMock(), MagicMock(), MagicMock())
+        votes = [ValidatorVote.create_and_sign(pc.state, "item-1", CkptItemType.PRIORITY, key)
+                 for key in CheckpointCase1.private_keys]
+        # Every vote arrives in a message of its own.
+        for vote in votes:
+            handler.handle_item_content(None, None, CkptItemType.VALVOTE, vote)
+        self.assertEqual(handler.verifier.checked, 0)
+        handler.process_received_votes()
+        self.assertEqual(handler.verifier.checked, len(votes))
+        self.assertEqual(handler.verifier.cache_hits, len(votes))
+        self.assertEqual(len(handler.registry.votes), len(votes))
+
+    def test_benchmark_vote_burst(self):
+        votes = signed_votes(500)
+        # Votes are delivered a second time by other peers.
+        burst = votes + votes
+        start = time.perf_counter()
+        for vote in burst:
+            vote.verify_signature()
+        serial_time = time.perf_counter() - start
+
+        verifier = BatchVerifier()
+        start = time.perf_counter()
+        verifier.verify_batch(burst)
+        for vote in burst:
+            verifier.verify(vote)
+        batch_time = time.perf_counter() - start
+        print(f"Verifying a burst of {len(burst)} votes: one by one {serial_time * 1000:.1f} ms, "
+              f"batched {batch_time * 1000:.1f} ms")
+        self.assertEqual(verifier.checked, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import time
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, List
+
+from abccore.DAG import Wallet, Checkpoint
+from abccore.checkpoint_service import CheckpointService
+
+from abcckpt.ckpt_constants import REWARD
+from abcckpt.ckptproposal import PostCheckpoint
+from abcckpt.pre_checkpoint import AgentService
+
+logger = logging.getLogger(__name__)
+
+OWNERS = [b'owner-%d' % i for i in range(10)]
+MINER = b'Miner'
+
+
+class DictDag:
+    """
+    DAG stand-in with direct lookups of txns by identifier.
+    """
+
+    def __init__(self):
+        self.txns: Dict[bytes, SimpleNamespace] = dict()
+
+    def add_txn(self, txn_id: bytes, outputs: List[Wallet]):
+        self.txns[txn_id] = SimpleNamespace(node=SimpleNamespace(outputs=outputs))
+
+    def search(self, txn_id: bytes):
+        return self.txns.get(txn_id)
+
+
+class FixedCkptService(CheckpointService):
+
+    def __init__(self, last_ckpt: Checkpoint):
+        self.checkpoint = last_ckpt
+
+    def get_height(self) -> int:
+        return self.checkpoint.height
+
+    def get_ckpt_id(self) -> bytes:
+        return self.checkpoint.id
+
+    def get_ckpt_utxos(self) -> List[Wallet]:
+        return self.checkpoint.utxos
+
+    def get_ckpt_outputs(self) -> List[Wallet]:
+        return self.checkpoint.outputs
+
+
+class RecordingAgentService(AgentService):
+
+    def __init__(self):
+        self.fetch_list = set()
+
+    def add_txn_to_fetch_list(self, item_id):
+        self.fetch_list.add(item_id)
+
+
+def txn_id(nr: int) -> bytes:
+    return hashlib.sha256(nr.to_bytes(8, 'big')).digest()
+
+
+def wallets_of(nr: int, count: int = 2) -> List[Wallet]:
+    return [Wallet(OWNERS[(nr + i) % len(OWNERS)], Decimal(nr % 100 + 1), txn_id(nr), i) for i in range(count)]
+
+
+def stake_of(utxos: List[Wallet]) -> Dict[bytes, Decimal]:
+    stake: Dict[bytes, Decimal] = dict()
+    for w in utxos:
+        stake[w.own_key] = stake.get(w.own_key, Decimal(0)) + w.value
+    stake[MINER] = stake.get(MINER, Decimal(0)) + REWARD
+    return stake
+
+
+def checkpoint(origin: bytes, height: int, utxos: List[Wallet], stake: Dict[bytes, Decimal] = None) -> Checkpoint:
+    if stake is None:
+        stake = stake_of(utxos)
+    return Checkpoint(origin, height, 0.0, 0, utxos, [Wallet(MINER, REWARD, None, 0)], stake, len(utxos),
+                      sum(stake.values()), sum(w.value for w in utxos) + REWARD, MINER)
+
+
+def scenario(old_txns: int, new_txns: int):
+    """
+    The last checkpoint holds the outputs of the old txns.
+    The proposal spends the first new txn count old txns and adds the outputs of the new txns.
+    """
+    dag = DictDag()
+    old_utxos = []
+    for nr in range(old_txns):
+        outputs = wallets_of(nr)
+        dag.add_txn(txn_id(nr), outputs)
+        old_utxos.extend(outputs)
+    last = checkpoint(b'Genesis', 3, old_utxos)
+    new_utxos = [w for w in old_utxos[2 * new_txns:]] + last.outputs
+    for nr in range(old_txns, old_txns + new_txns):
+        outputs = wallets_of(nr)
+        dag.add_txn(txn_id(nr), outputs)
+        new_utxos.extend(outputs)
+    return dag, FixedCkptService(last), new_utxos
+
+
+class TestCheckpointVerify(unittest.TestCase):
+
+    def test_valid_checkpoint(self):
+        dag, service, utxos = scenario(50, 10)
+        diff = PostCheckpoint.checkpoint_verify(dag, checkpoint(service.get_ckpt_id(), 4, utxos), service,
+                                                RecordingAgentService())
+        self.assertTrue(diff, str(diff))
+        self.assertEqual(diff.status, "")
+
+    def test_empty_checkpoint(self):
+        dag, service, _ = scenario(50, 0)
+        utxos = service.get_ckpt_utxos() + service.get_ckpt_outputs()
+        diff = PostCheckpoint.checkpoint_verify(dag, checkpoint(service.get_ckpt_id(), 4, utxos), service,
+                                                RecordingAgentService())
+        self.assertFalse(diff)
+        self.assertEqual(diff.status, "EMPTY")
+
+    def test_missing_txns_are_fetched(self):
+        dag, service, utxos = scenario(50, 10)
+        del dag.txns[txn_id(55)]
+        del dag.txns[txn_id(57)]
+        agent = RecordingAgentService()
+        diff = PostCheckpoint.checkpoint_verify(dag, checkpoint(service.get_ckpt_id(), 4, utxos), service, agent)
+        self.assertFalse(diff)
+        self.assertTrue(diff.pending)
+        self.assertEqual(diff.missing_txns, {txn_id(55), txn_id(57)})
+        self.assertEqual(agent.fetch_list, diff.missing_txns)
+
+    def test_unexpected_outputs(self):
+        dag, service, utxos = scenario(50, 10)
+        forged = Wallet(OWNERS[0], Decimal(1000), txn_id(52), 0)
+        out_of_range = Wallet(OWNERS[0], Decimal(1), txn_id(53), 7)
+        utxos = [w for w in utxos if (w.origin, w.id) != (txn_id(52), 0)] + [forged, out_of_range, utxos[0]]
+        diff = PostCheckpoint.checkpoint_verify(dag, checkpoint(service.get_ckpt_id(), 4, utxos), service,
+                                                RecordingAgentService())
+        self.assertFalse(diff)
+        self.assertEqual(diff.status, "")
+        self.assertEqual(diff.unexpected_outputs, [forged, out_of_range, utxos[0]])
+
+    def test_stake_mismatches(self):
+        dag, service, utxos = scenario(50, 10)
+        expected = stake_of(utxos)
+        declared = dict(expected)
+        declared[OWNERS[1]] += 1
+        del declared[OWNERS[2]]
+        ckpt = checkpoint(service.get_ckpt_id(), 4, utxos, declared)
+        diff = PostCheckpoint.checkpoint_verify(dag, ckpt, service, RecordingAgentService(), expected)
+        self.assertFalse(diff)
+        self.assertEqual(diff.stake_mismatches, {
+            OWNERS[1]: (declared[OWNERS[1]], expected[OWNERS[1]]),
+            OWNERS[2]: (None, expected[OWNERS[2]]),
+        })
+
+        ckpt.total_stake += 5
+        diff = PostCheckpoint.checkpoint_verify(dag, ckpt, service, RecordingAgentService())
+        self.assertFalse(diff)
+        self.assertEqual(list(diff.stake_mismatches.keys()), [None])
+
+    def benchmark(self, output_count: int):
+        txn_count = output_count // 2
+        dag, service, utxos = scenario(txn_count, txn_count // 10)
+        ckpt = checkpoint(service.get_ckpt_id(), 4, utxos)
+        start = time.perf_counter()
+        diff = PostCheckpoint.checkpoint_verify(dag, ckpt, service, RecordingAgentService(), stake_of(utxos))
+        duration = time.perf_counter() - start
+        self.assertTrue(diff, str(diff))
+        logger.info("Verified checkpoint with %d outputs in %.3f sec.", len(utxos), duration)
+        return duration
+
+    def test_benchmark_verify(self):
+        self.assertLess(self.benchmark(10 ** 5), 10)
+
+    @unittest.skipUnless('LONG_TESTS' in os.environ, "Long test")
+    def test_benchmark_verify_long(self):
+        self.assertLess(self.benchmark(10 ** 6), 60)
@@ -97,7 +97,9 @@ class TestPostCheckpoint(unittest.TestCase):
 
         status = PostCheckpoint.checkpoint_verify(tree1, check2, ckptservice, AgentService())
         print(status)
-        assert status == (False, 'PENDING')
+        assert not status
+        assert status.pending
+        assert status.missing_txns == {trans2.get_identifier()}
 
     def test_empty_ckpt(self):
         tree = Tree()
@@ -121,4 +123,5 @@ class TestPostCheckpoint(unittest.TestCase):
 
         status = PostCheckpoint.checkpoint_verify(tree, check2, ckptservice, AgentService())
         print(status)
-        assert status == (False, 'EMPTY')
+        assert not status
+        assert status.status == 'EMPTY'
@@ -1,6 +1,7 @@
 import unittest
 
 from abcckpt import fast_vrf
+from abcnet.timer import StopTimer
 
 
 class TestHashVRF(unittest.TestCase):
@@ -24,3 +25,42 @@ class TestHashVRF(unittest.TestCase):
         assert status == 'INVALID'
         assert sample2 == 0.0
 
+
+    def test_binary_and_json_proofs(self):
+        sk = fast_vrf.gen_key()
+        pkb = fast_vrf.encode_pub_key(sk.public_key())
+        _, binary_proof = fast_vrf.hash_vrf_prove(sk, b"12345", True, fast_vrf.PROOF_FORMAT_BINARY)
+        _, json_proof = fast_vrf.hash_vrf_prove(sk, b"12345", True, fast_vrf.PROOF_FORMAT_JSON)
+        assert len(binary_proof) == fast_vrf.BINARY_PROOF_SIZE
+        assert binary_proof[0] == fast_vrf.BINARY_PROOF_VERSION
+
+        # Both formats are accepted and result in the same sample:
+        samples = set()
+        for proof in [binary_proof, json_proof]:
+            status, sample = fast_vrf.hash_vrf_verify(pkb, proof, b'12345', True)
+            assert status == 'VALID'
+            assert fast_vrf.hash_vrf_proof_to_hash(proof, True) == ('VALID', sample)
+            samples.add(sample)
+        assert len(samples) == 1
+
+        # Truncated proofs and proofs with a forged signature are rejected:
+        assert fast_vrf.hash_vrf_verify(pkb, binary_proof[:-1], b'12345')[0] == 'INVALID'
+        forged = binary_proof[:-1] + bytes([binary_proof[-1] ^ 1])
+        assert fast_vrf.hash_vrf_verify(pkb, forged, b'12345')[0] == 'INVALID'
+
+    def test_proof_format_benchmark(self):
+        sk = fast_vrf.gen_key()
+        pkb = fast_vrf.encode_pub_key(sk.public_key())
+        rounds = 500
+        for proof_format in [fast_vrf.PROOF_FORMAT_JSON, fast_vrf.PROOF_FORMAT_BINARY]:
+            _, proof = fast_vrf.hash_vrf_prove(sk, b"common", True, proof_format)
+            timer = StopTimer()
+            for _ in range(rounds):
+                fast_vrf.hash_vrf_verify(pkb, proof, b"common", True)
+            verify_time = timer.time()
+            timer = StopTimer()
+            for _ in range(rounds):
+                fast_vrf.hash_vrf_proof_to_hash(proof, True)
+            sample_time = timer.time()
+            print(f"{proof_format} proof: {len(proof)} bytes, verify {verify_time / rounds * 1e6: 0.1f} us, "
+                  f"proof to sample {sample_time / rounds * 1e6: 0.1f} us")
@@ -0,0 +1,87 @@
+import unittest
+from types import SimpleNamespace
+from typing import List
+from unittest.mock import patch
+
+from abcckpt.ckptItems import CkptItemType, Priority
+from abcckpt.ckpttesthelpers import CheckpointCase1, pseudo_pc
+from abcckpt.prio_cr_handler import PriorityCrHandler
+from abcckpt.prio_handler import PriorityHandler, priority_rank
+
+
+class TestLazyPriority(unittest.TestCase):
+
+    def setUp(self):
+        self.pc = pseudo_pc()
+        self.handler = PriorityHandler(self.pc, CheckpointCase1)
+        self.priorities: List[Priority] = list()
+        for skey in CheckpointCase1.private_keys:
+            prio = PriorityCrHandler.create_prio(self.pc.state, skey, CheckpointCase1)
+            prio.add_signature(skey)
+            self.priorities.append(prio)
+        self.priorities.sort(key=priority_rank, reverse=True)
+        self.cs = SimpleNamespace(contact=SimpleNamespace(identifier="P1"))
+
+    def deliver(self, priorities: List[Priority]):
+        self.handler.handle_item_batch_contents(self.cs, None, [(CkptItemType.PRIORITY, p) for p in priorities])
+        self.handler.process_received_prios()
+
+    def test_only_the_best_is_verified(self):
+        self.deliver(list(reversed(self.priorities)))
+        self.assertEqual(self.handler.max_priority, self.priorities[0])
+        self.assertEqual(list(self.handler.verified_prios), [self.priorities[0].item_qualifier()])
+        stats = self.handler.stats
+        self.assertEqual((stats.received, stats.verified, stats.deferred), (10, 1, 9))
+        self.assertEqual(stats.saved, 9)
+
+        # Checklists of deferred priorities don't trigger requests.
+        self.assertTrue(self.handler.has_priority(self.priorities[-1].item_qualifier()))
+
+    def test_invalid_leader(self):
+        best = self.priorities[0]
+        forged = Priority(best.state, best.pub_k, best.stake, best.proof, best.votes + 1000)
+        forged.add_signature(CheckpointCase1.private_keys[CheckpointCase1.pub_keys.index(best.pub_k)])
+        self.deliver(self.priorities[1:] + [forged])
+        self.assertIn(forged.item_qualifier(), self.handler.rejected_prios)
+        self.assertEqual(self.handler.max_priority, self.priorities[1])
+        self.assertEqual(self.handler.stats.verified, 2)
+
+        # A better priority arriving later is verified.
+        self.handler.handle_item_content(self.cs, None, CkptItemType.PRIORITY, best)
+        self.assertTrue(self.handler.has_priority(best.item_qualifier()))
+        self.handler.process_received_prios()
+        self.assertEqual(self.handler.max_priority, best)
+
+    def test_deferred_priority_is_verified_when_needed(self):
+        self.deliver(self.priorities)
+        voted = self.priorities[3].item_qualifier()
+        self.assertFalse(voted in self.handler.verified_prios)
+        self.assertTrue(self.handler.check_item_exists(voted))
+        self.assertIn(voted, self.handler.verified_prios)
+        self.assertEqual(self.handler.max_priority, self.priorities[0])
+        self.assertEqual(self.handler.stats.promoted, 1)
+        self.assertEqual(self.handler.stats.saved, 8)
+
+    @patch('abcckpt.ckpt_constants.CKPT_DEFERRED_PRIORITIES', 3)
+    def test_deferred_queue_is_bounded(self):
+        self.deliver(self.priorities)
+        self.assertEqual(set(self.handler.deferred_prios), {p.item_qualifier() for p in self.priorities[1:4]})
+        self.assertEqual(self.handler.stats.evicted, 6)
+
+    def test_priorities_of_a_step_are_processed_together(self):
+        # Every priority arrives in a message of its own, the lowest first.
+        for priority in reversed(self.priorities):
+            self.handler.handle_item_content(self.cs, None, CkptItemType.PRIORITY, priority)
+        self.assertEqual(self.handler.stats.received, 0)
+        self.handler.process_received_prios()
+        self.assertEqual(self.handler.max_priority, self.priorities[0])
+        self.assertEqual((self.handler.stats.verified, self.handler.stats.deferred), (1, 9))
+
+    def test_own_priority_is_verified(self):
+        self.handler.initialise_prio(self.priorities[4])
+        self.handler.process_prio(self.priorities[4])
+        self.assertIn(self.priorities[4].item_qualifier(), self.handler.verified_prios)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,6 +18,37 @@ mean = n * p
 var = n * p * (1.0 - p)
 
 
+def scipy_vote_calc_normal(sample: float, stake: int) -> int:
+    """
+    The former scipy based vote calculation: binary search over norm(stake, stake).cdf.
+    """
+    distribution = scipy.stats.norm(stake, stake)
+    if distribution.cdf(0) >= sample:
+        return 0
+    cursor = stake
+    min_cursor = None
+    max_cursor = None
+    while True:
+        cursor_cdf = distribution.cdf(cursor)
+        if cursor_cdf > sample:
+            max_cursor = cursor
+        elif cursor_cdf < sample:
+            min_cursor = cursor
+        else:
+            return cursor
+        if min_cursor is not None and max_cursor is not None:
+            if max_cursor - min_cursor < 4:
+                break
+            cursor = int(math.ceil((min_cursor + max_cursor) / 2))
+        elif min_cursor is not None:
+            cursor += stake
+        else:
+            cursor -= stake
+    for cursor in range(min_cursor, max_cursor + 1):
+        if sample < distribution.cdf(cursor):
+            return cursor - 1
+
+
 class TestSortition(unittest.TestCase):
 
     def test_scipy_binom_runtime_efficiency(self):
@@ -151,3 +182,42 @@ class TestSortition(unittest.TestCase):
                                  calc(state2.get_current_common_str(), key1, Decimal(2000.0)))
         assert calc(state2.get_current_common_str(), key1, Decimal(2000.0)).seed == state2.current_common_str
 
+    def test_normal_cdf_and_ppf(self):
+        for z in [-8.5, -6.0, -3.2, -1.0, -0.7, -0.1, 0.0, 0.3, 0.71, 1.5, 4.0, 8.0]:
+            self.assertAlmostEqual(sortition.normal_cdf(z), scipy.stats.norm.cdf(z), delta=1e-15)
+        for p in [1e-12, 1e-5, 0.01, 0.02425, 0.1, 0.5, 0.77, 0.97575, 0.999, 0.99999]:
+            self.assertAlmostEqual(sortition.normal_ppf(p), scipy.stats.norm.ppf(p), delta=1e-9)
+        with self.assertRaises(ValueError):
+            sortition.normal_ppf(0.0)
+
+    def test_votes_match_scipy(self):
+        import random
+        r = random.Random(7)
+        stakes = list(range(1, 50)) + [10 ** k for k in range(2, 7)] + [r.randint(50, 10 ** 6) for _ in range(50)]
+        for stake in stakes:
+            samples = [round(r.random(), 5) for _ in range(20)] + [0.0, 0.15865, 0.15866, 0.5, 0.99999]
+            for sample in samples:
+                votes = sortition.vote_calc_normal(sample, stake)
+                self.assertEqual(votes, scipy_vote_calc_normal(sample, stake), f"stake={stake}, sample={sample}")
+                self.assertTrue(sortition.verify_votes_match_sample(sample, stake, votes))
+                self.assertFalse(sortition.verify_votes_match_sample(sample, stake, votes + 1))
+
+    def test_threshold_table_reuse(self):
+        stake = 123457
+        samples = [i * 0.00099 for i in range(1000)]
+
+        def calc_and_verify():
+            start_time = time.time()
+            for sample in samples:
+                votes = sortition.vote_calc_normal(sample, stake)
+                assert sortition.verify_votes_match_sample(sample, stake, votes)
+            return time.time() - start_time
+
+        first_run = calc_and_verify()
+        table = sortition.vote_thresholds(stake)
+        table_size = len(table.thresholds)
+        second_run = calc_and_verify()
+        print(f"Sortition for {len(samples)} samples took {first_run: 0.4f} seconds, "
+              f"with the filled threshold table {second_run: 0.4f} seconds.")
+        self.assertIs(sortition.vote_thresholds(stake), table)
+        self.assertEqual(len(table.thresholds), table_size)
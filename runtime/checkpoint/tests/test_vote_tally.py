@@ -0,0 +1,121 @@
+import os
+import random
+import time
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from abcckpt.ckptItems import CkptItemType, ValidatorVote
+from abcckpt.ckpt_creation_state import CkptCreationState
+from abcckpt.stab_abc_consens import VoteRegistry
+
+
+def stake_service(stakes: Dict[bytes, Decimal]):
+    return SimpleNamespace(delegated_stake=lambda pub_key: stakes[pub_key])
+
+
+def recount_leading_item(registry: VoteRegistry) -> Tuple[Optional[str], Decimal, Decimal]:
+    """
+    Sums the stake of all voters of every voted item, as the tally was computed before it was kept incrementally.
+    """
+    leading_item, leading_stake, all_stake = None, Decimal(0), Decimal(0)
+    for voted_item, voters in registry.item_votes.items():
+        stake = sum(map(lambda voter_info: voter_info.stake, voters), Decimal(0))
+        all_stake += stake
+        if stake > leading_stake:
+            leading_item, leading_stake = voted_item, stake
+    return leading_item, leading_stake, all_stake
+
+
+def cast(registry: VoteRegistry, vote: ValidatorVote, stakes: Dict[bytes, Decimal]):
+    vw = registry.get_or_create_vote(vote.item_qualifier())
+    registry.register_to_voter(vw, vote, stake_service(stakes))
+
+
+class TestVoteTally(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(37)
+        self.validators = [os.urandom(32) for _ in range(500)]
+        self.stakes = {v: Decimal(self.rnd.randint(1, 1000)) for v in self.validators}
+        self.total_stake = sum(self.stakes.values(), Decimal(0))
+
+    def round_votes(self, round_nr: int) -> List[ValidatorVote]:
+        """
+        Every validator votes for one of a few candidates or passes. Some validators vote a second time,
+        which moves their stake to the multiple votes bucket.
+        """
+        state = CkptCreationState(b'common', round_nr)
+        candidates = [f"candidate-{round_nr}-{i}" for i in range(5)] + [None]
+        weights = [50, 20, 10, 5, 5, 10]
+        votes = list()
+        first_votes = dict()
+        for validator in self.validators:
+            first_votes[validator] = self.rnd.choices(candidates, weights)[0]
+            votes.append(ValidatorVote(state, first_votes[validator], CkptItemType.PRIORITY, validator))
+        for validator in self.rnd.sample(self.validators, 50):
+            voted_item = self.rnd.choice([c for c in candidates[:-1] if c != first_votes[validator]])
+            votes.append(ValidatorVote(state, voted_item, CkptItemType.PRIORITY, validator))
+        self.rnd.shuffle(votes)
+        for vote in votes:
+            vote.item_qualifier()
+        return votes
+
+    def test_running_totals(self):
+        registry = VoteRegistry()
+        a, b, c = self.validators[:3]
+        state = CkptCreationState(b'common', 1)
+        cast(registry, ValidatorVote(state, "A", CkptItemType.PRIORITY, a), self.stakes)
+        cast(registry, ValidatorVote(state, "B", CkptItemType.PRIORITY, b), self.stakes)
+        cast(registry, ValidatorVote(state, "B", CkptItemType.PRIORITY, c), self.stakes)
+        self.assertEqual(registry.support("B"), self.stakes[b] + self.stakes[c])
+        self.assertEqual(registry.leading_item(), ("B", self.stakes[b] + self.stakes[c]))
+
+        # A second vote of c moves its stake from B to the multiple votes bucket.
+        cast(registry, ValidatorVote(state, "A", CkptItemType.PRIORITY, c), self.stakes)
+        self.assertEqual(registry.support("B"), self.stakes[b])
+        self.assertEqual(registry.support(None), self.stakes[c])
+        self.assertEqual(registry.total_support, self.stakes[a] + self.stakes[b] + self.stakes[c])
+        self.assertEqual(registry.leading_item(), recount_leading_item(registry)[:2])
+
+    def test_benchmark_500_validators(self):
+        rounds = [self.round_votes(round_nr) for round_nr in range(5)]
+        threshold = self.total_stake * 2 / 3
+
+        def run(evaluate) -> Tuple[float, List[Optional[str]]]:
+            majorities = list()
+            start = time.perf_counter()
+            for votes in rounds:
+                registry = VoteRegistry()
+                majority = None
+                for vote in votes:
+                    cast(registry, vote, self.stakes)
+                    voted_item, stake, all_stake = evaluate(registry)
+                    if majority is None and stake > threshold:
+                        majority = voted_item
+                majorities.append(majority)
+            return time.perf_counter() - start, majorities
+
+        def incremental(registry: VoteRegistry):
+            voted_item, stake = registry.leading_item()
+            return voted_item, stake, registry.total_support
+
+        for votes in rounds[:1]:
+            registry = VoteRegistry()
+            for vote in votes:
+                cast(registry, vote, self.stakes)
+                voted_item, stake, all_stake = incremental(registry)
+                self.assertEqual((stake, all_stake), recount_leading_item(registry)[1:])
+                self.assertEqual(registry.support(voted_item), stake)
+
+        recount_time, recount_majorities = run(recount_leading_item)
+        incremental_time, incremental_majorities = run(incremental)
+        self.assertEqual(incremental_majorities, recount_majorities)
+        print(f"Tallying {len(rounds)} rounds of {len(self.validators)} validators: "
+              f"recount {recount_time * 1000:.1f} ms, incremental {incremental_time * 1000:.1f} ms")
+        self.assertLess(incremental_time, recount_time)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,12 @@
+import hashlib
 import logging
-from typing import List, Iterable, Tuple, Callable, Any
+from collections import deque
+from typing import List, Iterable, Tuple, Callable, Any, Collection, Deque, Dict, Hashable, Optional
 
+from abcnet.settings import ItemSetting
 from abcnet.structures import Message, MsgType
 from abcnet.timer import StopTimer
+from abcnet import timer
 from abcnet import transcriber
 
 
@@ -172,6 +176,120 @@ class ItemExtraction(MessageHandler):
         msg.items = items
 
 
+class SeenItemCache:
+    """
+    Time and size bounded set of items that have already been received.
+
+    Entries are kept in a hash map for constant time lookups.
+    A ring of insertion times evicts the oldest entries once they are older than the timeout
+    or the number of entries exceeds the maximum size.
+    Each entry maps to its ring slot, so slots left behind by discarded keys are skipped instead of evicting
+    the key once it is added again.
+    An entry can have an alias, e.g. the key of the item content, which is forgotten together with the entry.
+    Hits and misses are counted for statistics.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, max_size: Optional[int] = None):
+        """
+        Initializes an empty cache.
+
+        :param timeout: Time in seconds after which an entry is evicted. Defaults to ItemSetting.SEEN_ITEMS_TIMEOUT.
+        :type timeout: float
+        :param max_size: Maximum number of entries. Defaults to ItemSetting.SEEN_ITEMS_MAX_SIZE.
+        :type max_size: int
+        """
+        if timeout is None:
+            timeout = ItemSetting.SEEN_ITEMS_TIMEOUT.time_period()
+        if max_size is None:
+            max_size = ItemSetting.SEEN_ITEMS_MAX_SIZE
+        if max_size <= 0:
+            raise ValueError("Max size of the seen items cache must be positive: " + str(max_size))
+        self.timeout: float = timeout
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._seen: Dict[Hashable, Tuple[float, Hashable]] = dict()
+        self._ring: Deque[Tuple[float, Hashable]] = deque()
+        self._aliases: Dict[Hashable, Hashable] = dict()
+
+    def _evict(self, now: float):
+        expiry = now - self.timeout
+        seen = self._seen
+        ring = self._ring
+        # Slots of discarded keys count against twice the maximum size, so the ring stays bounded.
+        while ring and (len(seen) > self.max_size or len(ring) > 2 * self.max_size or ring[0][0] <= expiry):
+            slot = ring.popleft()
+            key = slot[1]
+            if seen.get(key) is slot:
+                del seen[key]
+                self._aliases.pop(key, None)
+
+    def _insert(self, key: Hashable, now: float):
+        slot = (now, key)
+        self._seen[key] = slot
+        self._ring.append(slot)
+
+    def add(self, key: Hashable, alias: Optional[Hashable] = None) -> None:
+        """
+        Marks the given key as seen without touching the hit and miss counters.
+        If an alias is given, it is discarded together with the key.
+        """
+        now = timer.TIME_SUPPLIER()
+        if key not in self._seen:
+            self._insert(key, now)
+        if alias is not None:
+            self._aliases[key] = alias
+        self._evict(now)
+
+    def check_and_add(self, key: Hashable) -> bool:
+        """
+        Returns true if the given key was seen before and counts a hit.
+        Otherwise the key is marked as seen, a miss is counted and false is returned.
+        """
+        now = timer.TIME_SUPPLIER()
+        self._evict(now)
+        if key in self._seen:
+            self.hits += 1
+            return True
+        self.misses += 1
+        self._insert(key, now)
+        if len(self._seen) > self.max_size:
+            self._evict(now)
+        return False
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Forgets the given key and its alias, so the item is accepted again the next time it is received.
+        Their ring slots are skipped when they are evicted.
+        """
+        self._seen.pop(key, None)
+        alias = self._aliases.pop(key, None)
+        if alias is not None:
+            self._seen.pop(alias, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def hit_ratio(self) -> float:
+        """
+        Returns the ratio of lookups that found an already seen item.
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def __str__(self):
+        return f'SeenItemCache(size={len(self)}, hits={self.hits}, misses={self.misses})'
+
+
+def _content_key(item_type: int, item_content: bytes) -> Tuple[int, bytes]:
+    return item_type, hashlib.blake2b(item_content, digest_size=16).digest()
+
+
 class AbstractItemHandler(MessageHandler):
     """
     An abstract super class of all message handlers that are about handling item messages.
@@ -181,9 +299,14 @@ class AbstractItemHandler(MessageHandler):
 
     For a faster runtime implementations can also overwrite the batch version instead.
 
+    If a seen items cache is given, item contents that were already received are dropped before they are decoded.
+    Checklists are replied to by some handlers, e.g. with the items a peer is missing, so only checklists of the
+    given silent checklist types are dropped if the content of the item was already received.
+
     """
 
-    def __init__(self, interesting_item_types: List[int], item_parser: transcriber.ItemsParser):
+    def __init__(self, interesting_item_types: List[int], item_parser: transcriber.ItemsParser,
+                 seen_items: Optional[SeenItemCache] = None, silent_checklist_types: Collection[int] = ()):
         """
         Initializes the item handler with the given list of interested item types and the given item parser.
 
@@ -191,10 +314,16 @@ class AbstractItemHandler(MessageHandler):
         :type interesting_item_types: List[int]
         :param item_parser: Item parser that is used to decode the item contents.
         :type item_parser: transcriber.ItemParser
+        :param seen_items: Optional cache of already received items used to drop duplicates.
+        :type seen_items: SeenItemCache
+        :param silent_checklist_types: Item types whose checklists need no reply, dropped if the item was seen.
+        :type silent_checklist_types: Collection[int]
         """
         super().__init__()
         self.interesting_item_types: List[int] = interesting_item_types
         self.item_parser = item_parser
+        self.seen_items: Optional[SeenItemCache] = seen_items
+        self.silent_checklist_types: Collection[int] = silent_checklist_types
 
     def accept(self, cs: "ChannelService", msg: Message):
         if MsgType.is_items(msg.msg_type) and msg.items is None:
@@ -225,10 +354,39 @@ class AbstractItemHandler(MessageHandler):
             raise ValueError("Unexpected message type: " + str(msg_type))
         return handler
 
+    def _filter_seen_items(self, msg_type: int, items: Iterable[Tuple[int, Any]]) -> Iterable[Tuple[int, Any]]:
+        seen_items = self.seen_items
+        if msg_type == MsgType.items_content:
+            return [item for item in items if not seen_items.check_and_add(_content_key(item[0], item[1]))]
+        elif msg_type == MsgType.items_checklist and self.silent_checklist_types:
+            return [item for item in items if not self._is_seen_qualifier(item)]
+        return items
+
+    def _is_seen_qualifier(self, item: Tuple[int, str]) -> bool:
+        if item[0] not in self.silent_checklist_types:
+            return False
+        if item in self.seen_items:
+            self.seen_items.hits += 1
+            return True
+        self.seen_items.misses += 1
+        return False
+
+    def _mark_seen(self, raw_items: Iterable[Tuple[int, bytes]],
+                   decoded_items: Iterable[Tuple[int, Any]]) -> Iterable[Tuple[int, Any]]:
+        # The content key is an alias of the qualifier, so discarding the qualifier accepts the content again.
+        for (_, raw_content), (item_type, item_content) in zip(raw_items, decoded_items):
+            if item_content is not None and hasattr(item_content, "item_qualifier"):
+                self.seen_items.add((item_type, item_content.item_qualifier()), _content_key(item_type, raw_content))
+            yield item_type, item_content
+
     def _handle_item_msg(self, cs, msg: Message):
         if not self._msg_has_interesting_item(msg):
             return
         interesting_items = self._filter_interesting_items(msg.items)
+        if self.seen_items is not None:
+            interesting_items = self._filter_seen_items(msg.msg_type, interesting_items)
+            if not interesting_items:
+                return
         handler = self._msg_type_handler(msg.msg_type)
         handler(cs, msg, interesting_items)
 
@@ -236,7 +394,11 @@ class AbstractItemHandler(MessageHandler):
                                        msg: Message,
                                        item_batch: Iterable[Tuple[int, bytes]]):
         # Transforms the item to their decoded version by using the item_parser
+        if self.seen_items is not None:
+            item_batch = list(item_batch)
         decoded_items = self.item_parser.decode_item_list_raw(item_batch)
+        if self.seen_items is not None:
+            decoded_items = self._mark_seen(item_batch, decoded_items)
         self.handle_item_batch_contents(cs, msg, decoded_items)
 
     def handle_item_batch_contents(self, cs: "ChannelService",
@@ -0,0 +1,298 @@
+"""
+Compact network event log.
+
+Every sent and received message is recorded as a small fixed-layout record in a bounded ring buffer.
+A background thread appends the records to a binary or JSON lines file.
+Use `abcnet.netevents_analyzer` to summarize the written logs.
+"""
+import hashlib
+import json
+import logging
+import pathlib
+import struct
+import threading
+from collections import deque
+from typing import Deque, Iterator, List, Optional, BinaryIO
+
+from abcnet import timer
+from abcnet.handlers import MessageHandler
+from abcnet.networking import MessageDissemination
+from abcnet.outch import MsgSender
+from abcnet.services import ChannelService, BaseApp
+from abcnet.settings import NetStatSettings
+from abcnet.structures import Message, MsgType, Qualifier, get_qualifier_helper
+from abcnet.transcriber import NET_INT_SIZE, decode_int
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOG_MAGIC = b'ABCEVT01'
+"""
+Header of binary event log files.
+"""
+
+_RECORD_STRUCT = struct.Struct('<dBIII8sB')
+"""
+Layout of a binary record: timestamp, flags, message type, size, item count, digest, length of the peer id.
+The utf-8 encoded peer id follows each record.
+"""
+
+_FLAG_OUT = 0x01
+_FLAG_DIRECT = 0x02
+
+_COUNTED_MSG_TYPES = {MsgType.items_content, MsgType.items_checklist, MsgType.items_request,
+                      MsgType.items_notfound, MsgType.contacts_content, MsgType.contacts_checklist,
+                      MsgType.contacts_request}
+
+
+class MsgRecord:
+    """
+    Compact record of a single sent or received message.
+    """
+
+    __slots__ = ('timestamp', 'out_msg', 'direct_msg', 'peer', 'msg_type', 'size', 'item_count', 'digest')
+
+    def __init__(self, timestamp: float, out_msg: bool, direct_msg: bool, peer: str,
+                 msg_type: int, size: int, item_count: int, digest: bytes):
+        self.timestamp: float = timestamp
+        self.out_msg: bool = out_msg
+        self.direct_msg: bool = direct_msg
+        self.peer: str = peer
+        self.msg_type: int = msg_type
+        self.size: int = size
+        self.item_count: int = item_count
+        self.digest: bytes = digest
+
+    @staticmethod
+    def of_msg(msg: Message, out_msg: bool, direct_msg: bool, peer: str = "") -> "MsgRecord":
+        """
+        Creates the record of the given message without parsing its content.
+        The digest covers the magic number and the body of the message, so that the record of a sent message
+        matches the record of the message on the receiving side.
+        """
+        parts = msg.parts
+        size = sum(len(p) for p in parts)
+        digest = hashlib.blake2b(digest_size=8)
+        for p in parts[:2]:
+            digest.update(p)
+        body = parts[1] if len(parts) > 1 else b''
+        msg_type = 0
+        item_count = 0
+        if len(body) >= NET_INT_SIZE:
+            msg_type = decode_int(body[:NET_INT_SIZE])
+            if msg_type in _COUNTED_MSG_TYPES and len(body) >= 2 * NET_INT_SIZE:
+                item_count = decode_int(body[NET_INT_SIZE:2 * NET_INT_SIZE])
+        return MsgRecord(timer.TIME_SUPPLIER(), out_msg, direct_msg, peer, msg_type, size, item_count,
+                         digest.digest())
+
+    def to_bytes(self) -> bytes:
+        flags = (_FLAG_OUT if self.out_msg else 0) | (_FLAG_DIRECT if self.direct_msg else 0)
+        peer = self.peer.encode('utf-8')[:255]
+        return _RECORD_STRUCT.pack(self.timestamp, flags, self.msg_type, self.size, self.item_count,
+                                   self.digest, len(peer)) + peer
+
+    def to_json(self) -> str:
+        return json.dumps({
+            't': self.timestamp,
+            'dir': "OUT" if self.out_msg else "IN",
+            'direct': self.direct_msg,
+            'peer': self.peer,
+            'type': self.msg_type,
+            'size': self.size,
+            'items': self.item_count,
+            'digest': self.digest.hex()
+        })
+
+    @staticmethod
+    def from_json(line: str) -> "MsgRecord":
+        o = json.loads(line)
+        return MsgRecord(o['t'], o['dir'] == "OUT", o['direct'], o['peer'], o['type'], o['size'], o['items'],
+                         bytes.fromhex(o['digest']))
+
+    def __eq__(self, other):
+        if not isinstance(other, MsgRecord):
+            return False
+        return all(getattr(self, attr) == getattr(other, attr) for attr in MsgRecord.__slots__)
+
+    def __str__(self):
+        return f'MsgRecord({"OUT" if self.out_msg else "IN"}, type={self.msg_type}, size={self.size}, ' \
+               f'items={self.item_count}, peer={self.peer})'
+
+
+class EventRing:
+    """
+    Fixed size ring buffer of message records.
+    Records are pushed by the network thread and popped by the writer thread.
+    If the ring is full, the oldest record is overwritten.
+    """
+
+    def __init__(self, size: int = None):
+        if size is None:
+            size = NetStatSettings.EVENT_RING_SIZE
+        self._records: Deque[MsgRecord] = deque(maxlen=size)
+        self.overwritten: int = 0
+
+    def push(self, record: MsgRecord):
+        if len(self._records) == self._records.maxlen:
+            self.overwritten += 1
+        self._records.append(record)
+
+    def pop_all(self) -> List[MsgRecord]:
+        """
+        Removes and returns all records in the order they were pushed.
+        """
+        records = []
+        try:
+            while True:
+                records.append(self._records.popleft())
+        except IndexError:
+            pass
+        return records
+
+    def __len__(self):
+        return len(self._records)
+
+
+def write_records(fp: BinaryIO, records: List[MsgRecord], log_format: str):
+    """
+    Appends the records to the given file in the given format.
+    Binary files start with the `EVENT_LOG_MAGIC` header.
+    """
+    if log_format == "binary":
+        if fp.tell() == 0:
+            fp.write(EVENT_LOG_MAGIC)
+        fp.write(b''.join(r.to_bytes() for r in records))
+    elif log_format == "jsonl":
+        fp.write(''.join(r.to_json() + '\n' for r in records).encode('utf-8'))
+    else:
+        raise ValueError("Unrecognized event log format: " + str(log_format))
+
+
+def read_event_log(path: pathlib.PurePath) -> Iterator[MsgRecord]:
+    """
+    Reads all records of the given event log file.
+    The format is recognized by the file header.
+    """
+    with open(path, 'rb') as fp:
+        content = fp.read()
+    if content.startswith(EVENT_LOG_MAGIC):
+        pos = len(EVENT_LOG_MAGIC)
+        while pos < len(content):
+            timestamp, flags, msg_type, size, item_count, digest, peer_len = \
+                _RECORD_STRUCT.unpack_from(content, pos)
+            pos += _RECORD_STRUCT.size
+            peer = content[pos:pos + peer_len].decode('utf-8')
+            pos += peer_len
+            yield MsgRecord(timestamp, bool(flags & _FLAG_OUT), bool(flags & _FLAG_DIRECT), peer,
+                            msg_type, size, item_count, digest)
+    else:
+        for line in content.decode('utf-8').splitlines():
+            if line.strip():
+                yield MsgRecord.from_json(line)
+
+
+class EventLogWriter(MessageHandler):
+    """
+    Writes the records of the ring buffer to the event log file on a background thread.
+    The file is flushed every `NetStatSettings.STAT_SERIALIZATION_TIMER` seconds and when the app is closed.
+    """
+
+    def __init__(self, ring: EventRing, file_path: pathlib.PurePath, log_format: str = None):
+        if log_format is None:
+            log_format = NetStatSettings.EVENT_LOG_FORMAT
+        if log_format not in NetStatSettings.EVENT_LOG_FILE_ENDING:
+            raise ValueError("Unrecognized event log format: " + str(log_format))
+        self.ring: EventRing = ring
+        self.file_path: pathlib.PurePath = file_path
+        self.log_format: str = log_format
+        self.written: int = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"EventLogWriter({file_path})", daemon=True)
+        self._thread.start()
+
+    def _write(self, fp: BinaryIO):
+        records = self.ring.pop_all()
+        if records:
+            write_records(fp, records, self.log_format)
+            fp.flush()
+            self.written += len(records)
+
+    def _run(self):
+        interval = NetStatSettings.STAT_SERIALIZATION_TIMER.time_period()
+        with open(self.file_path, 'ab') as fp:
+            while not self._stop.wait(interval):
+                try:
+                    self._write(fp)
+                except Exception:
+                    logger.error("Error writing network events to %s.", self.file_path, exc_info=True)
+            self._write(fp)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self.ring.overwritten:
+            logger.warning("%d network events were overwritten before they could be written.",
+                           self.ring.overwritten)
+
+
+class OutboundEventCollector(MsgSender):
+
+    def __init__(self, ring: EventRing, intercepted_sender: MsgSender, direct_msg: bool, peer: str = ""):
+        self._ring = ring
+        self._intercepted_sender = intercepted_sender
+        self._direct_msg = direct_msg
+        self._peer = peer
+
+    def _send(self, msg: Message, do_log=True):
+        self._ring.push(MsgRecord.of_msg(msg, out_msg=True, direct_msg=self._direct_msg, peer=self._peer))
+        self._intercepted_sender._send(msg, do_log)
+
+
+class EventCollectorMD(MessageDissemination):
+
+    def __init__(self, ring: EventRing, md: MessageDissemination):
+        self._intercepted_md = md
+        self.ring = ring
+
+    def broadcast(self) -> MsgSender:
+        return OutboundEventCollector(self.ring, self._intercepted_md.broadcast(), direct_msg=False)
+
+    def direct(self, peer: Qualifier) -> MsgSender:
+        try:
+            peer_id = get_qualifier_helper(peer)
+        except ValueError:
+            peer_id = ""
+        return OutboundEventCollector(self.ring, self._intercepted_md.direct(peer), direct_msg=True, peer=peer_id)
+
+    def close_connection(self, peer: Qualifier):
+        self._intercepted_md.close_connection(peer)
+
+
+class InboundEventCollector(MessageHandler):
+
+    def __init__(self, ring: EventRing):
+        self._ring = ring
+
+    def accept(self, cs: ChannelService, msg: Message):
+        peer = msg.sender.identifier if msg.sender is not None else ""
+        self._ring.push(MsgRecord.of_msg(msg, out_msg=False, direct_msg=msg.is_direct, peer=peer))
+
+
+def enable_event_log(ba: BaseApp, stat_dir: pathlib.PurePath = None, log_format: str = None) -> EventRing:
+    """
+    Records all messages of the given app into a compact event log.
+    Register it after the authentication handler, to have the sender of inbound messages recorded.
+    """
+    from abcnet.netstats import default_stat_dir
+    if stat_dir is None:
+        stat_dir = default_stat_dir(ba)
+    if log_format is None:
+        log_format = NetStatSettings.EVENT_LOG_FORMAT
+    pathlib.Path(stat_dir).mkdir(parents=True, exist_ok=True)
+    file_path = pathlib.PurePath(stat_dir) / ("messages" + NetStatSettings.EVENT_LOG_FILE_ENDING[log_format])
+    ring = EventRing()
+    cs: ChannelService = ba.cs
+    cs._ChannelService__md = EventCollectorMD(ring, cs._ChannelService__md)
+    ba.register_app_layer("InboundEventCollector", InboundEventCollector(ring))
+    ba.register_app_layer("EventLogWriter", EventLogWriter(ring, file_path, log_format))
+    logger.info("Enabled network event log for peer %s. Event log: %s", ba.cs.contact, file_path)
+    return ring
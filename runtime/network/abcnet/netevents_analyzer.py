@@ -0,0 +1,142 @@
+"""
+Offline analyzer of compact network event logs written by `abcnet.netevents`.
+
+Usage::
+
+    python -m abcnet.netevents_analyzer netstats/*/*/messages.events.bin
+
+Prints per message type throughput, size and item count summaries for each direction.
+If logs of several peers are given, messages are matched by their digest and the delivery latency
+from sender to receiver is summarized as well.
+"""
+import json
+import pathlib
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from abcnet.netevents import MsgRecord, read_event_log
+from abcnet.structures import MsgType
+
+
+def _msg_type_name(msg_type: int) -> str:
+    try:
+        return MsgType(msg_type).name
+    except ValueError:
+        return hex(msg_type)
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        'min': values[0] if values else 0,
+        'avg': sum(values) / len(values) if values else 0,
+        'p50': _percentile(values, 0.5),
+        'p95': _percentile(values, 0.95),
+        'max': values[-1] if values else 0,
+    }
+
+
+def summarize(records: Iterable[MsgRecord]) -> Dict[str, Dict[str, Dict]]:
+    """
+    Summarizes the records per direction and message type.
+    Throughput is measured over the time span of all given records.
+    """
+    grouped: Dict[str, Dict[str, List[MsgRecord]]] = dict()
+    first, last = None, None
+    for r in records:
+        first = r.timestamp if first is None else min(first, r.timestamp)
+        last = r.timestamp if last is None else max(last, r.timestamp)
+        direction = "OUT" if r.out_msg else "IN"
+        grouped.setdefault(direction, dict()).setdefault(_msg_type_name(r.msg_type), list()).append(r)
+    span = (last - first) if first is not None and last > first else 1.0
+    summary: Dict[str, Dict[str, Dict]] = dict()
+    for direction, by_type in grouped.items():
+        summary[direction] = dict()
+        for type_name, type_records in sorted(by_type.items()):
+            sizes = [r.size for r in type_records]
+            total_bytes = sum(sizes)
+            summary[direction][type_name] = {
+                'count': len(type_records),
+                'bytes': total_bytes,
+                'items': sum(r.item_count for r in type_records),
+                'msgs_per_sec': len(type_records) / span,
+                'bytes_per_sec': total_bytes / span,
+                'size': _distribution(sizes),
+            }
+    return summary
+
+
+def delivery_latencies(logs: Iterable[Iterable[MsgRecord]]) -> Dict[str, Dict[str, float]]:
+    """
+    Matches sent messages with received messages by their digest across the given logs
+    and summarizes the delivery latency per message type.
+    The logs have to be recorded with comparable clocks, such as peers on the same machine or in a simulation.
+    """
+    sent: Dict[bytes, float] = dict()
+    received: List[MsgRecord] = list()
+    for log in logs:
+        for r in log:
+            if r.out_msg:
+                if r.digest not in sent or sent[r.digest] > r.timestamp:
+                    sent[r.digest] = r.timestamp
+            else:
+                received.append(r)
+    latencies: Dict[str, List[float]] = dict()
+    for r in received:
+        send_time = sent.get(r.digest)
+        if send_time is not None and r.timestamp >= send_time:
+            latencies.setdefault(_msg_type_name(r.msg_type), list()).append(r.timestamp - send_time)
+    return {type_name: dict(count=len(values), **_distribution(values))
+            for type_name, values in sorted(latencies.items())}
+
+
+def analyze(paths: List[pathlib.PurePath]) -> Dict:
+    logs = [list(read_event_log(p)) for p in paths]
+    report = {'throughput': summarize(r for log in logs for r in log)}
+    if len(logs) > 1:
+        report['latency'] = delivery_latencies(logs)
+    return report
+
+
+def format_report(report: Dict) -> str:
+    lines = []
+    for direction, by_type in report['throughput'].items():
+        lines.append(f"{direction}:")
+        lines.append(f"  {'type':<20} {'count':>8} {'items':>8} {'msgs/s':>10} {'bytes/s':>12} "
+                     f"{'avg size':>10} {'p95 size':>10} {'max size':>10}")
+        for type_name, s in by_type.items():
+            lines.append(f"  {type_name:<20} {s['count']:>8} {s['items']:>8} {s['msgs_per_sec']:>10.2f} "
+                         f"{s['bytes_per_sec']:>12.1f} {s['size']['avg']:>10.1f} {s['size']['p95']:>10} "
+                         f"{s['size']['max']:>10}")
+    if 'latency' in report:
+        lines.append("LATENCY (sec):")
+        lines.append(f"  {'type':<20} {'count':>8} {'avg':>10} {'p50':>10} {'p95':>10} {'max':>10}")
+        for type_name, s in report['latency'].items():
+            lines.append(f"  {type_name:<20} {s['count']:>8} {s['avg']:>10.4f} {s['p50']:>10.4f} "
+                         f"{s['p95']:>10.4f} {s['max']:>10.4f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Summarizes abc network event logs.')
+    parser.add_argument("logs", nargs="+", help="Event log files, one per peer.", type=pathlib.PurePath)
+    parser.add_argument("-j", "--json", help="Prints the report as json.", dest="json", action="store_true",
+                        default=False)
+    args = parser.parse_args(argv)
+    report = analyze(args.logs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -239,14 +239,21 @@ class MsgSerializer(StatsSerializer):
         return o
 
 
+def default_stat_dir(ba: BaseApp) -> pathlib.PurePath:
+    """
+    Returns the directory that the stats of the given app are written to by default.
+    """
+    dirname = NetStatSettings.STAT_SERIALIZATION_DIR
+    if NetStatSettings.STAT_SERIALIZATION_DATE_TIME_SUB_DIR:
+        date_time = datetime.today().strftime('%Y-%m-%d--%H,%M,%S')
+        return pathlib.PurePath(".") / dirname / date_time / ba.cs.contact.identifier
+    else:
+        return pathlib.PurePath(".") / dirname / ba.cs.contact.identifier
+
+
 def enable_statistics(ba: BaseApp, stat_dir: pathlib.PurePath = None) -> NetworkMessagesStats:
     if stat_dir is None:
-        dirname = NetStatSettings.STAT_SERIALIZATION_DIR
-        if NetStatSettings.STAT_SERIALIZATION_DATE_TIME_SUB_DIR:
-            date_time = datetime.today().strftime('%Y-%m-%d--%H,%M,%S')
-            stat_dir = pathlib.PurePath(".") / dirname / date_time / ba.cs.contact.identifier
-        else:
-            stat_dir = pathlib.PurePath(".") / dirname / ba.cs.contact.identifier
+        stat_dir = default_stat_dir(ba)
     try:
         pathlib.Path(stat_dir).mkdir(parents=True)
     except FileExistsError:
@@ -1,5 +1,6 @@
+from collections import deque
 from enum import Enum, auto
-from typing import List, Dict, Optional, Callable, Tuple
+from typing import List, Dict, Optional, Callable, Tuple, Deque
 
 import zmq
 import logging
@@ -7,6 +8,7 @@ import logging
 from abcnet import settings, transcriber
 from abcnet.handlers import MessageHandler
 from abcnet.outch import OutputChannel, MultiSendSocketsSender, DropMessageSender, MsgSender, SingleSocketSender
+from abcnet.transcriber import msg_network_bytes
 from abcnet.settings import MsgPoller, PeerSetting
 from abcnet.structures import Qualifier, PeerContactInfo, get_qualifier_helper, SocketBinding, Contact, get_caller, \
     PeerContactQualifier, Message, MsgType
@@ -361,6 +363,90 @@ def _check_is_closed(f):
     return function_that_first_checks_closed
 
 
+class PeerOutboundQueue(SingleSocketSender):
+    """
+    Bounded queue of messages for a single peer.
+    Messages are handed to the socket without blocking.
+    If the socket stops accepting messages, because the peer is slow or dead and the high water mark was reached,
+    the messages are queued and sent once the socket accepts messages again.
+    If the queue is full, messages are dropped by the priority of their message type.
+    """
+
+    def __init__(self, socket: zmq.Socket, max_size: int = None):
+        super().__init__(socket)
+        if max_size is None:
+            max_size = PeerSetting.OUTBOUND_QUEUE_SIZE
+        self.max_size: int = max_size
+        self._queue: Deque[Tuple[int, bytes]] = deque()
+        self.dropped: Dict[int, int] = dict()
+        """Number of dropped messages by message type."""
+
+    @staticmethod
+    def _priority(msg_type: int) -> int:
+        return PeerSetting.OUTBOUND_DROP_PRIORITY.get(msg_type, len(PeerSetting.OUTBOUND_DROP_PRIORITY))
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        # An empty queue is still a usable sender.
+        return True
+
+    @property
+    def fill_ratio(self) -> float:
+        return len(self._queue) / self.max_size
+
+    def _try_send(self, msg_bytes: bytes) -> bool:
+        try:
+            self.socket.send(msg_bytes, zmq.NOBLOCK)
+            return True
+        except zmq.Again:
+            return False
+
+    def _drop(self, msg_type: int):
+        self.dropped[msg_type] = self.dropped.get(msg_type, 0) + 1
+
+    def _enqueue(self, msg_type: int, msg_bytes: bytes):
+        if len(self._queue) < self.max_size:
+            self._queue.append((msg_type, msg_bytes))
+            return
+        # Find the oldest message with the lowest priority:
+        victim_index, victim_priority = None, None
+        for index, (queued_type, _) in enumerate(self._queue):
+            priority = self._priority(queued_type)
+            if victim_priority is None or priority < victim_priority:
+                victim_index, victim_priority = index, priority
+        if victim_priority > self._priority(msg_type):
+            self._drop(msg_type)
+            return
+        self._drop(self._queue[victim_index][0])
+        del self._queue[victim_index]
+        self._queue.append((msg_type, msg_bytes))
+
+    def drain(self) -> int:
+        """
+        Sends queued messages until the socket stops accepting messages.
+        Returns the number of messages that were sent.
+        """
+        sent = 0
+        while self._queue:
+            if not self._try_send(self._queue[0][1]):
+                break
+            self._queue.popleft()
+            sent += 1
+        return sent
+
+    def _send(self, msg: Message, do_log=True):
+        msg_bytes = msg_network_bytes(msg)
+        if do_log:
+            logger.debug("Sending message to a peer: %s", msg_bytes)
+        if self._queue:
+            self.drain()
+        if not self._queue and self._try_send(msg_bytes):
+            return
+        self._enqueue(transcriber.parse_message_type(msg), msg_bytes)
+
+
 class SocketHandler:
     """
     This class handles sockets and the integration of the network library.
@@ -376,6 +462,7 @@ class SocketHandler:
         self._all_receiving_sockets: List[zmq.Socket] = []
         self._msg_poller: Optional[MsgPoller] = None
         self._all_sending_sockets: Dict[str, zmq.Socket] = dict()
+        self._outbound_queues: Dict[str, PeerOutboundQueue] = dict()
         # Bind the sockets
         # Publish socket
         if socket_binding.bind_publish_addr is None:
@@ -383,6 +470,7 @@ class SocketHandler:
             logger.warning("Not binding any publish address.")
         else:
             self._publish_socket = context.socket(zmq.PUB)
+            self._configure_socket(self._publish_socket)
             self._publish_socket.bind(socket_binding.bind_publish_addr)
             logger.debug('Bound socket %s for publishing.', socket_binding.bind_publish_addr)
         # Direct and receiving socket
@@ -392,15 +480,25 @@ class SocketHandler:
             self._direct_receive_socket = None
         else:
             self._direct_receive_socket = context.socket(zmq.DEALER)
+            self._configure_socket(self._direct_receive_socket)
             self._direct_receive_socket.bind(socket_binding.bind_direct_addr)
             self._all_receiving_sockets.append(self._direct_receive_socket)
             logger.debug("Bound socket %s for listening to direct messaged.", socket_binding.bind_direct_addr)
         # Subscribe socket
         self._subscribe_socket: zmq.Socket = context.socket(zmq.SUB)
+        self._configure_socket(self._subscribe_socket)
         self._subscribe_socket.subscribe(b'')
         self._all_receiving_sockets.append(self._subscribe_socket)
         logger.debug("Created subscribe socket.")
 
+    @staticmethod
+    def _configure_socket(socket: zmq.Socket):
+        """Applies the high water marks and linger period of the peer settings to the socket."""
+        socket.setsockopt(zmq.SNDHWM, PeerSetting.SOCKET_SNDHWM)
+        socket.setsockopt(zmq.RCVHWM, PeerSetting.SOCKET_RCVHWM)
+        if PeerSetting.SOCKET_LINGER is not None:
+            socket.setsockopt(zmq.LINGER, int(PeerSetting.SOCKET_LINGER.time_period() * 1000))
+
     @_check_is_closed
     def receive_sockets(self) -> List[zmq.Socket]:
         """
@@ -440,14 +538,46 @@ class SocketHandler:
         if address in self._all_sending_sockets:
             return self._all_sending_sockets[address]
         direct_socket = settings.NetworkBackend.context().socket(zmq.DEALER)
+        self._configure_socket(direct_socket)
         direct_socket.connect(address)
         self._all_sending_sockets[address] = direct_socket
         logger.info("Created direct sending socket to %s", address)
         return direct_socket
 
+    @_check_is_closed
+    def direct_sender(self, address: str) -> PeerOutboundQueue:
+        """Returns the bounded outbound queue for direct messages to the given peer."""
+        if address in self._outbound_queues:
+            return self._outbound_queues[address]
+        queue = PeerOutboundQueue(self.direct_sending_socket(address))
+        self._outbound_queues[address] = queue
+        return queue
+
+    @_check_is_closed
+    def drain_outbound_queues(self):
+        """Sends queued direct messages to peers whose sockets accept messages again."""
+        for queue in self._outbound_queues.values():
+            queue.drain()
+
+    @_check_is_closed
+    def is_congested(self) -> bool:
+        """
+        Returns true if too many peers do not keep up with the outbound messages.
+        A peer is congested if its outbound queue is filled above `PeerSetting.BACKPRESSURE_QUEUE_FILL`.
+        """
+        if not self._outbound_queues:
+            return False
+        congested = sum(1 for queue in self._outbound_queues.values()
+                        if queue.fill_ratio >= PeerSetting.BACKPRESSURE_QUEUE_FILL)
+        return congested > 0 and congested >= PeerSetting.BACKPRESSURE_PEER_RATIO * len(self._outbound_queues)
+
     @_check_is_closed
     def close_direct_sending_socket(self, address: str):
         """Closes a direct socket to the given peer. """
+        if address in self._outbound_queues:
+            queue = self._outbound_queues.pop(address)
+            if len(queue):
+                logger.info("Dropping %d queued messages to %s", len(queue), address)
         if address in self._all_sending_sockets:
             self._all_sending_sockets[address].close()
             del self._all_sending_sockets[address]
@@ -471,6 +601,7 @@ class SocketHandler:
         for socket in self._all_sending_sockets.values():
             socket.close()
         self._all_sending_sockets.clear()
+        self._outbound_queues.clear()
         self._all_receiving_sockets.clear()
 
 
@@ -541,8 +672,7 @@ class SimpleMD1(MessageDissemination):
         if not peer.is_reachable:
             logger.debug("Cannot create direct connection to %s, as it is not reachable.", peer)
             return DropMessageSender()
-        socket = self.socket_handler.direct_sending_socket(peer.receive_addr)
-        return SingleSocketSender(socket)
+        return self.socket_handler.direct_sender(peer.receive_addr)
 
 
 class NetMaintainer(MessageHandler):
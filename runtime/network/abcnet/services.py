@@ -1,13 +1,16 @@
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 import logging
 import traceback
 
 from abcnet import settings
+from abcnet import transcriber
 from abcnet.auth import MessageAuthenticator, NoMessageAuthenticator
 from abcnet.handlers import MessageDelegator, MessageHandler
 from abcnet.networking import SocketHandler, SimpleMD1, MessageDissemination, ContactBook, NetMaintainer
 from abcnet.outch import OutputChannel
-from abcnet.structures import Message, PeerContactQualifier, PeerContactInfo, MsgType, SocketBinding, Contact
+from abcnet.structures import Message, PeerContactQualifier, PeerContactInfo, MsgType, SocketBinding, Contact, \
+    ItemQualifier, ItemEncodeable
 from abcnet.settings import RuntimeSetting
 from abcnet.timer import SimpleTimer
 
@@ -54,6 +57,96 @@ class ChannelLogger:
         self.inner_logger.critical(self._pre_id(msg), *args, **kwargs)
 
 
+class OutboundCoalescer:
+    """
+    Collects outbound item messages during a step and merges them before they are sent.
+
+    Items and checklists that are bound for the same destination are merged into as few messages as possible.
+    Each merged message holds at most `transcriber.NET_PARTS_MAX` items and is signed once.
+    Queued items are sent when `flush` is called.
+    """
+
+    def __init__(self, max_items: int = transcriber.NET_PARTS_MAX):
+        self.max_items: int = max_items
+        self._pending: Dict[Tuple[Hashable, MsgType], Tuple[OutputChannel, Dict[Any, Any]]] = dict()
+        self.send_calls: int = 0
+        """Number of items and checklist calls that were queued. Without coalescing each is a signed message."""
+        self.msgs_sent: int = 0
+        """Number of merged messages that were signed and sent."""
+        self.items_sent: int = 0
+        """Number of items that were sent in merged messages."""
+
+    @staticmethod
+    def _item_key(item: Any) -> Any:
+        if isinstance(item, ItemQualifier):
+            return item.item_type(), item.item_qualifier()
+        return id(item)
+
+    def queue(self, destination: Hashable, msg_type: MsgType, channel: OutputChannel, items: List[Any]):
+        """
+        Queues the given items to be sent to the destination with the given message type.
+        Items that are already queued for the same destination and message type are not sent twice.
+
+        :param destination: Key identifying the receiver(s) of the items.
+        :param msg_type: Either items_content or items_checklist.
+        :param channel: Output channel that is used to send the merged messages.
+        :param items: Items to be sent.
+        """
+        self.send_calls += 1
+        key = (destination, msg_type)
+        if key not in self._pending:
+            self._pending[key] = (channel, dict())
+        pending_items = self._pending[key][1]
+        for item in items:
+            pending_items.setdefault(self._item_key(item), item)
+
+    def has_pending(self) -> bool:
+        return len(self._pending) > 0
+
+    def flush(self):
+        """
+        Sends all queued items. Each destination and message type results in one message per `max_items` items.
+        """
+        pending = self._pending
+        self._pending = dict()
+        for (destination, msg_type), (channel, items) in pending.items():
+            item_list = list(items.values())
+            for start in range(0, len(item_list), self.max_items):
+                chunk = item_list[start:start + self.max_items]
+                try:
+                    if msg_type == MsgType.items_content:
+                        OutputChannel.items(channel, chunk)
+                    else:
+                        OutputChannel.checklist(channel, chunk)
+                except Exception:
+                    logger.error("Error sending coalesced %s message to %s.", msg_type, destination, exc_info=True)
+                    continue
+                self.msgs_sent += 1
+                self.items_sent += len(chunk)
+
+    def __str__(self):
+        return f'OutboundCoalescer(calls={self.send_calls}, msgs={self.msgs_sent}, items={self.items_sent})'
+
+
+class CoalescingOutputChannel(OutputChannel):
+    """
+    Output channel that hands items and checklists to an OutboundCoalescer instead of sending them immediately.
+    All other messages are sent right away.
+    """
+
+    def __init__(self, coalescer: OutboundCoalescer, destination: Hashable,
+                 authenticator: MessageAuthenticator = None, sender=None):
+        super().__init__(authenticator, sender)
+        self.coalescer: OutboundCoalescer = coalescer
+        self.destination: Hashable = destination
+
+    def checklist(self, listings: List[ItemQualifier], tc=None):
+        self.coalescer.queue(self.destination, MsgType.items_checklist, self, listings)
+
+    def items(self, item_list: List[ItemEncodeable], tc=None):
+        self.coalescer.queue(self.destination, MsgType.items_content, self, item_list)
+
+
 class ChannelService:
     """
     A ChannelService manages the sockets necessary to send, broadcast and receive messages to and from peers.
@@ -88,6 +181,12 @@ class ChannelService:
         self.__md: MessageDissemination = md
         self.__ma: MessageAuthenticator = ma
         self.__nm: NetMaintainer = nm
+        self.__coalescer: Optional[OutboundCoalescer] = None
+        self.coalescer_stats: OutboundCoalescer = OutboundCoalescer()
+        """
+        Accumulates the statistics of all coalesced steps. 
+        Compare send_calls with msgs_sent to see how many signed messages were saved.
+        """
 
         self.magic_number: int = magic_number
 
@@ -171,6 +270,28 @@ class ChannelService:
         msg: Optional[Message] = poller(timeout)
         return msg
 
+    @contextmanager
+    def coalesce_outbound(self):
+        """
+        Within this context, items and checklists sent over channels of this service are merged per destination
+        and sent once the context is left.
+        Nested contexts are flushed by the outermost one.
+        """
+        if self.__coalescer is not None or not RuntimeSetting.COALESCE_OUTBOUND_ITEMS:
+            yield
+            return
+        coalescer = OutboundCoalescer()
+        self.__coalescer = coalescer
+        try:
+            yield
+        finally:
+            self.__coalescer = None
+            coalescer.flush()
+            stats = self.coalescer_stats
+            stats.send_calls += coalescer.send_calls
+            stats.msgs_sent += coalescer.msgs_sent
+            stats.items_sent += coalescer.items_sent
+
     def broadcast_channel(self) -> OutputChannel:
         """
         Creates and returns an OutputChannel, that passes messages as broadcast to the entire network.
@@ -178,6 +299,8 @@ class ChannelService:
         :return: Broadcast OutputChannel
         :rtype: OutputChannel
         """
+        if self.__coalescer is not None:
+            return CoalescingOutputChannel(self.__coalescer, None, self.__ma, self.__md.broadcast())
         return OutputChannel(self.__ma, self.__md.broadcast())
 
     def direct_channel(self, peer: PeerContactInfo) -> OutputChannel:
@@ -193,8 +316,23 @@ class ChannelService:
         if peer in self.__cb:
             self.__cb.get_peer(peer).log_outgoing_contact()
         msg_sender = self.__md.direct(peer)
+        if self.__coalescer is not None:
+            return CoalescingOutputChannel(self.__coalescer, peer.identifier, self.__ma, msg_sender)
         return OutputChannel(self.__ma, msg_sender)
 
+    def backpressure(self) -> bool:
+        """
+        Returns true if peers do not keep up with the outbound messages of this service.
+        Applications should hold back new work, such as creating transactions, while this returns true.
+        """
+        return self.__sh.is_congested()
+
+    def drain_outbound(self):
+        """
+        Sends queued direct messages to peers that accept messages again.
+        """
+        self.__sh.drain_outbound_queues()
+
     def shutdown(self):
         """
         Closes the sockets used by this ChannelService.
@@ -266,7 +404,14 @@ class BaseApp:
     def maintain(self, force_maintenance=False):
         """
         Performs a maintenance of all registered applications.
+        Items and checklists sent by the applications are coalesced and sent after all applications are maintained.
+        Messages queued for slow peers are sent first.
         """
+        self.cs.drain_outbound()
+        with self.cs.coalesce_outbound():
+            self._maintain_apps(force_maintenance)
+
+    def _maintain_apps(self, force_maintenance):
         for app_name in self._handlers:
             app = self._handlers[app_name]
             timer = RuntimeSetting.APP_LAYER_MAINTENANCE_TIMEOUT_WARN_LOG.stop_timer(start=True)
@@ -93,6 +93,58 @@ class PeerSetting:
     Number of seconds that we wait until we declare a silent peer connection as stale.
     """
 
+    SOCKET_SNDHWM: int = 1000
+    """
+    High water mark of outbound messages that zmq queues per socket.
+    Publish sockets drop messages beyond it, direct sockets stop accepting messages and the peer outbound queue
+    takes over.
+    """
+
+    SOCKET_RCVHWM: int = 1000
+    """
+    High water mark of inbound messages that zmq queues per socket before it stops reading from the peer.
+    """
+
+    SOCKET_LINGER: Optional[Units.ConstantTimeout] = None
+    """
+    Time in seconds that pending outbound messages are kept after a socket is closed.
+    If None, the zmq default applies: pending messages are kept until they are delivered,
+    which may block closing the context while a peer is unreachable.
+    """
+
+    OUTBOUND_QUEUE_SIZE: int = 1000
+    """
+    Maximum number of messages queued for a single peer whose socket stopped accepting messages.
+    If the queue is full, messages are dropped by the priority given in `OUTBOUND_DROP_PRIORITY`.
+    """
+
+    OUTBOUND_DROP_PRIORITY: Dict[int, int] = {
+        0xabc002: 0,  # items_checklist
+        0xabc006: 0,  # contacts_checklist
+        0xabc008: 1,  # ping
+        0xabc009: 1,  # pong
+        0xabc004: 2,  # items_notfound
+        0xabc007: 3,  # contacts_request
+        0xabc005: 3,  # contacts_content
+        0xabc003: 4,  # items_request
+        0xabc001: 5,  # items_content
+    }
+    """
+    Priority of message types in full outbound queues. Messages with the lowest priority are dropped first.
+    Checklists are shed first, item contents such as checkpoint votes are kept the longest.
+    Unlisted message types have the highest priority.
+    """
+
+    BACKPRESSURE_QUEUE_FILL: float = 0.5
+    """
+    Fill ratio of a peer outbound queue above which the peer is considered congested.
+    """
+
+    BACKPRESSURE_PEER_RATIO: float = 0.5
+    """
+    Ratio of congested peers above which the channel service signals backpressure to the applications.
+    """
+
 
 class RuntimeSetting:
 
@@ -107,6 +159,28 @@ class RuntimeSetting:
     If the time of application layer maintenance exceed this timeout, it will be logged as warning.
     """
 
+    COALESCE_OUTBOUND_ITEMS: bool = True
+    """
+    If true, items and checklists sent during application layer maintenance are merged per destination
+    and sent at the end of the maintenance.
+    """
+
+
+class ItemSetting:
+
+    SEEN_ITEMS_TIMEOUT: Units.ConstantTimeout = Units.ConstantTimeout(20)
+    """
+    Number of seconds an item stays in the seen items cache of an item handler.
+    Items that are received again within this time are dropped before they are decoded.
+    Should cover the rebroadcast period of items.
+    """
+
+    SEEN_ITEMS_MAX_SIZE: int = 100000
+    """
+    Maximum number of entries kept in the seen items cache.
+    The oldest entries are evicted first when the cache is full.
+    """
+
 
 class PingSetting:
 
@@ -159,6 +233,22 @@ class NetStatSettings:
     Use to avoid collision when running multiple times.
     """
 
+    EVENT_RING_SIZE: int = 65536
+    """
+    Number of compact message events kept in the ring buffer of the event log.
+    If the writer falls behind, the oldest events are overwritten.
+    """
+
+    EVENT_LOG_FORMAT: str = "binary"
+    """
+    Format of the event log file. Either "binary" or "jsonl".
+    """
+
+    EVENT_LOG_FILE_ENDING: Dict[str, str] = {"binary": ".events.bin", "jsonl": ".events.jsonl"}
+    """
+    The file ending of the event log file by format.
+    """
+
     __MSG_PACKER_MAPPING: Dict[int, Callable[["Message"], Union[Dict, List, int, str]]] = None
 
     @staticmethod
@@ -1,9 +1,12 @@
-from typing import Dict, List, Optional, Iterable, Callable
+from typing import Dict, List, Optional, Iterable, Callable, Tuple
+import heapq
 import logging
+import random
 import zmq
 import time
 
 from abcnet.services import BaseApp
+from abcnet import timer
 from abcnet import transcriber
 from abcnet.timer import SimpleTimer, StopTimer
 
@@ -23,6 +26,9 @@ class MockedNetworkContext:
         self.listeners = dict()
         self.subscriptions = dict()
 
+    def destroy(self):
+        pass
+
     def socket(self, socket_type):
         new_socket: MockedSocket
         if socket_type == zmq.PUB:
@@ -61,6 +67,11 @@ class MockedNetworkContext:
         if target in self.listeners:
             self.listeners[target].enqueue(msg_bytes)
 
+    def queue_length(self, target: str) -> int:
+        if target in self.listeners:
+            return len(self.listeners[target].msg_queue)
+        return 0
+
 
 class MockedSocket:
     """
@@ -73,6 +84,10 @@ class MockedSocket:
     def __init__(self, context: "MockedNetworkContext"):
         self.context = context
         self.msg_queue = list()
+        self.options: Dict[int, int] = dict()
+
+    def setsockopt(self, option: int, value: int):
+        self.options[option] = value
 
     def bind(self, address: str):
         raise RuntimeError("This socket is not capable of binding.")
@@ -140,7 +155,7 @@ class PublishSocket(MockedSocket):
             raise ValueError("Already bound.")
         self.bound = address
 
-    def send(self, msg_bytes: bytes):
+    def send(self, msg_bytes: bytes, flags: int = 0):
         if not self.bound:
             raise ValueError("Socket wasn't bound yet.")
         self.context.broadcast_from(self.bound, msg_bytes)
@@ -173,21 +188,166 @@ class DealerSocket(MockedSocket):
             raise ValueError("Already connected.")
         self.connection = address
 
-    def send(self, msg_bytes: bytes):
+    def send(self, msg_bytes: bytes, flags: int = 0):
         if not self.connection:
             raise ValueError("Socket wasn't connected yet.")
+        hwm = self.options.get(zmq.SNDHWM, 0) + self.options.get(zmq.RCVHWM, 0)
+        if hwm and self.context.queue_length(self.connection) >= hwm:
+            # The peer stopped reading, like zmq the socket refuses more messages.
+            raise zmq.Again()
         self.context.send_to(self.connection, msg_bytes)
 
     def send_multipart(self, parts: List[bytes]):
         raise ValueError("Multipart sending is not ")
 
 
-def configure_mocked_network_env():
+class VirtualClock:
+    """
+    Clock of simulated time.
+    Once installed, all timers of the abcnet module read the time of this clock instead of the wall clock.
+    Modules that use ``time.time`` directly are not affected.
+    """
+
+    def __init__(self, start_time: float = 0.0):
+        self.now: float = start_time
+        self._replaced: List[Tuple[object, Callable[[], float]]] = list()
+
+    def time(self) -> float:
+        return self.now
+
+    def advance_to(self, new_time: float):
+        if new_time < self.now:
+            raise ValueError(f"Cannot turn back the clock from {self.now} to {new_time}.")
+        self.now = new_time
+
+    def install(self, *time_modules):
+        """
+        Replaces the ``TIME_SUPPLIER`` of abcnet.timer and of the given modules with this clock.
+        """
+        for module in (timer,) + time_modules:
+            self._replaced.append((module, module.TIME_SUPPLIER))
+            module.TIME_SUPPLIER = self.time
+
+    def uninstall(self):
+        """
+        Restores the replaced time suppliers.
+        """
+        for module, supplier in reversed(self._replaced):
+            module.TIME_SUPPLIER = supplier
+        self._replaced.clear()
+
+
+class LinkProperties:
+    """
+    Properties of the link between two peers.
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None, loss: float = 0.0):
+        """
+        :param latency: One way delay of a message in seconds.
+        :param bandwidth: Bytes per second that can be transmitted over the link. None for unlimited bandwidth.
+        :param loss: Probability in [0, 1] that a message is lost.
+        """
+        if latency < 0 or not 0 <= loss <= 1 or (bandwidth is not None and bandwidth <= 0):
+            raise ValueError(f"Illegal link properties: latency={latency}, bandwidth={bandwidth}, loss={loss}")
+        self.latency: float = latency
+        self.bandwidth: Optional[float] = bandwidth
+        self.loss: float = loss
+
+
+class VirtualNetworkContext(MockedNetworkContext):
+    """
+    Mocked network whose messages are delivered in simulated time.
+    Sent messages are put into a priority queue ordered by their delivery time,
+    which depends on the latency, bandwidth and loss of the link between sender and receiver.
+    The sender is the peer that is currently stepped by the simulation.
+    """
+
+    def __init__(self, clock: VirtualClock, default_link: LinkProperties = None, seed=None):
+        super().__init__()
+        self.clock: VirtualClock = clock
+        self.default_link: LinkProperties = default_link if default_link is not None else LinkProperties()
+        self.links: Dict[Tuple[Optional[str], Optional[str]], LinkProperties] = dict()
+        self.sender: Optional[str] = None
+        self.socket_owner: Dict[int, str] = dict()
+        self.deliveries: List[Tuple[float, int, MockedSocket, bytes]] = list()
+        self._link_busy_until: Dict[Tuple[Optional[str], Optional[str]], float] = dict()
+        self._in_flight: Dict[int, int] = dict()
+        self._seq: int = 0
+        self._random = random.Random(seed)
+        self.sent_msgs: int = 0
+        self.sent_bytes: int = 0
+        self.lost_msgs: int = 0
+
+    def set_link(self, source_peer: str, target_peer: str, link: LinkProperties):
+        """
+        Sets the properties of the link from source peer to target peer.
+        """
+        self.links[(source_peer, target_peer)] = link
+
+    def register_socket(self, socket: MockedSocket, owner: str):
+        """
+        Registers the peer that receives messages from the given socket.
+        """
+        self.socket_owner[id(socket)] = owner
+
+    def _schedule(self, target: MockedSocket, msg_bytes: bytes):
+        receiver = self.socket_owner.get(id(target))
+        key = (self.sender, receiver)
+        link = self.links.get(key, self.default_link)
+        self.sent_msgs += 1
+        self.sent_bytes += len(msg_bytes)
+        if link.loss and self._random.random() < link.loss:
+            self.lost_msgs += 1
+            return
+        send_time = self.clock.now
+        if link.bandwidth is not None:
+            # Messages on the same link are transmitted one after another.
+            send_time = max(send_time, self._link_busy_until.get(key, send_time)) + len(msg_bytes) / link.bandwidth
+            self._link_busy_until[key] = send_time
+        self._seq += 1
+        heapq.heappush(self.deliveries, (send_time + link.latency, self._seq, target, msg_bytes))
+        self._in_flight[id(target)] = self._in_flight.get(id(target), 0) + 1
+
+    def broadcast_from(self, source: str, msg_bytes: bytes):
+        if source in self.subscriptions:
+            for target in self.subscriptions[source]:
+                self._schedule(target, msg_bytes)
+
+    def send_to(self, target: str, msg_bytes: bytes):
+        if target in self.listeners:
+            self._schedule(self.listeners[target], msg_bytes)
+
+    def queue_length(self, target: str) -> int:
+        if target not in self.listeners:
+            return 0
+        listener = self.listeners[target]
+        return len(listener.msg_queue) + self._in_flight.get(id(listener), 0)
+
+    def next_delivery_time(self) -> Optional[float]:
+        if self.deliveries:
+            return self.deliveries[0][0]
+        return None
+
+    def deliver_due(self) -> List[MockedSocket]:
+        """
+        Delivers all messages whose delivery time is reached and returns the sockets that received messages.
+        """
+        receivers = list()
+        while self.deliveries and self.deliveries[0][0] <= self.clock.now:
+            _, _, target, msg_bytes = heapq.heappop(self.deliveries)
+            self._in_flight[id(target)] -= 1
+            target.enqueue(msg_bytes)
+            receivers.append(target)
+        return receivers
+
+
+def configure_mocked_network_env(context_initializer: Callable[[], MockedNetworkContext] = MockedNetworkContext):
     """
     Configures the network backend to use a mocked version, that is able to have many more sockets than zmq allows.
     """
     from abcnet import settings
-    settings.NetworkBackend.CONTEXT_INITIALIZER = MockedNetworkContext
+    settings.NetworkBackend.CONTEXT_INITIALIZER = context_initializer
 
     def mocked_msg_poller(sockets, direct_socket_predicate: Callable):
         """
@@ -277,3 +437,134 @@ class Simulation:
         for p in self._participants.values():
             p.close()
         logger.info("Simulation finished shutdown.")
+
+
+class DiscreteEventSimulation(Simulation):
+    """
+    Simulation in virtual time.
+
+    Instead of stepping every participant in rounds of wall clock time, events are processed in the order of
+    their virtual time: message deliveries and the maintenance of each participant every ``tick`` seconds.
+    The virtual clock jumps from event to event, so idle time costs nothing.
+    Messages travel over links with configurable latency, bandwidth and loss.
+
+    The simulation has to be created before the participants, because their sockets are created in the
+    virtual network. Participants run their maintenance at a random offset inside the first tick.
+    """
+
+    def __init__(self, tick: float = 0.1, default_link: LinkProperties = None, seed=None,
+                 time_modules: Iterable = tuple(), start_time: float = 0.0):
+        """
+        :param tick: Virtual time in seconds between two maintenances of a participant.
+        :param default_link: Link properties of all links that have no link properties set.
+        :param seed: Seed of the random generator used for message loss and maintenance offsets.
+        :param time_modules: Further modules with a ``TIME_SUPPLIER`` that is replaced by the virtual clock.
+        :param start_time: Initial time of the virtual clock.
+        """
+        from abcnet import settings
+        super().__init__(msg_timeout=0.0)
+        if tick <= 0:
+            raise ValueError("Tick must be positive: " + str(tick))
+        self.tick: float = tick
+        self.clock: VirtualClock = VirtualClock(start_time)
+        self.clock.install(*time_modules)
+        self.network: VirtualNetworkContext = VirtualNetworkContext(self.clock, default_link, seed)
+        self._random = random.Random(seed)
+        self._replaced_backend = (settings.NetworkBackend.CONTEXT_INITIALIZER,
+                                  settings.NetworkBackend.MSG_POLLER_BUILDER,
+                                  settings.NetworkBackend._zmq_context)
+        configure_mocked_network_env(lambda: self.network)
+        settings.NetworkBackend._set_context()
+        self._maintenance: List[Tuple[float, int, str]] = list()
+        self._seq: int = 0
+        self.processed_events: int = 0
+
+    @property
+    def now(self) -> float:
+        return self.clock.now
+
+    def __iadd__(self, other: BaseApp):
+        if isinstance(other, BaseApp):
+            super().__iadd__(other)
+            peer = other.cs.contact.identifier
+            self._register_sockets(other)
+            self._schedule_maintenance(peer, self.clock.now + self._random.random() * self.tick)
+        return self
+
+    def set_link(self, source: BaseApp, target: BaseApp, link: LinkProperties, both_directions: bool = True):
+        """
+        Sets the properties of the link between the two participants.
+        """
+        source_id, target_id = source.cs.contact.identifier, target.cs.contact.identifier
+        self.network.set_link(source_id, target_id, link)
+        if both_directions:
+            self.network.set_link(target_id, source_id, link)
+
+    def _register_sockets(self, app: BaseApp):
+        for socket in app.cs._ChannelService__sh.receive_sockets():
+            self.network.register_socket(socket, app.cs.contact.identifier)
+
+    def _schedule_maintenance(self, peer: str, at_time: float):
+        self._seq += 1
+        heapq.heappush(self._maintenance, (at_time, self._seq, peer))
+
+    def _run_as(self, peer: str, action: Callable[[BaseApp], None]):
+        app = self._participants[peer]
+        self.network.sender = peer
+        try:
+            action(app)
+        finally:
+            self.network.sender = None
+        # Subscriptions to newly discovered peers create new receiving sockets.
+        self._register_sockets(app)
+
+    def _next_event_time(self) -> Optional[float]:
+        times = [t for t in (self.network.next_delivery_time(),
+                             self._maintenance[0][0] if self._maintenance else None) if t is not None]
+        return min(times) if times else None
+
+    def run_until(self, end_time: float):
+        """
+        Processes all events up to the given virtual time and sets the clock to it.
+        """
+        while True:
+            next_time = self._next_event_time()
+            if next_time is None or next_time > end_time:
+                break
+            self.clock.advance_to(next_time)
+            receivers = {self.network.socket_owner.get(id(s)) for s in self.network.deliver_due()}
+            for peer in receivers:
+                if peer in self._participants:
+                    self._run_as(peer, lambda app: app.handle_remaining_messages(0))
+                    self.processed_events += 1
+            while self._maintenance and self._maintenance[0][0] <= self.clock.now:
+                _, _, peer = heapq.heappop(self._maintenance)
+                if peer not in self._participants:
+                    continue
+                self._run_as(peer, lambda app: app.step(0))
+                self.processed_events += 1
+                self._schedule_maintenance(peer, self.clock.now + self.tick)
+            if self.timer():
+                logger.info("Simulated time: %.2f sec.", self.clock.now)
+        self.clock.advance_to(max(end_time, self.clock.now))
+
+    def run_for(self, duration: float):
+        """
+        Processes all events of the next ``duration`` virtual seconds.
+        """
+        self.run_until(self.clock.now + duration)
+
+    def next_round(self, rounds=1):
+        """
+        Simulates n many ticks.
+        """
+        for i in range(rounds):
+            self.run_for(self.tick)
+            self._round_count += 1
+
+    def close(self):
+        from abcnet import settings
+        super().close()
+        self.clock.uninstall()
+        settings.NetworkBackend.CONTEXT_INITIALIZER, settings.NetworkBackend.MSG_POLLER_BUILDER, \
+            settings.NetworkBackend._zmq_context = self._replaced_backend
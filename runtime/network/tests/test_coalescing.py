@@ -0,0 +1,143 @@
+import logging
+from typing import List
+from unittest.mock import MagicMock
+
+from abcnet import transcriber
+from abcnet.handlers import MessageHandler
+from abcnet.nettesthelpers import pseudo_peer, msg_authenticator
+from abcnet.outch import MsgSender
+from abcnet.services import ChannelService, BaseApp, OutboundCoalescer
+from abcnet.settings import RuntimeSetting, configure_test_logging
+from abcnet.structures import Message, MsgType, ItemQualifier, ItemEncodeable
+from abcnet.timer import StopTimer
+
+configure_test_logging()
+logger = logging.getLogger(__name__)
+
+FAKE_ITEM_TYPE = 0xeeee012
+
+
+class FakeItem(ItemQualifier, ItemEncodeable):
+
+    def __init__(self, nr):
+        self.id = f"FakeItem-{nr}"
+
+    def item_type(self) -> int:
+        return FAKE_ITEM_TYPE
+
+    def item_qualifier(self):
+        return self.id
+
+    def encode(self, transcriber):
+        transcriber.write_text(self.id)
+
+
+class CollectingSender(MsgSender):
+
+    def __init__(self):
+        self.msgs: List[Message] = []
+
+    def _send(self, msg: Message, do_log=True):
+        self.msgs.append(msg)
+
+
+class CountingAuthenticator:
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.signatures = 0
+
+    def authenticate(self, msg: Message):
+        self.signatures += 1
+        self.inner.authenticate(msg)
+
+
+def channel_service():
+    contact = pseudo_peer()
+    broadcast = CollectingSender()
+    direct = CollectingSender()
+    md = MagicMock()
+    md.broadcast.return_value = broadcast
+    md.direct.return_value = direct
+    ma = CountingAuthenticator(msg_authenticator(contact))
+    cs = ChannelService(MagicMock(), None, MagicMock(), md, ma, MagicMock(), RuntimeSetting.MAGIC_NUMBER)
+    return cs, ma, broadcast, direct
+
+
+class ChattyApp(MessageHandler):
+    """
+    Sends every item in its own call, like the consensus handlers do.
+    """
+
+    def __init__(self, item_count, peer):
+        self.items = [FakeItem(i) for i in range(item_count)]
+        self.peer = peer
+
+    def perform_maintenance(self, cs, force_maintenance=False):
+        for item in self.items:
+            cs.broadcast_channel().items([item])
+            cs.broadcast_channel().checklist([item])
+            cs.direct_channel(self.peer).items([item])
+
+
+def item_count_of(msgs: List[Message]) -> int:
+    return sum(len(transcriber.parse_item_qualifier(m)) if transcriber.parse_message_type(m) != MsgType.items_content
+               else len(transcriber.parse_item_contents(m)) for m in msgs)
+
+
+def run_step(item_count: int, coalesce: bool):
+    RuntimeSetting.COALESCE_OUTBOUND_ITEMS = coalesce
+    try:
+        cs, ma, broadcast, direct = channel_service()
+        ba = BaseApp(cs, {"chatty": ChattyApp(item_count, pseudo_peer())})
+        timer = StopTimer()
+        ba.maintain()
+        run_time = timer.time()
+    finally:
+        RuntimeSetting.COALESCE_OUTBOUND_ITEMS = True
+    return cs, ma, broadcast, direct, run_time
+
+
+def test_coalescer_merges_and_dedupes():
+    sender = CollectingSender()
+    from abcnet.outch import OutputChannel
+    channel = OutputChannel(sender=sender)
+    coalescer = OutboundCoalescer(max_items=10)
+    for i in range(25):
+        coalescer.queue(None, MsgType.items_checklist, channel, [FakeItem(i), FakeItem(i)])
+    assert sender.msgs == []
+    coalescer.flush()
+    assert len(sender.msgs) == 3
+    assert item_count_of(sender.msgs) == 25
+    assert coalescer.send_calls == 25
+    assert coalescer.msgs_sent == 3
+    assert not coalescer.has_pending()
+
+
+def test_no_coalescing_outside_maintenance():
+    cs, ma, broadcast, direct = channel_service()
+    cs.broadcast_channel().items([FakeItem(1)])
+    assert len(broadcast.msgs) == 1
+
+
+def test_maintenance_coalesces_sends():
+    item_count = 300
+    cs, ma, broadcast, direct, t_plain = run_step(item_count, coalesce=False)
+    plain_msgs = len(broadcast.msgs) + len(direct.msgs)
+    plain_sigs = ma.signatures
+    assert plain_msgs == 3 * item_count
+
+    cs, ma, broadcast, direct, t_coalesced = run_step(item_count, coalesce=True)
+    coalesced_msgs = len(broadcast.msgs) + len(direct.msgs)
+    assert coalesced_msgs == 3
+    assert ma.signatures == 3
+    assert item_count_of(broadcast.msgs) == 2 * item_count
+    assert item_count_of(direct.msgs) == item_count
+    assert cs.coalescer_stats.send_calls == 3 * item_count
+    assert cs.coalescer_stats.msgs_sent == 3
+
+    logger.info("Without coalescing: %d msgs, %d sigs in %.4f sec (%.0f msgs/sec, %.0f sigs/sec).",
+                plain_msgs, plain_sigs, t_plain, plain_msgs / t_plain, plain_sigs / t_plain)
+    logger.info("With coalescing: %d msgs, %d sigs in %.4f sec (%.0f msgs/sec, %.0f sigs/sec).",
+                coalesced_msgs, ma.signatures, t_coalesced,
+                coalesced_msgs / t_coalesced, ma.signatures / t_coalesced)
@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from abcnet import netevents_analyzer, timer
+from abcnet.netevents import EventRing, MsgRecord, EventLogWriter, read_event_log, InboundEventCollector, \
+    OutboundEventCollector
+from abcnet.outch import OutputChannel, MsgSender
+from abcnet.structures import Message, MsgType, Ping, ItemQualifier, ItemEncodeable
+
+
+class FakeItem(ItemQualifier, ItemEncodeable):
+
+    def __init__(self, nr):
+        self.id = f"FakeItem-{nr}"
+
+    def item_type(self) -> int:
+        return 0xeeee013
+
+    def item_qualifier(self):
+        return self.id
+
+    def encode(self, transcriber):
+        transcriber.write_text(self.id)
+
+
+class LoopbackSender(MsgSender):
+    """
+    Delivers every sent message to the inbound collector of the receiving peer.
+    """
+
+    def __init__(self, receiver: InboundEventCollector, delay: float, now):
+        self.receiver = receiver
+        self.delay = delay
+        self.now = now
+
+    def _send(self, msg: Message, do_log=True):
+        self.now[0] += self.delay
+        received = Message(list(msg.parts))
+        self.receiver.accept(None, received)
+
+
+def record(nr: int, out_msg=True) -> MsgRecord:
+    return MsgRecord(float(nr), out_msg, False, "peer", MsgType.ping, 10 + nr, 0, nr.to_bytes(8, 'big'))
+
+
+def test_ring_overwrites_oldest():
+    ring = EventRing(size=3)
+    for i in range(5):
+        ring.push(record(i))
+    assert len(ring) == 3
+    assert ring.overwritten == 2
+    assert [r.timestamp for r in ring.pop_all()] == [2.0, 3.0, 4.0]
+    assert ring.pop_all() == []
+
+
+@patch('abcnet.settings.NetStatSettings.STAT_SERIALIZATION_TIMER.period_in_seconds', 0.01)
+def test_writer_round_trip(tmp_path):
+    for log_format in ["binary", "jsonl"]:
+        ring = EventRing(size=100)
+        records = [record(i) for i in range(50)]
+        file_path = tmp_path / f"messages.{log_format}"
+        writer = EventLogWriter(ring, file_path, log_format)
+        for r in records:
+            ring.push(r)
+        writer.close()
+        assert writer.written == 50
+        assert list(read_event_log(file_path)) == records
+
+
+def test_analyzer_throughput_and_latency(tmp_path, capsys):
+    now = [1000.0]
+    old_supplier = timer.TIME_SUPPLIER
+    timer.TIME_SUPPLIER = lambda: now[0]
+    try:
+        sender_ring, receiver_ring = EventRing(), EventRing()
+        loopback = LoopbackSender(InboundEventCollector(receiver_ring), delay=0.5, now=now)
+        channel = OutputChannel(sender=OutboundEventCollector(sender_ring, loopback, direct_msg=True, peer="P1"))
+        for i in range(10):
+            channel.items([FakeItem(i), FakeItem(i + 1)])
+            channel.ping(Ping())
+            now[0] += 1
+    finally:
+        timer.TIME_SUPPLIER = old_supplier
+
+    sent = sender_ring.pop_all()
+    assert len(sent) == 20
+    assert sent[0].msg_type == MsgType.items_content
+    assert sent[0].item_count == 2
+    assert sent[0].peer == "P1"
+
+    paths = []
+    for name, ring_records in [("sender", sent), ("receiver", receiver_ring.pop_all())]:
+        ring = EventRing()
+        for r in ring_records:
+            ring.push(r)
+        path = tmp_path / f"{name}.events.bin"
+        EventLogWriter(ring, path, "binary").close()
+        paths.append(path)
+
+    report = netevents_analyzer.analyze(paths)
+    items_out = report['throughput']['OUT']['items_content']
+    assert items_out['count'] == 10
+    assert items_out['items'] == 20
+    assert report['throughput']['IN']['ping']['count'] == 10
+    latency = report['latency']['items_content']
+    assert latency['count'] == 10
+    assert abs(latency['max'] - 0.5) < 1e-9
+
+    netevents_analyzer.main([str(p) for p in paths])
+    output = capsys.readouterr().out
+    assert "items_content" in output
+    assert "LATENCY" in output
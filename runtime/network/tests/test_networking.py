@@ -2,7 +2,7 @@ from abcnet.outch import SingleSocketSender, MultiSendSocketsSender, DropMessage
 from abcnet.settings import NetworkBackend
 from unittest.mock import MagicMock, patch
 
-from abcnet.networking import SocketHandler, SimpleMD1, ContactBook
+from abcnet.networking import SocketHandler, SimpleMD1, ContactBook, PeerOutboundQueue
 from abcnet.structures import SocketBinding
 from abcnet.nettesthelpers import pseudo_peer
 
@@ -112,12 +112,12 @@ def test_simple_md1():
             return direct_socket_2
         raise AssertionError("Unexpected address: " + addr)
 
-    sh_mock.direct_sending_socket = MagicMock(side_effect=create_direct_socket)
+    sh_mock.direct_sender = MagicMock(side_effect=lambda addr: PeerOutboundQueue(create_direct_socket(addr)))
     sender = smd.broadcast()
     assert sender is not None
     assert isinstance(sender, MultiSendSocketsSender)
     assert len(sender.inner_senders) == 2
-    assert isinstance(sender.inner_senders[0], SingleSocketSender)
+    assert isinstance(sender.inner_senders[0], PeerOutboundQueue)
     actual_direct_socket_1: MagicMock = sender.inner_senders[0].socket
     actual_direct_socket_2: MagicMock = sender.inner_senders[1].socket
     assert actual_direct_socket_2 == direct_socket_2
@@ -132,3 +132,92 @@ def test_simple_md1():
     assert sender is not None
     assert isinstance(sender, DropMessageSender)
 
+
+def _stalled_peer(context, addr):
+    import zmq
+    # A peer that binds its socket but never reads from it.
+    stalled_socket = context.socket(zmq.DEALER)
+    stalled_socket.bind(addr)
+    return stalled_socket
+
+
+def _msg(msg_type):
+    from abcnet.outch import OutputChannel
+    from abcnet.structures import MsgType
+    sent = []
+    channel = OutputChannel()
+    channel._send = lambda msg: sent.append(msg)
+    if msg_type == MsgType.items_checklist:
+        channel.checklist([])
+    else:
+        channel.items([])
+    return sent[0]
+
+
+@patch('abcnet.settings.PeerSetting.SOCKET_RCVHWM', 2)
+@patch('abcnet.settings.PeerSetting.SOCKET_SNDHWM', 3)
+def test_outbound_queue_stalled_peer():
+    import zmq
+    from abcnet.simenv import MockedNetworkContext
+    from abcnet.structures import MsgType
+    context = MockedNetworkContext()
+    peer = pseudo_peer()
+    stalled_socket = _stalled_peer(context, peer.receive_addr)
+    direct_socket = context.socket(zmq.DEALER)
+    SocketHandler._configure_socket(direct_socket)
+    direct_socket.connect(peer.receive_addr)
+
+    queue = PeerOutboundQueue(direct_socket, max_size=4)
+    for _ in range(5):
+        queue._send(_msg(MsgType.items_content))
+    # The sockets accepted up to their high water marks, the rest is queued:
+    assert len(stalled_socket.msg_queue) == 5
+    assert len(queue) == 0
+    # An empty queue is still a sender:
+    assert queue
+    for _ in range(2):
+        queue._send(_msg(MsgType.items_checklist))
+    for _ in range(4):
+        queue._send(_msg(MsgType.items_content))
+    # Memory is bounded and checklists are shed before item contents:
+    assert len(queue) == 4
+    assert queue.dropped == {MsgType.items_checklist: 2}
+    for _ in range(3):
+        queue._send(_msg(MsgType.items_checklist))
+    assert len(queue) == 4
+    assert queue.dropped == {MsgType.items_checklist: 5}
+    assert queue.fill_ratio == 1
+
+    # The peer reads again and the queue is drained:
+    stalled_socket.msg_queue.clear()
+    assert queue.drain() == 4
+    assert len(queue) == 0
+    assert len(stalled_socket.msg_queue) == 4
+
+
+@patch('abcnet.settings.PeerSetting.SOCKET_RCVHWM', 1)
+@patch('abcnet.settings.PeerSetting.SOCKET_SNDHWM', 1)
+@patch('abcnet.settings.PeerSetting.OUTBOUND_QUEUE_SIZE', 4)
+@patch('abcnet.settings.NetworkBackend')
+def test_socket_handler_backpressure(net_back_end_mock: NetworkBackend):
+    from abcnet.simenv import MockedNetworkContext
+    from abcnet.structures import MsgType
+    context = MockedNetworkContext()
+    net_back_end_mock.context = MagicMock(return_value=context)
+    self_peer, fast_peer, slow_peer = pseudo_peer(), pseudo_peer(), pseudo_peer()
+    sh = SocketHandler(SocketBinding(self_peer.publish_addr, self_peer.receive_addr))
+    fast_socket = _stalled_peer(context, fast_peer.receive_addr)
+    _stalled_peer(context, slow_peer.receive_addr)
+
+    for _ in range(4):
+        sh.direct_sender(fast_peer.receive_addr)._send(_msg(MsgType.items_content))
+        fast_socket.msg_queue.clear()
+    assert not sh.is_congested()
+
+    for _ in range(4):
+        sh.direct_sender(slow_peer.receive_addr)._send(_msg(MsgType.items_content))
+    # One of two peers is congested:
+    assert sh.is_congested()
+
+    sh.close_direct_sending_socket(slow_peer.receive_addr)
+    assert not sh.is_congested()
@@ -0,0 +1,185 @@
+from typing import Any, List
+
+from abcnet import timer
+from abcnet.handlers import AbstractItemHandler, ItemExtraction, MessageTypeCheck, SeenItemCache
+from abcnet.outch import OutputChannel, MsgSender
+from abcnet.structures import Message, ItemQualifier, ItemEncodeable
+from abcnet.transcriber import ItemsParser, Parser
+
+FAKE_ITEM_TYPE = 0xeeee011
+
+
+class FakeItem(ItemQualifier, ItemEncodeable):
+
+    def __init__(self, nr):
+        self.id = f"FakeItem-{nr}"
+        self.nr = nr
+
+    def item_type(self) -> int:
+        return FAKE_ITEM_TYPE
+
+    def item_qualifier(self):
+        return self.id
+
+    def encode(self, transcriber):
+        transcriber.write_text(self.id)
+        transcriber.integer(self.nr)
+
+
+class CountingParser(ItemsParser):
+
+    def __init__(self):
+        self.decoded = 0
+
+    def decode_item(self, item_type: int, parser: Parser) -> Any:
+        self.decoded += 1
+        _id = parser.consume_nested_text()
+        return FakeItem(parser.consume_int())
+
+
+class CollectingSender(MsgSender):
+
+    def __init__(self):
+        self.msgs: List[Message] = []
+
+    def _send(self, msg: Message, do_log=True):
+        self.msgs.append(Message(list(msg.parts)))
+
+
+class RecordingItemHandler(AbstractItemHandler):
+
+    def __init__(self, seen_items=None, silent_checklist_types=(FAKE_ITEM_TYPE,)):
+        self.parser = CountingParser()
+        super().__init__([FAKE_ITEM_TYPE], self.parser, seen_items, silent_checklist_types)
+        self.contents = []
+        self.checklists = []
+
+    def handle_item_content(self, cs, msg, item_type, item_content):
+        self.contents.append(item_content.item_qualifier())
+
+    def handle_item_checklist(self, cs, msg, item_type, item_qualifier):
+        self.checklists.append(item_qualifier)
+
+
+def deliver(handler: AbstractItemHandler, msgs: List[Message]):
+    for m in msgs:
+        msg = Message(list(m.parts))
+        MessageTypeCheck().accept(None, msg)
+        ItemExtraction().accept(None, msg)
+        handler.accept(None, msg)
+
+
+def flood(item_count=50, peer_count=20):
+    """
+    Every peer rebroadcasts the same items and checklists.
+    """
+    sender = CollectingSender()
+    och = OutputChannel(sender=sender)
+    items = [FakeItem(i) for i in range(item_count)]
+    for _ in range(peer_count):
+        och.items(items)
+        och.checklist(items)
+    return sender.msgs
+
+
+def test_seen_cache_bounds():
+    now = [100.0]
+    old_supplier = timer.TIME_SUPPLIER
+    timer.TIME_SUPPLIER = lambda: now[0]
+    try:
+        cache = SeenItemCache(timeout=10, max_size=3)
+        assert not cache.check_and_add("a")
+        assert cache.check_and_add("a")
+        for key in ["b", "c", "d"]:
+            cache.add(key)
+        # Size bound evicts the oldest entry
+        assert len(cache) == 3
+        assert "a" not in cache
+        now[0] += 11
+        # Time bound evicts all expired entries
+        assert not cache.check_and_add("e")
+        assert len(cache) == 1
+        assert cache.hits == 1
+        assert cache.misses == 2
+        cache.discard("e")
+        assert not cache.check_and_add("e")
+    finally:
+        timer.TIME_SUPPLIER = old_supplier
+
+
+def test_flood_without_cache():
+    msgs = flood()
+    handler = RecordingItemHandler()
+    deliver(handler, msgs)
+    assert handler.parser.decoded == 50 * 20
+    assert len(handler.contents) == 50 * 20
+    assert len(handler.checklists) == 50 * 20
+
+
+def test_flood_with_cache():
+    msgs = flood()
+    cache = SeenItemCache()
+    handler = RecordingItemHandler(cache)
+    deliver(handler, msgs)
+    # Only the first copy of each item is decoded, all checklists refer to known items.
+    assert handler.parser.decoded == 50
+    assert sorted(handler.contents) == sorted(f"FakeItem-{i}" for i in range(50))
+    assert handler.checklists == []
+    assert cache.misses == 50
+    assert cache.hits == 50 * 19 + 50 * 20
+
+
+def test_checklist_of_unknown_items_passes():
+    sender = CollectingSender()
+    OutputChannel(sender=sender).checklist([FakeItem(1), FakeItem(2)])
+    handler = RecordingItemHandler(SeenItemCache())
+    deliver(handler, sender.msgs * 3)
+    assert handler.checklists == ["FakeItem-1", "FakeItem-2"] * 3
+
+
+def test_checklist_with_reply_passes():
+    msgs = flood(item_count=5, peer_count=2)
+    handler = RecordingItemHandler(SeenItemCache(), silent_checklist_types=())
+    deliver(handler, msgs)
+    # The contents are still received once, the checklists reach the handler which may reply to them.
+    assert handler.parser.decoded == 5
+    assert len(handler.checklists) == 5 * 2
+
+
+def test_discard_accepts_content_again():
+    sender = CollectingSender()
+    OutputChannel(sender=sender).items([FakeItem(1)])
+    cache = SeenItemCache()
+    handler = RecordingItemHandler(cache)
+    deliver(handler, sender.msgs * 2)
+    assert handler.contents == ["FakeItem-1"]
+    cache.discard((FAKE_ITEM_TYPE, "FakeItem-1"))
+    deliver(handler, sender.msgs)
+    assert handler.contents == ["FakeItem-1"] * 2
+
+
+def test_discarded_key_added_again_is_kept():
+    now = [100.0]
+    old_supplier = timer.TIME_SUPPLIER
+    timer.TIME_SUPPLIER = lambda: now[0]
+    try:
+        cache = SeenItemCache(timeout=10, max_size=2)
+        cache.add("a")
+        cache.discard("a")
+        now[0] += 5
+        cache.add("a")
+        # The slot of the discarded entry expires, the entry added again stays.
+        now[0] += 6
+        assert not cache.check_and_add("b")
+        assert "a" in cache
+        # Slots of discarded entries don't count against the size.
+        cache.discard("b")
+        assert not cache.check_and_add("c")
+        assert len(cache) == 2
+        assert "a" in cache
+        now[0] += 5
+        cache.add("d")
+        assert "a" not in cache
+        assert len(cache) == 2
+    finally:
+        timer.TIME_SUPPLIER = old_supplier
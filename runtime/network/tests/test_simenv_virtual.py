@@ -0,0 +1,97 @@
+import time
+from typing import List
+
+from abcnet import timer
+from abcnet import transcriber
+from abcnet.handlers import MessageHandler
+from abcnet.nettesthelpers import pseudo_peer, net_app, msg_authenticator
+from abcnet.settings import configure_test_logging
+from abcnet.simenv import DiscreteEventSimulation, LinkProperties
+from abcnet.structures import MsgType, Ping
+
+configure_test_logging()
+
+
+class PingEveryTick(MessageHandler):
+
+    def __init__(self):
+        self.sent: List[float] = []
+
+    def perform_maintenance(self, cs, force_maintenance=False):
+        cs.broadcast_channel().ping(Ping(cs.contact.identifier))
+        self.sent.append(timer.TIME_SUPPLIER())
+
+
+class PingRecorder(MessageHandler):
+
+    def __init__(self):
+        self.received: List[float] = []
+
+    def accept(self, cs, msg):
+        if transcriber.parse_message_type(msg) == MsgType.ping:
+            self.received.append(timer.TIME_SUPPLIER())
+
+
+def sender_and_receivers(sim: DiscreteEventSimulation, receiver_count: int):
+    sender_contact = pseudo_peer("sender")
+    ma = msg_authenticator(sender_contact)
+    sender = net_app(sender_contact, ma=ma)
+    pinger = PingEveryTick()
+    sender.register_app_layer("pinger", pinger)
+    sim += sender
+    receivers = []
+    for i in range(receiver_count):
+        receiver = net_app(pseudo_peer(f"receiver-{i}"), [sender_contact])
+        recorder = PingRecorder()
+        receiver.register_app_layer("recorder", recorder)
+        sim += receiver
+        receivers.append((receiver, recorder))
+    return sender, pinger, receivers
+
+
+def test_latency_and_loss():
+    sim = DiscreteEventSimulation(tick=1.0, seed=42)
+    try:
+        sender, pinger, receivers = sender_and_receivers(sim, 3)
+        (fast, fast_rec), (slow, slow_rec), (lossy, lossy_rec) = receivers
+        sim.set_link(sender, fast, LinkProperties(latency=0.01))
+        sim.set_link(sender, slow, LinkProperties(latency=0.75))
+        sim.set_link(sender, lossy, LinkProperties(latency=0.01, loss=0.5))
+        sim.run_for(100)
+        assert sim.now == 100
+        assert abs(min(fast_rec.received) - min(pinger.sent) - 0.01) < 1e-9
+        assert abs(min(slow_rec.received) - min(pinger.sent) - 0.75) < 1e-9
+        assert 0 < len(lossy_rec.received) < len(fast_rec.received)
+        assert sim.network.lost_msgs > 0
+    finally:
+        sim.close()
+    assert timer.TIME_SUPPLIER is not sim.clock.time
+
+
+def test_bandwidth_serializes_messages():
+    sim = DiscreteEventSimulation(tick=1.0, seed=1)
+    try:
+        sender, pinger, [(receiver, recorder)] = sender_and_receivers(sim, 1)
+        # The link transmits less than the sender emits, so messages queue up on the link.
+        sim.set_link(sender, receiver, LinkProperties(latency=0.1, bandwidth=100))
+        sim.run_for(20)
+        delays = [r - s for s, r in zip(pinger.sent, recorder.received)]
+        assert len(delays) >= 3
+        assert all(d > 0.1 for d in delays)
+        assert all(later > earlier for earlier, later in zip(delays, delays[1:]))
+    finally:
+        sim.close()
+
+
+def test_idle_time_is_fast_forwarded():
+    sim = DiscreteEventSimulation(tick=10.0, seed=3)
+    try:
+        sender_and_receivers(sim, 2)
+        # The stop timer would measure virtual time.
+        start = time.perf_counter()
+        sim.run_for(3600)
+        assert time.perf_counter() - start < 60
+        assert sim.now == 3600
+        assert sim.processed_events >= 3 * 359
+    finally:
+        sim.close()
@@ -18,7 +18,7 @@ from abcckpt.stab_abc_consens import StabVotingHandler
 from abcckpt.vote_cr_handler import VoteCrHandler
 from abccore.agent import Agent, Genesis, Checkpoint
 from abccore.agent_service import AgentService
-from abcnet import auth, netstats, handlers, networking
+from abcnet import auth, netstats, netevents, handlers, networking
 from abcnet.auth import MessageAuthenticatorImpl, MessageIdentification
 from abcnet.gateway import GatewayRebroadcast
 from abcnet.networking import ContactBook
@@ -293,6 +293,8 @@ def main():
     parser.add_argument('-g', '--gateway', dest='is_gateway', help='Gateway mode', default=False, action="store_true")
     parser.add_argument('-s', '--stats', dest='stats', help='Enable stats serialization.', default=False,
                         action="store_true")
+    parser.add_argument('-el', '--event-log', dest='event_log', help='Enable the compact network event log.',
+                        default=False, action="store_true")
     parser.add_argument('-enk', '--enable-net-keys', help='Enables net key generation. '
                                                           'If no network private key is given it creates a new keyset.',
                         dest='enk', action="store_true", default=False)
@@ -373,6 +375,8 @@ def main():
 
     if args.stats:
         netstats.enable_statistics(app)
+    if args.event_log:
+        netevents.enable_event_log(app)
 
 
     try:
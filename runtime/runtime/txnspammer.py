@@ -5,13 +5,12 @@ from typing import List, Tuple
 
 from abccore import outputs_helper
 from abccore.DAG import Wallet, Transaction, get_wallet_value, Decimal, Genesis, Checkpoint
-from abccore.agent_crypto import auth_sign
 from abccore.agent_service import AgentService
+from abccore.key_ring import KeyRing
 from abccore.network_datastructures import NetTransaction
 from abcnet.handlers import MessageHandler
 from abcnet.services import ChannelService, BaseApp
 from abcnet.timer import StopTimer, SimpleTimer
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 
 from runtime.txnstats import TransactionConfirmationLogger
 
@@ -21,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 class TxnSpammer(MessageHandler):
 
-    def __init__(self, txn_conf_logger: TransactionConfirmationLogger, agent_service: AgentService, keys: List[Tuple[Ed25519PrivateKey, bytes]],
+    def __init__(self, txn_conf_logger: TransactionConfirmationLogger, agent_service: AgentService, keys: KeyRing,
                  txn_creation_rate: float):
         self.txn_conf_logger = txn_conf_logger
         self.agent_service = agent_service
@@ -50,7 +49,12 @@ class TxnSpammer(MessageHandler):
         elif self.output_wait_phase:
             self.check_splits()
         elif self.spam_phase:
-            self.spam(cs)
+            if cs.backpressure():
+                # Peers do not keep up, hold back new transactions.
+                if self.last_creation_time is not None:
+                    self.last_creation_time.reset()
+            else:
+                self.spam(cs)
             self.check_utxo_confirmed()
 
         if self.broadcast_time() and self.out_queue:
@@ -132,29 +136,22 @@ class TxnSpammer(MessageHandler):
         return True
 
     def sign_txn(self, txn: Transaction):
-        signed = set()
-        for input in txn.inputs:
-            input: Wallet
-            for private_key, pb_key in self.keys:
-                if pb_key == input.get_pk() and pb_key not in signed:
-                    signature = auth_sign(txn.get_identifier(), private_key)
-                    txn.add_signature(signature)
-                    signed.add(pb_key)
+        input_keys = [input.get_pk() for input in txn.inputs]
+        for signature in self.keys.sign_with_all(txn.get_identifier(), input_keys):
+            txn.add_signature(signature)
         return txn
 
 
 
 def activate_spammer(ba: BaseApp, txn_conf_logger: TransactionConfirmationLogger, agent_service: AgentService,
                  txn_creation_rate: float):
-    keys = list()
+    keys = KeyRing()
     with open('generated_keys.json') as fp:
         loaded_keys = json.load(fp)
         for k in loaded_keys['private_keys']:
             keyhex = k['key']
-            from abccore.agent_crypto import pub_key_to_bytes, parse_from_bytes
-            keypriv = parse_from_bytes(bytes.fromhex(keyhex))
-            pub_key = pub_key_to_bytes(keypriv.public_key())
-            keys.append((keypriv, pub_key))
+            from abccore.agent_crypto import parse_from_bytes
+            keys.add(parse_from_bytes(bytes.fromhex(keyhex)))
     assert len(keys) == 10
     spammer = TxnSpammer(txn_conf_logger, agent_service, keys, txn_creation_rate)
     ba.register_app_layer("TXNSPAMMER", spammer)